@@ -13,6 +13,8 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import time
+
 
 class BasePollingManager(object):
 
@@ -29,6 +31,10 @@ class BasePollingManager(object):
     def _is_polling_required(self):
         raise NotImplementedError()
 
+    def wait(self, timeout):
+        """Wait up to timeout seconds for polling to be required."""
+        time.sleep(timeout)
+
     @property
     def is_polling_required(self):
         # Always consume the updates to minimize polling.
@@ -14,8 +14,10 @@
 #    under the License.
 
 import os
+import shlex
 
 from oslo_config import cfg
+from oslo_privsep import priv_context
 
 from neutron._i18n import _
 from neutron.common import config
@@ -35,6 +37,21 @@ ROOT_HELPER_OPTS = [
                        "security configuration. If the root helper is "
                        "not required, set this to False for a performance "
                        "improvement.")),
+    cfg.BoolOpt('use_privsep_ip_lib',
+                default=False,
+                help=_("Query links and addresses through netlink, from a "
+                       "long-lived privileged helper started with "
+                       "oslo.privsep, instead of running one 'ip' command "
+                       "through the root helper per query. The helper is "
+                       "started through the root helper, which must allow "
+                       "privsep-helper. Has no effect when ip_lib_force_root "
+                       "is set.")),
+    cfg.BoolOpt('use_privsep_conntrack',
+                default=False,
+                help=_("Delete the connection tracking entries of the "
+                       "firewall in batches from the long-lived privileged "
+                       "helper started with oslo.privsep, instead of running "
+                       "each 'conntrack' command through the root helper.")),
     # We can't just use root_helper=sudo neutron-rootwrap-daemon $cfg because
     # it isn't appropriate for long-lived processes spawned with create_process
     # Having a bool use_rootwrap_daemon option precludes specifying the
@@ -64,6 +81,16 @@ IPTABLES_OPTS = [
                        "generated iptables rules that describe each rule's "
                        "purpose. System must support the iptables comments "
                        "module for addition of comments.")),
+    cfg.IntOpt('iptables_state_verify_interval', default=0, min=0,
+               help=_("Interval (in seconds) between two verifications of "
+                      "the iptables state with iptables-save. Until it "
+                      "elapses, the agent trusts the rules it last "
+                      "committed and does not run iptables-save before "
+                      "applying changes. The state is also verified after "
+                      "any iptables-restore failure. Only enable this if "
+                      "no other process modifies the iptables rules "
+                      "managed by the agent. Use 0 to verify the state on "
+                      "every change.")),
 ]
 
 PROCESS_MONITOR_OPTS = [
@@ -149,6 +176,11 @@ def get_root_helper(conf):
     return conf.AGENT.root_helper
 
 
+def setup_privsep():
+    """Start the privileged helper through the configured root helper."""
+    priv_context.init(root_helper=shlex.split(get_root_helper(cfg.CONF)))
+
+
 def setup_conf():
     bind_opts = [
         cfg.StrOpt('state_path',
@@ -288,7 +288,7 @@ class OVSBridge(BaseOVS):
         if action != 'del':
             for kw in kwargs_list:
                 if 'cookie' not in kw:
-                    kw['cookie'] = self._default_cookie
+                    kw['cookie'] = self.default_cookie
         flow_strs = [_build_flow_expr_str(kw, action) for kw in kwargs_list]
         self.run_ofctl('%s-flows' % action, ['-'], '\n'.join(flow_strs))
 
@@ -55,6 +55,9 @@ class DhcpAgent(manager.Manager):
         super(DhcpAgent, self).__init__(host=host)
         self.needs_resync_reasons = collections.defaultdict(list)
         self.dhcp_ready_ports = set()
+        # ports to report ready once the allocations of their network are
+        # reloaded, for the networks with a pending reload
+        self._pending_reloads = collections.defaultdict(set)
         self.conf = conf or cfg.CONF
         self.cache = NetworkCache()
         self.dhcp_driver_cls = importutils.import_class(self.conf.dhcp_driver)
@@ -99,6 +102,8 @@ class DhcpAgent(manager.Manager):
         self.sync_state()
         self.periodic_resync()
         self.start_ready_ports_loop()
+        if self.conf.reload_allocations_interval:
+            self.start_reload_allocations_loop()
 
     def call_driver(self, action, network, **action_kwargs):
         """Invoke an action on a DHCP driver instance."""
@@ -153,10 +158,25 @@ class DhcpAgent(manager.Manager):
         pool = eventlet.GreenPool(self.conf.num_sync_threads)
         known_network_ids = set(self.cache.get_network_ids())
 
+        def needs_sync(network_id):
+            return (not only_nets or  # specifically resync all
+                    network_id not in known_network_ids or  # missing net
+                    network_id in only_nets)  # specific network to sync
+
         try:
-            active_networks = self.plugin_rpc.get_active_networks_info()
-            LOG.info(_LI('All active networks have been fetched through RPC.'))
-            active_network_ids = set(network.id for network in active_networks)
+            active_network_ids = self._get_active_network_ids()
+            if active_network_ids is None:
+                active_networks = self.plugin_rpc.get_active_networks_info()
+                LOG.info(_LI('All active networks have been fetched through '
+                             'RPC.'))
+                active_network_ids = set(
+                    network.id for network in active_networks)
+                chunks = [[network for network in active_networks
+                           if needs_sync(network.id)]]
+            else:
+                chunks = self._iter_active_networks(
+                    sorted(network_id for network_id in active_network_ids
+                           if needs_sync(network_id)))
             for deleted_id in known_network_ids - active_network_ids:
                 try:
                     self.disable_dhcp_helper(deleted_id)
@@ -165,10 +185,8 @@ class DhcpAgent(manager.Manager):
                     LOG.exception(_LE('Unable to sync network state on '
                                       'deleted network %s'), deleted_id)
 
-            for network in active_networks:
-                if (not only_nets or  # specifically resync all
-                        network.id not in known_network_ids or  # missing net
-                        network.id in only_nets):  # specific network to sync
+            for networks in chunks:
+                for network in networks:
                     pool.spawn(self.safe_configure_dhcp_for_network, network)
             pool.waitall()
             # we notify all ports in case some were created while the agent
@@ -184,6 +202,45 @@ class DhcpAgent(manager.Manager):
                 self.schedule_resync(e)
             LOG.exception(_LE('Unable to sync network state.'))
 
+    def _get_active_network_ids(self):
+        """Return the IDs of the active networks to sync them in chunks.
+
+        Returns None when the networks must be fetched at once, because
+        sync_networks_chunk_size is 0 or the server does not support it.
+        """
+        if not self.conf.sync_networks_chunk_size:
+            return None
+        try:
+            return set(self.plugin_rpc.get_active_network_ids())
+        except oslo_messaging.UnsupportedVersion:
+            pass
+        except oslo_messaging.RemoteError as e:
+            if e.exc_type not in ('UnsupportedVersion', 'NoSuchMethod'):
+                raise
+        LOG.info(_LI("Server does not support fetching the active networks "
+                     "in chunks, fetching all of them at once."))
+        return None
+
+    def _iter_active_networks(self, network_ids):
+        """Fetch the networks of network_ids in chunks.
+
+        The next chunk is fetched while the networks of the current one are
+        being configured, so that at most two chunks are held in memory.
+        """
+        chunk_size = self.conf.sync_networks_chunk_size
+        chunks = [network_ids[i:i + chunk_size]
+                  for i in range(0, len(network_ids), chunk_size)]
+        if not chunks:
+            return
+        fetch = self.plugin_rpc.get_active_networks_info
+        pending = eventlet.spawn(fetch, network_ids=chunks[0])
+        for chunk in chunks[1:]:
+            networks = pending.wait()
+            pending = eventlet.spawn(fetch, network_ids=chunk)
+            yield networks
+        yield pending.wait()
+        LOG.info(_LI('All active networks have been fetched through RPC.'))
+
     def _dhcp_ready_ports_loop(self):
         """Notifies the server of any ports that had reservations setup."""
         while True:
@@ -215,6 +272,44 @@ class DhcpAgent(manager.Manager):
         """Spawn a thread to push changed ports to server."""
         eventlet.spawn(self._dhcp_ready_ports_loop)
 
+    def _schedule_reload_allocations(self, network, port_id=None):
+        """Reload the allocations of a network, possibly later.
+
+        The reloads requested for a network during
+        reload_allocations_interval are gathered into a single one.
+        """
+        if not self.conf.reload_allocations_interval:
+            self.call_driver('reload_allocations', network)
+            if port_id:
+                self.dhcp_ready_ports.add(port_id)
+            return
+        ready_ports = self._pending_reloads[network.id]
+        if port_id:
+            ready_ports.add(port_id)
+
+    @utils.synchronized('dhcp-agent')
+    def _reload_pending_allocations(self):
+        # be careful to avoid a race with additions from other threads
+        pending_reloads = self._pending_reloads
+        self._pending_reloads = collections.defaultdict(set)
+        for network_id, ready_ports in pending_reloads.items():
+            network = self.cache.get_network_by_id(network_id)
+            if network:
+                self.call_driver('reload_allocations', network)
+                self.dhcp_ready_ports |= ready_ports
+
+    @utils.exception_logger()
+    def _reload_allocations_loop(self):
+        """Reload the allocations of the networks with pending reloads."""
+        while True:
+            eventlet.sleep(self.conf.reload_allocations_interval)
+            if self._pending_reloads:
+                self._reload_pending_allocations()
+
+    def start_reload_allocations_loop(self):
+        """Spawn a thread to reload the allocations of updated networks."""
+        eventlet.spawn(self._reload_allocations_loop)
+
     @utils.exception_logger()
     def _periodic_resync_helper(self):
         """Resync the dhcp state at the configured interval."""
@@ -388,8 +483,11 @@ class DhcpAgent(manager.Manager):
                 if old_ips != new_ips:
                     driver_action = 'restart'
             self.cache.put_port(updated_port)
-            self.call_driver(driver_action, network)
-            self.dhcp_ready_ports.add(updated_port.id)
+            if driver_action == 'restart':
+                self.call_driver(driver_action, network)
+                self.dhcp_ready_ports.add(updated_port.id)
+            else:
+                self._schedule_reload_allocations(network, updated_port.id)
 
     def _is_port_on_this_agent(self, port):
         thishost = utils.get_dhcp_agent_device_id(
@@ -406,7 +504,7 @@ class DhcpAgent(manager.Manager):
         if port:
             network = self.cache.get_network_by_id(port.network_id)
             self.cache.remove_port(port)
-            self.call_driver('reload_allocations', network)
+            self._schedule_reload_allocations(network)
 
     def enable_isolated_metadata_proxy(self, network):
 
@@ -464,6 +562,8 @@ class DhcpPluginApi(object):
         1.1 - Added get_active_networks_info, create_dhcp_port,
               and update_dhcp_port methods.
         1.5 - Added dhcp_ready_on_ports
+        1.7 - Added get_active_network_ids and the network_ids argument
+              of get_active_networks_info
 
     """
 
@@ -476,11 +576,26 @@ class DhcpPluginApi(object):
                 version='1.0')
         self.client = n_rpc.get_client(target)
 
-    def get_active_networks_info(self):
-        """Make a remote process call to retrieve all network info."""
-        cctxt = self.client.prepare(version='1.1')
-        networks = cctxt.call(self.context, 'get_active_networks_info',
-                              host=self.host)
+    def get_active_network_ids(self):
+        """Make a remote process call to retrieve the active network IDs."""
+        cctxt = self.client.prepare(version='1.7')
+        return cctxt.call(self.context, 'get_active_network_ids',
+                          host=self.host)
+
+    def get_active_networks_info(self, network_ids=None):
+        """Make a remote process call to retrieve all network info.
+
+        If network_ids is given, only the info of these networks is
+        retrieved.
+        """
+        if network_ids is None:
+            cctxt = self.client.prepare(version='1.1')
+            networks = cctxt.call(self.context, 'get_active_networks_info',
+                                  host=self.host)
+        else:
+            cctxt = self.client.prepare(version='1.7')
+            networks = cctxt.call(self.context, 'get_active_networks_info',
+                                  host=self.host, network_ids=network_ids)
         return [dhcp.NetModel(n) for n in networks]
 
     def get_network_info(self, network_id):
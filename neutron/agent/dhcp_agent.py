@@ -42,6 +42,7 @@ def main():
     register_options(cfg.CONF)
     common_config.init(sys.argv[1:])
     config.setup_logging()
+    config.setup_privsep()
     server = neutron_service.Service.create(
         binary='neutron-dhcp-agent',
         topic=topics.DHCP_AGENT,
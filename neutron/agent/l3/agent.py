@@ -13,6 +13,8 @@
 #    under the License.
 #
 
+import collections
+
 import eventlet
 import netaddr
 from neutron_lib import constants as lib_const
@@ -36,6 +38,7 @@ from neutron.agent.l3 import legacy_router
 from neutron.agent.l3 import namespace_manager
 from neutron.agent.l3 import namespaces
 from neutron.agent.l3 import router_processing_queue as queue
+from neutron.agent.l3 import router_workers
 from neutron.agent.linux import external_process
 from neutron.agent.linux import ip_lib
 from neutron.agent.linux import pd
@@ -83,6 +86,7 @@ class L3PluginApi(object):
               - delete_agent_gateway_port
         1.8 - Added address scope information
         1.9 - Added get_router_ids
+        1.10 - Added the revisions of the routers and sync_changed_routers
     """
 
     def __init__(self, topic, host):
@@ -96,6 +100,17 @@ class L3PluginApi(object):
         return cctxt.call(context, 'sync_routers', host=self.host,
                           router_ids=router_ids)
 
+    def get_changed_routers(self, context, router_ids, revisions):
+        """Make a remote process call to retrieve the changed routers.
+
+        Return the sync data for the routers whose revision is not the given
+        one, and the ids of the other routers.
+        """
+        cctxt = self.client.prepare(version='1.10')
+        result = cctxt.call(context, 'sync_changed_routers', host=self.host,
+                            router_ids=router_ids, revisions=revisions)
+        return result['routers'], result['unchanged_router_ids']
+
     def get_router_ids(self, context):
         """Make a remote process call to retrieve scheduled routers ids."""
         cctxt = self.client.prepare(version='1.9')
@@ -182,6 +197,7 @@ class L3NATAgent(ha.AgentMixin,
         self.router_info = {}
 
         self._check_config_params()
+        self.router_workers = self._start_router_workers(host)
 
         self.process_monitor = external_process.ProcessMonitor(
             config=self.conf,
@@ -193,6 +209,7 @@ class L3NATAgent(ha.AgentMixin,
         self.plugin_rpc = L3PluginApi(topics.L3PLUGIN, host)
         self.fullsync = True
         self.sync_routers_chunk_size = SYNC_ROUTERS_MAX_CHUNK_SIZE
+        self._changed_routers_supported = True
 
         # Get the list of service plugins from Neutron Server
         # This is the first place where we contact neutron-server on startup
@@ -232,7 +249,8 @@ class L3NATAgent(ha.AgentMixin,
             self.driver,
             self.metadata_driver)
 
-        self._queue = queue.RouterProcessingQueue()
+        self._queue = (self.router_workers or
+                       queue.RouterProcessingQueue())
         super(L3NATAgent, self).__init__(host=self.conf.host)
 
         self.target_ex_net_id = None
@@ -268,6 +286,21 @@ class L3NATAgent(ha.AgentMixin,
                 LOG.error(msg, self.conf.ipv6_gateway)
                 raise SystemExit(1)
 
+        if (self.conf.router_workers and
+                self.conf.agent_mode != lib_const.L3_AGENT_MODE_LEGACY):
+            # The DVR routers of a host share their FIP namespaces.
+            LOG.error(_LE('router_workers is only supported in the %s '
+                          'agent mode'), lib_const.L3_AGENT_MODE_LEGACY)
+            raise SystemExit(1)
+
+    def _start_router_workers(self, host):
+        if not self.conf.router_workers:
+            return
+        workers = router_workers.RouterWorkerPool(self.conf.router_workers)
+        workers.start(lambda channel: L3NATAgentRouterWorker(
+            host, self.conf, channel).run())
+        return workers
+
     def _fetch_external_net_id(self, force=False):
         """Find UUID of single external network for this agent."""
         if self.conf.gateway_external_network_id:
@@ -296,6 +329,28 @@ class L3NATAgent(ha.AgentMixin,
                         "one external network.")
                     raise Exception(msg)
 
+    def enqueue_state_change(self, router_id, state):
+        if self.router_workers:
+            self.router_workers.enqueue_state_change(router_id, state)
+        else:
+            super(L3NATAgent, self).enqueue_state_change(router_id, state)
+
+    def _get_router_stats(self):
+        stats = collections.Counter(routers=len(self.router_info),
+                                    ex_gw_ports=0,
+                                    interfaces=0,
+                                    floating_ips=0)
+        for ri in self.router_info.values():
+            if ri.get_ex_gw_port():
+                stats['ex_gw_ports'] += 1
+            stats['interfaces'] += len(ri.router.get(lib_const.INTERFACE_KEY,
+                                                     []))
+            stats['floating_ips'] += len(ri.router.get(
+                lib_const.FLOATINGIP_KEY, []))
+        if self.router_workers:
+            stats.update(self.router_workers.get_stats())
+        return dict(stats)
+
     def _create_router(self, router_id, router):
         args = []
         kwargs = {
@@ -419,12 +474,18 @@ class L3NATAgent(ha.AgentMixin,
             self._process_added_router(router)
         else:
             self._process_updated_router(router)
+        ri = self.router_info[router['id']]
+        LOG.debug("Router %(router_id)s processed, elapsed: %(timings)s",
+                  {'router_id': router['id'],
+                   'timings': ', '.join('%s %.3f' % timing
+                                        for timing in ri.process_timings)})
 
     def _process_added_router(self, router):
         self._router_added(router['id'], router)
         ri = self.router_info[router['id']]
         ri.router = router
         ri.process(self)
+        ri.commit_processed()
         registry.notify(resources.ROUTER, events.AFTER_CREATE, self, router=ri)
 
     def _process_updated_router(self, router):
@@ -433,6 +494,7 @@ class L3NATAgent(ha.AgentMixin,
         registry.notify(resources.ROUTER, events.BEFORE_UPDATE,
                         self, router=ri)
         ri.process(self)
+        ri.commit_processed()
         registry.notify(resources.ROUTER, events.AFTER_UPDATE, self, router=ri)
 
     def _resync_router(self, router_update,
@@ -528,6 +590,8 @@ class L3NATAgent(ha.AgentMixin,
 
     def fetch_and_sync_all_routers(self, context, ns_manager):
         prev_router_ids = set(self.router_info)
+        if self.router_workers:
+            prev_router_ids |= self.router_workers.router_ids
         curr_router_ids = set()
         timestamp = timeutils.utcnow()
 
@@ -536,18 +600,21 @@ class L3NATAgent(ha.AgentMixin,
             # fetch routers by chunks to reduce the load on server and to
             # start router processing earlier
             for i in range(0, len(router_ids), self.sync_routers_chunk_size):
-                routers = self.plugin_rpc.get_routers(
+                routers, unchanged_router_ids = self._get_changed_routers(
                     context, router_ids[i:i + self.sync_routers_chunk_size])
                 LOG.debug('Processing :%r', routers)
+                for router_id in unchanged_router_ids:
+                    curr_router_ids.add(router_id)
+                    ri = self.router_info.get(router_id)
+                    if ri:
+                        self._keep_router_namespaces(ns_manager, ri.router)
+                    else:
+                        # A router of the workers, which are only supported
+                        # in the legacy mode.
+                        ns_manager.keep_router(router_id)
                 for r in routers:
                     curr_router_ids.add(r['id'])
-                    ns_manager.keep_router(r['id'])
-                    if r.get('distributed'):
-                        # need to keep fip namespaces as well
-                        ext_net_id = (r['external_gateway_info'] or {}).get(
-                            'network_id')
-                        if ext_net_id:
-                            ns_manager.keep_ext_net(ext_net_id)
+                    self._keep_router_namespaces(ns_manager, r)
                     update = queue.RouterUpdate(
                         r['id'],
                         queue.PRIORITY_SYNC_ROUTERS_TASK,
@@ -590,13 +657,63 @@ class L3NATAgent(ha.AgentMixin,
                                         action=queue.DELETE_ROUTER)
             self._queue.add(update)
 
+    def _get_router_revisions(self, router_ids):
+        if self.router_workers:
+            revisions = self.router_workers.revisions
+        else:
+            revisions = {router_id: ri.revision
+                         for router_id, ri in self.router_info.items()}
+        return {router_id: revisions[router_id] for router_id in router_ids
+                if revisions.get(router_id)}
+
+    def _get_changed_routers(self, context, router_ids):
+        """Return the changed routers and the ids of the unchanged ones.
+
+        The routers processed successfully since their last change are not
+        fetched again from the server, which returns their ids instead.
+        """
+        revisions = self._get_router_revisions(router_ids)
+        if revisions and self._changed_routers_supported:
+            try:
+                routers, unchanged_router_ids = (
+                    self.plugin_rpc.get_changed_routers(
+                        context, router_ids, revisions))
+            except oslo_messaging.RemoteError as e:
+                if e.exc_type != 'UnsupportedVersion':
+                    raise
+                LOG.info(_LI("The server does not support the revisions of "
+                             "the routers, fetching all of them on sync"))
+                self._changed_routers_supported = False
+            else:
+                # The routers removed while the server was answering are
+                # processed again, as changed ones.
+                revisions = self._get_router_revisions(unchanged_router_ids)
+                removed_router_ids = [router_id
+                                      for router_id in unchanged_router_ids
+                                      if router_id not in revisions]
+                if removed_router_ids:
+                    routers = routers + self.plugin_rpc.get_routers(
+                        context, removed_router_ids)
+                return routers, list(revisions)
+        return self.plugin_rpc.get_routers(context, router_ids), []
+
+    def _keep_router_namespaces(self, ns_manager, router):
+        ns_manager.keep_router(router['id'])
+        if router.get('distributed'):
+            # need to keep fip namespaces as well
+            ext_net_id = (router['external_gateway_info'] or {}).get(
+                'network_id')
+            if ext_net_id:
+                ns_manager.keep_ext_net(ext_net_id)
+
     def after_start(self):
         # Note: the FWaaS' vArmourL3NATAgent is a subclass of L3NATAgent. It
         # calls this method here. So Removing this after_start() would break
         # vArmourL3NATAgent. We need to find out whether vArmourL3NATAgent
         # can have L3NATAgentWithStateReport as its base class instead of
         # L3NATAgent.
-        eventlet.spawn_n(self._process_routers_loop)
+        if not self.router_workers:
+            eventlet.spawn_n(self._process_routers_loop)
         LOG.info(_LI("L3 agent started"))
 
     def create_pd_router_update(self):
@@ -636,24 +753,8 @@ class L3NATAgentWithStateReport(L3NATAgent):
             self.heartbeat.start(interval=report_interval)
 
     def _report_state(self):
-        num_ex_gw_ports = 0
-        num_interfaces = 0
-        num_floating_ips = 0
-        router_infos = self.router_info.values()
-        num_routers = len(router_infos)
-        for ri in router_infos:
-            ex_gw_port = ri.get_ex_gw_port()
-            if ex_gw_port:
-                num_ex_gw_ports += 1
-            num_interfaces += len(ri.router.get(lib_const.INTERFACE_KEY,
-                                                []))
-            num_floating_ips += len(ri.router.get(lib_const.FLOATINGIP_KEY,
-                                                  []))
         configurations = self.agent_state['configurations']
-        configurations['routers'] = num_routers
-        configurations['ex_gw_ports'] = num_ex_gw_ports
-        configurations['interfaces'] = num_interfaces
-        configurations['floating_ips'] = num_floating_ips
+        configurations.update(self._get_router_stats())
         try:
             agent_status = self.state_rpc.report_state(self.context,
                                                        self.agent_state,
@@ -673,7 +774,8 @@ class L3NATAgentWithStateReport(L3NATAgent):
             LOG.exception(_LE("Failed reporting state!"))
 
     def after_start(self):
-        eventlet.spawn_n(self._process_routers_loop)
+        if not self.router_workers:
+            eventlet.spawn_n(self._process_routers_loop)
         LOG.info(_LI("L3 agent started"))
         # Do the report state before we do the first full sync.
         self._report_state()
@@ -684,3 +786,61 @@ class L3NATAgentWithStateReport(L3NATAgent):
         """Handle the agent_updated notification event."""
         self.fullsync = True
         LOG.info(_LI("agent_updated by server side %s!"), payload)
+
+
+class L3NATAgentRouterWorker(L3NATAgent):
+    """Process the routers of a shard of the agent in a worker process.
+
+    The agent keeps receiving the notifications of the server and of
+    keepalived, and forwards them to the worker owning the router through
+    a RouterWorkerChannel.
+    """
+
+    def __init__(self, host, conf, channel):
+        self.channel = channel
+        super(L3NATAgentRouterWorker, self).__init__(host, conf)
+
+    def _start_router_workers(self, host):
+        pass
+
+    def _start_keepalived_notifications_server(self):
+        # Served by the agent.
+        pass
+
+    def _update_stats(self):
+        self.channel.send('update_stats', self._get_router_stats())
+
+    def _update_revision(self, router_id):
+        ri = self.router_info.get(router_id)
+        self.channel.send('update_revision', router_id,
+                          ri.revision if ri else None)
+
+    def _process_router_if_compatible(self, router):
+        try:
+            super(L3NATAgentRouterWorker,
+                  self)._process_router_if_compatible(router)
+        finally:
+            self._update_revision(router['id'])
+
+    def _router_removed(self, router_id):
+        super(L3NATAgentRouterWorker, self)._router_removed(router_id)
+        self._update_revision(router_id)
+
+    def run(self):
+        eventlet.spawn_n(self._process_routers_loop)
+        self.pd.after_start()
+        report_interval = self.conf.AGENT.report_interval
+        if report_interval:
+            self.stats_loop = loopingcall.FixedIntervalLoopingCall(
+                self._update_stats)
+            self.stats_loop.start(interval=report_interval)
+
+        handlers = {'add': self._queue.add,
+                    'enqueue_state_change': self.enqueue_state_change}
+        while True:
+            try:
+                method, args = self.channel.recv()
+            except EOFError:
+                LOG.info(_LI("L3 agent exited, stopping the router worker"))
+                return
+            handlers[method](*args)
@@ -26,6 +26,12 @@ class DvrRouterBase(router.RouterInfo):
         self.agent = agent
         self.host = host
 
+    def _get_router_changes(self):
+        # The DVR routers also depend on the FIP namespaces and the ARP
+        # entries shared with the other routers of the host: always
+        # process them fully.
+        return None
+
     def process(self, agent):
         super(DvrRouterBase, self).process(agent)
         # NOTE:  Keep a copy of the interfaces around for when they are removed
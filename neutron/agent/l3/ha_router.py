@@ -383,8 +383,9 @@ class HaRouter(router.RouterInfo):
     def process(self, agent):
         super(HaRouter, self).process(agent)
 
-        if self.ha_port:
-            self.enable_keepalived()
+        if self.ha_port and self.router_changed():
+            with self.timed('keepalived'):
+                self.enable_keepalived()
 
     @common_utils.synchronized('enable_radvd')
     def enable_radvd(self, internal_ports=None):
@@ -13,9 +13,13 @@
 #    under the License.
 
 import collections
+import contextlib
+import copy
+
 import netaddr
 from neutron_lib import constants as l3_constants
 from oslo_log import log as logging
+from oslo_utils import timeutils
 
 from neutron._i18n import _, _LE, _LW
 from neutron.agent.l3 import namespaces
@@ -38,6 +42,21 @@ ADDRESS_SCOPE_MARK_ID_MIN = 1024
 ADDRESS_SCOPE_MARK_ID_MAX = 2048
 DEFAULT_ADDRESS_SCOPE = "noscope"
 
+# Parts of the router processed by the steps of RouterInfo.process, which
+# are skipped when their part did not change since the router was last
+# processed. A change to any other key processes the whole router.
+ROUTER_PARTS = {
+    l3_constants.INTERFACE_KEY: 'ports',
+    l3_constants.FLOATINGIP_KEY: 'floating_ips',
+    'routes': 'routes',
+    'gw_port': 'gateway',
+    'external_gateway_info': 'gateway',
+    'enable_snat': 'gateway',
+}
+# Keys which do not describe the router, and never need processing.
+ROUTER_METADATA_KEYS = frozenset([n_const.ROUTER_REVISION_KEY, 'revision',
+                                  'created_at', 'updated_at'])
+
 
 class RouterInfo(object):
 
@@ -53,6 +72,10 @@ class RouterInfo(object):
         self.fip_map = {}
         self.internal_ports = []
         self.floating_ips = set()
+        self._processed_router = None
+        self._router_changes = None
+        self._fips_in_error = False
+        self.process_timings = []
         # Invoke the setter for establishing initial SNAT action
         self.router = router
         self.use_ipv6 = use_ipv6
@@ -108,6 +131,50 @@ class RouterInfo(object):
     def get_internal_device_name(self, port_id):
         return (INTERNAL_DEV_PREFIX + port_id)[:self.driver.DEV_NAME_LEN]
 
+    def _get_router_changes(self):
+        """Return the parts of the router changed since it was processed.
+
+        None means that the whole router has to be processed.
+        """
+        processed_router = self._processed_router
+        if processed_router is None:
+            return None
+        changes = set()
+        for key in set(processed_router) | set(self.router):
+            if key in ROUTER_METADATA_KEYS:
+                continue
+            if processed_router.get(key) != self.router.get(key):
+                if key not in ROUTER_PARTS:
+                    return None
+                changes.add(ROUTER_PARTS[key])
+        return changes
+
+    @property
+    def revision(self):
+        """Revision of the router as last processed successfully."""
+        if self._processed_router is None:
+            return None
+        return self._processed_router.get(n_const.ROUTER_REVISION_KEY)
+
+    def router_changed(self, *parts):
+        """Whether the router has to be processed for the given parts.
+
+        Without parts, whether any part of the router changed.
+        """
+        if self._router_changes is None:
+            return True
+        if not parts:
+            return bool(self._router_changes)
+        return bool(self._router_changes.intersection(parts))
+
+    @contextlib.contextmanager
+    def timed(self, step):
+        start = timeutils.now()
+        try:
+            yield
+        finally:
+            self.process_timings.append((step, timeutils.now() - start))
+
     def get_external_device_name(self, port_id):
         return (EXTERNAL_DEV_PREFIX + port_id)[:self.driver.DEV_NAME_LEN]
 
@@ -844,6 +911,10 @@ class RouterInfo(object):
         # filter out statuses that didn't change
         fip_statuses = {f: stat for f, stat in fip_statuses.items()
                         if stat != FLOATINGIP_STATUS_NOCHANGE}
+        # The floating IPs in error are set up again by the next processing
+        # of the router, even if they did not change.
+        self._fips_in_error = (l3_constants.FLOATINGIP_STATUS_ERROR in
+                               fip_statuses.values())
         if not fip_statuses:
             return
         LOG.debug('Sending floating ip statuses: %s', fip_statuses)
@@ -1030,12 +1101,23 @@ class RouterInfo(object):
         :param agent: Passes the agent in order to send RPC messages.
         """
         LOG.debug("process router updates")
-        self._process_internal_ports(agent.pd)
+        self._router_changes = self._get_router_changes()
+        # Process the whole router the next time if this processing fails
+        self._processed_router = None
+        self.process_timings = []
+        if self.router_changed('ports'):
+            with self.timed('internal_ports'):
+                self._process_internal_ports(agent.pd)
         agent.pd.sync_router(self.router['id'])
-        self.process_external(agent)
-        self.process_address_scope()
-        # Process static routes for router
-        self.routes_updated(self.routes, self.router['routes'])
+        if self.router_changed('ports', 'gateway', 'floating_ips'):
+            with self.timed('external'):
+                self.process_external(agent)
+            with self.timed('address_scope'):
+                self.process_address_scope()
+        if self.router_changed('routes'):
+            with self.timed('routes'):
+                # Process static routes for router
+                self.routes_updated(self.routes, self.router['routes'])
         self.routes = self.router['routes']
 
         # Update ex_gw_port and enable_snat on the router info cache
@@ -1045,3 +1127,12 @@ class RouterInfo(object):
                              for fip in self.get_floating_ips()])
         # TODO(Carl) FWaaS uses this.  Why is it set after processing is done?
         self.enable_snat = self.router.get('enable_snat')
+
+    def commit_processed(self):
+        """Save the router as processed, to only process its changes later.
+
+        This is called once the processing of the router, including the
+        steps added by the subclasses of RouterInfo, has succeeded.
+        """
+        if not self._fips_in_error:
+            self._processed_router = copy.deepcopy(self.router)
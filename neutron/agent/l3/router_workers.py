@@ -0,0 +1,170 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import collections
+import os
+import signal
+import socket
+import struct
+import zlib
+
+import eventlet
+from eventlet import semaphore
+from oslo_log import log as logging
+from six.moves import cPickle as pickle
+
+from neutron._i18n import _LE, _LI
+from neutron.agent.l3 import router_processing_queue as queue
+
+LOG = logging.getLogger(__name__)
+
+_HEADER = struct.Struct('!I')
+
+
+class RouterWorkerChannel(object):
+    """Channel of the messages between the agent and a router worker.
+
+    A message is a method name and its arguments, pickled and prefixed by
+    their length.
+    """
+
+    def __init__(self, sock):
+        self._sock = sock
+        self._reader = sock.makefile('rb')
+        self._send_lock = semaphore.Semaphore()
+
+    def send(self, method, *args):
+        data = pickle.dumps((method, args), pickle.HIGHEST_PROTOCOL)
+        with self._send_lock:
+            self._sock.sendall(_HEADER.pack(len(data)) + data)
+
+    def recv(self):
+        """Return the next (method, args) message.
+
+        :raises EOFError: when the other end of the channel is closed.
+        """
+        size, = _HEADER.unpack(self._read(_HEADER.size))
+        return pickle.loads(self._read(size))
+
+    def _read(self, size):
+        data = self._reader.read(size)
+        if len(data) < size:
+            raise EOFError()
+        return data
+
+    def close(self):
+        self._reader.close()
+        self._sock.close()
+
+
+class RouterWorkerPool(object):
+    """Shard the routers of the agent across worker processes.
+
+    A router is always processed by the same worker, which owns its
+    namespaces and processes its updates through its own
+    RouterProcessingQueue, so that a router is never processed by two
+    workers at the same time. The pool is used by the agent in place of
+    its RouterProcessingQueue.
+    """
+
+    def __init__(self, num_workers):
+        self.num_workers = num_workers
+        # routers dispatched to the workers and not deleted since
+        self.router_ids = set()
+        # revisions of the routers as last processed by the workers
+        self.revisions = {}
+        self._channels = []
+        self._stats = {}
+
+    def start(self, worker_main):
+        """Fork the workers, each running worker_main(channel).
+
+        The workers must be forked before the agent connects to the server,
+        so that they do not share its connections.
+        """
+        for index in range(self.num_workers):
+            agent_sock, worker_sock = socket.socketpair()
+            pid = os.fork()
+            if not pid:
+                agent_sock.close()
+                self._run_worker(worker_main, index, worker_sock)
+            worker_sock.close()
+            LOG.info(_LI("Started router worker %(index)d, pid %(pid)d"),
+                     {'index': index, 'pid': pid})
+            self._channels.append(RouterWorkerChannel(agent_sock))
+        for index, channel in enumerate(self._channels):
+            eventlet.spawn_n(self._read_worker, index, channel)
+
+    def _run_worker(self, worker_main, index, sock):
+        # Drop the greenthreads inherited from the agent, and the channels
+        # to the workers forked before this one.
+        eventlet.hubs.use_hub()
+        for channel in self._channels:
+            channel.close()
+        status = 1
+        try:
+            worker_main(RouterWorkerChannel(sock))
+            status = 0
+        except Exception:
+            LOG.exception(_LE("Router worker %d failed"), index)
+        finally:
+            os._exit(status)
+
+    def _read_worker(self, index, channel):
+        while True:
+            try:
+                method, args = channel.recv()
+            except EOFError:
+                # The routers of the worker would no longer be processed.
+                LOG.error(_LE("Router worker %d exited, stopping the "
+                              "agent"), index)
+                os.kill(os.getpid(), signal.SIGTERM)
+                return
+            if method == 'update_stats':
+                self._stats[index] = args[0]
+            elif method == 'update_revision':
+                self._update_revision(*args)
+
+    def _update_revision(self, router_id, revision):
+        if revision and router_id in self.router_ids:
+            self.revisions[router_id] = revision
+        else:
+            self.revisions.pop(router_id, None)
+
+    def _get_worker(self, router_id):
+        shard = zlib.crc32(router_id.encode('utf-8')) & 0xffffffff
+        return self._channels[shard % self.num_workers]
+
+    def add(self, update):
+        """Queue a router update in the worker owning the router."""
+        if update.id is None:
+            # The prefix delegation updates are not about a router.
+            for channel in self._channels:
+                channel.send('add', update)
+            return
+        if update.action == queue.DELETE_ROUTER:
+            self.router_ids.discard(update.id)
+            self.revisions.pop(update.id, None)
+        else:
+            self.router_ids.add(update.id)
+        self._get_worker(update.id).send('add', update)
+
+    def enqueue_state_change(self, router_id, state):
+        self._get_worker(router_id).send('enqueue_state_change',
+                                         router_id, state)
+
+    def get_stats(self):
+        """Return the sum of the router statistics of the workers."""
+        stats = collections.Counter()
+        for worker_stats in self._stats.values():
+            stats.update(worker_stats)
+        return dict(stats)
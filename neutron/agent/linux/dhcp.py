@@ -292,6 +292,14 @@ class Dnsmasq(DhcpLocalProcess):
 
     _ID = 'id:'
 
+    # NOTE: the hosts and addn_hosts entries rendered for each port are kept
+    # per network id across driver instances. The agent replaces the ports
+    # of its network cache on update instead of modifying them, so a port
+    # object seen before renders to the same entries.
+    _port_entries_cache = {}
+
+    _conf_files_changed = False
+
     @classmethod
     def check_version(cls):
         pass
@@ -417,6 +425,10 @@ class Dnsmasq(DhcpLocalProcess):
 
         return cmd
 
+    def disable(self, retain_port=False):
+        super(Dnsmasq, self).disable(retain_port=retain_port)
+        self._port_entries_cache.pop(self.network.id, None)
+
     def spawn_process(self):
         """Spawn the process, if it's not spawned already."""
         # we only need to generate the lease file the first time dnsmasq starts
@@ -428,15 +440,20 @@ class Dnsmasq(DhcpLocalProcess):
         """Spawns or reloads a Dnsmasq process for the network.
 
         When reload_with_HUP is True, dnsmasq receives a HUP signal,
-        or it's reloaded if the process is not running.
+        or it's reloaded if the process is not running. The HUP signal is
+        not sent when no config file changed.
         """
 
-        self._output_config_files()
+        conf_files_changed = self._output_config_files()
 
         pm = self._get_process_manager(
             cmd_callback=self._build_cmdline_callback)
 
-        pm.enable(reload_cfg=reload_with_HUP)
+        if reload_with_HUP and not conf_files_changed and pm.active:
+            LOG.debug('Config files of network %s are unchanged, dnsmasq '
+                      'is not reloaded', self.network.id)
+        else:
+            pm.enable(reload_cfg=reload_with_HUP)
 
         self.process_monitor.register(uuid=self.network.id,
                                       service_name=DNSMASQ_SERVICE_NAME,
@@ -456,9 +473,23 @@ class Dnsmasq(DhcpLocalProcess):
         ip_wrapper.netns.execute(cmd, run_as_root=True)
 
     def _output_config_files(self):
+        """Write the config files, returning whether any of them changed."""
+        self._conf_files_changed = False
         self._output_hosts_file()
         self._output_addn_hosts_file()
         self._output_opts_file()
+        return self._conf_files_changed
+
+    def _replace_conf_file(self, filename, contents):
+        """Replace a config file unless it already has the given contents."""
+        try:
+            with open(filename) as f:
+                if f.read() == contents:
+                    return
+        except (OSError, IOError):
+            pass
+        common_utils.replace_file(filename, contents)
+        self._conf_files_changed = True
 
     def reload_allocations(self):
         """Rebuild the dnsmasq config and signal the dnsmasq to reload."""
@@ -529,41 +560,91 @@ class Dnsmasq(DhcpLocalProcess):
             no_opts,  # A flag indication that options shouldn't be written
         )
         """
-        v6_nets = dict((subnet.id, subnet) for subnet in
-                       self.network.subnets if subnet.ip_version == 6)
-
+        v6_nets = self._get_v6_nets()
         for port in self.network.ports:
-            fixed_ips = self._sort_fixed_ips_for_dnsmasq(port.fixed_ips,
-                                                         v6_nets)
-            # Confirm whether Neutron server supports dns_name attribute in the
-            # ports API
-            dns_assignment = getattr(port, 'dns_assignment', None)
+            for host_tuple in self._iter_port_hosts(port, v6_nets):
+                yield host_tuple
+
+    def _get_v6_nets(self):
+        return dict((subnet.id, subnet) for subnet in
+                    self.network.subnets if subnet.ip_version == 6)
+
+    def _iter_port_hosts(self, port, v6_nets):
+        """Iterate over the hosts of a port, as described in _iter_hosts."""
+        fixed_ips = self._sort_fixed_ips_for_dnsmasq(port.fixed_ips, v6_nets)
+        # Confirm whether Neutron server supports dns_name attribute in the
+        # ports API
+        dns_assignment = getattr(port, 'dns_assignment', None)
+        if dns_assignment:
+            dns_ip_map = {d.ip_address: d for d in dns_assignment}
+        for alloc in fixed_ips:
+            no_dhcp = False
+            no_opts = False
+            if alloc.subnet_id in v6_nets:
+                addr_mode = v6_nets[alloc.subnet_id].ipv6_address_mode
+                no_dhcp = addr_mode in (n_const.IPV6_SLAAC,
+                                        n_const.DHCPV6_STATELESS)
+                # we don't setup anything for SLAAC. It doesn't make sense
+                # to provide options for a client that won't use DHCP
+                no_opts = addr_mode == n_const.IPV6_SLAAC
+
+            # If dns_name attribute is supported by ports API, return the
+            # dns_assignment generated by the Neutron server. Otherwise,
+            # generate hostname and fqdn locally (previous behaviour)
             if dns_assignment:
-                dns_ip_map = {d.ip_address: d for d in dns_assignment}
-            for alloc in fixed_ips:
-                no_dhcp = False
-                no_opts = False
-                if alloc.subnet_id in v6_nets:
-                    addr_mode = v6_nets[alloc.subnet_id].ipv6_address_mode
-                    no_dhcp = addr_mode in (n_const.IPV6_SLAAC,
-                                            n_const.DHCPV6_STATELESS)
-                    # we don't setup anything for SLAAC. It doesn't make sense
-                    # to provide options for a client that won't use DHCP
-                    no_opts = addr_mode == n_const.IPV6_SLAAC
-
-                # If dns_name attribute is supported by ports API, return the
-                # dns_assignment generated by the Neutron server. Otherwise,
-                # generate hostname and fqdn locally (previous behaviour)
-                if dns_assignment:
-                    hostname = dns_ip_map[alloc.ip_address].hostname
-                    fqdn = dns_ip_map[alloc.ip_address].fqdn
-                else:
-                    hostname = 'host-%s' % alloc.ip_address.replace(
-                        '.', '-').replace(':', '-')
-                    fqdn = hostname
-                    if self.conf.dhcp_domain:
-                        fqdn = '%s.%s' % (fqdn, self.conf.dhcp_domain)
-                yield (port, alloc, hostname, fqdn, no_dhcp, no_opts)
+                hostname = dns_ip_map[alloc.ip_address].hostname
+                fqdn = dns_ip_map[alloc.ip_address].fqdn
+            else:
+                hostname = 'host-%s' % alloc.ip_address.replace(
+                    '.', '-').replace(':', '-')
+                fqdn = hostname
+                if self.conf.dhcp_domain:
+                    fqdn = '%s.%s' % (fqdn, self.conf.dhcp_domain)
+            yield (port, alloc, hostname, fqdn, no_dhcp, no_opts)
+
+    def _get_port_entries(self):
+        """Return the hosts and addn_hosts file entries of each port.
+
+        Entries are only rendered again for the ports which were replaced
+        since the last call for the network, or for all of them when the
+        subnets changed.
+        """
+        signature = (self.conf.dhcp_domain, tuple(
+            (subnet.id, subnet.ip_version, subnet.enable_dhcp,
+             getattr(subnet, 'ipv6_address_mode', None))
+            for subnet in self.network.subnets))
+        cached_signature, cached_entries = self._port_entries_cache.get(
+            self.network.id, (None, {}))
+        if cached_signature != signature:
+            cached_entries = {}
+        v6_nets = self._get_v6_nets()
+        dhcp_enabled_subnet_ids = [s.id for s in self.network.subnets
+                                   if s.enable_dhcp]
+        port_entries = {}
+        entries = []
+        for port in self.network.ports:
+            entry = cached_entries.get(port.id)
+            if not entry or entry[0] is not port:
+                entry = (port,) + self._render_port_entries(
+                    port, v6_nets, dhcp_enabled_subnet_ids)
+            port_entries[port.id] = entry
+            entries.append(entry[1:])
+        self._port_entries_cache[self.network.id] = (signature, port_entries)
+        return entries
+
+    def _render_port_entries(self, port, v6_nets, dhcp_enabled_subnet_ids):
+        hosts = []
+        addn_hosts = []
+        for host_tuple in self._iter_port_hosts(port, v6_nets):
+            alloc, hostname, fqdn = host_tuple[1:4]
+            hosts.append(self._format_hosts_entry(
+                host_tuple, dhcp_enabled_subnet_ids))
+            # It is compulsory to write the `fqdn` before the `hostname` in
+            # order to obtain it in PTR responses.
+            if alloc:
+                addn_hosts.append('%s\t%s %s\n' %
+                                  (alloc.ip_address, fqdn, hostname))
+        return ''.join(hosts), ''.join(addn_hosts)
 
     def _get_port_extra_dhcp_opts(self, port):
         return getattr(port, edo_ext.EXTRADHCPOPTS, False)
@@ -638,49 +719,43 @@ class Dnsmasq(DhcpLocalProcess):
         should receive a dhcp lease, the hosts resolution in itself is
         defined by the `_output_addn_hosts_file` method.
         """
-        buf = six.StringIO()
         filename = self.get_conf_file_name('host')
 
         LOG.debug('Building host file: %s', filename)
-        dhcp_enabled_subnet_ids = [s.id for s in self.network.subnets
-                                   if s.enable_dhcp]
         # NOTE(ihrachyshka): the loop should not log anything inside it, to
         # avoid potential performance drop when lots of hosts are dumped
-        for host_tuple in self._iter_hosts():
-            port, alloc, hostname, name, no_dhcp, no_opts = host_tuple
-            if no_dhcp:
-                if not no_opts and self._get_port_extra_dhcp_opts(port):
-                    buf.write('%s,%s%s\n' %
-                              (port.mac_address, 'set:', port.id))
-                continue
+        self._replace_conf_file(filename, ''.join(
+            entries[0] for entries in self._get_port_entries()))
+        LOG.debug('Done building host file %s', filename)
+        return filename
 
-            # don't write ip address which belongs to a dhcp disabled subnet.
-            if alloc.subnet_id not in dhcp_enabled_subnet_ids:
-                continue
+    def _format_hosts_entry(self, host_tuple, dhcp_enabled_subnet_ids):
+        """Format the hosts file line of a host, if it needs one."""
+        port, alloc, hostname, name, no_dhcp, no_opts = host_tuple
+        if no_dhcp:
+            if not no_opts and self._get_port_extra_dhcp_opts(port):
+                return '%s,%s%s\n' % (port.mac_address, 'set:', port.id)
+            return ''
 
-            ip_address = self._format_address_for_dnsmasq(alloc.ip_address)
+        # don't write ip address which belongs to a dhcp disabled subnet.
+        if alloc.subnet_id not in dhcp_enabled_subnet_ids:
+            return ''
 
-            if self._get_port_extra_dhcp_opts(port):
-                client_id = self._get_client_id(port)
-                if client_id and len(port.extra_dhcp_opts) > 1:
-                    buf.write('%s,%s%s,%s,%s,%s%s\n' %
-                              (port.mac_address, self._ID, client_id, name,
-                               ip_address, 'set:', port.id))
-                elif client_id and len(port.extra_dhcp_opts) == 1:
-                    buf.write('%s,%s%s,%s,%s\n' %
-                          (port.mac_address, self._ID, client_id, name,
-                           ip_address))
-                else:
-                    buf.write('%s,%s,%s,%s%s\n' %
-                              (port.mac_address, name, ip_address,
-                               'set:', port.id))
-            else:
-                buf.write('%s,%s,%s\n' %
-                          (port.mac_address, name, ip_address))
+        ip_address = self._format_address_for_dnsmasq(alloc.ip_address)
 
-        common_utils.replace_file(filename, buf.getvalue())
-        LOG.debug('Done building host file %s', filename)
-        return filename
+        if self._get_port_extra_dhcp_opts(port):
+            client_id = self._get_client_id(port)
+            if client_id and len(port.extra_dhcp_opts) > 1:
+                return '%s,%s%s,%s,%s,%s%s\n' % (
+                    port.mac_address, self._ID, client_id, name,
+                    ip_address, 'set:', port.id)
+            elif client_id and len(port.extra_dhcp_opts) == 1:
+                return '%s,%s%s,%s,%s\n' % (
+                    port.mac_address, self._ID, client_id, name, ip_address)
+            else:
+                return '%s,%s,%s,%s%s\n' % (
+                    port.mac_address, name, ip_address, 'set:', port.id)
+        return '%s,%s,%s\n' % (port.mac_address, name, ip_address)
 
     def _get_client_id(self, port):
         if self._get_port_extra_dhcp_opts(port):
@@ -740,15 +815,9 @@ class Dnsmasq(DhcpLocalProcess):
         Each line in this file is in the same form as a standard /etc/hosts
         file.
         """
-        buf = six.StringIO()
-        for host_tuple in self._iter_hosts():
-            port, alloc, hostname, fqdn, no_dhcp, no_opts = host_tuple
-            # It is compulsory to write the `fqdn` before the `hostname` in
-            # order to obtain it in PTR responses.
-            if alloc:
-                buf.write('%s\t%s %s\n' % (alloc.ip_address, fqdn, hostname))
         addn_hosts = self.get_conf_file_name('addn_hosts')
-        common_utils.replace_file(addn_hosts, buf.getvalue())
+        self._replace_conf_file(addn_hosts, ''.join(
+            entries[1] for entries in self._get_port_entries()))
         return addn_hosts
 
     def _output_opts_file(self):
@@ -757,7 +826,7 @@ class Dnsmasq(DhcpLocalProcess):
         options += self._generate_opts_per_port(subnet_index_map)
 
         name = self.get_conf_file_name('opts')
-        common_utils.replace_file(name, '\n'.join(options))
+        self._replace_conf_file(name, '\n'.join(options))
         return name
 
     def _generate_opts_per_subnet(self):
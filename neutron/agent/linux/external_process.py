@@ -71,6 +71,9 @@ class ProcessManager(MonitoredProcess):
         self.pids_path = pids_path or self.conf.external_pids
         self.pid_file = pid_file
         self.run_as_root = run_as_root
+        # (pid, ctime of /proc/<pid>) of the process last found active, only
+        # used to skip the full check while the ctime is unchanged
+        self._active_process = None
 
         if service:
             self.service_pid_fname = 'pid.' + service
@@ -82,6 +85,7 @@ class ProcessManager(MonitoredProcess):
         common_utils.ensure_dir(os.path.dirname(self.get_pid_file_name()))
 
     def enable(self, cmd_callback=None, reload_cfg=False):
+        self._active_process = None
         if not self.active:
             if not cmd_callback:
                 cmd_callback = self.default_cmd_callback
@@ -97,6 +101,7 @@ class ProcessManager(MonitoredProcess):
         self.disable('HUP')
 
     def disable(self, sig='9', get_stop_command=None):
+        self._active_process = None
         pid = self.pid
 
         if self.active:
@@ -133,16 +138,45 @@ class ProcessManager(MonitoredProcess):
 
     @property
     def active(self):
+        """Whether the process is running.
+
+        The process is found from the pid file, and identified by its uuid
+        in its /proc/<pid>/cmdline. The pid and the ctime of /proc/<pid> of
+        the process found active are kept as a fast path: while the ctime is
+        unchanged, the periodic checks of the ProcessMonitor need no file
+        read. procfs sets that ctime when it instantiates the inode of the
+        entry, which it may do again while the process runs, so a different
+        ctime only means that the full check is done again.
+        """
+        if self._active_process:
+            pid, ctime = self._active_process
+            if self._get_proc_ctime(pid) == ctime:
+                return True
+            self._active_process = None
+
         pid = self.pid
         if pid is None:
             return False
 
+        # Read before cmdline, so that the inode of a pid reused in between
+        # has a different ctime and does not take the fast path.
+        ctime = self._get_proc_ctime(pid)
         cmdline = '/proc/%s/cmdline' % pid
         try:
             with open(cmdline, "r") as f:
-                return self.uuid in f.readline()
+                active = self.uuid in f.readline()
         except IOError:
             return False
+        if active and ctime is not None:
+            self._active_process = (pid, ctime)
+        return active
+
+    @staticmethod
+    def _get_proc_ctime(pid):
+        try:
+            return os.stat('/proc/%s' % pid).st_ctime
+        except OSError:
+            return None
 
 
 ServiceId = collections.namedtuple('ServiceId', ['uuid', 'service'])
@@ -11,43 +11,45 @@
 #    See the License for the specific language governing permissions and
 #    limitations under the License.
 
+import collections
+
+import eventlet
 import netaddr
 from oslo_log import log as logging
 
 from neutron._i18n import _LE
 from neutron.agent.linux import utils as linux_utils
+from neutron.privileged.agent.linux import ip_conntrack as privileged
 
 LOG = logging.getLogger(__name__)
 
 
 class IpConntrackManager(object):
-    """Smart wrapper for ip conntrack."""
+    """Smart wrapper for ip conntrack.
+
+    The conntrack entries to delete are queued per zone, without duplicates,
+    and deleted in the background by a greenthread, at most batch_size of
+    them at once, so that a change involving thousands of entries does not
+    stall the agent.
+    """
 
-    def __init__(self, zone_lookup_func, execute=None, namespace=None):
+    def __init__(self, zone_lookup_func, execute=None, namespace=None,
+                 batch_size=None, use_privsep=False):
         self.get_device_zone = zone_lookup_func
         self.execute = execute or linux_utils.execute
         self.namespace = namespace
+        self.batch_size = batch_size
+        self.use_privsep = use_privsep
+        # zone -> {ConntrackEntry: the same entry without remote address}
+        self._pending = collections.OrderedDict()
+        self._worker = None
 
-    @staticmethod
-    def _generate_conntrack_cmd_by_rule(rule, namespace):
-        ethertype = rule.get('ethertype')
-        protocol = rule.get('protocol')
+    def _get_conntrack_entries(self, device_info_list, rule,
+                               remote_ip=None):
+        conntrack_entries = collections.OrderedDict()
+        ethertype = str(rule.get('ethertype')).lower()
+        protocol = rule.get('protocol') or None
         direction = rule.get('direction')
-        cmd = ['conntrack', '-D']
-        if protocol:
-            cmd.extend(['-p', str(protocol)])
-        cmd.extend(['-f', str(ethertype).lower()])
-        cmd.append('-d' if direction == 'ingress' else '-s')
-        cmd_ns = []
-        if namespace:
-            cmd_ns.extend(['ip', 'netns', 'exec', namespace])
-        cmd_ns.extend(cmd)
-        return cmd_ns
-
-    def _get_conntrack_cmds(self, device_info_list, rule, remote_ip=None):
-        conntrack_cmds = set()
-        cmd = self._generate_conntrack_cmd_by_rule(rule, self.namespace)
-        ethertype = rule.get('ethertype')
         for device_info in device_info_list:
             zone_id = self.get_device_zone(device_info['device'])
             ips = device_info.get('fixed_ips', [])
@@ -55,24 +57,81 @@ class IpConntrackManager(object):
                 net = netaddr.IPNetwork(ip)
                 if str(net.version) not in ethertype:
                     continue
-                ip_cmd = [str(net.ip), '-w', zone_id]
+                entry = privileged.ConntrackEntry(
+                    zone_id, ethertype, protocol, direction, str(net.ip),
+                    None)
+                broader_entry = None
                 if remote_ip and str(
                         netaddr.IPNetwork(remote_ip).version) in ethertype:
-                    ip_cmd.extend(['-s', str(remote_ip)])
-                conntrack_cmds.add(tuple(cmd + ip_cmd))
-        return conntrack_cmds
+                    broader_entry = entry
+                    entry = entry._replace(remote_address=str(remote_ip))
+                conntrack_entries[entry] = broader_entry
+        return conntrack_entries
 
     def _delete_conntrack_state(self, device_info_list, rule, remote_ip=None):
-        conntrack_cmds = self._get_conntrack_cmds(device_info_list,
-                                                  rule, remote_ip)
-        for cmd in conntrack_cmds:
+        conntrack_entries = self._get_conntrack_entries(device_info_list,
+                                                        rule, remote_ip)
+        for entry, broader_entry in conntrack_entries.items():
+            zone_entries = self._pending.setdefault(entry.zone,
+                                                    collections.OrderedDict())
+            if entry in zone_entries or broader_entry in zone_entries:
+                continue
+            if broader_entry is None:
+                # the entries of the remote ips are deleted with it
+                for pending_entry in [e for e, b in zone_entries.items()
+                                      if b == entry]:
+                    del zone_entries[pending_entry]
+            zone_entries[entry] = broader_entry
+        if self._pending:
+            self._start_worker()
+
+    def _start_worker(self):
+        if self._worker is None:
+            self._worker = eventlet.spawn(self._process_queue)
+
+    def _get_batch(self):
+        entries = []
+        while self._pending and (self.batch_size is None or
+                                 len(entries) < self.batch_size):
+            zone_id, zone_entries = next(iter(self._pending.items()))
+            while zone_entries and (self.batch_size is None or
+                                    len(entries) < self.batch_size):
+                entries.append(zone_entries.popitem(last=False)[0])
+            if not zone_entries:
+                del self._pending[zone_id]
+        return entries
+
+    def _process_queue(self):
+        try:
+            while self._pending:
+                self._delete_conntrack_entries(self._get_batch())
+                # let the agent run between the batches
+                eventlet.sleep(0)
+        finally:
+            self._worker = None
+
+    def _delete_conntrack_entries(self, entries):
+        if self.use_privsep:
+            try:
+                failures = privileged.delete_conntrack_entries(
+                    entries, self.namespace)
+            except Exception:
+                LOG.exception(_LE("Failed deleting %d conntrack entries"),
+                              len(entries))
+                return
+            for entry, error in failures:
+                LOG.error(_LE("Failed deleting conntrack entries %(entry)s: "
+                              "%(error)s"), {'entry': entry, 'error': error})
+            return
+        for entry in entries:
             try:
-                self.execute(list(cmd), run_as_root=True,
+                cmd = privileged.get_delete_cmd(entry, self.namespace)
+                self.execute(cmd, run_as_root=True,
                              check_exit_code=True,
                              extra_ok_codes=[1])
-            except RuntimeError:
+            except (RuntimeError, ValueError):
                 LOG.exception(
-                    _LE("Failed execute conntrack command %s"), cmd)
+                    _LE("Failed deleting conntrack entries %s"), entry)
 
     def delete_conntrack_state_by_rule(self, device_info_list, rule):
         self._delete_conntrack_state(device_info_list, rule)
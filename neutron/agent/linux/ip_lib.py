@@ -29,6 +29,7 @@ from neutron._i18n import _, _LE
 from neutron.agent.common import utils
 from neutron.common import exceptions as n_exc
 from neutron.common import utils as common_utils
+from neutron.privileged.agent.linux import ip_lib as privileged
 
 LOG = logging.getLogger(__name__)
 
@@ -74,6 +75,10 @@ class SubProcessBase(object):
             # Only callers that need to force use of the root helper
             # need to register the option.
             self.force_root = False
+        # Commands forced to run with the root helper have to keep going
+        # through it, they may be run elsewhere (e.g. in XenServer dom0).
+        self.use_privsep = (cfg.CONF.AGENT.use_privsep_ip_lib and
+                            not self.force_root)
 
     def _run(self, options, command, args):
         if self.namespace:
@@ -120,7 +125,9 @@ class IPWrapper(SubProcessBase):
 
     def get_devices(self, exclude_loopback=False):
         retval = []
-        if self.namespace:
+        if self.use_privsep:
+            output = privileged.get_device_names(self.namespace)
+        elif self.namespace:
             # we call out manually because in order to avoid screen scraping
             # iproute2 we use find to see what is in the sysfs directory, as
             # suggested by Stephen Hemminger (iproute2 dev).
@@ -547,6 +554,9 @@ class IpLinkCommand(IpDeviceCommandBase):
 
     @property
     def attributes(self):
+        if self._parent.use_privsep:
+            return privileged.get_link_attributes(self.name,
+                                                  self._parent.namespace)
         return self._parse_line(self._run(['o'], ('show', self.name)))
 
     def _parse_line(self, value):
@@ -590,6 +600,10 @@ class IpAddrCommand(IpDeviceCommandBase):
         @param name: if it's not None, only a device with that matching name
                      will be returned.
         """
+        if self._parent.use_privsep and filters in (None, ['permanent']):
+            return self._get_devices_with_ip_privsep(name, scope, to,
+                                                     filters, ip_version)
+
         options = [ip_version] if ip_version else []
 
         args = ['show']
@@ -633,6 +647,22 @@ class IpAddrCommand(IpDeviceCommandBase):
                                dadfailed=('dadfailed' == parts[-1])))
         return retval
 
+    def _get_devices_with_ip_privsep(self, name, scope, to, filters,
+                                     ip_version):
+        # The same filtering as 'ip addr show' does, on the addresses
+        # returned through netlink.
+        retval = privileged.get_ip_addresses(name, self._parent.namespace,
+                                             ip_version)
+        if filters:
+            retval = [addr for addr in retval if not addr['dynamic']]
+        if scope:
+            retval = [addr for addr in retval if addr['scope'] == scope]
+        if to:
+            to = netaddr.IPNetwork(to)
+            retval = [addr for addr in retval
+                      if netaddr.IPNetwork(addr['cidr']).ip in to]
+        return retval
+
     def list(self, scope=None, to=None, filters=None, ip_version=None):
         """Get device details of a device named <self.name>."""
         return self.get_devices_with_ip(
@@ -729,7 +759,33 @@ class IpRouteCommand(IpDeviceCommandBase):
 
             yield route
 
+    def _use_privsep(self):
+        # Named tables are only known to the ip command
+        return (self._parent.use_privsep and
+                (not self._table or str(self._table).isdigit()))
+
+    def _list_routes_privsep(self, ip_version, scope=None, **kwargs):
+        # The same filtering as 'ip route list' does, on the routes returned
+        # through netlink.
+        routes = privileged.list_routes(ip_version, self._parent.namespace,
+                                        device=self.name, table=self._table)
+        if scope:
+            routes = [r for r in routes if r.get('scope', 'global') == scope]
+            kwargs['scope'] = scope
+        if 'via' in kwargs:
+            via = netaddr.IPAddress(kwargs['via'])
+            routes = [r for r in routes
+                      if 'via' in r and netaddr.IPAddress(r['via']) == via]
+        for route in routes:
+            if self._table:
+                route['table'] = self._table
+            route.update(kwargs)
+        return routes
+
     def list_routes(self, ip_version, **kwargs):
+        if self._use_privsep() and set(kwargs) <= {'scope', 'via'}:
+            return self._list_routes_privsep(ip_version, **kwargs)
+
         args = ['list']
         args += self._dev_args()
         args += self._table_args()
@@ -750,6 +806,9 @@ class IpRouteCommand(IpDeviceCommandBase):
         self.delete_route(cidr, scope='link')
 
     def get_gateway(self, scope=None, filters=None, ip_version=None):
+        if self._use_privsep() and not filters:
+            return self._get_gateway_privsep(scope, ip_version)
+
         options = [ip_version] if ip_version else []
 
         args = ['list']
@@ -778,6 +837,21 @@ class IpRouteCommand(IpDeviceCommandBase):
 
         return retval
 
+    def _get_gateway_privsep(self, scope, ip_version):
+        # 'ip route list' lists the IPv4 routes when no version is given
+        ip_version = ip_version or constants.IP_VERSION_4
+        default_route = next(
+            (r for r in self._list_routes_privsep(ip_version, scope=scope)
+             if r['cidr'] == constants.IP_ANY[ip_version]), None)
+        if default_route is None:
+            return None
+        retval = {}
+        if 'via' in default_route:
+            retval.update(gateway=default_route['via'])
+        if 'metric' in default_route:
+            retval.update(metric=int(default_route['metric']))
+        return retval
+
     def add_route(self, cidr, via=None, table=None, **kwargs):
         ip_version = get_ip_version(cidr)
         args = ['replace', cidr]
@@ -29,12 +29,21 @@ class IpsetManager(object):
 
        Keeps track of ip addresses per set, using bulk
        or single ip add/remove for smaller changes.
+
+       While apply is deferred, set creations, member changes and set
+       destructions are accumulated and committed with a single
+       ipset restore when apply is no longer deferred.
     """
 
     def __init__(self, execute=None, namespace=None):
         self.execute = execute or linux_utils.execute
         self.namespace = namespace
         self.ipset_sets = {}
+        self.ipset_apply_deferred = False
+        # set name -> (ethertype, member ips) waiting for a deferred apply
+        self._pending_sets = {}
+        # set names waiting for a deferred destroy
+        self._pending_destroys = set()
 
     def _sanitize_addresses(self, addresses):
         """This method converts any address to ipset format.
@@ -67,7 +76,24 @@ class IpsetManager(object):
 
     def set_name_exists(self, set_name):
         """Returns true if the set name is known to the manager."""
-        return set_name in self.ipset_sets
+        if set_name in self._pending_sets:
+            return True
+        return (set_name in self.ipset_sets and
+                set_name not in self._pending_destroys)
+
+    def _get_set_ips(self, set_name):
+        if set_name in self._pending_sets:
+            return self._pending_sets[set_name][1]
+        if set_name in self._pending_destroys:
+            return []
+        return self.ipset_sets.get(set_name, [])
+
+    def defer_apply_on(self):
+        self.ipset_apply_deferred = True
+
+    def defer_apply_off(self):
+        self.ipset_apply_deferred = False
+        self._apply_deferred()
 
     def set_members(self, id, ethertype, member_ips):
         """Create or update a specific set by name and ethertype.
@@ -77,16 +103,18 @@ class IpsetManager(object):
         """
         member_ips = self._sanitize_addresses(member_ips)
         set_name = self.get_name(id, ethertype)
-        add_ips = self._get_new_set_ips(set_name, member_ips)
-        del_ips = self._get_deleted_set_ips(set_name, member_ips)
-        if not add_ips and not del_ips and self.set_name_exists(set_name):
+        if (self.set_name_exists(set_name) and
+                set(member_ips) == set(self._get_set_ips(set_name))):
             # nothing to do because no membership changes and the ipset exists
             return
         self.set_members_mutate(set_name, ethertype, member_ips)
 
     @utils.synchronized('ipset', external=True)
     def set_members_mutate(self, set_name, ethertype, member_ips):
-        if not self.set_name_exists(set_name):
+        if self.ipset_apply_deferred:
+            self._pending_destroys.discard(set_name)
+            self._pending_sets[set_name] = (ethertype, list(member_ips))
+        elif not self.set_name_exists(set_name):
             # The initial creation is handled with create/refresh to
             # avoid any downtime for existing sets (i.e. avoiding
             # a flush/restore), as the restore operation of ipset is
@@ -109,7 +137,61 @@ class IpsetManager(object):
     @utils.synchronized('ipset', external=True)
     def destroy(self, id, ethertype, forced=False):
         set_name = self.get_name(id, ethertype)
-        self._destroy(set_name, forced)
+        if self.ipset_apply_deferred:
+            self._pending_sets.pop(set_name, None)
+            if set_name in self.ipset_sets or forced:
+                self._pending_destroys.add(set_name)
+        else:
+            self._destroy(set_name, forced)
+
+    @utils.synchronized('ipset', external=True)
+    def _apply_deferred(self):
+        """Commit all the deferred set changes with one ipset restore."""
+        pending_sets = self._pending_sets
+        pending_destroys = self._pending_destroys
+        self._pending_sets = {}
+        self._pending_destroys = set()
+        process_input = []
+        for set_name, (ethertype, member_ips) in sorted(pending_sets.items()):
+            if set_name in self.ipset_sets:
+                process_input.extend(
+                    "add %s %s" % (set_name, ip)
+                    for ip in self._get_new_set_ips(set_name, member_ips))
+                process_input.extend(
+                    "del %s %s" % (set_name, ip)
+                    for ip in self._get_deleted_set_ips(set_name, member_ips))
+            else:
+                # The set may already exist in the system with stale
+                # members, so it is populated through a swap like in
+                # set_members_mutate.
+                new_set_name = set_name + SWAP_SUFFIX
+                set_type = self._get_ipset_set_type(ethertype)
+                process_input.append("create %s hash:net family %s" % (
+                    set_name, set_type))
+                process_input.append("create %s hash:net family %s" % (
+                    new_set_name, set_type))
+                process_input.extend("add %s %s" % (new_set_name, ip)
+                                     for ip in member_ips)
+                process_input.append("swap %s %s" % (new_set_name, set_name))
+                process_input.append("destroy %s" % new_set_name)
+        if process_input:
+            self._restore_sets(process_input)
+        for set_name, (ethertype, member_ips) in pending_sets.items():
+            self.ipset_sets[set_name] = copy.copy(member_ips)
+
+        if pending_destroys:
+            try:
+                self._restore_sets(["destroy %s" % set_name
+                                    for set_name in sorted(pending_destroys)])
+            except RuntimeError:
+                # ipset restore stops at the first set it fails to destroy,
+                # for instance one still referenced. As with _destroy, this
+                # shouldn't prevent the agent from going on, but the sets
+                # after it have to be destroyed.
+                for set_name in sorted(pending_destroys):
+                    self._destroy(set_name, forced=True)
+            for set_name in pending_destroys:
+                self.ipset_sets.pop(set_name, None)
 
     def _add_member_to_set(self, set_name, member_ip):
         cmd = ['ipset', 'add', '-exist', set_name, member_ip]
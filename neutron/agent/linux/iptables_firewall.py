@@ -71,7 +71,9 @@ class IptablesFirewallDriver(firewall.FirewallDriver):
         # driver composed over this one
         self.ipset = ipset_manager.IpsetManager(namespace=namespace)
         self.ipconntrack = ip_conntrack.IpConntrackManager(
-            self.get_device_zone, namespace=namespace)
+            self.get_device_zone, namespace=namespace,
+            batch_size=cfg.CONF.SECURITYGROUP.conntrack_delete_batch_size,
+            use_privsep=cfg.CONF.AGENT.use_privsep_conntrack)
         self._populate_initial_zone_map()
         # list of port which has security group
         self.filtered_ports = {}
@@ -669,6 +671,7 @@ class IptablesFirewallDriver(firewall.FirewallDriver):
     def filter_defer_apply_on(self):
         if not self._defer_apply:
             self.iptables.defer_apply_on()
+            self.ipset.defer_apply_on()
             self._pre_defer_filtered_ports = dict(self.filtered_ports)
             self._pre_defer_unfiltered_ports = dict(self.unfiltered_ports)
             self.pre_sg_members = dict(self.sg_members)
@@ -832,9 +835,17 @@ class IptablesFirewallDriver(firewall.FirewallDriver):
                                       self._pre_defer_unfiltered_ports)
             self._setup_chains_apply(self.filtered_ports,
                                      self.unfiltered_ports)
+            # the sets must exist before any iptables rule can reference
+            # them, and unused sets can only be destroyed once no rule
+            # references them anymore.
+            self.ipset.defer_apply_off()
             self.iptables.defer_apply_off()
             self._remove_conntrack_entries_from_sg_updates()
-            self._remove_unused_security_group_info()
+            self.ipset.defer_apply_on()
+            try:
+                self._remove_unused_security_group_info()
+            finally:
+                self.ipset.defer_apply_off()
             self._pre_defer_filtered_ports = None
             self._pre_defer_unfiltered_ports = None
 
@@ -24,6 +24,7 @@ import difflib
 import os
 import re
 import sys
+import time
 
 from oslo_concurrency import lockutils
 from oslo_config import cfg
@@ -58,6 +59,9 @@ binary_name = get_binary_name()
 MAX_CHAIN_LEN_WRAP = 11
 MAX_CHAIN_LEN_NOWRAP = 28
 
+# The packet and byte counters of a chain in the iptables-save output
+CHAIN_COUNTERS_REGEX = re.compile(r'\s\[\d+:\d+\]$')
+
 # Number of iptables rules to print before and after a rule that causes a
 # a failure during iptables-restore
 IPTABLES_ERROR_LINES_OF_CONTEXT = 5
@@ -113,6 +117,9 @@ class IptablesRule(object):
     def __ne__(self, other):
         return not self == other
 
+    def __hash__(self):
+        return hash((self.chain, self.rule, self.top, self.wrap))
+
     def __str__(self):
         if self.wrap:
             chain = '%s-%s' % (self.wrap_name, self.chain)
@@ -131,6 +138,13 @@ class IptablesTable(object):
         self.unwrapped_chains = set()
         self.remove_chains = set()
         self.wrap_name = binary_name[:16]
+        # Names of the chains whose rules changed since the last apply. As
+        # long as this is empty the table is known to produce the same
+        # iptables state as last time, so apply() can skip diffing it.
+        self.dirty_chains = set()
+
+    def _mark_dirty(self, chain):
+        self.dirty_chains.add(chain)
 
     def add_chain(self, name, wrap=True):
         """Adds a named chain to the table.
@@ -145,10 +159,10 @@ class IptablesTable(object):
 
         """
         name = get_chain_name(name, wrap)
-        if wrap:
-            self.chains.add(name)
-        else:
-            self.unwrapped_chains.add(name)
+        chain_set = self._select_chain_set(wrap)
+        if name not in chain_set:
+            chain_set.add(name)
+            self._mark_dirty(name)
 
     def _select_chain_set(self, wrap):
         if wrap:
@@ -174,6 +188,7 @@ class IptablesTable(object):
             return
 
         chain_set.remove(name)
+        self._mark_dirty(name)
 
         if not wrap:
             # non-wrapped chains and rules need to be dealt with specially,
@@ -221,6 +236,7 @@ class IptablesTable(object):
 
         self.rules.append(IptablesRule(chain, rule, wrap, top, self.wrap_name,
                                        tag, comment))
+        self._mark_dirty(chain)
 
     def _wrap_target_chain(self, s, wrap):
         if s.startswith('$'):
@@ -245,6 +261,7 @@ class IptablesTable(object):
             self.rules.remove(IptablesRule(chain, rule, wrap, top,
                                            self.wrap_name,
                                            comment=comment))
+            self._mark_dirty(chain)
             if not wrap:
                 self.remove_rules.append(str(IptablesRule(chain, rule, wrap,
                                                           top, self.wrap_name,
@@ -263,15 +280,19 @@ class IptablesTable(object):
     def empty_chain(self, chain, wrap=True):
         """Remove all rules from a chain."""
         chained_rules = self._get_chain_rules(chain, wrap)
-        for rule in chained_rules:
-            self.rules.remove(rule)
+        if chained_rules:
+            chained_rules = set(chained_rules)
+            self.rules = [r for r in self.rules if r not in chained_rules]
+            self._mark_dirty(get_chain_name(chain, wrap))
 
     def clear_rules_by_tag(self, tag):
         if not tag:
             return
         rules = [rule for rule in self.rules if rule.tag == tag]
-        for rule in rules:
-            self.rules.remove(rule)
+        if rules:
+            self.rules = [rule for rule in self.rules if rule.tag != tag]
+            for rule in rules:
+                self._mark_dirty(rule.chain)
 
 
 class IptablesManager(object):
@@ -308,6 +329,15 @@ class IptablesManager(object):
         self.namespace = namespace
         self.iptables_apply_deferred = False
         self.wrap_name = binary_name[:16]
+        # (command, table name) -> iptables-save lines of the table as they
+        # were when the table was last found to need no changes. Used to
+        # skip clean tables whose kernel state was not touched since.
+        self._converged_tables = {}
+        # command -> iptables-save lines we expect the kernel to hold, and
+        # the time of the last real iptables-save used to verify them. Only
+        # used when iptables_state_verify_interval is set.
+        self._cached_state = {}
+        self._state_verified_at = {}
 
         self.ipv4 = {'filter': IptablesTable(binary_name=self.wrap_name)}
         self.ipv6 = {'filter': IptablesTable(binary_name=self.wrap_name)}
@@ -459,11 +489,8 @@ class IptablesManager(object):
             s += [('ip6tables', self.ipv6)]
         all_commands = []  # variable to keep track all commands for return val
         for cmd, tables in s:
-            args = ['%s-save' % (cmd,)]
-            if self.namespace:
-                args = ['ip', 'netns', 'exec', self.namespace] + args
-            save_output = self.execute(args, run_as_root=True)
-            all_lines = save_output.split('\n')
+            all_lines = self._get_saved_state(cmd)
+            new_state = []
             commands = []
             # Traverse tables in sorted order for predictable dump output
             for table_name in sorted(tables):
@@ -471,18 +498,30 @@ class IptablesManager(object):
                 # isolate the lines of the table we are modifying
                 start, end = self._find_table(all_lines, table_name)
                 old_rules = all_lines[start:end]
+                if self._is_table_converged(cmd, table_name, table,
+                                            old_rules):
+                    new_state += old_rules
+                    continue
                 # generate the new table state we want
                 new_rules = self._modify_rules(old_rules, table, table_name)
+                table.dirty_chains.clear()
                 # generate the iptables commands to get between the old state
                 # and the new state
                 changes = _generate_path_between_rules(old_rules, new_rules)
-                if changes:
+                if not changes:
+                    self._converged_tables[(cmd, table_name)] = (
+                        _strip_chain_counters(old_rules))
+                    new_state += old_rules
+                else:
+                    new_state += _get_table_section(table_name, new_rules)
+                    self._converged_tables.pop((cmd, table_name), None)
                     # if there are changes to the table, we put on the header
                     # and footer that iptables-save needs
                     commands += (['# Generated by iptables_manager'] +
                                  ['*%s' % table_name] + changes +
                                  ['COMMIT', '# Completed by iptables_manager'])
             if not commands:
+                self._cache_state(cmd, new_state)
                 continue
             all_commands += commands
             args = ['%s-restore' % (cmd,), '-n']
@@ -493,8 +532,12 @@ class IptablesManager(object):
                 commands.append('')
                 self.execute(args, process_input='\n'.join(commands),
                              run_as_root=True)
+                self._cache_state(cmd, new_state)
             except RuntimeError as r_error:
                 with excutils.save_and_reraise_exception():
+                    # we no longer know what the kernel holds, force an
+                    # iptables-save on the next apply
+                    self._invalidate_state(cmd)
                     try:
                         line_no = int(re.search(
                             'iptables-restore: line ([0-9]+?) failed',
@@ -518,6 +561,45 @@ class IptablesManager(object):
                   "commands were issued", len(all_commands))
         return all_commands
 
+    def _get_saved_state(self, cmd):
+        """Return the lines of the current iptables state for cmd.
+
+        When iptables_state_verify_interval is set, the state committed by
+        the last successful apply is trusted instead of forking
+        iptables-save, until the interval since the last verification
+        elapses.
+        """
+        interval = cfg.CONF.AGENT.iptables_state_verify_interval
+        if interval > 0 and cmd in self._cached_state:
+            if time.time() - self._state_verified_at[cmd] < interval:
+                return self._cached_state[cmd]
+        args = ['%s-save' % (cmd,)]
+        if self.namespace:
+            args = ['ip', 'netns', 'exec', self.namespace] + args
+        save_output = self.execute(args, run_as_root=True)
+        self._state_verified_at[cmd] = time.time()
+        return save_output.split('\n')
+
+    def _cache_state(self, cmd, lines):
+        if cfg.CONF.AGENT.iptables_state_verify_interval > 0:
+            self._cached_state[cmd] = lines
+
+    def _invalidate_state(self, cmd):
+        self._cached_state.pop(cmd, None)
+        self._state_verified_at.pop(cmd, None)
+
+    def _is_table_converged(self, cmd, table_name, table, old_rules):
+        """Check if a table can be skipped during apply.
+
+        A table is converged when none of its chains changed since the last
+        apply and iptables-save still returns the lines it returned when the
+        table was last found to need no changes, the chain counters aside.
+        """
+        if table.dirty_chains or table.remove_rules or table.remove_chains:
+            return False
+        return (self._converged_tables.get((cmd, table_name)) ==
+                _strip_chain_counters(old_rules))
+
     def _find_table(self, lines, table_name):
         if len(lines) < 3:
             # length only <2 when fake iptables
@@ -564,19 +646,17 @@ class IptablesManager(object):
         # the unwrapped chains (e.g. neutron-filter-top) may already exist in
         # the new_filter since they aren't marked by the wrap_name so we only
         # want to add them if they arent' already there
+        existing_chains = set(s[1:].split(' ', 1)[0] for s in new_filter
+                              if s.startswith(':'))
         our_chains += [':%s' % name for name in unwrapped_chains
-                       if not any(':%s' % name in s for s in new_filter)]
+                       if name not in existing_chains]
 
         our_top_rules = []
         our_bottom_rules = []
+        our_rules = set()
         for rule in table.rules:
             rule_str = str(rule)
-            # similar to the unwrapped chains, there are some rules that belong
-            # to us but they don't have the wrap name. we want to remove them
-            # from the new_filter and then add them in the right location in
-            # case our new rules changed the order.
-            # (e.g. '-A FORWARD -j neutron-filter-top')
-            new_filter = [s for s in new_filter if rule_str not in s]
+            our_rules.add(rule_str)
 
             if rule.top:
                 # rule.top == True means we want this rule to be at the top.
@@ -584,6 +664,13 @@ class IptablesManager(object):
             else:
                 our_bottom_rules += [rule_str]
 
+        # similar to the unwrapped chains, there are some rules that belong
+        # to us but they don't have the wrap name. we want to remove them
+        # from the new_filter and then add them in the right location in
+        # case our new rules changed the order.
+        # (e.g. '-A FORWARD -j neutron-filter-top')
+        new_filter = [s for s in new_filter if s not in our_rules]
+
         our_chains_and_rules = our_chains + our_top_rules + our_bottom_rules
 
         # locate the position immediately after the existing chains to insert
@@ -591,6 +678,8 @@ class IptablesManager(object):
         rules_index = self._find_rules_index(new_filter)
         new_filter[rules_index:rules_index] = our_chains_and_rules
 
+        remove_rules = set(table.remove_rules)
+
         def _weed_out_removes(line):
             # remove any rules or chains from the filter that were slated
             # for removal
@@ -600,8 +689,8 @@ class IptablesManager(object):
                     table.remove_chains.remove(chain)
                     return False
             else:
-                if line in table.remove_rules:
-                    table.remove_rules.remove(line)
+                if line in remove_rules:
+                    remove_rules.remove(line)
                     return False
             # Leave it alone
             return True
@@ -708,14 +797,34 @@ def _generate_path_between_rules(old_rules, new_rules):
             other_chains.append(chain)
 
     for chain in other_chains + sg_chains:
+        old_chain_rules = old_by_chain[chain]
+        new_chain_rules = new_by_chain[chain]
+        # most chains are untouched between two applies, don't bother
+        # running a full diff on them
+        if old_chain_rules == new_chain_rules:
+            continue
         statements += _generate_chain_diff_iptables_commands(
-            chain, old_by_chain[chain], new_by_chain[chain])
+            chain, old_chain_rules, new_chain_rules)
     # unreferenced chains get the axe
     for chain in sorted(old_chains - new_chains):
         statements += ['-X %s' % chain]
     return statements
 
 
+def _get_table_section(table_name, rules):
+    """Return rules as an iptables-save section of table_name."""
+    header = '*%s' % table_name
+    if rules and rules[0] == header:
+        return rules
+    return [header] + rules + ['COMMIT']
+
+
+def _strip_chain_counters(rules):
+    """Return rules without the counters of the chain declarations."""
+    return [CHAIN_COUNTERS_REGEX.sub('', line) if line.startswith(':')
+            else line for line in rules]
+
+
 def _get_rules_by_chain(rules):
     by_chain = collections.defaultdict(list)
     for line in rules:
@@ -12,14 +12,23 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import functools
+import threading
+import time
+
 import eventlet
+from oslo_config import cfg
 from oslo_log import log as logging
 from oslo_serialization import jsonutils
+from ovs.db import idl
 
 from neutron._i18n import _LE
 from neutron.agent.linux import async_process
 from neutron.agent.ovsdb import api as ovsdb
+from neutron.agent.ovsdb.native import connection
+
 
+cfg.CONF.import_opt('ovs_vsctl_timeout', 'neutron.agent.common.ovs_lib')
 
 LOG = logging.getLogger(__name__)
 
@@ -28,6 +37,8 @@ OVSDB_ACTION_INSERT = 'insert'
 OVSDB_ACTION_DELETE = 'delete'
 OVSDB_ACTION_NEW = 'new'
 
+INTERFACE_COLUMNS = ['name', 'ofport', 'external_ids']
+
 
 class OvsdbMonitor(async_process.AsyncProcess):
     """Manages an invocation of 'ovsdb-client monitor'."""
@@ -116,3 +127,129 @@ class SimpleInterfaceMonitor(OvsdbMonitor):
             with eventlet.timeout.Timeout(timeout):
                 while not self.is_active():
                     eventlet.sleep()
+
+    def wait(self, timeout):
+        # the output of ovsdb-client is only processed when polled
+        time.sleep(timeout)
+
+
+class InterfaceEventsIdl(idl.Idl):
+    """IDL replicating the Interface columns used by the agents.
+
+    The changes of the rows are passed to notify_handler as soon as the IDL
+    processes them.
+    """
+
+    def __init__(self, remote, schema_helper, notify_handler):
+        schema_helper.register_columns('Interface', INTERFACE_COLUMNS)
+        super(InterfaceEventsIdl, self).__init__(remote, schema_helper)
+        self._notify_handler = notify_handler
+
+    def notify(self, event, row, updates=None):
+        self._notify_handler(event, row)
+
+
+class NativeInterfaceMonitor(object):
+    """Monitors the Interface table through the native OVSDB interface.
+
+    It offers the same interface as SimpleInterfaceMonitor without forking
+    and parsing the output of an ovsdb-client process: the IDL pushes the
+    interfaces which are added, removed or whose ofport changed, and wait()
+    returns as soon as such an event is available.
+    """
+
+    def __init__(self):
+        self._connection = None
+        self._active = False
+        self._lock = threading.Lock()
+        self._events_available = threading.Event()
+        # interface name -> ofport, to detect the ofport changes
+        self._ofports = {}
+        self.new_events = {'added': [], 'removed': []}
+
+    @staticmethod
+    def is_supported():
+        # the notify hook of the IDL is available since ovs 2.6
+        return hasattr(idl.Idl, 'notify')
+
+    @staticmethod
+    def _row_to_device(row):
+        # optional columns are lists in the IDL, the ofport is [] until
+        # vswitchd assigns it, like with ovsdb-client
+        ofport = row.ofport[0] if row.ofport else []
+        return {'name': row.name,
+                'ofport': ofport,
+                'external_ids': row.external_ids}
+
+    def _notify(self, event, row):
+        if not self._active:
+            return
+        device = self._row_to_device(row)
+        name = device['name']
+        with self._lock:
+            if event == idl.ROW_CREATE:
+                self.new_events['added'].append(device)
+                self._ofports[name] = device['ofport']
+            elif event == idl.ROW_DELETE:
+                self.new_events['removed'].append(device)
+                self._ofports.pop(name, None)
+            elif self._ofports.get(name) != device['ofport']:
+                self._ofports[name] = device['ofport']
+                pending = [added for added in self.new_events['added']
+                           if added['name'] == name]
+                for added in pending:
+                    added.update(device)
+                if not pending:
+                    # signal the port as added again so that it is rewired
+                    # with its new ofport
+                    self.new_events['added'].append(device)
+            else:
+                return
+        self._events_available.set()
+
+    def is_active(self):
+        return self._active
+
+    def start(self, block=False, timeout=5):
+        # NOTE: the connection is started synchronously, block and timeout
+        # are only accepted for compatibility with SimpleInterfaceMonitor
+        if self._connection is None:
+            self._connection = connection.Connection(
+                cfg.CONF.OVS.ovsdb_connection,
+                cfg.CONF.ovs_vsctl_timeout,
+                'Open_vSwitch',
+                idl_class=functools.partial(InterfaceEventsIdl,
+                                            notify_handler=self._notify))
+            self._connection.start(table_name_list=[])
+        rows = self._connection.idl.tables['Interface'].rows.values()
+        with self._lock:
+            # signal all the current interfaces as added, like ovsdb-client
+            # does with the initial rows of the table
+            devices = [self._row_to_device(row) for row in rows]
+            self._ofports = {d['name']: d['ofport'] for d in devices}
+            self.new_events = {'added': devices, 'removed': []}
+            self._active = True
+        self._events_available.set()
+
+    def stop(self):
+        # NOTE: the IDL keeps running, only its events are dropped
+        with self._lock:
+            self._active = False
+            self.new_events = {'added': [], 'removed': []}
+        self._events_available.clear()
+
+    @property
+    def has_updates(self):
+        if not self._active:
+            LOG.error(_LE("Interface monitor is not active"))
+        return bool(self.new_events['added'] or self.new_events['removed'])
+
+    def get_events(self):
+        with self._lock:
+            events = self.new_events
+            self.new_events = {'added': [], 'removed': []}
+            self._events_available.clear()
+        return events
+
+    def wait(self, timeout):
+        self._events_available.wait(timeout)
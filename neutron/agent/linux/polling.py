@@ -15,8 +15,10 @@
 import contextlib
 
 import eventlet
+from oslo_config import cfg
 from oslo_log import log as logging
 
+from neutron._i18n import _LW
 from neutron.agent.common import base_polling
 from neutron.agent.linux import async_process
 from neutron.agent.linux import ovsdb_monitor
@@ -31,7 +33,8 @@ def get_polling_manager(minimize_polling=False,
                             constants.DEFAULT_OVSDBMON_RESPAWN)):
     if minimize_polling:
         pm = InterfacePollingMinimizer(
-            ovsdb_monitor_respawn_interval=ovsdb_monitor_respawn_interval)
+            ovsdb_monitor_respawn_interval=ovsdb_monitor_respawn_interval,
+            native_monitor=_use_native_monitor())
         pm.start()
     else:
         pm = base_polling.AlwaysPoll()
@@ -42,16 +45,36 @@ def get_polling_manager(minimize_polling=False,
             pm.stop()
 
 
+def _use_native_monitor():
+    if cfg.CONF.OVS.ovsdb_interface != 'native':
+        return False
+    if not ovsdb_monitor.NativeInterfaceMonitor.is_supported():
+        LOG.warning(_LW("The ovs library does not support IDL "
+                        "notifications, falling back to ovsdb-client to "
+                        "monitor the interfaces"))
+        return False
+    return True
+
+
 class InterfacePollingMinimizer(base_polling.BasePollingManager):
-    """Monitors ovsdb to determine when polling is required."""
+    """Monitors ovsdb to determine when polling is required.
+
+    With native_monitor, the Interface table is monitored in process
+    through the native OVSDB interface and wait() returns as soon as an
+    interface event is available, instead of forking an ovsdb-client.
+    """
 
     def __init__(
             self,
-            ovsdb_monitor_respawn_interval=constants.DEFAULT_OVSDBMON_RESPAWN):
+            ovsdb_monitor_respawn_interval=constants.DEFAULT_OVSDBMON_RESPAWN,
+            native_monitor=False):
 
         super(InterfacePollingMinimizer, self).__init__()
-        self._monitor = ovsdb_monitor.SimpleInterfaceMonitor(
-            respawn_interval=ovsdb_monitor_respawn_interval)
+        if native_monitor:
+            self._monitor = ovsdb_monitor.NativeInterfaceMonitor()
+        else:
+            self._monitor = ovsdb_monitor.SimpleInterfaceMonitor(
+                respawn_interval=ovsdb_monitor_respawn_interval)
 
     def start(self):
         self._monitor.start()
@@ -70,3 +93,6 @@ class InterfacePollingMinimizer(base_polling.BasePollingManager):
 
     def get_events(self):
         return self._monitor.get_events()
+
+    def wait(self, timeout):
+        self._monitor.wait(timeout)
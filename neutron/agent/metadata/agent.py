@@ -15,6 +15,7 @@
 import hashlib
 import hmac
 
+from eventlet import pools
 import httplib2
 from neutron_lib import constants
 from oslo_config import cfg
@@ -22,6 +23,7 @@ from oslo_log import log as logging
 import oslo_messaging
 from oslo_service import loopingcall
 from oslo_utils import encodeutils
+from oslo_utils import timeutils
 import six
 import six.moves.urllib.parse as urlparse
 import webob
@@ -29,6 +31,7 @@ import webob
 from neutron._i18n import _, _LE, _LW
 from neutron.agent.linux import utils as agent_utils
 from neutron.agent.metadata import config
+from neutron.agent.metadata import port_index
 from neutron.agent import rpc as agent_rpc
 from neutron.common import cache_utils as cache
 from neutron.common import constants as n_const
@@ -79,16 +82,41 @@ class MetadataProxyHandler(object):
 
         self.plugin_rpc = MetadataPluginAPI(topics.PLUGIN)
         self.context = context.get_admin_context_without_session()
+        # An httplib2 client keeps its connections alive but can only be
+        # used by one request at a time: pool them so that the concurrent
+        # requests reuse the connections, and their TLS sessions, to Nova.
+        self._http_pool = pools.Pool(
+            max_size=self.conf.nova_metadata_pool_size,
+            create=self._create_http_client)
+        self._port_index = None
+        if self.conf.enable_port_index:
+            self._port_index = port_index.PortIndex(
+                self.plugin_rpc, self.context,
+                self.conf.port_index_resync_interval)
 
     @webob.dec.wsgify(RequestClass=webob.Request)
     def __call__(self, req):
         try:
             LOG.debug("Request: %s", req)
 
+            start = timeutils.now()
             instance_id, tenant_id = self._get_instance_and_tenant_id(req)
+            lookup_time = timeutils.now() - start
             if instance_id:
-                return self._proxy_request(instance_id, tenant_id, req)
+                start = timeutils.now()
+                response = self._proxy_request(instance_id, tenant_id, req)
+                LOG.debug("Metadata request %(path)s of instance "
+                          "%(instance_id)s served. Lookup: %(lookup).3f, "
+                          "proxy: %(proxy).3f",
+                          {'path': req.path_info,
+                           'instance_id': instance_id,
+                           'lookup': lookup_time,
+                           'proxy': timeutils.now() - start})
+                return response
             else:
+                LOG.debug("No instance found for metadata request %(path)s. "
+                          "Lookup: %(lookup).3f",
+                          {'path': req.path_info, 'lookup': lookup_time})
                 return webob.exc.HTTPNotFound()
 
         except Exception:
@@ -145,12 +173,17 @@ class MetadataProxyHandler(object):
         """
         if network_id:
             networks = (network_id,)
+        elif router_id and self._port_index:
+            return self._port_index.get_router_ports(remote_address,
+                                                     router_id)
         elif router_id:
             networks = self._get_router_networks(router_id)
         else:
             raise TypeError(_("Either one of parameter network_id or router_id"
                               " must be passed to _get_ports method."))
 
+        if self._port_index:
+            return self._port_index.get_ports(remote_address, networks)
         return self._get_ports_for_remote_address(remote_address, networks)
 
     def _get_instance_and_tenant_id(self, req):
@@ -172,25 +205,16 @@ class MetadataProxyHandler(object):
             'X-Instance-ID-Signature': self._sign_instance_id(instance_id)
         }
 
-        nova_ip_port = '%s:%s' % (self.conf.nova_metadata_ip,
-                                  self.conf.nova_metadata_port)
         url = urlparse.urlunsplit((
             self.conf.nova_metadata_protocol,
-            nova_ip_port,
+            self._nova_ip_port,
             req.path_info,
             req.query_string,
             ''))
 
-        h = httplib2.Http(
-            ca_certs=self.conf.auth_ca_cert,
-            disable_ssl_certificate_validation=self.conf.nova_metadata_insecure
-        )
-        if self.conf.nova_client_cert and self.conf.nova_client_priv_key:
-            h.add_certificate(self.conf.nova_client_priv_key,
-                              self.conf.nova_client_cert,
-                              nova_ip_port)
-        resp, content = h.request(url, method=req.method, headers=headers,
-                                  body=req.body)
+        with self._http_pool.item() as h:
+            resp, content = h.request(url, method=req.method,
+                                      headers=headers, body=req.body)
 
         if resp.status == 200:
             LOG.debug(str(resp))
@@ -219,6 +243,22 @@ class MetadataProxyHandler(object):
         else:
             raise Exception(_('Unexpected response code: %s') % resp.status)
 
+    @property
+    def _nova_ip_port(self):
+        return '%s:%s' % (self.conf.nova_metadata_ip,
+                          self.conf.nova_metadata_port)
+
+    def _create_http_client(self):
+        h = httplib2.Http(
+            ca_certs=self.conf.auth_ca_cert,
+            disable_ssl_certificate_validation=self.conf.nova_metadata_insecure
+        )
+        if self.conf.nova_client_cert and self.conf.nova_client_priv_key:
+            h.add_certificate(self.conf.nova_client_priv_key,
+                              self.conf.nova_client_cert,
+                              self._nova_ip_port)
+        return h
+
     def _sign_instance_id(self, instance_id):
         secret = self.conf.metadata_proxy_shared_secret
         secret = encodeutils.to_utf8(secret)
@@ -290,7 +330,9 @@ class UnixDomainMetadataProxy(object):
         return MODE_MAP[mode]
 
     def run(self):
-        server = agent_utils.UnixDomainWSGIServer('neutron-metadata-agent')
+        server = agent_utils.UnixDomainWSGIServer(
+            'neutron-metadata-agent',
+            num_threads=self.conf.metadata_pool_size)
         server.start(MetadataProxyHandler(self.conf),
                      self.conf.metadata_proxy_socket,
                      workers=self.conf.metadata_workers,
@@ -79,7 +79,27 @@ METADATA_PROXY_HANDLER_OPTS = [
                 help=_("Client certificate for nova metadata api server.")),
      cfg.StrOpt('nova_client_priv_key',
                 default='',
-                help=_("Private key of client certificate."))
+                help=_("Private key of client certificate.")),
+     cfg.IntOpt('nova_metadata_pool_size',
+                default=100,
+                min=1,
+                help=_("Maximum number of connections to the Nova metadata "
+                       "server kept alive by each metadata worker, to reuse "
+                       "them for the next requests. Requests wait for a "
+                       "free connection when they are all in use.")),
+     cfg.BoolOpt('enable_port_index',
+                 default=True,
+                 help=_("Keep a local index of the ports of the networks "
+                        "and routers serving metadata requests, updated "
+                        "by the port notifications, instead of looking "
+                        "the ports up from the server for each request.")),
+     cfg.IntOpt('port_index_resync_interval',
+                default=300,
+                min=0,
+                help=_("Interval in seconds between the resynchronizations "
+                       "of the local port index with the server, "
+                       "recovering from lost notifications. 0 disables "
+                       "the resynchronization."))
 ]
 
 DEDUCE_MODE = 'deduce'
@@ -112,5 +132,10 @@ UNIX_DOMAIN_METADATA_PROXY_OPTS = [
     cfg.IntOpt('metadata_backlog',
                default=4096,
                help=_('Number of backlog requests to configure the '
-                      'metadata server socket with'))
+                      'metadata server socket with')),
+    cfg.IntOpt('metadata_pool_size',
+               min=1,
+               help=_('Number of requests served concurrently by each '
+                      'metadata worker (defaults to '
+                      'wsgi_default_pool_size)'))
 ]
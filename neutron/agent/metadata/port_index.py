@@ -0,0 +1,213 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import collections
+
+from neutron_lib import constants
+from oslo_log import log as logging
+import oslo_messaging
+from oslo_service import loopingcall
+
+from neutron._i18n import _LE
+from neutron.agent import rpc as agent_rpc
+from neutron.common import topics
+
+LOG = logging.getLogger(__name__)
+
+
+class PortIndex(object):
+    """Local index of the ports looked up by the metadata proxy.
+
+    The ports of a network, or the interfaces of a router, are loaded from
+    the server the first time a metadata request needs them. The index is
+    then kept up to date by the port and network notifications fanned out
+    to the L2 agents, and periodically resynchronized with the server to
+    recover from lost notifications, so that the metadata requests need no
+    RPC call in the steady state.
+    """
+
+    target = oslo_messaging.Target(version='1.4')
+
+    def __init__(self, plugin_rpc, context, resync_interval):
+        self.plugin_rpc = plugin_rpc
+        self.context = context
+        self.resync_interval = resync_interval
+        self._started = False
+        self._reset()
+
+    def _reset(self):
+        # port id -> port of the tracked networks and routers
+        self._ports = {}
+        # (network id, ip address) -> {port id: port}
+        self._addresses = collections.defaultdict(dict)
+        # router id -> {interface port id: network id}
+        self._routers = {}
+        self._networks = set()
+
+    def _start(self):
+        # The consumers are only created by the first lookup, so that they
+        # belong to the metadata worker process serving the requests.
+        if self._started:
+            return
+        self._started = True
+        consumers = [[topics.PORT, topics.UPDATE],
+                     [topics.PORT, topics.DELETE],
+                     [topics.NETWORK, topics.DELETE]]
+        self.connection = agent_rpc.create_consumers([self],
+                                                     topics.AGENT,
+                                                     consumers)
+        if self.resync_interval:
+            self._resync_loop = loopingcall.FixedIntervalLoopingCall(
+                self._resync)
+            self._resync_loop.start(interval=self.resync_interval,
+                                    initial_delay=self.resync_interval)
+
+    def _get_ports_from_server(self, filters):
+        return self.plugin_rpc.get_ports(self.context, filters)
+
+    def _add_port(self, port):
+        self._remove_port(port['id'])
+        port = {'id': port['id'],
+                'network_id': port['network_id'],
+                'device_id': port['device_id'],
+                'device_owner': port['device_owner'],
+                'tenant_id': port['tenant_id'],
+                'ip_addresses': [ip['ip_address']
+                                 for ip in port['fixed_ips']]}
+        router = None
+        if port['device_owner'] in constants.ROUTER_INTERFACE_OWNERS:
+            router = self._routers.get(port['device_id'])
+        tracked_network = port['network_id'] in self._networks
+        if router is None and not tracked_network:
+            return
+
+        self._ports[port['id']] = port
+        if router is not None:
+            router[port['id']] = port['network_id']
+        if tracked_network:
+            for ip_address in port['ip_addresses']:
+                self._addresses[(port['network_id'],
+                                 ip_address)][port['id']] = port
+
+    def _remove_port(self, port_id):
+        port = self._ports.pop(port_id, None)
+        if not port:
+            return
+        for ip_address in port['ip_addresses']:
+            key = (port['network_id'], ip_address)
+            ports = self._addresses.get(key, {})
+            ports.pop(port_id, None)
+            if not ports:
+                self._addresses.pop(key, None)
+        self._routers.get(port['device_id'], {}).pop(port_id, None)
+
+    def _resync(self):
+        networks = list(self._networks)
+        routers = list(self._routers)
+        try:
+            ports = []
+            if networks:
+                ports += self._get_ports_from_server(
+                    {'network_id': networks})
+            if routers:
+                ports += self._get_ports_from_server(
+                    {'device_id': routers,
+                     'device_owner': constants.ROUTER_INTERFACE_OWNERS})
+        except Exception:
+            LOG.exception(_LE("Unable to resynchronize the metadata port "
+                              "index."))
+            return
+
+        self._reset()
+        self._networks.update(networks)
+        self._routers.update((router_id, {}) for router_id in routers)
+        for port in ports:
+            self._add_port(port)
+        LOG.debug("Metadata port index resynchronized: %(ports)d ports of "
+                  "%(networks)d networks and %(routers)d routers",
+                  {'ports': len(self._ports), 'networks': len(networks),
+                   'routers': len(routers)})
+
+    def _load_router(self, router_id):
+        ports = self._get_ports_from_server(
+            {'device_id': [router_id],
+             'device_owner': constants.ROUTER_INTERFACE_OWNERS})
+        for port_id in list(self._routers.get(router_id, ())):
+            self._remove_port(port_id)
+        self._routers[router_id] = {}
+        for port in ports:
+            self._add_port(port)
+
+    def get_router_networks(self, router_id):
+        """Return the networks connected to the given router."""
+        self._start()
+        if router_id not in self._routers:
+            self._load_router(router_id)
+        return tuple(sorted(set(self._routers[router_id].values())))
+
+    def _track_networks(self, networks):
+        untracked = [network_id for network_id in networks
+                     if network_id not in self._networks]
+        if untracked:
+            ports = self._get_ports_from_server({'network_id': untracked})
+            self._networks.update(untracked)
+            for port in ports:
+                self._add_port(port)
+
+    def get_ports(self, ip_address, networks):
+        """Return the ports having the ip address in the given networks."""
+        self._start()
+        self._track_networks(networks)
+        ports = self._lookup(ip_address, networks)
+        if not ports and networks:
+            # The notification of a new port may still be on its way: ask
+            # the server rather than failing the request.
+            for port in self._get_ports_from_server(
+                    {'network_id': list(networks),
+                     'fixed_ips': {'ip_address': [ip_address]}}):
+                self._add_port(port)
+            ports = self._lookup(ip_address, networks)
+        return ports
+
+    def get_router_ports(self, ip_address, router_id):
+        """Return the ports having the ip address behind the given router."""
+        networks = self.get_router_networks(router_id)
+        self._track_networks(networks)
+        ports = self._lookup(ip_address, networks)
+        if not ports:
+            # No port update is sent when an interface is added to a router:
+            # refresh its interfaces before looking the port up again.
+            self._load_router(router_id)
+            ports = self.get_ports(ip_address,
+                                   self.get_router_networks(router_id))
+        return ports
+
+    def _lookup(self, ip_address, networks):
+        return [port for network_id in networks
+                for port in self._addresses.get((network_id, ip_address),
+                                                {}).values()]
+
+    def port_update(self, context, **kwargs):
+        port = kwargs.get('port')
+        LOG.debug("Port %s updated, updating the metadata port index",
+                  port['id'])
+        self._add_port(port)
+
+    def port_delete(self, context, **kwargs):
+        self._remove_port(kwargs.get('port_id'))
+
+    def network_delete(self, context, **kwargs):
+        network_id = kwargs.get('network_id')
+        for port in list(self._ports.values()):
+            if port['network_id'] == network_id:
+                self._remove_port(port['id'])
+        self._networks.discard(network_id)
@@ -53,13 +53,19 @@ class TransactionQueue(Queue.Queue, object):
 
 
 class Connection(object):
-    def __init__(self, connection, timeout, schema_name):
+    def __init__(self, connection, timeout, schema_name, idl_class=None):
+        """
+        :param idl_class: A callable building the IDL from the connection
+                string and the schema helper, ovs.db.idl.Idl by default.
+                It can be used to handle the notifications of the IDL.
+        """
         self.idl = None
         self.connection = connection
         self.timeout = timeout
         self.txns = TransactionQueue(1)
         self.lock = threading.Lock()
         self.schema_name = schema_name
+        self.idl_class = idl_class
 
     def start(self, table_name_list=None):
         """
@@ -93,7 +99,8 @@ class Connection(object):
             else:
                 for table_name in table_name_list:
                     helper.register_table(table_name)
-            self.idl = idl.Idl(self.connection, helper)
+            idl_class = self.idl_class or idl.Idl
+            self.idl = idl_class(self.connection, helper)
             idlutils.wait_for_change(self.idl, self.timeout)
             self.poller = poller.Poller()
             self.thread = threading.Thread(target=self.run)
@@ -15,6 +15,7 @@
 #
 
 import functools
+import itertools
 
 from oslo_config import cfg
 from oslo_log import log as logging
@@ -43,7 +44,15 @@ security_group_opts = [
         default=True,
         help=_('Use ipset to speed-up the iptables based security groups. '
                'Enabling ipset support requires that ipset is installed on L2 '
-               'agent node.'))
+               'agent node.')),
+    cfg.IntOpt(
+        'conntrack_delete_batch_size',
+        default=200,
+        min=1,
+        help=_('Maximum number of connection tracking deletions the '
+               'iptables based firewall applies at once. The deletions are '
+               'queued and applied in the background, the agent runs '
+               'between the batches.'))
 ]
 cfg.CONF.register_opts(security_group_opts, 'SECURITYGROUP')
 
@@ -82,6 +91,79 @@ def disable_security_group_extension_by_config(aliases):
         _disable_extension('allowed-address-pairs', aliases)
 
 
+class SecurityGroupInfoCache(object):
+    """Security group rules and members last received by the agent.
+
+    The digests of the cached information are sent to the server, which
+    answers with what changed since then only.
+    """
+
+    def __init__(self):
+        self.rules = {}  # {sg_id: (digest, rules)}
+        # {sg_id: {ethertype: (buckets, bucket digests)}}
+        self.member_ips = {}
+
+    def get_cached_info(self):
+        return {
+            'security_groups': dict(
+                (sg_id, digest)
+                for sg_id, (digest, rules) in self.rules.items()),
+            'sg_member_ips': dict(
+                (sg_id, dict((ethertype, digests) for ethertype, (
+                    buckets, digests) in member_ips.items()))
+                for sg_id, member_ips in self.member_ips.items())}
+
+    def _set_member_ips(self, sg_id, ethertype, ips):
+        nb_buckets = securitygroups_rpc.get_member_buckets_count(len(ips))
+        buckets = securitygroups_rpc.split_member_ips(ips, nb_buckets)
+        digests = [securitygroups_rpc.get_digest(bucket)
+                   for bucket in buckets]
+        self.member_ips.setdefault(sg_id, {})[ethertype] = (buckets,
+                                                            digests)
+
+    def _update_member_ips(self, sg_id, ethertype, changed_buckets):
+        buckets, digests = self.member_ips[sg_id][ethertype]
+        for index, ips in changed_buckets.items():
+            buckets[int(index)] = set(ips)
+            digests[int(index)] = securitygroups_rpc.get_digest(ips)
+        ips = list(itertools.chain.from_iterable(buckets))
+        nb_buckets = securitygroups_rpc.get_member_buckets_count(len(ips))
+        if not len(buckets) // 4 <= nb_buckets <= len(buckets) * 4:
+            # the group grew or shrank a lot, spread its members again
+            self._set_member_ips(sg_id, ethertype, ips)
+        return ips
+
+    def apply(self, sg_info):
+        """Apply security group information received from the server.
+
+        :returns: sg_info, completed with the cached information the
+        server did not send again.
+        """
+        security_groups = sg_info['security_groups']
+        for sg_id, rules in security_groups.items():
+            self.rules[sg_id] = (securitygroups_rpc.get_rules_digest(rules),
+                                 rules)
+        for sg_id in sg_info.pop('unchanged_security_groups', []):
+            security_groups[sg_id] = self.rules[sg_id][1]
+        sg_member_ips = sg_info['sg_member_ips']
+        for sg_id, member_ips in sg_member_ips.items():
+            for ethertype, ips in member_ips.items():
+                self._set_member_ips(sg_id, ethertype, ips)
+        member_ips_buckets = sg_info.pop('sg_member_ips_buckets', {})
+        for sg_id, changed in member_ips_buckets.items():
+            for ethertype, changed_buckets in changed.items():
+                sg_member_ips.setdefault(sg_id, {})[ethertype] = (
+                    self._update_member_ips(sg_id, ethertype,
+                                            changed_buckets))
+        return sg_info
+
+    def prune(self, sg_ids):
+        """Forget the security groups which are not in sg_ids."""
+        for cache in (self.rules, self.member_ips):
+            for sg_id in set(cache) - set(sg_ids):
+                del cache[sg_id]
+
+
 class SecurityGroupAgentRpc(object):
     """Enables SecurityGroup agent support in agent implementations."""
 
@@ -114,6 +196,8 @@ class SecurityGroupAgentRpc(object):
         # Flag raised when a global refresh is needed
         self.global_refresh_firewall = False
         self._use_enhanced_rpc = None
+        self._use_delta_rpc = None
+        self.sg_info_cache = SecurityGroupInfoCache()
 
     @property
     def use_enhanced_rpc(self):
@@ -122,6 +206,26 @@ class SecurityGroupAgentRpc(object):
                 self._check_enhanced_rpc_is_supported_by_server())
         return self._use_enhanced_rpc
 
+    @property
+    def use_delta_rpc(self):
+        if self._use_delta_rpc is None:
+            self._use_delta_rpc = (
+                self.use_enhanced_rpc and
+                self._check_delta_rpc_is_supported_by_server())
+        return self._use_delta_rpc
+
+    def _check_delta_rpc_is_supported_by_server(self):
+        try:
+            self.plugin_rpc.security_group_info_for_devices(
+                self.context, devices=[], cached_info={})
+        except oslo_messaging.UnsupportedVersion:
+            LOG.warning(_LW('security_group_info_for_devices rpc call with '
+                            'cached_info not supported by the server, the '
+                            'full security group information will be '
+                            'fetched on each update.'))
+            return False
+        return True
+
     def _check_enhanced_rpc_is_supported_by_server(self):
         try:
             self.plugin_rpc.security_group_info_for_devices(
@@ -154,10 +258,24 @@ class SecurityGroupAgentRpc(object):
         LOG.info(_LI("Preparing filters for devices %s"), device_ids)
         self._apply_port_filter(device_ids)
 
+    def _get_security_group_info(self, device_ids):
+        if not self.use_delta_rpc:
+            return self.plugin_rpc.security_group_info_for_devices(
+                self.context, list(device_ids))
+        devices_info = self.plugin_rpc.security_group_info_for_devices(
+            self.context, list(device_ids),
+            cached_info=self.sg_info_cache.get_cached_info())
+        try:
+            return self.sg_info_cache.apply(devices_info)
+        except KeyError:
+            # the cache was pruned while waiting for the server
+            devices_info = self.plugin_rpc.security_group_info_for_devices(
+                self.context, list(device_ids), cached_info={})
+            return self.sg_info_cache.apply(devices_info)
+
     def _apply_port_filter(self, device_ids, update_filter=False):
         if self.use_enhanced_rpc:
-            devices_info = self.plugin_rpc.security_group_info_for_devices(
-                self.context, list(device_ids))
+            devices_info = self._get_security_group_info(device_ids)
             devices = devices_info['devices']
             security_groups = devices_info['security_groups']
             security_group_member_ips = devices_info['sg_member_ips']
@@ -241,6 +359,10 @@ class SecurityGroupAgentRpc(object):
                 if not device:
                     continue
                 self.firewall.remove_port_filter(device)
+        self.sg_info_cache.prune(set(itertools.chain.from_iterable(
+            (device.get('security_groups') or []) +
+            (device.get('security_group_source_groups') or [])
+            for device in self.firewall.ports.values())))
 
     @skip_if_noopfirewall_or_firewall_disabled
     def refresh_firewall(self, device_ids=None):
@@ -71,23 +71,36 @@ class DhcpRpcCallback(object):
     #     1.6 - Removed get_active_networks. It's not used by reference
     #           DHCP agent since Havana, so similar rationale for not bumping
     #           the major version as above applies here too.
+    #     1.7 - Added get_active_network_ids and the network_ids argument
+    #           of get_active_networks_info, to sync networks in chunks.
 
     target = oslo_messaging.Target(
         namespace=n_const.RPC_NAMESPACE_DHCP_PLUGIN,
-        version='1.6')
+        version='1.7')
 
     def _get_active_networks(self, context, **kwargs):
-        """Retrieve and return a list of the active networks."""
+        """Retrieve and return a list of the active networks.
+
+        If network_ids is given, only the active networks among them are
+        returned, and networks are not auto scheduled.
+        """
         host = kwargs.get('host')
+        network_ids = kwargs.get('network_ids')
         plugin = manager.NeutronManager.get_plugin()
         if utils.is_extension_supported(
             plugin, constants.DHCP_AGENT_SCHEDULER_EXT_ALIAS):
-            if cfg.CONF.network_auto_schedule:
-                plugin.auto_schedule_networks(context, host)
-            nets = plugin.list_active_networks_on_active_dhcp_agent(
-                context, host)
+            if network_ids is None:
+                if cfg.CONF.network_auto_schedule:
+                    plugin.auto_schedule_networks(context, host)
+                nets = plugin.list_active_networks_on_active_dhcp_agent(
+                    context, host)
+            else:
+                nets = plugin.list_active_networks_on_active_dhcp_agent(
+                    context, host, network_ids=network_ids)
         else:
             filters = dict(admin_state_up=[True])
+            if network_ids is not None:
+                filters['id'] = network_ids
             nets = plugin.get_networks(context, filters=filters)
         return nets
 
@@ -130,11 +143,24 @@ class DhcpRpcCallback(object):
             grouped[net_id] = list(values)
         return grouped
 
+    def get_active_network_ids(self, context, **kwargs):
+        """Returns the IDs of the active networks of the agent."""
+        host = kwargs.get('host')
+        LOG.debug('get_active_network_ids from %s', host)
+        return [network['id']
+                for network in self._get_active_networks(context, **kwargs)]
+
     def get_active_networks_info(self, context, **kwargs):
-        """Returns all the networks/subnets/ports in system."""
+        """Returns all the networks/subnets/ports in system.
+
+        If network_ids is given, only the active networks among them are
+        returned.
+        """
         host = kwargs.get('host')
         LOG.debug('get_active_networks_info from %s', host)
         networks = self._get_active_networks(context, **kwargs)
+        if not networks:
+            return []
         plugin = manager.NeutronManager.get_plugin()
         filters = {'network_id': [network['id'] for network in networks]}
         ports = plugin.get_ports(context, filters=filters)
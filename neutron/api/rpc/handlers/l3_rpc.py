@@ -13,6 +13,8 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import hashlib
+
 from neutron_lib import constants
 from neutron_lib import exceptions
 from oslo_config import cfg
@@ -48,7 +50,8 @@ class L3RpcCallback(object):
     # 1.7 Added method delete_agent_gateway_port for DVR Routers
     # 1.8 Added address scope information
     # 1.9 Added get_router_ids
-    target = oslo_messaging.Target(version='1.9')
+    # 1.10 Added the revisions of the routers and sync_changed_routers
+    target = oslo_messaging.Target(version='1.10')
 
     @property
     def plugin(self):
@@ -85,8 +88,44 @@ class L3RpcCallback(object):
         @return: a list of routers
                  with their interfaces and floating_ips
         """
-        router_ids = kwargs.get('router_ids')
-        host = kwargs.get('host')
+        routers = self._get_sync_routers(kwargs.get('host'),
+                                         kwargs.get('router_ids'))
+        LOG.debug("Routers returned to l3 agent:\n %s",
+                  utils.DelayedStringRenderer(jsonutils.dumps,
+                                              routers, indent=5))
+        return routers
+
+    @db_api.retry_db_errors
+    def sync_changed_routers(self, context, **kwargs):
+        """Sync the routers which changed since an agent processed them.
+
+        @param context: contain user information
+        @param kwargs: host, router_ids, revisions
+                       revisions maps the ids of the routers known by the
+                       agent to their revision
+        @return: a dict with the routers whose revision is not the one
+                 known by the agent, and the ids of the other routers
+        """
+        revisions = kwargs.get('revisions') or {}
+        routers = self._get_sync_routers(kwargs.get('host'),
+                                         kwargs.get('router_ids'))
+        changed_routers = []
+        unchanged_router_ids = []
+        for router in routers:
+            if (revisions.get(router['id']) ==
+                    router[n_const.ROUTER_REVISION_KEY]):
+                unchanged_router_ids.append(router['id'])
+            else:
+                changed_routers.append(router)
+        LOG.debug("Routers returned to l3 agent, %(unchanged)d unchanged "
+                  "routers omitted:\n %(routers)s",
+                  {'unchanged': len(unchanged_router_ids),
+                   'routers': utils.DelayedStringRenderer(
+                       jsonutils.dumps, changed_routers, indent=5)})
+        return {'routers': changed_routers,
+                'unchanged_router_ids': unchanged_router_ids}
+
+    def _get_sync_routers(self, host, router_ids):
         context = neutron_context.get_admin_context()
         if utils.is_extension_supported(
             self.l3plugin, constants.L3_AGENT_SCHEDULER_EXT_ALIAS):
@@ -98,11 +137,21 @@ class L3RpcCallback(object):
         if utils.is_extension_supported(
             self.plugin, constants.PORT_BINDING_EXT_ALIAS):
             self._ensure_host_set_on_ports(context, host, routers)
-        LOG.debug("Routers returned to l3 agent:\n %s",
-                  utils.DelayedStringRenderer(jsonutils.dumps,
-                                              routers, indent=5))
+        for router in routers:
+            router[n_const.ROUTER_REVISION_KEY] = self._get_router_revision(
+                router)
         return routers
 
+    @staticmethod
+    def _get_router_revision(router):
+        # The revision numbers of the resources do not cover everything a
+        # router brings to the agent (the floating IPs and subnets do not
+        # revise the router, the port bindings and HA states have no
+        # revision), so the revision is a digest of the whole router.
+        router.pop(n_const.ROUTER_REVISION_KEY, None)
+        data = jsonutils.dump_as_bytes(router, sort_keys=True)
+        return hashlib.sha1(data).hexdigest()
+
     def _ensure_host_set_on_ports(self, context, host, routers):
         for router in routers:
             LOG.debug("Checking router: %(id)s for host: %(host)s",
@@ -12,8 +12,12 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import hashlib
+import zlib
+
 from oslo_log import log as logging
 import oslo_messaging
+from oslo_serialization import jsonutils
 
 from neutron._i18n import _LW
 from neutron.common import constants
@@ -24,6 +28,74 @@ from neutron import manager
 
 LOG = logging.getLogger(__name__)
 
+# The member IPs of a remote security group are spread over buckets by a
+# hash of the IP, so that an agent can fetch only the buckets which changed
+# since it cached them.
+MEMBERS_PER_BUCKET = 32
+MAX_MEMBER_BUCKETS = 1024
+
+
+def get_member_buckets_count(nb_members):
+    return max(1, min(MAX_MEMBER_BUCKETS, nb_members // MEMBERS_PER_BUCKET))
+
+
+def split_member_ips(member_ips, nb_buckets):
+    """Split member IPs into nb_buckets sets."""
+    buckets = [set() for i in range(nb_buckets)]
+    for ip in member_ips:
+        index = (zlib.crc32(ip.encode('utf-8')) & 0xffffffff) % nb_buckets
+        buckets[index].add(ip)
+    return buckets
+
+
+def get_digest(items):
+    """Return a digest of strings, whatever their order."""
+    data = '\n'.join(sorted(items)).encode('utf-8')
+    return hashlib.sha1(data).hexdigest()[:16]
+
+
+def get_rules_digest(rules):
+    return get_digest(jsonutils.dumps(rule, sort_keys=True)
+                      for rule in rules)
+
+
+def make_security_group_info_delta(sg_info, cached_info):
+    """Strip from security group information what an agent already has.
+
+    :param sg_info: the security_group_info_for_ports result
+    :param cached_info: digests of what the agent has:
+    {
+      'security_groups': {sg_id: rules digest},
+      'sg_member_ips': {sg_id: {ethertype: [bucket digest, ...]}}
+    }
+    :returns: sg_info, where the security groups whose rules digest did not
+    change are only listed in 'unchanged_security_groups', and the member
+    IPs of the groups cached by the agent are replaced, in
+    'sg_member_ips_buckets', by the buckets whose digest changed:
+    {sg_id: {ethertype: {bucket index: [ip, ...]}}}
+    """
+    cached_rules = cached_info.get('security_groups', {})
+    cached_member_ips = cached_info.get('sg_member_ips', {})
+    sg_info['unchanged_security_groups'] = []
+    for sg_id, rules in list(sg_info['security_groups'].items()):
+        if cached_rules.get(sg_id) == get_rules_digest(rules):
+            del sg_info['security_groups'][sg_id]
+            sg_info['unchanged_security_groups'].append(sg_id)
+    sg_info['sg_member_ips_buckets'] = {}
+    for sg_id, member_ips in sg_info['sg_member_ips'].items():
+        for ethertype, ips in list(member_ips.items()):
+            digests = cached_member_ips.get(sg_id, {}).get(ethertype)
+            if not digests:
+                continue
+            buckets = split_member_ips(ips, len(digests))
+            sg_info['sg_member_ips_buckets'].setdefault(sg_id, {})[
+                ethertype] = dict(
+                    (str(index), list(bucket))
+                    for index, bucket in enumerate(buckets)
+                    if get_digest(bucket) != digests[index])
+            del member_ips[ethertype]
+    return sg_info
+
 
 class SecurityGroupServerRpcApi(object):
     """RPC client for security group methods in the plugin.
@@ -47,12 +119,17 @@ class SecurityGroupServerRpcApi(object):
         return cctxt.call(context, 'security_group_rules_for_devices',
                           devices=devices)
 
-    def security_group_info_for_devices(self, context, devices):
+    def security_group_info_for_devices(self, context, devices,
+                                        cached_info=None):
         LOG.debug("Get security group information for devices via rpc %r",
                   devices)
-        cctxt = self.client.prepare(version='1.2')
+        if cached_info is None:
+            cctxt = self.client.prepare(version='1.2')
+            return cctxt.call(context, 'security_group_info_for_devices',
+                              devices=devices)
+        cctxt = self.client.prepare(version='1.3')
         return cctxt.call(context, 'security_group_info_for_devices',
-                          devices=devices)
+                          devices=devices, cached_info=cached_info)
 
 
 class SecurityGroupServerRpcCallback(object):
@@ -66,10 +143,11 @@ class SecurityGroupServerRpcCallback(object):
     # API version history:
     #   1.1 - Initial version
     #   1.2 - security_group_info_for_devices introduced as an optimization
+    #   1.3 - cached_info argument added to security_group_info_for_devices
 
     # NOTE: target must not be overridden in subclasses
     # to keep RPC API version consistent across plugins.
-    target = oslo_messaging.Target(version='1.2',
+    target = oslo_messaging.Target(version='1.3',
                                    namespace=constants.RPC_NAMESPACE_SECGROUP)
 
     @property
@@ -100,6 +178,8 @@ class SecurityGroupServerRpcCallback(object):
         """Return security group information for requested devices.
 
         :params devices: list of devices
+        :params cached_info: optional digests of the security group
+        information cached by the agent, see make_security_group_info_delta
         :returns:
         sg_info{
           'security_groups': {sg_id: [rule1, rule2]}
@@ -110,8 +190,12 @@ class SecurityGroupServerRpcCallback(object):
         Note that sets are serialized into lists by rpc code.
         """
         devices_info = kwargs.get('devices')
+        cached_info = kwargs.get('cached_info')
         ports = self._get_devices_info(context, devices_info)
-        return self.plugin.security_group_info_for_ports(context, ports)
+        sg_info = self.plugin.security_group_info_for_ports(context, ports)
+        if cached_info is not None:
+            sg_info = make_security_group_info_delta(sg_info, cached_info)
+        return sg_info
 
 
 class SecurityGroupAgentRpcApiMixin(object):
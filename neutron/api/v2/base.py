@@ -243,6 +243,11 @@ class Controller(object):
             return api_common.SortingEmulatedHelper(request, self._attr_info)
         return api_common.NoSortingHelper(request, self._attr_info)
 
+    @staticmethod
+    def _match_filters(obj, filters):
+        return filters is not None and all(
+            obj.get(field) == value for field, value in six.iteritems(filters))
+
     def _items(self, request, do_authz=False, parent_id=None):
         """Retrieves and formats a list of elements of the requested entity."""
         # NOTE(salvatore-orlando): The following ensures that fields which
@@ -253,6 +258,18 @@ class Controller(object):
         filters = api_common.get_filters(request, self._attr_info,
                                          ['fields', 'sort_key', 'sort_dir',
                                           'limit', 'marker', 'page_reverse'])
+        authz_filters, authz_exact = None, False
+        if do_authz:
+            # Objects matching authz_filters are visible without checking
+            # the policy on each of them. When the policy only lets the
+            # caller see those objects, the plugin filters them in the query
+            authz_filters, authz_exact = policy.get_query_filters(
+                request.context, self._plugin_handlers[self.SHOW],
+                self._attr_info, pluralized=self._collection)
+        if authz_exact:
+            for field, value in six.iteritems(authz_filters):
+                filters[field] = [v for v in filters.get(field, [value])
+                                  if v == value]
         kwargs = {'filters': filters,
                   'fields': original_fields}
         sorting_helper = self._get_sorting_helper(request)
@@ -271,13 +288,17 @@ class Controller(object):
         if do_authz:
             # FIXME(salvatore-orlando): obj_getter might return references to
             # other resources. Must check authZ on them too.
-            # Omit items from list that should not be visible
+            # Omit items from list that should not be visible. Plugins are
+            # not required to honour every filter, so objects not matching
+            # authz_filters are still discarded when they are exact
             obj_list = [obj for obj in obj_list
-                        if policy.check(request.context,
-                                        self._plugin_handlers[self.SHOW],
-                                        obj,
-                                        plugin=self._plugin,
-                                        pluralized=self._collection)]
+                        if self._match_filters(obj, authz_filters) or
+                        (not authz_exact and
+                         policy.check(request.context,
+                                      self._plugin_handlers[self.SHOW],
+                                      obj,
+                                      plugin=self._plugin,
+                                      pluralized=self._collection))]
         # Use the first element in the list for discriminating which attributes
         # should be filtered out because of authZ policies
         # fields_to_add contains a list of attributes added for request policy
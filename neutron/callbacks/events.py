@@ -42,3 +42,4 @@ ABORT_DELETE = 'abort_delete'
 ABORT = 'abort_'
 BEFORE = 'before_'
 PRECOMMIT = 'precommit_'
+AFTER = 'after_'
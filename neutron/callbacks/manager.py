@@ -11,7 +11,9 @@
 #    under the License.
 
 import collections
+import time
 
+import eventlet
 from oslo_log import log as logging
 from oslo_utils import reflection
 
@@ -22,14 +24,18 @@ from neutron.db import api as db_api
 
 LOG = logging.getLogger(__name__)
 
+# greenthreads running the async safe callbacks of the AFTER events
+ASYNC_POOL_SIZE = 64
+
 
 class CallbacksManager(object):
     """A callback system that allows objects to cooperate in a loose manner."""
 
     def __init__(self):
+        self._async_pool = eventlet.GreenPool(ASYNC_POOL_SIZE)
         self.clear()
 
-    def subscribe(self, callback, resource, event):
+    def subscribe(self, callback, resource, event, async_safe=False):
         """Subscribe callback for a resource event.
 
         The same callback may register for more than one event.
@@ -37,6 +43,12 @@ class CallbacksManager(object):
         :param callback: the callback. It must raise or return a boolean.
         :param resource: the resource. It must be a valid resource.
         :param event: the event. It must be a valid event.
+        :param async_safe: whether the callback may run in the background
+                           for the AFTER events, concurrently with the other
+                           callbacks and once the notifier has moved on.
+                           It then gets a copy of the context, with its own
+                           database session, and must not rely on the order
+                           of the notifications.
         """
         LOG.debug("Subscribe: %(callback)s %(resource)s %(event)s",
                   {'callback': callback, 'resource': resource, 'event': event})
@@ -49,6 +61,10 @@ class CallbacksManager(object):
             # prior to enlisting the callback.
             self._callbacks[resource][event] = {}
             self._callbacks[resource][event][callback_id] = callback
+        if async_safe:
+            self._async_safe.add((resource, event, callback_id))
+        else:
+            self._async_safe.discard((resource, event, callback_id))
         # We keep a copy of callbacks to speed the unsubscribe operation.
         if callback_id not in self._index:
             self._index[callback_id] = collections.defaultdict(set)
@@ -70,6 +86,7 @@ class CallbacksManager(object):
             return
         if resource and event:
             del self._callbacks[resource][event][callback_id]
+            self._async_safe.discard((resource, event, callback_id))
             self._index[callback_id][resource].discard(event)
             if not self._index[callback_id][resource]:
                 del self._index[callback_id][resource]
@@ -90,6 +107,7 @@ class CallbacksManager(object):
             if resource in self._index[callback_id]:
                 for event in self._index[callback_id][resource]:
                     del self._callbacks[resource][event][callback_id]
+                    self._async_safe.discard((resource, event, callback_id))
                 del self._index[callback_id][resource]
                 if not self._index[callback_id]:
                     del self._index[callback_id]
@@ -105,6 +123,7 @@ class CallbacksManager(object):
             for resource, resource_events in self._index[callback_id].items():
                 for event in resource_events:
                     del self._callbacks[resource][event][callback_id]
+                    self._async_safe.discard((resource, event, callback_id))
             del self._index[callback_id]
 
     @db_api.reraise_as_retryrequest
@@ -133,6 +152,15 @@ class CallbacksManager(object):
         """Brings the manager to a clean slate."""
         self._callbacks = collections.defaultdict(dict)
         self._index = collections.defaultdict(dict)
+        # (resource, event, callback_id) of the async safe callbacks
+        self._async_safe = set()
+        # callback_id -> call statistics
+        self._stats = collections.defaultdict(collections.Counter)
+
+    def get_stats(self):
+        """Return the calls, errors and time spent per callback."""
+        return {callback_id: dict(stats)
+                for callback_id, stats in self._stats.items()}
 
     def _notify_loop(self, resource, event, trigger, **kwargs):
         """The notification loop."""
@@ -141,26 +169,65 @@ class CallbacksManager(object):
 
         errors = []
         callbacks = list(self._callbacks[resource].get(event, {}).items())
-        # TODO(armax): consider using a GreenPile
+        if event.startswith(events.AFTER):
+            # The errors of the AFTER events are not reported to the
+            # notifier, which does not need to wait for these callbacks.
+            sync_callbacks = []
+            for callback_id, callback in callbacks:
+                if (resource, event, callback_id) in self._async_safe:
+                    self._async_pool.spawn_n(
+                        self._call, callback_id, callback, resource, event,
+                        trigger, **_copy_context(kwargs))
+                else:
+                    sync_callbacks.append((callback_id, callback))
+            callbacks = sync_callbacks
         for callback_id, callback in callbacks:
-            try:
-                LOG.debug("Calling callback %s", callback_id)
-                callback(resource, event, trigger, **kwargs)
-            except Exception as e:
-                LOG.exception(_LE("Error during notification for "
-                                  "%(callback)s %(resource)s, %(event)s"),
-                              {'callback': callback_id,
-                               'resource': resource,
-                               'event': event})
-                errors.append(exceptions.NotificationError(callback_id, e))
+            error = self._call(callback_id, callback, resource, event,
+                               trigger, **kwargs)
+            if error:
+                errors.append(error)
         return errors
 
+    def _call(self, callback_id, callback, resource, event, trigger,
+              **kwargs):
+        """Call a callback, returning its NotificationError if it fails."""
+        stats = self._stats[callback_id]
+        start = time.time()
+        try:
+            LOG.debug("Calling callback %s", callback_id)
+            callback(resource, event, trigger, **kwargs)
+        except Exception as e:
+            LOG.exception(_LE("Error during notification for "
+                              "%(callback)s %(resource)s, %(event)s"),
+                          {'callback': callback_id,
+                           'resource': resource,
+                           'event': event})
+            stats['errors'] += 1
+            return exceptions.NotificationError(callback_id, e)
+        finally:
+            elapsed = time.time() - start
+            stats['calls'] += 1
+            stats['time'] += elapsed
+            stats['max_time'] = max(stats['max_time'], elapsed)
+
     def _find(self, callback):
         """Return the callback_id if found, None otherwise."""
         callback_id = _get_id(callback)
         return callback_id if callback_id in self._index else None
 
 
+def _copy_context(kwargs):
+    """Return the kwargs with a copy of their context, if any.
+
+    The copy gets its own database session, as the session of the context
+    must not be used by several greenthreads.
+    """
+    context = kwargs.get('context')
+    if context is None or not hasattr(context, 'to_dict'):
+        return kwargs
+    return dict(kwargs, context=context.from_dict(context.to_dict()))
+
+
 def _get_id(callback):
     """Return a unique identifier for the callback."""
     # TODO(armax): consider using something other than names
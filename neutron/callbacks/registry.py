@@ -24,8 +24,8 @@ def _get_callback_manager():
     return CALLBACK_MANAGER
 
 
-def subscribe(callback, resource, event):
-    _get_callback_manager().subscribe(callback, resource, event)
+def subscribe(callback, resource, event, async_safe=False):
+    _get_callback_manager().subscribe(callback, resource, event, async_safe)
 
 
 def unsubscribe(callback, resource, event):
@@ -44,5 +44,9 @@ def notify(resource, event, trigger, **kwargs):
     _get_callback_manager().notify(resource, event, trigger, **kwargs)
 
 
+def get_stats():
+    return _get_callback_manager().get_stats()
+
+
 def clear():
     _get_callback_manager().clear()
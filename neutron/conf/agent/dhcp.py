@@ -58,7 +58,18 @@ DHCP_AGENT_OPTS = [
     cfg.IntOpt('num_sync_threads', default=4,
                help=_('Number of threads to use during sync process. '
                       'Should not exceed connection pool size configured on '
-                      'server.'))
+                      'server.')),
+    cfg.IntOpt('sync_networks_chunk_size', default=100, min=0,
+               help=_('Number of networks fetched from the server at once '
+                      'during a full sync. The next networks are fetched '
+                      'while the previous ones are being configured. Set it '
+                      'to 0 to fetch all the networks in a single request.')),
+    cfg.FloatOpt('reload_allocations_interval', default=1,
+                 help=_("Number of seconds during which the port updates and "
+                        "deletions of a network are gathered before its DHCP "
+                        "allocations are reloaded once for all of them. Set "
+                        "it to 0 to reload the allocations on each port "
+                        "update or deletion.")),
 ]
 
 DHCP_OPTS = [
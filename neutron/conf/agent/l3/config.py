@@ -84,6 +84,14 @@ OPTS = [
                       'neutron.agent.linux.pd_drivers namespace. See '
                       'setup.cfg for entry points included with the neutron '
                       'source.')),
+    cfg.IntOpt('router_workers',
+               default=0,
+               min=0,
+               help=_("Number of separate worker processes processing the "
+                      "routers. The routers are sharded across the workers "
+                      "by router id. With the default of 0, the routers are "
+                      "processed by the agent process. Only supported in "
+                      "the 'legacy' agent mode.")),
     cfg.BoolOpt('enable_metadata_proxy', default=True,
                 help=_("Allow running metadata proxy.")),
     cfg.StrOpt('metadata_access_mark',
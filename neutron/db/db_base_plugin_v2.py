@@ -903,6 +903,9 @@ class NeutronDbPluginV2(db_base_plugin_common.DbBasePluginCommon,
             # Delete related ipam subnet manually,
             # since there is no FK relationship
             self.ipam.delete_subnet(context, id)
+            if subnet.subnetpool_id:
+                subnet_alloc.release_subnetpool_prefixes(
+                    context, subnet.subnetpool_id, [subnet.cidr])
 
     def get_subnet(self, context, id, fields=None):
         subnet = self._get_subnet(context, id)
@@ -1041,8 +1044,12 @@ class NeutronDbPluginV2(db_base_plugin_common.DbBasePluginCommon,
             address_scope_changed = (
                 orig_sp.address_scope_id != reader.address_scope_id)
 
+            added_prefixes = (netaddr.IPSet(reader.prefixes) -
+                              netaddr.IPSet(orig_sp.prefixes or []))
             orig_sp.update_fields(reader.subnetpool)
             orig_sp.update()
+            subnet_alloc.release_subnetpool_prefixes(
+                context, id, added_prefixes.iter_cidrs())
 
         if address_scope_changed:
             # Notify about the update of subnetpool's address scope
@@ -1098,7 +1105,9 @@ class NeutronDbPluginV2(db_base_plugin_common.DbBasePluginCommon,
                 device_owner=device_owner)
 
     def create_port_bulk(self, context, ports):
-        return self._create_bulk('port', context, ports)
+        with context.session.begin(subtransactions=True):
+            self.ipam.allocate_ips_for_ports(context, ports['ports'])
+            return self._create_bulk('port', context, ports)
 
     def _create_db_port_obj(self, context, port_data):
         mac_address = port_data.pop('mac_address', None)
@@ -449,6 +449,15 @@ class IpamBackendMixin(db_base_plugin_common.DbBasePluginCommon):
                             original=prev_ips,
                             remove=remove_ips)
 
+    def allocate_ips_for_ports(self, context, ports):
+        """Prepare the IP allocation of ports created in bulk.
+
+        Backends able to allocate the addresses of several ports at once
+        override this, addresses are allocated port by port otherwise.
+
+        :param ports: list of port dicts, as found in the bulk request
+        """
+
     def delete_port(self, context, port_id):
         query = (context.session.query(models_v2.Port).
                  enable_eagerloads(False).filter_by(id=port_id))
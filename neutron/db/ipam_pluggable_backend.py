@@ -13,9 +13,11 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import collections
 import copy
 
 import netaddr
+from neutron_lib.api import validators
 from neutron_lib import constants
 from neutron_lib import exceptions as n_exc
 from oslo_db import exception as db_exc
@@ -35,6 +37,10 @@ from neutron.ipam import requests as ipam_req
 
 LOG = logging.getLogger(__name__)
 
+# Key of the port dict holding the addresses allocated by
+# allocate_ips_for_ports until the port is created.
+PREALLOCATED_IPS = '_preallocated_ips'
+
 
 class IpamPluggableBackend(ipam_backend_mixin.IpamBackendMixin):
 
@@ -152,7 +158,54 @@ class IpamPluggableBackend(ipam_backend_mixin.IpamBackendMixin):
         ipam_driver = driver.Pool.get_instance(None, context)
         ipam_driver.remove_subnet(subnet_id)
 
+    def allocate_ips_for_ports(self, context, ports):
+        """Allocate at once the addresses of ports created in bulk.
+
+        This handles the ports which ask for automatic addresses and are not
+        bound to a host: all the ports of a network get their address from
+        each of its IPv4 and DHCPv6 stateful subnet groups with a single
+        allocate_many call. The addresses are kept in the port dict until
+        allocate_ips_for_port_and_store stores them with the port.
+        """
+        ports_by_network = collections.defaultdict(list)
+        for port in ports:
+            p = port['port']
+            p.pop(PREALLOCATED_IPS, None)
+            if (p.get('fixed_ips') is constants.ATTR_NOT_SPECIFIED and
+                    not validators.is_attr_set(p.get(portbindings.HOST_ID))):
+                ports_by_network[p['network_id']].append(p)
+        if not ports_by_network:
+            return
+        ipam_driver = driver.Pool.get_instance(None, context)
+        factory = ipam_driver.get_address_request_factory()
+        for network_id, net_ports in ports_by_network.items():
+            subnets = self._ipam_get_subnets(context, network_id=network_id,
+                                             host=None)
+            v4, v6_stateful, v6_stateless = self._classify_subnets(
+                context, subnets)
+            preallocated = [[] for p in net_ports]
+            for subnets in (v4, v6_stateful):
+                if not subnets:
+                    continue
+                ip_dict = {'subnet_id': subnets[0]['id']}
+                requests = [factory.get_request(context, p, ip_dict)
+                            for p in net_ports]
+                allocator = ipam_driver.get_allocator(
+                    [s['id'] for s in subnets])
+                try:
+                    allocated = allocator.allocate_many(requests)
+                except ipam_exc.IpAddressGenerationFailureAllSubnets:
+                    raise n_exc.IpAddressGenerationFailure(net_id=network_id)
+                for ips, (ip_address, subnet_id) in zip(preallocated,
+                                                        allocated):
+                    ips.append({'ip_address': ip_address,
+                                'subnet_id': subnet_id})
+            for p, ips in zip(net_ports, preallocated):
+                p[PREALLOCATED_IPS] = ips
+
     def allocate_ips_for_port_and_store(self, context, port, port_id):
+        # Addresses allocated by allocate_ips_for_ports are only stored
+        preallocated = port['port'].pop(PREALLOCATED_IPS, None)
         # Make a copy of port dict to prevent changing
         # incoming dict by adding 'id' to it.
         # Deepcopy doesn't work correctly in this case, because copy of
@@ -163,7 +216,8 @@ class IpamPluggableBackend(ipam_backend_mixin.IpamBackendMixin):
         network_id = port_copy['port']['network_id']
         ips = []
         try:
-            ips = self._allocate_ips_for_port(context, port_copy)
+            ips = self._allocate_ips_for_port(context, port_copy,
+                                              preallocated)
             for ip in ips:
                 ip_address = ip['ip_address']
                 subnet_id = ip['subnet_id']
@@ -181,12 +235,14 @@ class IpamPluggableBackend(ipam_backend_mixin.IpamBackendMixin):
                                         ipam_driver, port_copy['port'], ips,
                                         revert_on_fail=False)
 
-    def _allocate_ips_for_port(self, context, port):
+    def _allocate_ips_for_port(self, context, port, preallocated=None):
         """Allocate IP addresses for the port. IPAM version.
 
         If port['fixed_ips'] is set to 'ATTR_NOT_SPECIFIED', allocate IP
         addresses for the port. If port['fixed_ips'] contains an IP address or
         a subnet_id then allocate an IP address accordingly.
+        If preallocated is set, it holds the addresses already allocated for
+        the port, only SLAAC addresses remain to be allocated.
         """
         p = port['port']
         subnets = self._ipam_get_subnets(context,
@@ -197,7 +253,9 @@ class IpamPluggableBackend(ipam_backend_mixin.IpamBackendMixin):
             context, subnets)
 
         fixed_configured = p['fixed_ips'] is not constants.ATTR_NOT_SPECIFIED
-        if fixed_configured:
+        if preallocated is not None:
+            ips = []
+        elif fixed_configured:
             ips = self._test_fixed_ips_for_port(context,
                                                 p["network_id"],
                                                 p['fixed_ips'],
@@ -222,7 +280,8 @@ class IpamPluggableBackend(ipam_backend_mixin.IpamBackendMixin):
                             'eui64_address': True,
                             'mac': p['mac_address']})
         ipam_driver = driver.Pool.get_instance(None, context)
-        return self._ipam_allocate_ips(context, ipam_driver, p, ips)
+        return (preallocated or []) + self._ipam_allocate_ips(
+            context, ipam_driver, p, ips)
 
     def _test_fixed_ips_for_port(self, context, network_id, fixed_ips,
                                  device_owner, subnets):
@@ -1672,8 +1672,11 @@ class L3RpcNotifierMixin(object):
 
     @staticmethod
     def _subscribe_callbacks():
+        # The routers updated notification only tells the agents to fetch
+        # the routers again, it does not need to delay the port deletion.
         registry.subscribe(
-            _notify_routers_callback, resources.PORT, events.AFTER_DELETE)
+            _notify_routers_callback, resources.PORT, events.AFTER_DELETE,
+            async_safe=True)
         registry.subscribe(
             _notify_subnet_gateway_ip_update, resources.SUBNET_GATEWAY,
             events.AFTER_UPDATE)
@@ -0,0 +1,82 @@
+# Copyright 2016 OpenStack Foundation
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+#
+
+"""rebuild ipam availability ranges
+
+The reference IPAM driver now keeps its availability ranges equal to the
+allocation pools minus the allocated addresses, while they were left as
+created with the pools until now.
+
+Revision ID: e4b7b01d6c0f
+Revises: 7d9d8eeec6ad
+Create Date: 2016-08-01 10:12:43.241538
+
+"""
+
+# revision identifiers, used by Alembic.
+revision = 'e4b7b01d6c0f'
+down_revision = '7d9d8eeec6ad'
+
+import collections
+
+from alembic import op
+import netaddr
+import sqlalchemy as sa
+
+
+pools = sa.Table(
+    'ipamallocationpools', sa.MetaData(),
+    sa.Column('id', sa.String(length=36), nullable=False),
+    sa.Column('ipam_subnet_id', sa.String(length=36), nullable=False),
+    sa.Column('first_ip', sa.String(length=64), nullable=False),
+    sa.Column('last_ip', sa.String(length=64), nullable=False))
+
+allocations = sa.Table(
+    'ipamallocations', sa.MetaData(),
+    sa.Column('ip_address', sa.String(length=64), nullable=False),
+    sa.Column('status', sa.String(length=36)),
+    sa.Column('ipam_subnet_id', sa.String(length=36), nullable=False))
+
+ranges = sa.Table(
+    'ipamavailabilityranges', sa.MetaData(),
+    sa.Column('allocation_pool_id', sa.String(length=36), nullable=False),
+    sa.Column('first_ip', sa.String(length=64), nullable=False),
+    sa.Column('last_ip', sa.String(length=64), nullable=False))
+
+
+def rebuild_availability_ranges():
+    session = sa.orm.Session(bind=op.get_bind())
+    with session.begin(subtransactions=True):
+        allocated = collections.defaultdict(netaddr.IPSet)
+        for subnet_id, ip_address in session.query(
+                allocations.c.ipam_subnet_id, allocations.c.ip_address):
+            allocated[subnet_id].add(ip_address)
+        session.execute(ranges.delete())
+        for pool_id, subnet_id, first_ip, last_ip in session.query(pools):
+            available = (netaddr.IPSet(netaddr.IPRange(first_ip, last_ip)) -
+                         allocated[subnet_id])
+            rows = [{'allocation_pool_id': pool_id,
+                     'first_ip': str(netaddr.IPAddress(ip_range.first,
+                                                       ip_range.version)),
+                     'last_ip': str(netaddr.IPAddress(ip_range.last,
+                                                      ip_range.version))}
+                    for ip_range in available.iter_ipranges()]
+            if rows:
+                session.execute(ranges.insert(), rows)
+    session.commit()
+
+
+def upgrade():
+    rebuild_availability_ranges()
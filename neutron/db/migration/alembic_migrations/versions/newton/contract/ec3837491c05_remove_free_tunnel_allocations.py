@@ -0,0 +1,46 @@
+# Copyright 2016 OpenStack Foundation
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+#
+
+"""remove free tunnel allocations
+
+The free tunnel ids are held as ranges in ml2_tunnel_free_ranges, the rows
+of the free ids are only left in the allocations tables for the servers not
+using the free ranges yet.
+
+Revision ID: ec3837491c05
+Revises: e4b7b01d6c0f
+Create Date: 2016-08-08 15:42:07.518204
+
+"""
+
+# revision identifiers, used by Alembic.
+revision = 'ec3837491c05'
+down_revision = 'e4b7b01d6c0f'
+depends_on = ('5a4477ffc3f1',)
+
+from alembic import op
+import sqlalchemy as sa
+
+
+TABLES = ('ml2_gre_allocations', 'ml2_vxlan_allocations',
+          'ml2_geneve_allocations')
+
+
+def upgrade():
+    for table_name in TABLES:
+        table = sa.Table(table_name, sa.MetaData(),
+                         sa.Column('allocated', sa.Boolean(),
+                                   nullable=False))
+        op.execute(table.delete().where(table.c.allocated == sa.false()))
@@ -0,0 +1,46 @@
+# Copyright 2016 OpenStack Foundation
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+#
+
+"""add ml2 tunnel free ranges
+
+The free tunnel ids are held as ranges, filled by the tunnel type drivers
+from their configured ranges when the server starts, which also removes the
+rows of the free ids from the allocations tables.
+
+Revision ID: 5a4477ffc3f1
+Revises: b12a3ef66e62
+Create Date: 2016-08-05 09:47:18.310525
+
+"""
+
+# revision identifiers, used by Alembic.
+revision = '5a4477ffc3f1'
+down_revision = 'b12a3ef66e62'
+
+from alembic import op
+import sqlalchemy as sa
+
+
+def upgrade():
+    op.create_table(
+        'ml2_tunnel_free_ranges',
+        sa.Column('network_type', sa.String(length=32), nullable=False,
+                  primary_key=True),
+        sa.Column('first_id', sa.Integer(), nullable=False,
+                  primary_key=True, autoincrement=False),
+        sa.Column('last_id', sa.Integer(), nullable=False),
+    )
+    op.create_index('ix_ml2_tunnel_free_ranges_network_type_last_id',
+                    'ml2_tunnel_free_ranges', ['network_type', 'last_id'])
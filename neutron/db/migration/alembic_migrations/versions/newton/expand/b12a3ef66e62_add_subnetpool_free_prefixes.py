@@ -0,0 +1,46 @@
+# Copyright 2016 OpenStack Foundation
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+#
+
+"""add subnetpool free prefixes
+
+Revision ID: b12a3ef66e62
+Revises: 3d0e74aa7d37
+Create Date: 2016-08-03 14:21:05.128034
+
+"""
+
+# revision identifiers, used by Alembic.
+revision = 'b12a3ef66e62'
+down_revision = '3d0e74aa7d37'
+
+from alembic import op
+import sqlalchemy as sa
+
+
+def upgrade():
+    op.create_table(
+        'subnetpoolfreeprefixes',
+        sa.Column('cidr', sa.String(length=64), nullable=False,
+                  primary_key=True),
+        sa.Column('subnetpool_id', sa.String(length=36),
+                  sa.ForeignKey('subnetpools.id', ondelete='CASCADE'),
+                  nullable=False, primary_key=True),
+        sa.Column('prefixlen', sa.Integer(), nullable=False),
+    )
+    op.create_index('ix_subnetpoolfreeprefixes_subnetpool_id_prefixlen',
+                    'subnetpoolfreeprefixes', ['subnetpool_id', 'prefixlen'])
+    op.add_column('subnetpools',
+                  sa.Column('free_prefixes_hash', sa.String(length=36),
+                            nullable=True))
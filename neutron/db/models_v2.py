@@ -240,6 +240,30 @@ class SubnetPoolPrefix(model_base.BASEV2):
                               primary_key=True)
 
 
+class SubnetPoolFreePrefix(model_base.BASEV2):
+    """Represents a prefix of a neutron subnet pool not used by any subnet
+
+    The free prefixes of a subnet pool are the largest CIDRs of its
+    prefixes not overlapping any of its subnets. They are valid as long as
+    the free prefixes hash of the subnet pool is its hash.
+    """
+
+    __tablename__ = 'subnetpoolfreeprefixes'
+
+    cidr = sa.Column(sa.String(64), nullable=False, primary_key=True)
+    subnetpool_id = sa.Column(sa.String(36),
+                              sa.ForeignKey('subnetpools.id',
+                                            ondelete='CASCADE'),
+                              nullable=False,
+                              primary_key=True)
+    prefixlen = sa.Column(sa.Integer, nullable=False)
+    __table_args__ = (
+        sa.Index('ix_subnetpoolfreeprefixes_subnetpool_id_prefixlen',
+                 'subnetpool_id', 'prefixlen'),
+        model_base.BASEV2.__table_args__
+    )
+
+
 class SubnetPool(model_base.HasStandardAttributes, model_base.BASEV2,
                  HasId, HasTenant):
     """Represents a neutron subnet pool.
@@ -255,6 +279,9 @@ class SubnetPool(model_base.HasStandardAttributes, model_base.BASEV2,
                            server_default=sql.false())
     default_quota = sa.Column(sa.Integer, nullable=True)
     hash = sa.Column(sa.String(36), nullable=False, server_default='')
+    # hash of the subnet pool when its free prefixes were last up to date,
+    # None if they were never computed
+    free_prefixes_hash = sa.Column(sa.String(36), nullable=True)
     address_scope_id = sa.Column(sa.String(36), nullable=True)
     prefixes = orm.relationship(SubnetPoolPrefix,
                                 backref='subnetpools',
@@ -17,6 +17,7 @@ import six
 
 from neutron_lib.api import converters
 from neutron_lib import constants
+from oslo_config import cfg
 
 from neutron.api import extensions
 from neutron.api.v2 import attributes
@@ -104,7 +105,9 @@ class Segment(extensions.ExtensionDescriptor):
             SEGMENTS,
             SEGMENT,
             manager.NeutronManager.get_service_plugins()[SEGMENTS],
-            resource_attributes)
+            resource_attributes,
+            allow_pagination=cfg.CONF.allow_pagination,
+            allow_sorting=cfg.CONF.allow_sorting)
         return [extensions.ResourceExtension(SEGMENTS,
                                              controller,
                                              attr_map=resource_attributes)]
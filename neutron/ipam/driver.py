@@ -141,6 +141,22 @@ class Subnet(object):
             AddressOutsideSubnet
         """
 
+    def allocate_many(self, address_requests):
+        """Allocates IP addresses based on the requests passed in
+
+        Drivers can override this to allocate the addresses at once, it
+        allocates them one by one by default.
+
+        :param address_requests: Specifies what to allocate.
+        :type address_requests: A list of instances of subclasses of
+            AddressRequest
+        :returns: A list of netaddr.IPAddress, in the order of the requests
+        :raises: AddressNotAvailable, AddressOutsideAllocationPool,
+            AddressOutsideSubnet
+        """
+        return [self.allocate(address_request)
+                for address_request in address_requests]
+
     @abc.abstractmethod
     def deallocate(self, address):
         """Returns a previously allocated address to the pool
@@ -179,3 +195,17 @@ class SubnetGroup(object):
         :raises: AddressNotAvailable, AddressOutsideAllocationPool,
             AddressOutsideSubnet, IpAddressGenerationFailureAllSubnets
         """
+
+    def allocate_many(self, address_requests):
+        """Allocates IP addresses based on the requests passed in
+
+        :param address_requests: Specifies what to allocate.
+        :type address_requests: A list of instances of subclasses of
+            AddressRequest
+        :returns: A list of netaddr.IPAddress, subnet_id tuples, in the order
+            of the requests
+        :raises: AddressNotAvailable, AddressOutsideAllocationPool,
+            AddressOutsideSubnet, IpAddressGenerationFailureAllSubnets
+        """
+        return [self.allocate(address_request)
+                for address_request in address_requests]
@@ -68,7 +68,8 @@ class IpamSubnetManager(object):
         return session.query(db_models.IpamSubnet).filter_by(
             neutron_subnet_id=neutron_subnet_id).delete()
 
-    def create_pool(self, session, pool_start, pool_end):
+    def create_pool(self, session, pool_start, pool_end,
+                    available_ranges=None):
         """Create an allocation pool and availability ranges for the subnet.
 
         This method does not perform any validation on parameters; it simply
@@ -76,18 +77,24 @@ class IpamSubnetManager(object):
 
         :param pool_start: string expressing the start of the pool
         :param pool_end: string expressing the end of the pool
+        :param available_ranges: list of (first_ip, last_ip) strings for the
+            addresses of the pool which are not allocated. When not
+            specified, the whole pool is available.
         :return: the newly created pool object.
         """
+        if available_ranges is None:
+            available_ranges = [(pool_start, pool_end)]
         ip_pool = db_models.IpamAllocationPool(
             ipam_subnet_id=self._ipam_subnet_id,
             first_ip=pool_start,
             last_ip=pool_end)
         session.add(ip_pool)
-        ip_range = db_models.IpamAvailabilityRange(
-            allocation_pool=ip_pool,
-            first_ip=pool_start,
-            last_ip=pool_end)
-        session.add(ip_range)
+        for range_start, range_end in available_ranges:
+            ip_range = db_models.IpamAvailabilityRange(
+                allocation_pool=ip_pool,
+                first_ip=range_start,
+                last_ip=range_end)
+            session.add(ip_range)
         return ip_pool
 
     def delete_allocation_pools(self, session):
@@ -238,6 +245,22 @@ class IpamSubnetManager(object):
             ipam_subnet_id=self._ipam_subnet_id)
         session.add(ip_request)
 
+    def create_allocations(self, session, ip_addresses,
+                           status='ALLOCATED'):
+        """Create IP allocation entries with a single insert.
+
+        :param session: database session
+        :param ip_addresses: the IP addresses to allocate
+        :param status: IP allocation status
+        """
+        if not ip_addresses:
+            return
+        session.execute(db_models.IpamAllocation.__table__.insert(),
+                        [{'ip_address': ip_address,
+                          'status': status,
+                          'ipam_subnet_id': self._ipam_subnet_id}
+                         for ip_address in ip_addresses])
+
     def delete_allocation(self, session, ip_address):
         """Remove an IP allocation for this subnet.
 
@@ -13,11 +13,11 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
-import itertools
 import random
 
 import netaddr
 from neutron_lib import exceptions as n_exc
+from oslo_db import exception as db_exc
 from oslo_log import log
 from oslo_utils import uuidutils
 
@@ -42,19 +42,28 @@ class NeutronDbSubnet(ipam_base.Subnet):
     Allocation for IP addresses is based on the concept of availability
     ranges, which were already used in Neutron's DB base class for handling
     IPAM operations.
+    The availability ranges of a subnet are kept equal to its allocation
+    pools minus its allocations, so that picking an address does not depend
+    on the number of addresses already allocated.
     """
 
     @classmethod
-    def create_allocation_pools(cls, subnet_manager, session, pools, cidr):
+    def create_allocation_pools(cls, subnet_manager, session, pools, cidr,
+                                allocated_ips=None):
+        # IPv6 addresses that start '::1', '::2', etc cause IP version
+        # ambiguity when converted to integers by pool.first and pool.last.
+        # Infer the IP version from the subnet cidr.
+        ip_version = cidr.version
+        allocated = netaddr.IPSet(allocated_ips or [])
         for pool in pools:
-            # IPv6 addresses that start '::1', '::2', etc cause IP version
-            # ambiguity when converted to integers by pool.first and pool.last.
-            # Infer the IP version from the subnet cidr.
-            ip_version = cidr.version
+            available = netaddr.IPSet(pool) - allocated
             subnet_manager.create_pool(
                 session,
                 netaddr.IPAddress(pool.first, ip_version).format(),
-                netaddr.IPAddress(pool.last, ip_version).format())
+                netaddr.IPAddress(pool.last, ip_version).format(),
+                [(netaddr.IPAddress(ip_range.first, ip_version).format(),
+                  netaddr.IPAddress(ip_range.last, ip_version).format())
+                 for ip_range in available.iter_ipranges()])
 
     @classmethod
     def create_from_subnet_request(cls, subnet_request, ctx):
@@ -154,31 +163,132 @@ class NeutronDbSubnet(ipam_base.Subnet):
                 subnet_id=self.subnet_manager.neutron_id,
                 ip=ip_address)
 
-    def _generate_ip(self, session, prefer_next=False):
-        """Generate an IP address from the set of available addresses."""
-        ip_allocations = netaddr.IPSet()
-        for ipallocation in self.subnet_manager.list_allocations(session):
-            ip_allocations.add(netaddr.IPAddress(ipallocation.ip_address))
-
-        for ip_pool in self.subnet_manager.list_pools(session):
-            ip_set = netaddr.IPSet()
-            ip_set.add(netaddr.IPRange(ip_pool.first_ip, ip_pool.last_ip))
-            av_set = ip_set.difference(ip_allocations)
-            if av_set.size == 0:
-                continue
+    def _list_ranges(self, session):
+        """Return the availability ranges of the subnet, lowest first."""
+        ranges = [(netaddr.IPRange(db_range.first_ip, db_range.last_ip),
+                   db_range)
+                  for db_range in self.subnet_manager.list_ranges_by_subnet_id(
+                      session)]
+        ranges.sort(key=lambda r: r[0].first)
+        return ranges
+
+    def _remove_from_range(self, session, ip_range, db_range, first, last):
+        """Remove addresses first to last from an availability range.
+
+        Ranges are updated or deleted only if they are still as they were
+        read, otherwise a concurrent allocation took place and the operation
+        is retried.
+        """
+        if first == ip_range[0] and last == ip_range[-1]:
+            count = self.subnet_manager.delete_range(session, db_range)
+        elif first == ip_range[0]:
+            count = self.subnet_manager.update_range(
+                session, db_range, first_ip=str(last + 1))
+        elif last == ip_range[-1]:
+            count = self.subnet_manager.update_range(
+                session, db_range, last_ip=str(first - 1))
+        else:
+            pool_id = db_range.allocation_pool_id
+            count = self.subnet_manager.update_range(
+                session, db_range, last_ip=str(first - 1))
+            self.subnet_manager.create_range(
+                session, pool_id, str(last + 1), str(ip_range[-1]))
+        if not count:
+            raise db_exc.RetryRequest(ipam_exc.IPAllocationFailed())
 
+    def _generate_ip(self, session, prefer_next=False):
+        """Generate an IP address from the availability ranges."""
+        while True:
+            ranges = self._list_ranges(session)
+            if not ranges:
+                raise ipam_exc.IpAddressGenerationFailure(
+                    subnet_id=self.subnet_manager.neutron_id)
+            ip_range, db_range = ranges[0]
             if prefer_next:
                 window = 1
             else:
                 # Compute a value for the selection window
-                window = min(av_set.size, 10)
-            ip_index = random.randint(1, window)
-            candidate_ips = list(itertools.islice(av_set, ip_index))
-            allocated_ip = candidate_ips[-1]
-            return str(allocated_ip), ip_pool.id
-
-        raise ipam_exc.IpAddressGenerationFailure(
-                  subnet_id=self.subnet_manager.neutron_id)
+                window = min(ip_range.size, 10)
+            allocated_ip = ip_range[random.randint(0, window - 1)]
+            self._remove_from_range(session, ip_range, db_range,
+                                    allocated_ip, allocated_ip)
+            # EUI-64 addresses are not removed from the ranges
+            if self.subnet_manager.check_unique_allocation(
+                    session, str(allocated_ip)):
+                return str(allocated_ip), db_range.allocation_pool_id
+
+    def _generate_ips(self, session, count):
+        """Generate count IP addresses from the availability ranges.
+
+        Addresses are taken in order, starting with the lowest range, so
+        that each range is updated at most once.
+        """
+        ranges = self._list_ranges(session)
+        if sum(ip_range.size for ip_range, db_range in ranges) < count:
+            raise ipam_exc.IpAddressGenerationFailure(
+                subnet_id=self.subnet_manager.neutron_id)
+        ips = []
+        for ip_range, db_range in ranges:
+            needed = count - len(ips)
+            if not needed:
+                break
+            last = ip_range[min(needed, ip_range.size) - 1]
+            self._remove_from_range(session, ip_range, db_range,
+                                    ip_range[0], last)
+            ips.extend(str(ip) for ip in netaddr.iter_iprange(ip_range[0],
+                                                              last))
+        return ips
+
+    def _reserve_specific_ip(self, session, ip_address):
+        """Remove a specifically requested address from the ranges."""
+        ip = netaddr.IPAddress(ip_address)
+        for ip_range, db_range in self._list_ranges(session):
+            if ip in ip_range:
+                self._remove_from_range(session, ip_range, db_range, ip, ip)
+                return
+
+    def _release_ip(self, session, ip_address):
+        """Give a deallocated address back to the availability ranges.
+
+        The address is merged with the ranges adjacent to it, if any, to
+        keep the number of ranges low.
+        """
+        ip = netaddr.IPAddress(ip_address)
+        pool = next((pool for pool in self.subnet_manager.list_pools(session)
+                     if ip in netaddr.IPRange(pool.first_ip, pool.last_ip)),
+                    None)
+        if not pool:
+            # Addresses out of the pools, like the gateway, never were in
+            # the availability ranges.
+            return
+        before = after = None
+        for ip_range, db_range in self._list_ranges(session):
+            if db_range.allocation_pool_id != pool.id:
+                continue
+            if ip in ip_range:
+                # EUI-64 addresses were never removed from the ranges
+                return
+            if ip_range[-1] + 1 == ip:
+                before = db_range
+            elif ip_range[0] - 1 == ip:
+                after = db_range
+        if before and after:
+            last_ip = after.last_ip
+            count = self.subnet_manager.delete_range(session, after)
+            count = count and self.subnet_manager.update_range(
+                session, before, last_ip=last_ip)
+        elif before:
+            count = self.subnet_manager.update_range(
+                session, before, last_ip=str(ip))
+        elif after:
+            count = self.subnet_manager.update_range(
+                session, after, first_ip=str(ip))
+        else:
+            self.subnet_manager.create_range(session, pool.id,
+                                             str(ip), str(ip))
+            count = 1
+        if not count:
+            raise db_exc.RetryRequest(ipam_exc.IPAllocationFailed())
 
     def allocate(self, address_request):
         # NOTE(pbondar): Ipam driver is always called in context of already
@@ -195,6 +305,12 @@ class NeutronDbSubnet(ipam_base.Subnet):
             # Check availability of requested IP
             ip_address = str(address_request.address)
             self._verify_ip(session, ip_address)
+            # Removing EUI-64 addresses from the ranges of SLAAC subnets
+            # would split them for each port, leave them in and let
+            # _generate_ip skip them instead.
+            if not isinstance(address_request,
+                              ipam_req.AutomaticAddressRequest):
+                self._reserve_specific_ip(session, ip_address)
         else:
             prefer_next = isinstance(address_request,
                                      ipam_req.PreferNextAddressRequest)
@@ -206,11 +322,31 @@ class NeutronDbSubnet(ipam_base.Subnet):
         self.subnet_manager.create_allocation(session, ip_address)
         return ip_address
 
+    def allocate_many(self, address_requests):
+        """Allocate several IP addresses with a single pass on the ranges.
+
+        Requests for specific addresses are handled one by one, the other
+        ones get consecutive addresses taken from the availability ranges,
+        which are read and updated once for all of them.
+        """
+        session = self._context.session
+        addresses = [None] * len(address_requests)
+        generated = []
+        for index, address_request in enumerate(address_requests):
+            if isinstance(address_request, ipam_req.SpecificAddressRequest):
+                addresses[index] = self.allocate(address_request)
+            else:
+                generated.append(index)
+        ips = self._generate_ips(session, len(generated))
+        self.subnet_manager.create_allocations(session, ips)
+        for index, ip_address in zip(generated, ips):
+            addresses[index] = ip_address
+        return addresses
+
     def deallocate(self, address):
-        # This is almost a no-op because the Neutron DB IPAM driver does not
-        # delete IPAllocation objects, neither rebuilds availability ranges
-        # at every deallocation. The only operation it performs is to delete
-        # an IPRequest entry.
+        # The Neutron DB IPAM driver does not delete IPAllocation objects.
+        # It deletes the IPRequest entry and gives the address back to the
+        # availability ranges.
         session = self._context.session
 
         count = self.subnet_manager.delete_allocation(
@@ -220,6 +356,7 @@ class NeutronDbSubnet(ipam_base.Subnet):
             raise ipam_exc.IpAddressAllocationNotFound(
                 subnet_id=self.subnet_manager.neutron_id,
                 ip_address=address)
+        self._release_ip(session, str(address))
 
     def _no_pool_changes(self, session, pools):
         """Check if pool updates in db are required."""
@@ -235,8 +372,11 @@ class NeutronDbSubnet(ipam_base.Subnet):
         session = self._context.session
         if self._no_pool_changes(session, pools):
             return
+        allocated_ips = [allocation.ip_address for allocation in
+                         self.subnet_manager.list_allocations(session)]
         self.subnet_manager.delete_allocation_pools(session)
-        self.create_allocation_pools(self.subnet_manager, session, pools, cidr)
+        self.create_allocation_pools(self.subnet_manager, session, pools, cidr,
+                                     allocated_ips)
         self._pools = pools
 
     def get_details(self):
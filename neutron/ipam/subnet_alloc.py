@@ -67,9 +67,10 @@ class SubnetAllocator(driver.Pool):
         if not count:
             raise db_exc.RetryRequest(lib_exc.SubnetPoolInUse(
                                       subnet_pool_id=self._subnetpool['id']))
+        return current_hash, new_hash
 
     def _get_allocated_cidrs(self):
-        query = self._context.session.query(models_v2.Subnet)
+        query = self._context.session.query(models_v2.Subnet.cidr)
         subnets = query.filter_by(subnetpool_id=self._subnetpool['id'])
         return (x.cidr for x in subnets)
 
@@ -84,6 +85,76 @@ class SubnetAllocator(driver.Pool):
                       key=operator.attrgetter('prefixlen'),
                       reverse=True)
 
+    def _free_prefixes_query(self):
+        return self._context.session.query(
+            models_v2.SubnetPoolFreePrefix).filter_by(
+                subnetpool_id=self._subnetpool['id'])
+
+    def _set_free_prefixes_hash(self, pool_hash):
+        query = self._context.session.query(models_v2.SubnetPool).filter_by(
+            id=self._subnetpool['id'])
+        query.update({'free_prefixes_hash': pool_hash})
+
+    def _rebuild_free_prefixes(self, pool_hash):
+        """Recompute the free prefixes from the prefixes and subnets."""
+        self._free_prefixes_query().delete()
+        for prefix in self._get_available_prefix_list():
+            self._context.session.add(models_v2.SubnetPoolFreePrefix(
+                subnetpool_id=self._subnetpool['id'], cidr=str(prefix),
+                prefixlen=prefix.prefixlen))
+        self._set_free_prefixes_hash(pool_hash)
+
+    def _is_free_prefixes_stale(self, pool_hash):
+        """Check if the free prefixes were not computed for pool_hash.
+
+        Subnets allocated or released without updating the free prefixes
+        leave the subnet pool with an outdated free prefixes hash. A full
+        subnet pool has up to date, but no, free prefixes.
+        """
+        query = self._context.session.query(
+            models_v2.SubnetPool.free_prefixes_hash)
+        return query.filter_by(id=self._subnetpool['id']).scalar() != pool_hash
+
+    def _get_free_prefixes(self, prefixlen):
+        """Return the free prefixes able to hold a prefixlen subnet."""
+        return self._free_prefixes_query().filter(
+            models_v2.SubnetPoolFreePrefix.prefixlen <= prefixlen).order_by(
+                models_v2.SubnetPoolFreePrefix.prefixlen.desc()).all()
+
+    def _take_free_prefix(self, free_prefix, cidr, new_hash):
+        """Remove cidr from the free prefix containing it."""
+        remaining = netaddr.IPSet([free_prefix.cidr])
+        remaining.remove(cidr)
+        self._context.session.delete(free_prefix)
+        for prefix in remaining.iter_cidrs():
+            self._context.session.add(models_v2.SubnetPoolFreePrefix(
+                subnetpool_id=self._subnetpool['id'], cidr=str(prefix),
+                prefixlen=prefix.prefixlen))
+        self._set_free_prefixes_hash(new_hash)
+
+    def _match_free_prefix(self, request):
+        free_prefixes = self._get_free_prefixes(request.prefixlen)
+        if isinstance(request, ipam_req.SpecificSubnetRequest):
+            for free_prefix in free_prefixes:
+                if request.subnet_cidr in netaddr.IPNetwork(free_prefix.cidr):
+                    return free_prefix
+        elif free_prefixes:
+            # NOTE: best fit, the smallest free prefix able to hold the
+            # subnet is used, at its lowest address
+            best_fit = [x for x in free_prefixes
+                        if x.prefixlen == free_prefixes[0].prefixlen]
+            return min(best_fit,
+                       key=lambda x: netaddr.IPNetwork(x.cidr).first)
+
+    def _find_free_prefix(self, request, current_hash):
+        """Find the free prefix to allocate the requested subnet from.
+
+        The free prefixes are rebuilt first if they are not up to date.
+        """
+        if self._is_free_prefixes_stale(current_hash):
+            self._rebuild_free_prefixes(current_hash)
+        return self._match_free_prefix(request)
+
     def _num_quota_units_in_prefixlen(self, prefixlen, quota_unit):
         return math.pow(2, quota_unit - prefixlen)
 
@@ -91,7 +162,7 @@ class SubnetAllocator(driver.Pool):
         subnetpool_id = self._subnetpool['id']
         tenant_id = self._subnetpool['tenant_id']
         with self._context.session.begin(subtransactions=True):
-            qry = self._context.session.query(models_v2.Subnet)
+            qry = self._context.session.query(models_v2.Subnet.cidr)
             allocations = qry.filter_by(subnetpool_id=subnetpool_id,
                                         tenant_id=tenant_id)
             value = 0
@@ -116,37 +187,38 @@ class SubnetAllocator(driver.Pool):
 
     def _allocate_any_subnet(self, request):
         with self._context.session.begin(subtransactions=True):
-            self._lock_subnetpool()
+            current_hash, new_hash = self._lock_subnetpool()
             self._check_subnetpool_tenant_quota(request.tenant_id,
                                                 request.prefixlen)
-            prefix_pool = self._get_available_prefix_list()
-            for prefix in prefix_pool:
-                if request.prefixlen >= prefix.prefixlen:
-                    subnet = next(prefix.subnet(request.prefixlen))
-                    gateway_ip = request.gateway_ip
-                    if not gateway_ip:
-                        gateway_ip = subnet.network + 1
-                    pools = ipam_utils.generate_pools(subnet.cidr,
-                                                      gateway_ip)
-
-                    return IpamSubnet(request.tenant_id,
-                                      request.subnet_id,
-                                      subnet.cidr,
-                                      gateway_ip=gateway_ip,
-                                      allocation_pools=pools)
+            free_prefix = self._find_free_prefix(request, current_hash)
+            if free_prefix:
+                prefix = netaddr.IPNetwork(free_prefix.cidr)
+                subnet = next(prefix.subnet(request.prefixlen))
+                self._take_free_prefix(free_prefix, subnet, new_hash)
+                gateway_ip = request.gateway_ip
+                if not gateway_ip:
+                    gateway_ip = subnet.network + 1
+                pools = ipam_utils.generate_pools(subnet.cidr,
+                                                  gateway_ip)
+
+                return IpamSubnet(request.tenant_id,
+                                  request.subnet_id,
+                                  subnet.cidr,
+                                  gateway_ip=gateway_ip,
+                                  allocation_pools=pools)
             msg = _("Insufficient prefix space to allocate subnet size /%s")
             raise n_exc.SubnetAllocationError(reason=msg %
                                               str(request.prefixlen))
 
     def _allocate_specific_subnet(self, request):
         with self._context.session.begin(subtransactions=True):
-            self._lock_subnetpool()
+            current_hash, new_hash = self._lock_subnetpool()
             self._check_subnetpool_tenant_quota(request.tenant_id,
                                                 request.prefixlen)
             cidr = request.subnet_cidr
-            available = self._get_available_prefix_list()
-            matched = netaddr.all_matching_cidrs(cidr, available)
-            if len(matched) is 1 and matched[0].prefixlen <= cidr.prefixlen:
+            free_prefix = self._find_free_prefix(request, current_hash)
+            if free_prefix:
+                self._take_free_prefix(free_prefix, cidr, new_hash)
                 return IpamSubnet(request.tenant_id,
                                   request.subnet_id,
                                   cidr,
@@ -234,6 +306,53 @@ class IpamSubnetGroup(driver.SubnetGroup):
                 continue
         raise ipam_exc.IpAddressGenerationFailureAllSubnets()
 
+    def allocate_many(self, address_requests):
+        """Allocate all the addresses from the first subnet able to."""
+        for subnet_id in self._subnet_ids:
+            try:
+                ipam_subnet = self._driver.get_subnet(subnet_id)
+                return [(ip_address, subnet_id) for ip_address in
+                        ipam_subnet.allocate_many(address_requests)]
+            except ipam_exc.IpAddressGenerationFailure:
+                continue
+        raise ipam_exc.IpAddressGenerationFailureAllSubnets()
+
+
+def release_subnetpool_prefixes(context, subnetpool_id, prefixes):
+    """Give prefixes back to the free prefixes of a subnet pool.
+
+    Each released prefix is merged with its free buddy, if any, and so on
+    upwards. Nothing is done if the free prefixes of the subnet pool are not
+    up to date. Otherwise the subnet pool free prefixes hash is written back:
+    this waits for a concurrent allocation holding the subnet pool row, and
+    leaves the free prefixes outdated once it has committed, so that the
+    next allocation rebuilds them instead of trusting them.
+    """
+    free_model = models_v2.SubnetPoolFreePrefix
+    with context.session.begin(subtransactions=True):
+        pool_query = context.session.query(models_v2.SubnetPool).filter_by(
+            id=subnetpool_id)
+        pool = pool_query.with_entities(
+            models_v2.SubnetPool.hash,
+            models_v2.SubnetPool.free_prefixes_hash).first()
+        if not pool or pool.free_prefixes_hash != pool.hash:
+            return
+        pool_query.update({'free_prefixes_hash': pool.hash})
+        query = context.session.query(free_model).filter_by(
+            subnetpool_id=subnetpool_id)
+        for prefix in prefixes:
+            prefix = netaddr.IPNetwork(prefix).cidr
+            while prefix.prefixlen:
+                supernet = prefix.supernet(prefix.prefixlen - 1)[0]
+                buddies = [x for x in supernet.subnet(prefix.prefixlen)
+                           if x != prefix]
+                if not query.filter_by(cidr=str(buddies[0])).delete():
+                    break
+                prefix = supernet
+            context.session.add(free_model(
+                subnetpool_id=subnetpool_id, cidr=str(prefix),
+                prefixlen=prefix.prefixlen))
+
 
 class SubnetPoolReader(object):
     '''Class to assist with reading a subnetpool, loading defaults, and
@@ -22,7 +22,7 @@ import six
 from sqlalchemy import or_
 from sqlalchemy.orm import exc
 
-from neutron._i18n import _LE
+from neutron._i18n import _LE, _LI
 from neutron.db import models_v2
 from neutron.db import securitygroups_db as sg_db
 from neutron.db import segments_db
@@ -179,6 +179,92 @@ def get_port(session, port_id):
             return
 
 
+def partial_port_ids_to_full_ids(context, partial_ids):
+    """Map the beginnings of port IDs to full port IDs.
+
+    Returns a dictionary of the partial IDs matching exactly one port to
+    the full ID of that port.
+    """
+    partial_ids = list(set(partial_ids))
+    if not partial_ids:
+        return {}
+    if len(partial_ids) > MAX_PORTS_PER_QUERY:
+        result = partial_port_ids_to_full_ids(
+            context, partial_ids[:MAX_PORTS_PER_QUERY])
+        result.update(partial_port_ids_to_full_ids(
+            context, partial_ids[MAX_PORTS_PER_QUERY:]))
+        return result
+
+    # partial UUIDs must be individually matched with startswith.
+    # full UUIDs may be matched directly in an IN statement
+    partial_uuids = set(port_id for port_id in partial_ids
+                        if not uuidutils.is_uuid_like(port_id))
+    full_uuids = set(partial_ids) - partial_uuids
+    or_criteria = [models_v2.Port.id.startswith(port_id)
+                   for port_id in partial_uuids]
+    if full_uuids:
+        or_criteria.append(models_v2.Port.id.in_(full_uuids))
+    query = context.session.query(models_v2.Port.id).filter(or_(*or_criteria))
+    candidates = [port_id for port_id, in query]
+
+    result = {}
+    for partial_id in partial_ids:
+        matching = [c for c in candidates if c.startswith(partial_id)]
+        if len(matching) == 1:
+            result[partial_id] = matching[0]
+        elif not matching:
+            LOG.info(_LI("No ports have port_id starting with %s"),
+                     partial_id)
+        else:
+            LOG.error(_LE("Multiple ports have port_id starting with %s"),
+                      partial_id)
+    return result
+
+
+def get_port_db_objects(context, port_ids):
+    """Get the port records of port_ids, keyed by port ID.
+
+    Ports which do not exist are mapped to None.
+    """
+    port_ids = list(port_ids)
+    result = dict.fromkeys(port_ids)
+    for i in range(0, len(port_ids), MAX_PORTS_PER_QUERY):
+        query = (context.session.query(models_v2.Port).
+                 filter(models_v2.Port.id.in_(
+                     port_ids[i:i + MAX_PORTS_PER_QUERY])))
+        for port in query:
+            result[port.id] = port
+    return result
+
+
+def get_binding_levels_by_ports(session, port_ids):
+    """Get the binding levels of port_ids, keyed by (port ID, host)."""
+    port_ids = list(port_ids)
+    result = {}
+    for i in range(0, len(port_ids), MAX_PORTS_PER_QUERY):
+        query = (session.query(models.PortBindingLevel).
+                 filter(models.PortBindingLevel.port_id.in_(
+                     port_ids[i:i + MAX_PORTS_PER_QUERY])).
+                 order_by(models.PortBindingLevel.level))
+        for level in query:
+            result.setdefault((level.port_id, level.host), []).append(level)
+    return result
+
+
+def get_distributed_port_bindings_by_host(session, port_ids, host):
+    """Get the distributed bindings of port_ids on host, keyed by port ID."""
+    port_ids = list(port_ids)
+    result = {}
+    for i in range(0, len(port_ids), MAX_PORTS_PER_QUERY):
+        query = (session.query(models.DistributedPortBinding).
+                 filter_by(host=host).
+                 filter(models.DistributedPortBinding.port_id.in_(
+                     port_ids[i:i + MAX_PORTS_PER_QUERY])))
+        for binding in query:
+            result[binding.port_id] = binding
+    return result
+
+
 def get_port_from_device_mac(context, device_mac):
     LOG.debug("get_port_from_device_mac() called for mac %s", device_mac)
     qry = context.session.query(models_v2.Port).filter_by(
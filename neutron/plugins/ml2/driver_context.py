@@ -38,12 +38,14 @@ class MechanismDriverContext(object):
 class NetworkContext(MechanismDriverContext, api.NetworkContext):
 
     def __init__(self, plugin, plugin_context, network,
-                 original_network=None):
+                 original_network=None, segments=None):
         super(NetworkContext, self).__init__(plugin, plugin_context)
         self._network = network
         self._original_network = original_network
-        self._segments = segments_db.get_network_segments(
-            plugin_context.session, network['id'])
+        if segments is None:
+            segments = segments_db.get_network_segments(
+                plugin_context.session, network['id'])
+        self._segments = segments
 
     @property
     def current(self):
@@ -88,8 +90,11 @@ class PortContext(MechanismDriverContext, api.PortContext):
         super(PortContext, self).__init__(plugin, plugin_context)
         self._port = port
         self._original_port = original_port
-        self._network_context = NetworkContext(plugin, plugin_context,
-                                               network)
+        if isinstance(network, NetworkContext):
+            self._network_context = network
+        else:
+            self._network_context = NetworkContext(plugin, plugin_context,
+                                                   network)
         self._binding = binding
         self._binding_levels = binding_levels
         self._segments_to_bind = None
@@ -192,6 +197,11 @@ class PortContext(MechanismDriverContext, api.PortContext):
                 self._original_binding_levels[-1].segment_id)
 
     def _expand_segment(self, segment_id):
+        # static segments are already known by the network context, only
+        # dynamic segments need to be looked up
+        for segment in self._network_context.network_segments:
+            if segment[api.ID] == segment_id:
+                return segment
         segment = segments_db.get_segment_by_id(self._plugin_context.session,
                                                 segment_id)
         if not segment:
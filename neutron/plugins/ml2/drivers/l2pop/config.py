@@ -22,6 +22,13 @@ l2_population_options = [
     cfg.IntOpt('agent_boot_time', default=180,
                help=_('Delay within which agent is expected to update '
                       'existing ports whent it restarts')),
+    cfg.FloatOpt('fdb_batch_interval', default=0, min=0,
+                 help=_('Seconds during which the FDB entries to send to the '
+                        'L2 agents are queued, to be sent merged per agent '
+                        'and network in as few casts as possible. An entry '
+                        'added then removed during the interval is only '
+                        'removed. 0 sends the entries of each port update '
+                        'right away.')),
 ]
 
 cfg.CONF.register_opts(l2_population_options, "l2pop")
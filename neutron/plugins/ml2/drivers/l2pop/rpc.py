@@ -15,11 +15,15 @@
 
 import collections
 
+from oslo_config import cfg
 from oslo_log import log as logging
 import oslo_messaging
 
+from neutron._i18n import _LE
 from neutron.common import rpc as n_rpc
 from neutron.common import topics
+from neutron.notifiers import batch_notifier
+from neutron.plugins.ml2.drivers.l2pop import config  # noqa
 
 
 LOG = logging.getLogger(__name__)
@@ -27,6 +31,10 @@ LOG = logging.getLogger(__name__)
 
 PortInfo = collections.namedtuple("PortInfo", "mac_address ip_address")
 
+ADD_FDB_ENTRIES = 'add_fdb_entries'
+REMOVE_FDB_ENTRIES = 'remove_fdb_entries'
+UPDATE_FDB_ENTRIES = 'update_fdb_entries'
+
 
 class L2populationAgentNotifyAPI(object):
 
@@ -37,6 +45,13 @@ class L2populationAgentNotifyAPI(object):
                                                         topics.UPDATE)
         target = oslo_messaging.Target(topic=topic, version='1.0')
         self.client = n_rpc.get_client(target)
+        # casts sent, and queued entries merged into or cancelled by a later
+        # entry of the same batch
+        self.stats = collections.Counter()
+        self._batch_notifier = None
+        if cfg.CONF.l2pop.fdb_batch_interval:
+            self._batch_notifier = batch_notifier.BatchNotifier(
+                cfg.CONF.l2pop.fdb_batch_interval, self._send_batch)
 
     def _notification_fanout(self, context, method, fdb_entries):
         LOG.debug('Fanout notify l2population agents at %(topic)s '
@@ -47,6 +62,7 @@ class L2populationAgentNotifyAPI(object):
 
         cctxt = self.client.prepare(topic=self.topic_l2pop_update, fanout=True)
         cctxt.cast(context, method, fdb_entries=fdb_entries)
+        self.stats['casts'] += 1
 
     def _notification_host(self, context, method, fdb_entries, host):
         LOG.debug('Notify l2population agent %(host)s at %(topic)s the '
@@ -58,30 +74,94 @@ class L2populationAgentNotifyAPI(object):
 
         cctxt = self.client.prepare(topic=self.topic_l2pop_update, server=host)
         cctxt.cast(context, method, fdb_entries=fdb_entries)
+        self.stats['casts'] += 1
+
+    def _notify(self, context, method, fdb_entries, host):
+        if not fdb_entries:
+            return
+        if self._batch_notifier:
+            self._batch_notifier.queue_event(
+                (context, method, fdb_entries, host))
+        else:
+            self._notify_now(context, method, fdb_entries, host)
+
+    def _send_batch(self, events):
+        """Send the FDB entries queued during a batch interval.
+
+        The added and removed entries are merged per target and network,
+        the last operation queued for an entry replacing the previous ones.
+        The updated entries are not merged, but sent after the entries
+        queued before them.
+        """
+        casts = self.stats['casts']
+        # host, None for the fanout -> network id ->
+        # (network attributes, agent ip -> {entry: method})
+        queued = collections.OrderedDict()
+        try:
+            for context, method, fdb_entries, host in events:
+                if method == UPDATE_FDB_ENTRIES:
+                    self._send_queued(context, queued)
+                    self._notify_now(context, method, fdb_entries, host)
+                else:
+                    self._queue_entries(queued, method, fdb_entries, host)
+            self._send_queued(context, queued)
+        except Exception:
+            LOG.exception(_LE("Failed to send the l2population FDB entries"))
+        LOG.debug('Sent %(casts)d l2population casts for %(events)d '
+                  'notifications, statistics: %(stats)s',
+                  {'casts': self.stats['casts'] - casts,
+                   'events': len(events), 'stats': dict(self.stats)})
+
+    def _notify_now(self, context, method, fdb_entries, host):
+        if host:
+            self._notification_host(context, method, fdb_entries, host)
+        else:
+            self._notification_fanout(context, method, fdb_entries)
+
+    def _queue_entries(self, queued, method, fdb_entries, host):
+        networks = queued.setdefault(host, collections.OrderedDict())
+        for network_id, network in fdb_entries.items():
+            attributes, agents = networks.setdefault(
+                network_id, ({}, collections.OrderedDict()))
+            attributes.update((key, value) for key, value in network.items()
+                              if key != 'ports')
+            for agent_ip, entries in network.get('ports', {}).items():
+                agent_entries = agents.setdefault(agent_ip,
+                                                  collections.OrderedDict())
+                for entry in entries:
+                    previous = agent_entries.pop(entry, None)
+                    if previous == method:
+                        self.stats['entries_merged'] += 1
+                    elif previous:
+                        self.stats['entries_cancelled'] += 1
+                    agent_entries[entry] = method
+
+    def _send_queued(self, context, queued):
+        # The entries of a host are the FDB of the network loaded from the
+        # database, which the fanout entries queued with them only update.
+        for host in sorted(queued, key=lambda host: host is None):
+            fdb_entries = {REMOVE_FDB_ENTRIES: {}, ADD_FDB_ENTRIES: {}}
+            for network_id, (attributes, agents) in queued[host].items():
+                for agent_ip, agent_entries in agents.items():
+                    for entry, method in agent_entries.items():
+                        network = fdb_entries[method].setdefault(
+                            network_id, dict(attributes, ports={}))
+                        network['ports'].setdefault(agent_ip, []).append(
+                            entry)
+            for method in (REMOVE_FDB_ENTRIES, ADD_FDB_ENTRIES):
+                if fdb_entries[method]:
+                    self._notify_now(context, method, fdb_entries[method],
+                                     host)
+        queued.clear()
+
+    def get_stats(self):
+        return dict(self.stats)
 
     def add_fdb_entries(self, context, fdb_entries, host=None):
-        if fdb_entries:
-            if host:
-                self._notification_host(context, 'add_fdb_entries',
-                                        fdb_entries, host)
-            else:
-                self._notification_fanout(context, 'add_fdb_entries',
-                                          fdb_entries)
+        self._notify(context, ADD_FDB_ENTRIES, fdb_entries, host)
 
     def remove_fdb_entries(self, context, fdb_entries, host=None):
-        if fdb_entries:
-            if host:
-                self._notification_host(context, 'remove_fdb_entries',
-                                        fdb_entries, host)
-            else:
-                self._notification_fanout(context, 'remove_fdb_entries',
-                                          fdb_entries)
+        self._notify(context, REMOVE_FDB_ENTRIES, fdb_entries, host)
 
     def update_fdb_entries(self, context, fdb_entries, host=None):
-        if fdb_entries:
-            if host:
-                self._notification_host(context, 'update_fdb_entries',
-                                        fdb_entries, host)
-            else:
-                self._notification_fanout(context, 'update_fdb_entries',
-                                          fdb_entries)
+        self._notify(context, UPDATE_FDB_ENTRIES, fdb_entries, host)
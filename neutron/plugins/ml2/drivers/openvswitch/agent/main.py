@@ -21,6 +21,7 @@ from oslo_config import cfg
 from oslo_log import log as logging
 from oslo_utils import importutils
 
+from neutron.agent.common import config as agent_config
 from neutron.common import config as common_config
 from neutron.common import profiler
 from neutron.common import utils as n_utils
@@ -46,6 +47,7 @@ def main():
     mod = importutils.import_module(mod_name)
     mod.init_config()
     common_config.setup_logging()
+    agent_config.setup_privsep()
     n_utils.log_opt_values(LOG)
     profiler.setup("neutron-ovs-agent", cfg.CONF.host)
     mod.main()
@@ -13,6 +13,10 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import contextlib
+
+import eventlet
+
 from neutron.agent.common import ovs_lib
 
 
@@ -24,6 +28,15 @@ class OVSBridgeCookieMixin(object):
     def __init__(self, *args, **kwargs):
         super(OVSBridgeCookieMixin, self).__init__(*args, **kwargs)
         self._reserved_cookies = set()
+        # port id -> cookie of the flows installed for that port
+        self._port_cookies = {}
+        # cookies used instead of the default one, per greenthread
+        self._cookie_overrides = {}
+
+    @property
+    def default_cookie(self):
+        return self._cookie_overrides.get(eventlet.getcurrent(),
+                                          self._default_cookie)
 
     @property
     def reserved_cookies(self):
@@ -47,3 +60,39 @@ class OVSBridgeCookieMixin(object):
         if self._default_cookie in self._reserved_cookies:
             self._reserved_cookies.remove(self._default_cookie)
         super(OVSBridgeCookieMixin, self).set_agent_uuid_stamp(val)
+
+    def request_port_cookie(self, port_id):
+        """Return the cookie reserved for the flows of a port."""
+        cookie = self._port_cookies.get(port_id)
+        if cookie is None:
+            cookie = self.request_cookie()
+            self._port_cookies[port_id] = cookie
+        return cookie
+
+    def release_port_cookie(self, port_id):
+        """Delete the flows of a port and release its cookie."""
+        cookie = self._port_cookies.pop(port_id, None)
+        if cookie is None:
+            return
+        self.delete_flows_by_cookies([cookie])
+        self._reserved_cookies.discard(cookie)
+
+    @contextlib.contextmanager
+    def port_cookie(self, port_id):
+        """Context in which the flows are installed with a port cookie.
+
+        The flows installed by the current greenthread within this context
+        get the cookie of the port instead of the default one, so that they
+        can be removed with a single cookie-masked delete when the port goes
+        away.
+        """
+        current = eventlet.getcurrent()
+        previous = self._cookie_overrides.get(current)
+        self._cookie_overrides[current] = self.request_port_cookie(port_id)
+        try:
+            yield
+        finally:
+            if previous is None:
+                del self._cookie_overrides[current]
+            else:
+                self._cookie_overrides[current] = previous
@@ -21,9 +21,12 @@ from oslo_log import log as logging
 from oslo_utils import excutils
 from oslo_utils import timeutils
 import ryu.app.ofctl.api as ofctl_api
+from ryu.app.ofctl import event as ofctl_event
 import ryu.exception as ryu_exc
+from ryu.lib import hub
 
-from neutron._i18n import _, _LW
+from neutron._i18n import _, _LE, _LW
+from neutron.agent.common import ovs_lib
 
 LOG = logging.getLogger(__name__)
 
@@ -44,6 +47,8 @@ class OpenFlowSwitchMixin(object):
 
     def __init__(self, *args, **kwargs):
         self._app = kwargs.pop('ryu_app')
+        # messages deferred by DeferredOpenFlowSwitch, per greenthread
+        self._deferred_msgs = {}
         super(OpenFlowSwitchMixin, self).__init__(*args, **kwargs)
 
     def _get_dp_by_dpid(self, dpid_int):
@@ -65,6 +70,16 @@ class OpenFlowSwitchMixin(object):
         return dp
 
     def _send_msg(self, msg, reply_cls=None, reply_multi=False):
+        deferred_msgs = self._deferred_msgs.get(eventlet.getcurrent())
+        if deferred_msgs is not None:
+            if reply_cls is None:
+                deferred_msgs.append(msg)
+                return
+            # NOTE: keep the order of the deferred messages with respect to
+            # the requests expecting a reply.
+            msgs = deferred_msgs[:]
+            del deferred_msgs[:]
+            self._send_msgs(msgs)
         timeout_sec = cfg.CONF.OVS.of_request_timeout
         timeout = eventlet.timeout.Timeout(seconds=timeout_sec)
         try:
@@ -93,6 +108,59 @@ class OpenFlowSwitchMixin(object):
                   {"request": msg, "result": result})
         return result
 
+    def _send_msgs(self, msgs):
+        """Send messages expecting no reply, pipelining them.
+
+        Unlike ofctl_api.send_msg, all the requests are queued to the ofctl
+        service before waiting for their replies, so the switch receives
+        the messages back to back and the round trips overlap.  The
+        messages are sent in order and the first error is raised.
+        """
+        if len(msgs) <= 1:
+            for msg in msgs:
+                self._send_msg(msg)
+            return
+        requests = []
+        for msg in msgs:
+            # NOTE: this is RyuApp.send_request without the wait
+            req = ofctl_event.SendMsgRequest(msg=msg)
+            req.sync = True
+            req.reply_q = hub.Queue()
+            self._app.send_event(req.dst, req)
+            requests.append(req)
+        timeout_sec = cfg.CONF.OVS.of_request_timeout
+        for req in requests:
+            timeout = eventlet.timeout.Timeout(seconds=timeout_sec)
+            try:
+                req.reply_q.get()()
+            except ryu_exc.RyuException as e:
+                m = _("ofctl request %(request)s error %(error)s") % {
+                    "request": req.msg,
+                    "error": e,
+                }
+                LOG.error(m)
+                raise RuntimeError(m)
+            except eventlet.timeout.Timeout as e:
+                with excutils.save_and_reraise_exception() as ctx:
+                    if e is timeout:
+                        ctx.reraise = False
+                        m = _("ofctl request %(request)s timed out") % {
+                            "request": req.msg,
+                        }
+                        LOG.error(m)
+                        raise RuntimeError(m)
+            finally:
+                timeout.cancel()
+        LOG.debug("ofctl requests %s sent", msgs)
+
+    def deferred(self, **kwargs):
+        """Return a DeferredOpenFlowSwitch for this bridge.
+
+        kwargs are accepted for API compat with ovs_lib.DeferredOVSBridge,
+        the flow-mods are always applied in the order they were issued.
+        """
+        return DeferredOpenFlowSwitch(self)
+
     @staticmethod
     def _match(_ofp, ofpp, match, **match_kwargs):
         if match is not None:
@@ -134,13 +202,20 @@ class OpenFlowSwitchMixin(object):
             flows += rep.body
         return flows
 
+    def delete_flows_by_cookies(self, cookies):
+        with self.deferred() as deferred_br:
+            for c in cookies:
+                deferred_br.delete_flows(cookie=c,
+                                         cookie_mask=ovs_lib.UINT64_BITMASK)
+
     def cleanup_flows(self):
         cookies = set([f.cookie for f in self.dump_flows()]) - \
                   self.reserved_cookies
         for c in cookies:
             LOG.warning(_LW("Deleting flow with cookie 0x%(cookie)x"),
                         {'cookie': c})
-            self.delete_flows(cookie=c, cookie_mask=((1 << 64) - 1))
+        self.delete_flows_by_cookies(cookies)
+        return cookies
 
     def install_goto_next(self, table_id):
         self.install_goto(table_id=table_id, dest_table_id=table_id + 1)
@@ -199,3 +274,53 @@ class OpenFlowSwitchMixin(object):
                                   match=match,
                                   instructions=instructions,
                                   **match_kwargs)
+
+
+class DeferredOpenFlowSwitch(object):
+    """Deferred native bridge.
+
+    This class wraps a bridge and defers the flow-mods issued through its
+    methods until apply_flows is called, in order to send them in a single
+    pipelined batch.  It offers the same API as ovs_lib.DeferredOVSBridge:
+    used as a context, apply_flows is called on __exit__ except if an
+    exception is raised.
+    Like ovs_lib.DeferredOVSBridge, it is not thread-safe and a new
+    instance must be used for every batch.
+    """
+
+    def __init__(self, br):
+        self.br = br
+        self.msgs = []
+
+    def __getattr__(self, name):
+        attr = getattr(self.br, name)
+        if not callable(attr):
+            return attr
+
+        def deferred_call(*args, **kwargs):
+            current = eventlet.getcurrent()
+            deferred_msgs = self.br._deferred_msgs
+            if deferred_msgs.get(current) is not None:
+                # nested call of a deferred bridge method
+                return attr(*args, **kwargs)
+            deferred_msgs[current] = self.msgs
+            try:
+                return attr(*args, **kwargs)
+            finally:
+                del deferred_msgs[current]
+        return deferred_call
+
+    def apply_flows(self):
+        msgs = self.msgs
+        self.msgs = []
+        self.br._send_msgs(msgs)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.apply_flows()
+        else:
+            LOG.exception(_LE("OpenFlow flows could not be applied on "
+                              "bridge %s"), self.br.br_name)
@@ -14,11 +14,13 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import collections
 import re
 
 from oslo_log import log as logging
 
 from neutron._i18n import _LW
+from neutron.agent.common import ovs_lib
 
 LOG = logging.getLogger(__name__)
 
@@ -89,23 +91,30 @@ class OpenFlowSwitchMixin(object):
         LOG.debug("Bridge cookies used to filter flows: %s",
                   cookie_list)
         cookie_re = re.compile('cookie=(0x[A-Fa-f0-9]*)')
-        table_re = re.compile('table=([0-9]*)')
         for flow in flows:
             fl_cookie = cookie_re.search(flow)
             if not fl_cookie:
                 continue
             fl_cookie = fl_cookie.group(1)
             if int(fl_cookie, 16) not in cookie_list:
-                fl_table = table_re.search(flow)
-                if not fl_table:
-                    continue
-                fl_table = fl_table.group(1)
-                yield flow, fl_cookie, fl_table
+                yield flow, fl_cookie
+
+    def delete_flows_by_cookies(self, cookies):
+        with self.deferred() as deferred_br:
+            for cookie in cookies:
+                deferred_br.delete_flows(
+                    cookie=ovs_lib.check_cookie_mask(str(cookie)))
 
     def cleanup_flows(self):
         flows = self.dump_flows_all_tables()
-        for flow, cookie, table in self._filter_flows(flows):
+        stale_flows = collections.Counter(
+            cookie for _flow, cookie in self._filter_flows(flows))
+        for cookie, count in stale_flows.items():
             # deleting a stale flow should be rare.
             # it might deserve some attention
-            LOG.warning(_LW("Deleting flow %s"), flow)
-            self.delete_flows(cookie=cookie + '/-1', table=table)
+            LOG.warning(_LW("Deleting %(count)d flows with cookie "
+                            "%(cookie)s"), {'count': count, 'cookie': cookie})
+        # delete all the flows of the stale cookies at once rather than
+        # one by one, there might be a lot of them after a restart
+        self.delete_flows_by_cookies(stale_flows)
+        return set(stale_flows)
@@ -861,8 +861,9 @@ class OVSNeutronAgent(sg_rpc.SecurityGroupAgentRpcCallbackMixin,
             if cur_tag and cur_tag != lvm.vlan:
                 self.int_br.delete_flows(in_port=port.ofport)
             if self.prevent_arp_spoofing:
-                self.setup_arp_spoofing_protection(self.int_br,
-                                                   port, port_detail)
+                with self.int_br.port_cookie(port.vif_id):
+                    self.setup_arp_spoofing_protection(self.int_br,
+                                                       port, port_detail)
             if cur_tag != lvm.vlan:
                 self.int_br.set_db_attribute(
                     "Port", port.port_name, "tag", lvm.vlan)
@@ -983,7 +984,8 @@ class OVSNeutronAgent(sg_rpc.SecurityGroupAgentRpcCallbackMixin,
             self.int_br.set_db_attribute("Port", port.port_name, "tag",
                                          constants.DEAD_VLAN_TAG,
                                          log_errors=log_errors)
-            self.int_br.drop_port(in_port=port.ofport)
+            with self.int_br.port_cookie(port.vif_id):
+                self.int_br.drop_port(in_port=port.ofport)
 
     def setup_integration_br(self):
         '''Setup the integration bridge.
@@ -1583,6 +1585,9 @@ class OVSNeutronAgent(sg_rpc.SecurityGroupAgentRpcCallbackMixin,
         for device in devices:
             self.ext_manager.delete_port(self.context, {'port_id': device})
             self.port_unbound(device)
+            # the flows installed for the port are identified by its
+            # cookie, no need to dump the bridge flows to find them
+            self.int_br.release_port_cookie(device)
         return failed_devices
 
     def treat_ancillary_devices_removed(self, devices):
@@ -1647,9 +1652,19 @@ class OVSNeutronAgent(sg_rpc.SecurityGroupAgentRpcCallbackMixin,
         self._add_port_tag_info(need_binding_devices)
         if security_disabled_ports:
             added_ports -= set(security_disabled_ports)
+        start = time.time()
         self.sg_agent.setup_port_filters(added_ports,
                                          port_info.get('updated', set()))
+        LOG.debug("process_network_ports - iteration:%(iter_num)d - "
+                  "setup_port_filters completed in %(elapsed).3f",
+                  {'iter_num': self.iter_num,
+                   'elapsed': time.time() - start})
+        start = time.time()
         failed_devices['added'] |= self._bind_devices(need_binding_devices)
+        LOG.debug("process_network_ports - iteration:%(iter_num)d - "
+                  "_bind_devices completed in %(elapsed).3f",
+                  {'iter_num': self.iter_num,
+                   'elapsed': time.time() - start})
 
         if 'removed' in port_info and port_info['removed']:
             start = time.time()
@@ -1769,8 +1784,10 @@ class OVSNeutronAgent(sg_rpc.SecurityGroupAgentRpcCallbackMixin,
                             "and checking OVS status periodically."))
         return status
 
-    def loop_count_and_wait(self, start_time, port_stats):
-        # sleep till end of polling interval
+    def loop_count_and_wait(self, start_time, port_stats,
+                            polling_manager=None):
+        # sleep till end of polling interval, or until the polling manager
+        # notices an interface event
         elapsed = time.time() - start_time
         LOG.debug("Agent rpc_loop - iteration:%(iter_num)d "
                   "completed. Processed ports statistics: "
@@ -1779,7 +1796,10 @@ class OVSNeutronAgent(sg_rpc.SecurityGroupAgentRpcCallbackMixin,
                    'port_stats': port_stats,
                    'elapsed': elapsed})
         if elapsed < self.polling_interval:
-            time.sleep(self.polling_interval - elapsed)
+            if polling_manager:
+                polling_manager.wait(self.polling_interval - elapsed)
+            else:
+                time.sleep(self.polling_interval - elapsed)
         else:
             LOG.debug("Loop iteration exceeded interval "
                       "(%(polling_interval)s vs. %(elapsed)s)!",
@@ -1806,7 +1826,15 @@ class OVSNeutronAgent(sg_rpc.SecurityGroupAgentRpcCallbackMixin,
             bridges.append(self.tun_br)
         for bridge in bridges:
             LOG.info(_LI("Cleaning stale %s flows"), bridge.br_name)
-            bridge.cleanup_flows()
+            start = time.time()
+            stale_cookies = bridge.cleanup_flows()
+            LOG.debug("Agent rpc_loop - iteration:%(iter_num)d - "
+                      "%(num_cookies)d stale cookies cleaned on %(bridge)s. "
+                      "Elapsed:%(elapsed).3f",
+                      {'iter_num': self.iter_num,
+                       'num_cookies': len(stale_cookies or ()),
+                       'bridge': bridge.br_name,
+                       'elapsed': time.time() - start})
 
     def process_port_info(self, start, polling_manager, sync, ovs_restarted,
                        ports, ancillary_ports, updated_ports_copy,
@@ -1982,6 +2010,7 @@ class OVSNeutronAgent(sg_rpc.SecurityGroupAgentRpcCallbackMixin,
                 # prevent unexpected failure or crash. Sleep and continue
                 # loop in which ovs status will be checked periodically.
                 port_stats = self.get_port_stats({}, {})
+                # the interface events are not consumed while ovs is dead
                 self.loop_count_and_wait(start, port_stats)
                 continue
             # Notify the plugin of tunnel IP
@@ -2035,13 +2064,18 @@ class OVSNeutronAgent(sg_rpc.SecurityGroupAgentRpcCallbackMixin,
                                   port_info)
                         failed_devices = self.process_network_ports(
                             port_info, ovs_restarted)
-                        if need_clean_stale_flow:
-                            self.cleanup_stale_flows()
-                            need_clean_stale_flow = False
                         LOG.debug("Agent rpc_loop - iteration:%(iter_num)d - "
                                   "ports processed. Elapsed:%(elapsed).3f",
                                   {'iter_num': self.iter_num,
                                    'elapsed': time.time() - start})
+                        if need_clean_stale_flow:
+                            self.cleanup_stale_flows()
+                            need_clean_stale_flow = False
+                            LOG.debug("Agent rpc_loop - iteration:"
+                                      "%(iter_num)d - stale flows cleaned. "
+                                      "Elapsed:%(elapsed).3f",
+                                      {'iter_num': self.iter_num,
+                                       'elapsed': time.time() - start})
 
                     ports = port_info['current']
 
@@ -2071,7 +2105,11 @@ class OVSNeutronAgent(sg_rpc.SecurityGroupAgentRpcCallbackMixin,
                     self.updated_ports |= updated_ports_copy
                     sync = True
             port_stats = self.get_port_stats(port_info, ancillary_port_info)
-            self.loop_count_and_wait(start, port_stats)
+            # A sync scans the ports without consuming the interface events,
+            # which would otherwise end every wait right away.
+            self.loop_count_and_wait(
+                start, port_stats,
+                None if sync or self.fullsync else polling_manager)
 
     def daemon_loop(self):
         # Start everything.
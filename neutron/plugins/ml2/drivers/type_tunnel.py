@@ -13,8 +13,9 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 import abc
+import bisect
 import itertools
-import operator
+import random
 
 import netaddr
 from neutron_lib import exceptions as exc
@@ -23,12 +24,14 @@ from oslo_db import api as oslo_db_api
 from oslo_db import exception as db_exc
 from oslo_log import log
 import six
-from six import moves
+import sqlalchemy as sa
 from sqlalchemy import or_
 
 from neutron._i18n import _, _LI, _LW
+from neutron.common import exceptions as n_exc
 from neutron.common import topics
 from neutron.db import api as db_api
+from neutron.db import model_base
 from neutron.plugins.common import constants as p_const
 from neutron.plugins.common import utils as plugin_utils
 from neutron.plugins.ml2 import driver_api as api
@@ -48,6 +51,50 @@ def chunks(iterable, chunk_size):
         chunk = list(itertools.islice(iterator, 0, chunk_size))
 
 
+def _get_free_ranges(tunnel_ranges, allocated_ids):
+    """Return the ranges of the ids of tunnel_ranges not in allocated_ids.
+
+    allocated_ids must be sorted.
+    """
+    merged = []
+    for tun_min, tun_max in sorted(tunnel_ranges):
+        if merged and tun_min <= merged[-1][1] + 1:
+            merged[-1][1] = max(merged[-1][1], tun_max)
+        else:
+            merged.append([tun_min, tun_max])
+    free_ranges = []
+    for tun_min, tun_max in merged:
+        first_id = tun_min
+        start = bisect.bisect_left(allocated_ids, tun_min)
+        end = bisect.bisect_right(allocated_ids, tun_max)
+        for tunnel_id in allocated_ids[start:end]:
+            if tunnel_id > first_id:
+                free_ranges.append((first_id, tunnel_id - 1))
+            first_id = tunnel_id + 1
+        if first_id <= tun_max:
+            free_ranges.append((first_id, tun_max))
+    return free_ranges
+
+
+class TunnelFreeRange(model_base.BASEV2):
+    """Represent a range of free tunnel ids of a tunnel network type.
+
+    The allocations table of a tunnel type only holds the allocated ids, the
+    free ones are held as ranges.
+    """
+
+    __tablename__ = 'ml2_tunnel_free_ranges'
+    __table_args__ = (
+        sa.Index('ix_ml2_tunnel_free_ranges_network_type_last_id',
+                 'network_type', 'last_id'),
+        model_base.BASEV2.__table_args__
+    )
+    network_type = sa.Column(sa.String(32), nullable=False, primary_key=True)
+    first_id = sa.Column(sa.Integer, nullable=False, primary_key=True,
+                         autoincrement=False)
+    last_id = sa.Column(sa.Integer, nullable=False)
+
+
 @six.add_metaclass(abc.ABCMeta)
 class TunnelTypeDriver(helpers.SegmentTypeDriver):
     """Define stable abstract interface for ML2 type drivers.
@@ -143,38 +190,194 @@ class TunnelTypeDriver(helpers.SegmentTypeDriver):
         max_retries=db_api.MAX_RETRIES,
         exception_checker=db_api.is_retriable)
     def sync_allocations(self):
-        # determine current configured allocatable tunnel ids
-        tunnel_ids = set()
-        for tun_min, tun_max in self.tunnel_ranges:
-            tunnel_ids |= set(moves.range(tun_min, tun_max + 1))
-
-        tunnel_id_getter = operator.attrgetter(self.segmentation_key)
+        network_type = self.get_type()
         tunnel_col = getattr(self.model, self.segmentation_key)
         session = db_api.get_session()
         with session.begin(subtransactions=True):
-            # remove from table unallocated tunnels not currently allocatable
-            # fetch results as list via all() because we'll be iterating
-            # through them twice
-            allocs = (session.query(self.model).
-                      with_lockmode("update").all())
-
-            # collect those vnis that needs to be deleted from db
-            unallocateds = (
-                tunnel_id_getter(a) for a in allocs if not a.allocated)
-            to_remove = (x for x in unallocateds if x not in tunnel_ids)
-            # Immediately delete tunnels in chunks. This leaves no work for
-            # flush at the end of transaction
-            for chunk in chunks(to_remove, self.BULK_SIZE):
-                session.query(self.model).filter(
-                    tunnel_col.in_(chunk)).delete(synchronize_session=False)
-
-            # collect vnis that need to be added
-            existings = {tunnel_id_getter(a) for a in allocs}
-            missings = list(tunnel_ids - existings)
-            for chunk in chunks(missings, self.BULK_SIZE):
-                bulk = [{self.segmentation_key: x, 'allocated': False}
-                        for x in chunk]
-                session.execute(self.model.__table__.insert(), bulk)
+            # the free tunnels kept as rows of the allocations table by the
+            # servers not using the free ranges yet are left to them
+            allocated_ids = sorted(
+                tunnel_id for tunnel_id, in
+                session.query(tunnel_col).filter_by(allocated=True).
+                with_lockmode("update"))
+
+            # rebuild the free ranges from the configured tunnel ranges, so
+            # that the ids no longer allocatable are dropped from them
+            (session.query(TunnelFreeRange).
+             filter_by(network_type=network_type).
+             delete(synchronize_session=False))
+            free_ranges = _get_free_ranges(self.tunnel_ranges, allocated_ids)
+            for chunk in chunks(free_ranges, self.BULK_SIZE):
+                bulk = [{'network_type': network_type,
+                         'first_id': first_id, 'last_id': last_id}
+                        for first_id, last_id in chunk]
+                session.execute(TunnelFreeRange.__table__.insert(), bulk)
+        LOG.info(_LI("%(type)s free ranges: %(count)d ranges, "
+                     "%(allocated)d ids allocated"),
+                 {'type': network_type, 'count': len(free_ranges),
+                  'allocated': len(allocated_ids)})
+
+    def _free_ranges_query(self, session):
+        return (session.query(TunnelFreeRange.first_id,
+                              TunnelFreeRange.last_id).
+                filter_by(network_type=self.get_type()))
+
+    def _free_range_query(self, session, first_id, last_id):
+        return (session.query(TunnelFreeRange).
+                filter_by(network_type=self.get_type(),
+                          first_id=first_id, last_id=last_id))
+
+    def _remove_from_range(self, session, first_id, last_id, tunnel_id):
+        """Remove tunnel_id from the free range first_id to last_id.
+
+        The range is updated or deleted only if it is still as it was read,
+        otherwise a concurrent allocation took place and the operation is
+        retried.
+        """
+        query = self._free_range_query(session, first_id, last_id)
+        if first_id == last_id:
+            count = query.delete(synchronize_session=False)
+        elif tunnel_id == first_id:
+            count = query.update({'first_id': tunnel_id + 1},
+                                 synchronize_session=False)
+        else:
+            count = query.update({'last_id': tunnel_id - 1},
+                                 synchronize_session=False)
+            if count and tunnel_id < last_id:
+                session.execute(TunnelFreeRange.__table__.insert(),
+                                {'network_type': self.get_type(),
+                                 'first_id': tunnel_id + 1,
+                                 'last_id': last_id})
+        if not count:
+            raise db_exc.RetryRequest(
+                n_exc.NoNetworkFoundInMaximumAllowedAttempts())
+
+    def _add_to_ranges(self, session, tunnel_id):
+        """Give a released tunnel id back to the free ranges.
+
+        The id is merged with the ranges adjacent to it, if any, to keep the
+        number of ranges low.
+        """
+        ranges = self._free_ranges_query(session)
+        before = ranges.filter_by(last_id=tunnel_id - 1).first()
+        after = ranges.filter_by(first_id=tunnel_id + 1).first()
+        if before and after:
+            count = (self._free_range_query(session, *after).
+                     delete(synchronize_session=False))
+            count = count and (self._free_range_query(session, *before).
+                               update({'last_id': after.last_id},
+                                      synchronize_session=False))
+        elif before:
+            count = (self._free_range_query(session, *before).
+                     update({'last_id': tunnel_id},
+                            synchronize_session=False))
+        elif after:
+            count = (self._free_range_query(session, *after).
+                     update({'first_id': tunnel_id},
+                            synchronize_session=False))
+        else:
+            session.execute(TunnelFreeRange.__table__.insert(),
+                            {'network_type': self.get_type(),
+                             'first_id': tunnel_id, 'last_id': tunnel_id})
+            count = 1
+        if not count:
+            raise db_exc.RetryRequest(
+                n_exc.NoNetworkFoundInMaximumAllowedAttempts())
+
+    def _take_allocation(self, session, tunnel_id):
+        """Allocate tunnel_id, once removed from the free ranges.
+
+        Return the allocation db object, or None if the tunnel id is already
+        allocated.
+        """
+        alloc = self.get_allocation(session, tunnel_id)
+        if not alloc:
+            alloc = self.model(allocated=True,
+                               **{self.segmentation_key: tunnel_id})
+            alloc.save(session)
+            return alloc
+        # The servers not using the free ranges yet keep the free ids as rows
+        # of the allocations table, take them like they do.
+        count = (session.query(self.model).
+                 filter_by(allocated=False,
+                           **{self.segmentation_key: tunnel_id}).
+                 update({'allocated': True}))
+        if count:
+            return alloc
+
+    def allocate_fully_specified_segment(self, session, **raw_segment):
+        """Allocate the tunnel id specified by raw_segment.
+
+        Return the allocation db object, or None if the tunnel id is already
+        allocated.
+        """
+        network_type = self.get_type()
+        tunnel_id = raw_segment[self.segmentation_key]
+        try:
+            with session.begin(subtransactions=True):
+                alloc = self.get_allocation(session, tunnel_id)
+                if alloc and alloc.allocated:
+                    # Segment already allocated
+                    return
+                LOG.debug("%(type)s segment %(segment)s create started",
+                          {"type": network_type, "segment": raw_segment})
+                free_range = (self._free_ranges_query(session).
+                              filter(TunnelFreeRange.first_id <= tunnel_id).
+                              order_by(TunnelFreeRange.first_id.desc()).
+                              first())
+                if free_range and free_range.last_id >= tunnel_id:
+                    self._remove_from_range(session, free_range.first_id,
+                                            free_range.last_id, tunnel_id)
+                alloc = self._take_allocation(session, tunnel_id)
+                if not alloc:
+                    # Segment allocated concurrently by an older server
+                    return
+                LOG.debug("%(type)s segment %(segment)s create done",
+                          {"type": network_type, "segment": raw_segment})
+        except db_exc.DBDuplicateEntry:
+            # Segment already allocated (insert failure)
+            LOG.debug("%(type)s segment %(segment)s create failed",
+                      {"type": network_type, "segment": raw_segment})
+            return
+        return alloc
+
+    def allocate_partially_specified_segment(self, session, **filters):
+        """Allocate a tunnel id from the free ranges.
+
+        Return allocated db object or None.
+        """
+        network_type = self.get_type()
+        with session.begin(subtransactions=True):
+            while True:
+                free_ranges = (self._free_ranges_query(session).
+                               order_by(TunnelFreeRange.first_id).
+                               limit(helpers.IDPOOL_SELECT_SIZE).all())
+                if not free_ranges:
+                    # No resource available
+                    return
+                # Lock the range and take a random id in it, so that
+                # concurrent allocations from the same range wait for each
+                # other and split it instead of failing to update it.
+                first_id = random.choice(free_ranges)[0]
+                free_range = (self._free_ranges_query(session).
+                              filter_by(first_id=first_id).
+                              with_for_update().first())
+                if not free_range:
+                    raise db_exc.RetryRequest(
+                        n_exc.NoNetworkFoundInMaximumAllowedAttempts())
+                last_id = free_range.last_id
+                tunnel_id = random.randint(first_id, last_id)
+                self._remove_from_range(session, first_id, last_id,
+                                        tunnel_id)
+                # A server rebuilding the free ranges concurrently, or one not
+                # using them yet, may have allocated the id, skip it.
+                alloc = self._take_allocation(session, tunnel_id)
+                if alloc:
+                    break
+            LOG.debug("%(type)s segment allocate from pool success with "
+                      "%(segment)s ", {"type": network_type,
+                                       "segment": tunnel_id})
+            return alloc
 
     def is_partial_segment(self, segment):
         return segment.get(api.SEGMENTATION_ID) is None
@@ -225,18 +428,15 @@ class TunnelTypeDriver(helpers.SegmentTypeDriver):
 
         info = {'type': self.get_type(), 'id': tunnel_id}
         with session.begin(subtransactions=True):
-            query = (session.query(self.model).
-                     filter_by(**{self.segmentation_key: tunnel_id}))
-            if inside:
-                count = query.update({"allocated": False})
-                if count:
-                    LOG.debug("Releasing %(type)s tunnel %(id)s to pool",
-                              info)
-            else:
-                count = query.delete()
-                if count:
-                    LOG.debug("Releasing %(type)s tunnel %(id)s outside pool",
-                              info)
+            count = (session.query(self.model).
+                     filter_by(**{self.segmentation_key: tunnel_id}).
+                     delete())
+            if count and inside:
+                self._add_to_ranges(session, tunnel_id)
+                LOG.debug("Releasing %(type)s tunnel %(id)s to pool", info)
+            elif count:
+                LOG.debug("Releasing %(type)s tunnel %(id)s outside pool",
+                          info)
 
         if not count:
             LOG.warning(_LW("%(type)s tunnel %(id)s not found"), info)
@@ -71,6 +71,7 @@ from neutron.extensions import portbindings
 from neutron.extensions import portsecurity as psec
 from neutron.extensions import providernet as provider
 from neutron.extensions import vlantransparent
+from neutron.ipam import subnet_alloc
 from neutron import manager
 from neutron.plugins.common import constants as service_constants
 from neutron.plugins.ml2.common import exceptions as ml2_exc
@@ -649,8 +650,11 @@ class Ml2Plugin(db_base_plugin_v2.NeutronDbPluginV2,
         objects = []
         collection = "%ss" % resource
         items = request_items[collection]
+        item = None
         try:
             with context.session.begin(subtransactions=True):
+                if resource == attributes.PORT:
+                    self.ipam.allocate_ips_for_ports(context, items)
                 obj_creator = getattr(self, '_create_%s_db' % resource)
                 for item in items:
                     attrs = item[resource]
@@ -661,10 +665,17 @@ class Ml2Plugin(db_base_plugin_v2.NeutronDbPluginV2,
 
         except Exception as e:
             with excutils.save_and_reraise_exception():
-                utils.attach_exc_details(
-                    e, _LE("An exception occurred while creating "
-                           "the %(resource)s:%(item)s"),
-                    {'resource': resource, 'item': item})
+                if item is None:
+                    # The failure happened before creating any item, e.g.
+                    # while allocating the IP addresses of the ports.
+                    utils.attach_exc_details(
+                        e, _LE("An exception occurred while creating "
+                               "the %s"), collection)
+                else:
+                    utils.attach_exc_details(
+                        e, _LE("An exception occurred while creating "
+                               "the %(resource)s:%(item)s"),
+                        {'resource': resource, 'item': item})
 
         try:
             postcommit_op = getattr(self.mechanism_manager,
@@ -1096,6 +1107,9 @@ class Ml2Plugin(db_base_plugin_v2.NeutronDbPluginV2,
                     # The super(Ml2Plugin, self).delete_subnet() is not called,
                     # so need to manually call delete_subnet for pluggable ipam
                     self.ipam.delete_subnet(context, id)
+                    if record.subnetpool_id:
+                        subnet_alloc.release_subnetpool_prefixes(
+                            context, record.subnetpool_id, [record.cidr])
 
                     LOG.debug("Committing transaction")
                     break
@@ -1638,6 +1652,82 @@ class Ml2Plugin(db_base_plugin_v2.NeutronDbPluginV2,
 
         return self._bind_port_if_needed(port_context)
 
+    def get_network_contexts(self, context, network_ids):
+        """Return a map of network_id to NetworkContext for network_ids."""
+        network_ids = list(set(network_ids))
+        if not network_ids:
+            return {}
+        nets = self.get_networks(context, filters={'id': network_ids})
+        segments_by_net = segments_db.get_networks_segments(
+            context.session, [net['id'] for net in nets])
+        return {net['id']: driver_context.NetworkContext(
+                    self, context, net, segments=segments_by_net[net['id']])
+                for net in nets}
+
+    def get_bound_ports_contexts(self, plugin_context, devices, host=None):
+        """Return a map of device to the bound PortContext of its port.
+
+        This is the bulk version of get_bound_port_context: the ports,
+        bindings, binding levels, networks and segments of all devices are
+        loaded in a constant number of queries. Devices whose port or
+        binding could not be found are mapped to None.
+        """
+        session = plugin_context.session
+        port_contexts = dict.fromkeys(devices)
+        with session.begin(subtransactions=True):
+            dev_to_port_ids = {
+                device: self._device_to_port_id(plugin_context, device)
+                for device in devices}
+            full_port_ids = db.partial_port_ids_to_full_ids(
+                plugin_context, dev_to_port_ids.values())
+            port_dbs = db.get_port_db_objects(plugin_context,
+                                              set(full_port_ids.values()))
+            port_dbs = {port_id: port_db
+                        for port_id, port_db in port_dbs.items() if port_db}
+            network_contexts = self.get_network_contexts(
+                plugin_context,
+                [port_db.network_id for port_db in port_dbs.values()])
+            levels_by_port = db.get_binding_levels_by_ports(session,
+                                                            port_dbs)
+            dvr_port_ids = [
+                port_id for port_id, port_db in port_dbs.items()
+                if port_db.device_owner == const.DEVICE_OWNER_DVR_INTERFACE]
+            dvr_bindings = {}
+            if dvr_port_ids and host:
+                dvr_bindings = db.get_distributed_port_bindings_by_host(
+                    session, dvr_port_ids, host)
+
+            for device, port_id in dev_to_port_ids.items():
+                port_db = port_dbs.get(full_port_ids.get(port_id))
+                if not port_db or port_db.network_id not in network_contexts:
+                    continue
+                port = self._make_port_dict(port_db)
+                if port['device_owner'] == const.DEVICE_OWNER_DVR_INTERFACE:
+                    binding = dvr_bindings.get(port_db.id)
+                    if not binding:
+                        LOG.error(_LE("Binding info for DVR port %s not "
+                                      "found"), port_id)
+                        continue
+                    levels_host = host
+                else:
+                    binding = port_db.port_binding
+                    if not binding:
+                        LOG.info(_LI("Binding info for port %s was not "
+                                     "found, it might have been deleted "
+                                     "already."), port_id)
+                        continue
+                    levels_host = binding.host
+                levels = None
+                if levels_host:
+                    levels = levels_by_port.get((port_db.id, levels_host), [])
+                port_contexts[device] = driver_context.PortContext(
+                    self, plugin_context, port,
+                    network_contexts[port_db.network_id], binding, levels)
+
+        return {device: self._bind_port_if_needed(port_context)
+                if port_context else None
+                for device, port_context in port_contexts.items()}
+
     @oslo_db_api.wrap_db_retry(
         max_retries=db_api.MAX_RETRIES, retry_on_request=True,
         exception_checker=lambda e: isinstance(e, (sa_exc.StaleDataError,
@@ -1720,6 +1810,71 @@ class Ml2Plugin(db_base_plugin_v2.NeutronDbPluginV2,
 
         return port['id']
 
+    @oslo_db_api.wrap_db_retry(
+        max_retries=db_api.MAX_RETRIES, retry_on_request=True,
+        exception_checker=lambda e: isinstance(e, (sa_exc.StaleDataError,
+                                                   os_db_exception.DBDeadlock))
+    )
+    def update_port_statuses(self, context, port_statuses, host=None,
+                             network_contexts=None):
+        """Update the status of several ports in a single transaction.
+
+        port_statuses maps full port IDs to their new status.
+        network_contexts can map network IDs to NetworkContexts already
+        retrieved by the caller. Distributed ports are updated one by one
+        by update_port_status. Returns the IDs of the ports that exist.
+        """
+        session = context.session
+        mech_contexts = []
+        dvr_port_ids = []
+        with session.begin(subtransactions=True):
+            port_dbs = [port_db for port_db in db.get_port_db_objects(
+                context, port_statuses).values() if port_db]
+            network_contexts = dict(network_contexts or {})
+            network_contexts.update(self.get_network_contexts(
+                context, set(port_db.network_id for port_db in port_dbs) -
+                set(network_contexts)))
+            levels_by_port = db.get_binding_levels_by_ports(
+                session, [port_db.id for port_db in port_dbs])
+            for port_db in port_dbs:
+                status = port_statuses[port_db.id]
+                if (port_db.device_owner ==
+                        const.DEVICE_OWNER_DVR_INTERFACE):
+                    dvr_port_ids.append(port_db.id)
+                    continue
+                binding = port_db.port_binding
+                if (port_db.status == status or not binding or
+                        port_db.network_id not in network_contexts):
+                    continue
+                original_port = self._make_port_dict(port_db)
+                port_db.status = status
+                updated_port = self._make_port_dict(port_db)
+                levels = None
+                if binding.host:
+                    levels = levels_by_port.get((port_db.id, binding.host),
+                                                [])
+                mech_context = driver_context.PortContext(
+                    self, context, updated_port,
+                    network_contexts[port_db.network_id], binding, levels,
+                    original_port=original_port)
+                self.mechanism_manager.update_port_precommit(mech_context)
+                mech_contexts.append(mech_context)
+
+        for mech_context in mech_contexts:
+            self.mechanism_manager.update_port_postcommit(mech_context)
+            kwargs = {'context': context, 'port': mech_context.current,
+                      'original_port': mech_context.original}
+            if mech_context.current['status'] == const.PORT_STATUS_ACTIVE:
+                kwargs['update_device_up'] = True
+            registry.notify(resources.PORT, events.AFTER_UPDATE, self,
+                            **kwargs)
+
+        for port_id in dvr_port_ids:
+            self.update_port_status(context, port_id, port_statuses[port_id],
+                                    host)
+
+        return [port_db.id for port_db in port_dbs]
+
     def port_bound_to_host(self, context, port_id, host):
         if not host:
             return
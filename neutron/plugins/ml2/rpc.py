@@ -75,19 +75,37 @@ class RpcCallbacks(type_tunnel.TunnelRpcCallbackMixin):
                                                      port_id,
                                                      host,
                                                      cached_networks)
+        # caching information about networks for future use
+        if port_context and cached_networks is not None:
+            network_id = port_context.current['network_id']
+            if network_id not in cached_networks:
+                cached_networks[network_id] = port_context.network.current
+
+        entry, new_status = self._get_device_details(
+            device, agent_id, host, port_context)
+        if new_status:
+            plugin.update_port_status(rpc_context,
+                                      port_id,
+                                      new_status,
+                                      host,
+                                      port_context.network.current)
+        LOG.debug("Returning: %s", entry)
+        return entry
+
+    def _get_device_details(self, device, agent_id, host, port_context):
+        """Build the details of a device from its bound port context.
+
+        Returns the details and the status the port must be updated to, or
+        None if the port status does not need to change.
+        """
         if not port_context:
             LOG.debug("Device %(device)s requested by agent "
                       "%(agent_id)s not found in database",
                       {'device': device, 'agent_id': agent_id})
-            return {'device': device}
+            return {'device': device}, None
 
         segment = port_context.bottom_bound_segment
         port = port_context.current
-        # caching information about networks for future use
-        if cached_networks is not None:
-            if port['network_id'] not in cached_networks:
-                cached_networks[port['network_id']] = (
-                    port_context.network.current)
 
         if not segment:
             LOG.warning(_LW("Device %(device)s requested by agent "
@@ -97,17 +115,14 @@ class RpcCallbacks(type_tunnel.TunnelRpcCallbackMixin):
                          'agent_id': agent_id,
                          'network_id': port['network_id'],
                          'vif_type': port_context.vif_type})
-            return {'device': device}
+            return {'device': device}, None
 
+        new_status = None
         if (not host or host == port_context.host):
             new_status = (n_const.PORT_STATUS_BUILD if port['admin_state_up']
                           else n_const.PORT_STATUS_DOWN)
-            if port['status'] != new_status:
-                plugin.update_port_status(rpc_context,
-                                          port_id,
-                                          new_status,
-                                          host,
-                                          port_context.network.current)
+            if port['status'] == new_status:
+                new_status = None
 
         network_qos_policy_id = port_context.network._network.get(
             qos_consts.QOS_POLICY_ID)
@@ -128,29 +143,63 @@ class RpcCallbacks(type_tunnel.TunnelRpcCallbackMixin):
                  'profile': port[portbindings.PROFILE]}
         if 'security_groups' in port:
             entry['security_groups'] = port['security_groups']
-        LOG.debug("Returning: %s", entry)
-        return entry
+        return entry, new_status
+
+    def _get_devices_details(self, rpc_context, devices, agent_id, host):
+        """Get the details of devices in a constant number of queries.
+
+        The ports of all devices are loaded at once, and the ports whose
+        status changes are updated in a single transaction.
+        """
+        LOG.debug("Devices %(devices)s details requested by agent "
+                  "%(agent_id)s with host %(host)s",
+                  {'devices': devices, 'agent_id': agent_id, 'host': host})
+        plugin = manager.NeutronManager.get_plugin()
+        port_contexts = plugin.get_bound_ports_contexts(rpc_context,
+                                                        devices, host)
+        entries = []
+        new_statuses = {}
+        network_contexts = {}
+        for device in devices:
+            port_context = port_contexts.get(device)
+            entry, new_status = self._get_device_details(
+                device, agent_id, host, port_context)
+            if new_status:
+                new_statuses[port_context.current['id']] = new_status
+                network_contexts[port_context.current['network_id']] = (
+                    port_context.network)
+            entries.append(entry)
+        if new_statuses:
+            plugin.update_port_statuses(rpc_context, new_statuses, host,
+                                        network_contexts)
+        LOG.debug("Returning: %s", entries)
+        return entries
 
     def get_devices_details_list(self, rpc_context, **kwargs):
-        # cached networks used for reducing number of network db calls
-        cached_networks = {}
-        return [
-            self.get_device_details(
-                rpc_context,
-                device=device,
-                cached_networks=cached_networks,
-                **kwargs
-            )
-            for device in kwargs.pop('devices', [])
-        ]
+        return self._get_devices_details(rpc_context,
+                                         kwargs.pop('devices', []),
+                                         kwargs.get('agent_id'),
+                                         kwargs.get('host'))
 
     def get_devices_details_list_and_failed_devices(self,
                                                     rpc_context,
                                                     **kwargs):
+        devices_to_fetch = kwargs.pop('devices', [])
+        try:
+            devices = self._get_devices_details(rpc_context,
+                                                devices_to_fetch,
+                                                kwargs.get('agent_id'),
+                                                kwargs.get('host'))
+            return {'devices': devices,
+                    'failed_devices': []}
+        except Exception:
+            LOG.exception(_LE("Failed to get details for devices %s, "
+                              "retrying them one by one"), devices_to_fetch)
+
         devices = []
         failed_devices = []
         cached_networks = {}
-        for device in kwargs.pop('devices', []):
+        for device in devices_to_fetch:
             try:
                 devices.append(self.get_device_details(
                                rpc_context,
@@ -38,12 +38,54 @@ _ENFORCER = None
 ADMIN_CTX_POLICY = 'context_is_admin'
 ADVSVC_CTX_POLICY = 'context_is_advsvc'
 
+# Maximum number of entries kept in the caches of this module
+_CACHE_SIZE = 1024
+
+
+class _LRUCache(object):
+    """A dictionary keeping at most maxsize of its most recent entries."""
+
+    def __init__(self, maxsize=_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._data = collections.OrderedDict()
+
+    def get(self, key, default=None):
+        try:
+            value = self._data.pop(key)
+        except KeyError:
+            return default
+        self._data[key] = value
+        return value
+
+    def __setitem__(self, key, value):
+        self._data.pop(key, None)
+        self._data[key] = value
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def __len__(self):
+        return len(self._data)
+
+    def clear(self):
+        self._data.clear()
+
+
+# Match rules built for an action, indexed by the attributes of the target
+# which determine the rule, and attributes enforcing a policy per resource
+_MATCH_RULES = _LRUCache()
+_ENFORCED_ATTRIBUTES = {}
+# Attributes of parent resources loaded by OwnerCheck, indexed by request
+_PARENT_ATTRIBUTES = _LRUCache()
+
 
 def reset():
     global _ENFORCER
     if _ENFORCER:
         _ENFORCER.clear()
         _ENFORCER = None
+    _MATCH_RULES.clear()
+    _ENFORCED_ATTRIBUTES.clear()
+    _PARENT_ATTRIBUTES.clear()
 
 
 def init(conf=cfg.CONF, policy_file=None):
@@ -106,6 +148,16 @@ def _should_validate_sub_attributes(attribute, sub_attr):
                  v for (k, v) in six.iteritems(validate)]))
 
 
+def _get_sub_attributes(attribute, sub_attr):
+    """Return the sub-attributes with a type descriptor set in sub_attr."""
+    for key, data in six.iteritems(attribute['validate']):
+        if key.startswith('type:dict'):
+            if not isinstance(data, dict):
+                return ()
+            return tuple(name for name in data if name in sub_attr)
+    return ()
+
+
 def _build_subattr_match_rule(attr_name, attr, action, target):
     """Create the rule to match for sub-attribute policy checks."""
     # TODO(salv-orlando): Instead of relying on validator info, introduce
@@ -142,6 +194,40 @@ def _process_rules_list(rules, match_rule):
     return rules
 
 
+def _get_enforced_attributes(resource):
+    """Return the attributes of a resource with enforce_policy set."""
+    enforced_attributes = _ENFORCED_ATTRIBUTES.get(resource)
+    if enforced_attributes is None:
+        enforced_attributes = [
+            name for name, attribute in six.iteritems(
+                attributes.RESOURCE_ATTRIBUTE_MAP.get(resource, {}))
+            if 'enforce_policy' in attribute]
+        _ENFORCED_ATTRIBUTES[resource] = enforced_attributes
+    return enforced_attributes
+
+
+def _get_match_rule_signature(action, resource, target):
+    """Return the attributes of the target which determine the match rule.
+
+    These are the attributes which enforce a policy and are explicitly set
+    in the target, along with the sub-attributes set for those whose
+    sub-attributes are validated.
+    """
+    res_map = attributes.RESOURCE_ATTRIBUTE_MAP
+    signature = []
+    for attribute_name in _get_enforced_attributes(resource):
+        if _is_attribute_explicitly_set(attribute_name, res_map[resource],
+                                        target, action):
+            attribute = res_map[resource][attribute_name]
+            sub_attributes = None
+            if _should_validate_sub_attributes(attribute,
+                                               target[attribute_name]):
+                sub_attributes = _get_sub_attributes(attribute,
+                                                     target[attribute_name])
+            signature.append((attribute_name, sub_attributes))
+    return tuple(signature)
+
+
 def _build_match_rule(action, target, pluralized):
     """Create the rule to match for a given action.
 
@@ -153,30 +239,32 @@ def _build_match_rule(action, target, pluralized):
     4) add an entry for sub-attributes of a resource for which the
        action is being executed
        (e.g.: create_router:external_gateway_info:network_id)
+
+    Rules are cached, as they only depend on the action and on which
+    attributes enforcing a policy are set in the target.
     """
-    match_rule = policy.RuleCheck('rule', action)
     resource, enforce_attr_based_check = get_resource_and_action(
         action, pluralized)
+    signature = ()
     if enforce_attr_based_check:
-        # assigning to variable with short name for improving readability
-        res_map = attributes.RESOURCE_ATTRIBUTE_MAP
-        if resource in res_map:
-            for attribute_name in res_map[resource]:
-                if _is_attribute_explicitly_set(attribute_name,
-                                                res_map[resource],
-                                                target, action):
-                    attribute = res_map[resource][attribute_name]
-                    if 'enforce_policy' in attribute:
-                        attr_rule = policy.RuleCheck('rule', '%s:%s' %
-                                                     (action, attribute_name))
-                        # Build match entries for sub-attributes
-                        if _should_validate_sub_attributes(
-                                attribute, target[attribute_name]):
-                            attr_rule = policy.AndCheck(
-                                [attr_rule, _build_subattr_match_rule(
-                                    attribute_name, attribute,
-                                    action, target)])
-                        match_rule = policy.AndCheck([match_rule, attr_rule])
+        signature = _get_match_rule_signature(action, resource, target)
+    key = (action, resource, signature)
+    match_rule = _MATCH_RULES.get(key)
+    if match_rule is not None:
+        return match_rule
+    match_rule = policy.RuleCheck('rule', action)
+    res_map = attributes.RESOURCE_ATTRIBUTE_MAP
+    for attribute_name, sub_attributes in signature:
+        attribute = res_map[resource][attribute_name]
+        attr_rule = policy.RuleCheck('rule', '%s:%s' %
+                                     (action, attribute_name))
+        # Build match entries for sub-attributes
+        if sub_attributes is not None:
+            attr_rule = policy.AndCheck(
+                [attr_rule, _build_subattr_match_rule(
+                    attribute_name, attribute, action, target)])
+        match_rule = policy.AndCheck([match_rule, attr_rule])
+    _MATCH_RULES[key] = match_rule
     return match_rule
 
 
@@ -247,39 +335,54 @@ class OwnerCheck(policy.Check):
                 raise exceptions.PolicyCheckError(
                     policy="%s:%s" % (self.kind, self.match),
                     reason=err_reason)
-            # NOTE(salv-orlando): This check currently assumes the parent
-            # resource is handled by the core plugin. It might be worth
-            # having a way to map resources to plugins so to make this
-            # check more general
-            # NOTE(ihrachys): if import is put in global, circular
-            # import failure occurs
-            manager = importutils.import_module('neutron.manager')
-            f = getattr(manager.NeutronManager.get_instance().plugin,
-                        'get_%s' % parent_res)
-            # f *must* exist, if not found it is better to let neutron
-            # explode. Check will be performed with admin context
-            context = importutils.import_module('neutron.context')
-            try:
-                data = f(context.get_admin_context(),
-                         target[parent_foreign_key],
-                         fields=[parent_field])
-                target[self.target_field] = data[parent_field]
-            except lib_exc.NotFound as e:
-                # NOTE(kevinbenton): a NotFound exception can occur if a
-                # list operation is happening at the same time as one of
-                # the parents and its children being deleted. So we issue
-                # a RetryRequest so the API will redo the lookup and the
-                # problem items will be gone.
-                raise db_exc.RetryRequest(e)
-            except Exception:
-                with excutils.save_and_reraise_exception():
-                    LOG.exception(_LE('Policy check error while calling %s!'),
-                                  f)
+            target[self.target_field] = self._get_parent_attribute(
+                parent_res, target[parent_foreign_key], parent_field,
+                creds.get('request_id'))
         match = self.match % target
         if self.kind in creds:
             return match == six.text_type(creds[self.kind])
         return False
 
+    @staticmethod
+    def _get_parent_attribute(parent_res, parent_id, parent_field,
+                              request_id):
+        # NOTE: many objects checked while serving a request, for instance
+        # the ports of a list, usually share the same parent, so its
+        # attributes are cached for the duration of the request
+        key = (request_id, parent_res, parent_id, parent_field)
+        if request_id is not None:
+            cached = _PARENT_ATTRIBUTES.get(key, key)
+            if cached is not key:
+                return cached
+        # NOTE(salv-orlando): This check currently assumes the parent
+        # resource is handled by the core plugin. It might be worth
+        # having a way to map resources to plugins so to make this
+        # check more general
+        # NOTE(ihrachys): if import is put in global, circular
+        # import failure occurs
+        manager = importutils.import_module('neutron.manager')
+        f = getattr(manager.NeutronManager.get_instance().plugin,
+                    'get_%s' % parent_res)
+        # f *must* exist, if not found it is better to let neutron
+        # explode. Check will be performed with admin context
+        context = importutils.import_module('neutron.context')
+        try:
+            data = f(context.get_admin_context(), parent_id,
+                     fields=[parent_field])
+        except lib_exc.NotFound as e:
+            # NOTE(kevinbenton): a NotFound exception can occur if a
+            # list operation is happening at the same time as one of
+            # the parents and its children being deleted. So we issue
+            # a RetryRequest so the API will redo the lookup and the
+            # problem items will be gone.
+            raise db_exc.RetryRequest(e)
+        except Exception:
+            with excutils.save_and_reraise_exception():
+                LOG.exception(_LE('Policy check error while calling %s!'), f)
+        if request_id is not None:
+            _PARENT_ATTRIBUTES[key] = data[parent_field]
+        return data[parent_field]
+
 
 @policy.register('field')
 class FieldCheck(policy.Check):
@@ -406,6 +509,114 @@ def enforce(context, action, target, plugin=None, pluralized=None):
     return result
 
 
+def _and_filters(results):
+    filters = {}
+    if False in results:
+        return False
+    for result in results:
+        if result is None:
+            return None
+        if result is True:
+            continue
+        for field, value in six.iteritems(result):
+            if filters.setdefault(field, value) != value:
+                return False
+    return filters or True
+
+
+def _or_filters(results):
+    remaining = []
+    for result in results:
+        if result is True:
+            return True
+        if result is not False and result not in remaining:
+            remaining.append(result)
+    if not remaining:
+        return False
+    if len(remaining) == 1:
+        return remaining[0]
+    return None
+
+
+def _compile_rule(rule, credentials, attr_info, unknown, seen=()):
+    """Compile a policy rule for a given set of credentials.
+
+    Checks which only depend on the credentials are evaluated, and
+    ownership checks on one of the resource's own attributes are turned
+    into an equality filter on that attribute. Any other check evaluates
+    to unknown, which is either None, to get a result equivalent to the
+    rule, or False, to get a result which only implies the rule.
+
+    The result is True or False when the rule does not depend on the
+    target, a dict of filters which all have to be matched, or None.
+    """
+    def _compile(r):
+        return _compile_rule(r, credentials, attr_info, unknown, seen)
+
+    if isinstance(rule, policy.RuleCheck):
+        if rule.match in seen:
+            return unknown
+        try:
+            referenced_rule = _ENFORCER.rules[rule.match]
+        except KeyError:
+            return False
+        return _compile_rule(referenced_rule, credentials, attr_info,
+                             unknown, seen + (rule.match,))
+    if isinstance(rule, policy.AndCheck):
+        return _and_filters([_compile(r) for r in rule.rules])
+    if isinstance(rule, policy.OrCheck):
+        return _or_filters([_compile(r) for r in rule.rules])
+    if isinstance(rule, policy.NotCheck):
+        # The negation of a check which only implies the rule does not imply
+        # its negation: the operand has to be compiled into an equivalent.
+        result = _compile_rule(rule.rule, credentials, attr_info, None, seen)
+        return (not result) if isinstance(result, bool) else unknown
+    if isinstance(rule, OwnerCheck):
+        if rule.target_field not in attr_info:
+            return unknown
+        if rule.kind not in credentials:
+            return False
+        return {rule.target_field: six.text_type(credentials[rule.kind])}
+    if isinstance(rule, FieldCheck):
+        return unknown
+    if (getattr(rule, 'kind', None) in ('http', 'https') or
+            '%(' in getattr(rule, 'match', '')):
+        return unknown
+    return bool(rule({}, credentials, _ENFORCER))
+
+
+def get_query_filters(context, action, attr_info, pluralized=None):
+    """Translate the policy for reading a resource into filters.
+
+    :param context: neutron context
+    :param action: the action authorizing the read of a single object,
+        for instance ``get_port``
+    :param attr_info: the attribute map of the resource
+    :param pluralized: pluralized case of resource
+
+    :return: a tuple (filters, exact). filters is a dict mapping attribute
+        names to the value an object must have for the action to be
+        authorized on it without a policy check, an empty dict if the
+        action is authorized on every object, or None if the policy has to
+        be checked on every object. exact is True if the action is not
+        authorized on any object not matching filters, which can then be
+        applied when querying the objects.
+    """
+    if context.is_admin:
+        return {}, True
+    init()
+    match_rule, _target, credentials = _prepare_check(context, action,
+                                                      None, pluralized)
+    exact = True
+    result = _compile_rule(match_rule, credentials, attr_info, None)
+    if result is None:
+        exact = False
+        result = _compile_rule(match_rule, credentials, attr_info, False)
+    if result is False:
+        return None, False
+    return (result if result is not True else {}), exact
+
+
 def check_is_admin(context):
     """Verify context has admin rights according to policy settings."""
     init()
@@ -0,0 +1,105 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import collections
+import re
+
+import netaddr
+from oslo_concurrency import processutils
+import six
+
+from neutron._i18n import _
+from neutron import privileged
+
+# The conntrack entries of a zone to delete, by the address of a port and
+# optionally the remote address of the connections.
+ConntrackEntry = collections.namedtuple(
+    'ConntrackEntry',
+    'zone ethertype protocol direction address remote_address')
+
+_ETHERTYPES = {'ipv4': 4, 'ipv6': 6}
+_DIRECTIONS = ('ingress', 'egress')
+_PROTOCOL_RE = re.compile(r'^[a-z0-9][a-z0-9-]*$')
+_NAMESPACE_RE = re.compile(r'^[A-Za-z0-9_][A-Za-z0-9_.-]*$')
+MAX_ZONE = 65535
+
+
+def _check(condition, what, value):
+    if not condition:
+        raise ValueError(_("Invalid conntrack %(what)s: %(value)r") %
+                         {'what': what, 'value': value})
+
+
+def _validate_address(address, version, what):
+    _check(isinstance(address, six.string_types), what, address)
+    try:
+        network = netaddr.IPNetwork(address)
+    except (netaddr.AddrFormatError, ValueError):
+        network = None
+    _check(network is not None and network.version == version and
+           not address.startswith('-'), what, address)
+
+
+def get_delete_cmd(entry, namespace=None):
+    """Return the command deleting the conntrack entries of an entry.
+
+    :raises ValueError: when a field of the entry or the namespace is not
+                        valid.
+    """
+    entry = ConntrackEntry(*entry)
+    _check(isinstance(entry.zone, six.integer_types) and
+           not isinstance(entry.zone, bool) and
+           0 <= entry.zone <= MAX_ZONE, 'zone', entry.zone)
+    _check(entry.ethertype in _ETHERTYPES, 'ethertype', entry.ethertype)
+    version = _ETHERTYPES[entry.ethertype]
+    if entry.protocol is not None:
+        protocol = six.text_type(entry.protocol)
+        _check(_PROTOCOL_RE.match(protocol), 'protocol', entry.protocol)
+    _check(entry.direction in _DIRECTIONS, 'direction', entry.direction)
+    _validate_address(entry.address, version, 'address')
+    if entry.remote_address is not None:
+        _validate_address(entry.remote_address, version, 'remote address')
+
+    cmd = []
+    if namespace:
+        _check(isinstance(namespace, six.string_types) and
+               _NAMESPACE_RE.match(namespace), 'namespace', namespace)
+        cmd.extend(['ip', 'netns', 'exec', namespace])
+    cmd.extend(['conntrack', '-D'])
+    if entry.protocol is not None:
+        cmd.extend(['-p', str(entry.protocol)])
+    cmd.extend(['-f', entry.ethertype,
+                '-d' if entry.direction == 'ingress' else '-s',
+                entry.address, '-w', entry.zone])
+    if entry.remote_address is not None:
+        cmd.extend(['-s', entry.remote_address])
+    return cmd
+
+
+@privileged.default.entrypoint
+def delete_conntrack_entries(entries, namespace=None):
+    """Delete the conntrack entries of a batch of ConntrackEntry.
+
+    The commands are built here from the validated fields of the entries.
+    Exit code 1 means that no entry matched. Return the entries which could
+    not be deleted, with their error.
+    """
+    failures = []
+    for entry in entries:
+        try:
+            cmd = get_delete_cmd(entry, namespace)
+            processutils.execute(*[str(arg) for arg in cmd],
+                                 check_exit_code=[0, 1])
+        except (TypeError, ValueError, OSError,
+                processutils.ProcessExecutionError) as e:
+            failures.append((entry, str(e)))
+    return failures
@@ -0,0 +1,187 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import errno
+import socket
+
+from neutron_lib import constants
+import pyroute2
+
+from neutron._i18n import _
+from neutron import privileged
+
+
+_IP_VERSION_FAMILY_MAP = {4: socket.AF_INET, 6: socket.AF_INET6}
+
+# rtnetlink scopes, named the way the ip command shows them
+_RT_SCOPES = {0: 'global', 200: 'site', 253: 'link', 254: 'host',
+              255: 'nowhere'}
+
+_RT_TABLE_MAIN = 254
+
+RTN_UNICAST = 1
+
+IFA_F_PERMANENT = 0x80
+IFA_F_TENTATIVE = 0x40
+IFA_F_DADFAILED = 0x08
+
+
+# NOTE: these inherit from RuntimeError, which is what the callers of the
+# ip command based ip_lib catch when a device or a namespace is missing.
+class NetworkNamespaceNotFound(RuntimeError):
+    pass
+
+
+class NetworkInterfaceNotFound(RuntimeError):
+    pass
+
+
+def _get_iproute(namespace):
+    if namespace:
+        # flags=0 prevents pyroute2 from creating a missing namespace
+        return pyroute2.NetNS(namespace, flags=0)
+    return pyroute2.IPRoute()
+
+
+def _run_iproute(namespace, func, *args):
+    try:
+        with _get_iproute(namespace) as ip:
+            return func(ip, *args)
+    except OSError as e:
+        if e.errno == errno.ENOENT:
+            raise NetworkNamespaceNotFound(
+                _("Network namespace %s could not be found.") % namespace)
+        raise
+
+
+def _get_link_id(ip, device):
+    link_ids = ip.link_lookup(ifname=device)
+    if not link_ids:
+        raise NetworkInterfaceNotFound(
+            _("Network interface %s could not be found.") % device)
+    return link_ids[0]
+
+
+def _make_link_attributes(link):
+    """Convert a link message to the output of 'ip -o link show'."""
+    attributes = {
+        'mtu': link.get_attr('IFLA_MTU'),
+        'qdisc': link.get_attr('IFLA_QDISC'),
+        'state': link.get_attr('IFLA_OPERSTATE'),
+        'qlen': link.get_attr('IFLA_TXQLEN'),
+        'link/ether': link.get_attr('IFLA_ADDRESS'),
+        'brd': link.get_attr('IFLA_BROADCAST'),
+        'alias': link.get_attr('IFLA_IFALIAS'),
+    }
+    return {k: v for k, v in attributes.items() if v is not None}
+
+
+def _make_ip_address(address, device_name):
+    """Convert an address message to a get_devices_with_ip entry."""
+    flags = address.get_attr('IFA_FLAGS') or address['flags']
+    ip = address.get_attr('IFA_LOCAL') or address.get_attr('IFA_ADDRESS')
+    return {'name': device_name,
+            'cidr': '%s/%s' % (ip, address['prefixlen']),
+            'scope': _RT_SCOPES.get(address['scope'], address['scope']),
+            'dynamic': not flags & IFA_F_PERMANENT,
+            'tentative': bool(flags & IFA_F_TENTATIVE),
+            'dadfailed': bool(flags & IFA_F_DADFAILED)}
+
+
+def _make_route(route, ip_version, device_names):
+    """Convert a route message to a list_routes entry."""
+    dst = route.get_attr('RTA_DST')
+    if not dst:
+        cidr = constants.IP_ANY[ip_version]
+    elif route['dst_len'] == (32 if ip_version == 4 else 128):
+        # 'ip route' shows host routes without their prefix length
+        cidr = dst
+    else:
+        cidr = '%s/%s' % (dst, route['dst_len'])
+    attributes = {
+        'cidr': cidr,
+        'via': route.get_attr('RTA_GATEWAY'),
+        'dev': device_names.get(route.get_attr('RTA_OIF')),
+        'src': route.get_attr('RTA_PREFSRC'),
+        'metric': route.get_attr('RTA_PRIORITY'),
+    }
+    route_entry = {k: str(v) for k, v in attributes.items() if v is not None}
+    # 'ip route' only shows the scopes narrower than global
+    if route['scope']:
+        route_entry['scope'] = _RT_SCOPES.get(route['scope'], route['scope'])
+    return route_entry
+
+
+def _get_link_attributes(ip, device):
+    link = ip.get_links(_get_link_id(ip, device))[0]
+    return _make_link_attributes(link)
+
+
+def _get_device_names(ip):
+    return [link.get_attr('IFLA_IFNAME') for link in ip.get_links()]
+
+
+def _get_ip_addresses(ip, device, ip_version):
+    names = {link['index']: link.get_attr('IFLA_IFNAME')
+             for link in ip.get_links()}
+    kwargs = {}
+    if device:
+        kwargs['index'] = _get_link_id(ip, device)
+    if ip_version:
+        kwargs['family'] = _IP_VERSION_FAMILY_MAP[int(ip_version)]
+    addresses = ip.get_addr(**kwargs)
+    # list them per device, IPv4 first, like 'ip addr show' does
+    addresses = sorted(
+        addresses, key=lambda a: (a['index'], a['family'] != socket.AF_INET))
+    return [_make_ip_address(address, names.get(address['index']))
+            for address in addresses]
+
+
+def _list_routes(ip, ip_version, device, table):
+    names = {link['index']: link.get_attr('IFLA_IFNAME')
+             for link in ip.get_links()}
+    link_id = _get_link_id(ip, device) if device else None
+    table = int(table) if table else _RT_TABLE_MAIN
+    routes = ip.get_routes(family=_IP_VERSION_FAMILY_MAP[int(ip_version)])
+    # NOTE: tables above 255 are only given by the RTA_TABLE attribute
+    return [_make_route(route, int(ip_version), names) for route in routes
+            if route['type'] == RTN_UNICAST and
+            (route.get_attr('RTA_TABLE') or route['table']) == table and
+            (link_id is None or route.get_attr('RTA_OIF') == link_id)]
+
+
+@privileged.default.entrypoint
+def get_link_attributes(device, namespace):
+    """Return the attributes of a device, as 'ip link show' parses them."""
+    return _run_iproute(namespace, _get_link_attributes, device)
+
+
+@privileged.default.entrypoint
+def get_device_names(namespace):
+    """Return the names of all the devices of a namespace."""
+    return _run_iproute(namespace, _get_device_names)
+
+
+@privileged.default.entrypoint
+def get_ip_addresses(device, namespace, ip_version=None):
+    """Return the addresses of a namespace, or only of one of its devices."""
+    return _run_iproute(namespace, _get_ip_addresses, device, ip_version)
+
+
+@privileged.default.entrypoint
+def list_routes(ip_version, namespace, device=None, table=None):
+    """Return the unicast routes of a table, as 'ip route list' shows them.
+
+    Only the routes through device are returned if it is given. The table is
+    a table id, the main table by default.
+    """
+    return _run_iproute(namespace, _list_routes, ip_version, device, table)
@@ -24,6 +24,9 @@ class FlavorsPlugin(service_base.ServicePluginBase,
 
     supported_extension_aliases = ['flavors', 'service-type']
 
+    __native_pagination_support = True
+    __native_sorting_support = True
+
     @classmethod
     def get_plugin_type(cls):
         return constants.FLAVORS
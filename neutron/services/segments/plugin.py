@@ -63,6 +63,9 @@ class Plugin(db.SegmentDbMixin, segment.SegmentPluginBase):
 
     supported_extension_aliases = ["segment", "ip_allocation", "l2_adjacency"]
 
+    __native_pagination_support = True
+    __native_sorting_support = True
+
     def __init__(self):
         common_db_mixin.CommonDbMixin.register_dict_extend_funcs(
             attributes.NETWORKS, [_extend_network_dict_binding])
@@ -366,6 +366,8 @@ class BaseTestCase(DietTestCase):
         self._callback_manager = registry_manager.CallbacksManager()
         mock.patch.object(registry, '_get_callback_manager',
                           return_value=self._callback_manager).start()
+        # run the callbacks deferred by the test before the next one starts
+        self.addCleanup(self._callback_manager._async_pool.waitall)
 
     def setup_config(self, args=None):
         """Tests that need a non-default config can override this method."""
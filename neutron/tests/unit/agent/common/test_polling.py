@@ -41,6 +41,11 @@ class TestBasePollingManager(base.BaseTestCase):
         return mock.patch.object(self.pm, '_is_polling_required',
                                  return_value=return_value)
 
+    def test_wait_sleeps(self):
+        with mock.patch('time.sleep') as sleep:
+            self.pm.wait(2)
+        sleep.assert_called_once_with(2)
+
     def test_is_polling_required_returns_true_when_forced(self):
         with self.mock_is_polling_required(False):
             self.pm.force_polling()
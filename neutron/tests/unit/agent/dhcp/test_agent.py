@@ -340,12 +340,21 @@ class TestDhcpAgent(base.BaseTestCase):
             trace_level='warning',
             expected_sync=False)
 
-    def _test_sync_state_helper(self, known_net_ids, active_net_ids):
+    def _test_sync_state_helper(self, known_net_ids, active_net_ids,
+                                chunk_size=None):
+        if chunk_size is not None:
+            cfg.CONF.set_override('sync_networks_chunk_size', chunk_size)
         active_networks = set(mock.Mock(id=netid) for netid in active_net_ids)
 
+        def get_active_networks_info(network_ids=None):
+            return [net for net in active_networks
+                    if network_ids is None or net.id in network_ids]
+
         with mock.patch(DHCP_PLUGIN) as plug:
             mock_plugin = mock.Mock()
-            mock_plugin.get_active_networks_info.return_value = active_networks
+            mock_plugin.get_active_network_ids.return_value = active_net_ids
+            mock_plugin.get_active_networks_info.side_effect = (
+                get_active_networks_info)
             plug.return_value = mock_plugin
 
             dhcp = dhcp_agent.DhcpAgent(HOSTNAME)
@@ -364,6 +373,7 @@ class TestDhcpAgent(base.BaseTestCase):
                 mocks['cache'].assert_has_calls([mock.call.get_network_ids()])
                 mocks['disable_dhcp_helper'].assert_has_calls(exp_disable)
                 self.assertEqual(set(range(4)), dhcp.dhcp_ready_ports)
+                return mock_plugin, mocks
 
     def test_sync_state_initial(self):
         self._test_sync_state_helper([], ['a'])
@@ -374,6 +384,60 @@ class TestDhcpAgent(base.BaseTestCase):
     def test_sync_state_disabled_net(self):
         self._test_sync_state_helper(['b'], ['a'])
 
+    def test_sync_state_without_chunks(self):
+        plugin, mocks = self._test_sync_state_helper(['b'], ['a'],
+                                                     chunk_size=0)
+        self.assertFalse(plugin.get_active_network_ids.called)
+        plugin.get_active_networks_info.assert_called_once_with()
+
+    def test_sync_state_chunks(self):
+        active_net_ids = ['1', '2', '3', '4', '5']
+        plugin, mocks = self._test_sync_state_helper(['6'], active_net_ids,
+                                                     chunk_size=2)
+        plugin.get_active_network_ids.assert_called_once_with()
+        plugin.get_active_networks_info.assert_has_calls(
+            [mock.call(network_ids=['1', '2']),
+             mock.call(network_ids=['3', '4']),
+             mock.call(network_ids=['5'])])
+        self.assertEqual(
+            active_net_ids,
+            sorted(c[0][0].id for c in
+                   mocks['safe_configure_dhcp_for_network'].call_args_list))
+
+    def test_sync_state_chunks_only_fetch_networks_to_sync(self):
+        cfg.CONF.set_override('sync_networks_chunk_size', 2)
+        with mock.patch(DHCP_PLUGIN) as plug:
+            mock_plugin = mock.Mock()
+            mock_plugin.get_active_network_ids.return_value = ['a', 'b', 'c']
+            mock_plugin.get_active_networks_info.return_value = []
+            plug.return_value = mock_plugin
+            dhcp = dhcp_agent.DhcpAgent(HOSTNAME)
+            with mock.patch.object(dhcp, 'cache') as cache:
+                cache.get_network_ids.return_value = ['a', 'b']
+                cache.get_port_ids.return_value = []
+                dhcp.sync_state(['a'])
+            mock_plugin.get_active_networks_info.assert_called_once_with(
+                network_ids=['a', 'c'])
+
+    def test_sync_state_chunks_unsupported(self):
+        cfg.CONF.set_override('sync_networks_chunk_size', 2)
+        with mock.patch(DHCP_PLUGIN) as plug:
+            mock_plugin = mock.Mock()
+            mock_plugin.get_active_network_ids.side_effect = (
+                oslo_messaging.RemoteError('UnsupportedVersion'))
+            mock_plugin.get_active_networks_info.return_value = [
+                mock.Mock(id='a')]
+            plug.return_value = mock_plugin
+            dhcp = dhcp_agent.DhcpAgent(HOSTNAME)
+            with mock.patch.object(dhcp, 'cache') as cache, \
+                    mock.patch.object(
+                        dhcp, 'safe_configure_dhcp_for_network') as configure:
+                cache.get_network_ids.return_value = []
+                cache.get_port_ids.return_value = []
+                dhcp.sync_state()
+            mock_plugin.get_active_networks_info.assert_called_once_with()
+            self.assertEqual(1, configure.call_count)
+
     def test_sync_state_waitall(self):
         with mock.patch.object(dhcp_agent.eventlet.GreenPool, 'waitall') as w:
             active_net_ids = ['1', '2', '3', '4', '5']
@@ -400,6 +464,7 @@ class TestDhcpAgent(base.BaseTestCase):
         with mock.patch(DHCP_PLUGIN) as plug:
             mock_plugin = mock.Mock()
             exc = Exception()
+            mock_plugin.get_active_network_ids.return_value = ['foo_network']
             mock_plugin.get_active_networks_info.side_effect = exc
             plug.return_value = mock_plugin
 
@@ -617,6 +682,7 @@ class TestDhcpAgentEventHandler(base.BaseTestCase):
         cfg.CONF.set_override('interface_driver',
                               'neutron.agent.linux.interface.NullDriver')
         entry.register_options(cfg.CONF)  # register all dhcp cfg options
+        cfg.CONF.set_override('reload_allocations_interval', 0)
 
         self.plugin_p = mock.patch(DHCP_PLUGIN)
         plugin_cls = self.plugin_p.start()
@@ -1075,6 +1141,32 @@ class TestDhcpAgentEventHandler(base.BaseTestCase):
         self.call_driver.assert_has_calls(
             [mock.call.call_driver('reload_allocations', fake_network)])
 
+    def test_port_update_end_reload_allocations_later(self):
+        cfg.CONF.set_override('reload_allocations_interval', 1)
+        self.cache.get_network_by_id.return_value = fake_network
+        self.cache.get_port_by_id.return_value = fake_port2
+        self.dhcp.port_update_end(None, dict(port=fake_port2))
+        self.dhcp.port_update_end(None, dict(port=fake_port2))
+        self.dhcp.port_delete_end(None, dict(port_id=fake_port2.id))
+        self.assertFalse(self.call_driver.called)
+        self.assertEqual(set(), self.dhcp.dhcp_ready_ports)
+
+        self.dhcp._reload_pending_allocations()
+        self.call_driver.assert_called_once_with('reload_allocations',
+                                                 fake_network)
+        self.assertEqual({fake_port2.id}, self.dhcp.dhcp_ready_ports)
+        self.assertFalse(self.dhcp._pending_reloads)
+
+    def test_reload_pending_allocations_deleted_network(self):
+        cfg.CONF.set_override('reload_allocations_interval', 1)
+        self.cache.get_network_by_id.return_value = fake_network
+        self.cache.get_port_by_id.return_value = fake_port2
+        self.dhcp.port_update_end(None, dict(port=fake_port2))
+        self.cache.get_network_by_id.return_value = None
+        self.dhcp._reload_pending_allocations()
+        self.assertFalse(self.call_driver.called)
+        self.assertEqual(set(), self.dhcp.dhcp_ready_ports)
+
     def test_port_delete_end_unknown_port(self):
         payload = dict(port_id='unknown')
         self.cache.get_port_by_id.return_value = None
@@ -1109,6 +1201,13 @@ class TestDhcpPluginApiProxy(base.BaseTestCase):
     def test_get_active_networks_info(self):
         self._test_dhcp_api('get_active_networks_info', version='1.1')
 
+    def test_get_active_networks_info_network_ids(self):
+        self._test_dhcp_api('get_active_networks_info', network_ids=['a'],
+                            version='1.7')
+
+    def test_get_active_network_ids(self):
+        self._test_dhcp_api('get_active_network_ids', version='1.7')
+
     def test_get_network_info(self):
         self._test_dhcp_api('get_network_info', network_id='fake_id',
                             return_value=None)
@@ -35,11 +35,13 @@ from neutron.agent.l3 import agent as l3_agent
 from neutron.agent.l3 import dvr_edge_router as dvr_router
 from neutron.agent.l3 import dvr_snat_ns
 from neutron.agent.l3 import ha
+from neutron.agent.l3 import ha_router
 from neutron.agent.l3 import legacy_router
 from neutron.agent.l3 import link_local_allocator as lla
 from neutron.agent.l3 import namespaces
 from neutron.agent.l3 import router_info as l3router
 from neutron.agent.l3 import router_processing_queue
+from neutron.agent.l3 import router_workers
 from neutron.agent.linux import dibbler
 from neutron.agent.linux import external_process
 from neutron.agent.linux import interface
@@ -215,6 +217,63 @@ class TestBasicRouterOperations(BasicRouterOperationsFramework):
                           agent.context)
         self.assertTrue(agent.fullsync)
 
+    def test_periodic_sync_routers_task_unchanged_routers(self):
+        agent = l3_agent.L3NATAgent(HOSTNAME, self.conf)
+        changed_router = {'id': _uuid()}
+        agent.router_info[FAKE_ID] = mock.Mock(revision='rev',
+                                               router={'id': FAKE_ID})
+        self.plugin_api.get_router_ids.return_value = [
+            FAKE_ID, changed_router['id']]
+        self.plugin_api.get_changed_routers.return_value = (
+            [changed_router], [FAKE_ID])
+        with mock.patch.object(agent, '_queue') as agent_queue:
+            agent.periodic_sync_routers_task(agent.context)
+        self.plugin_api.get_changed_routers.assert_called_once_with(
+            agent.context, [FAKE_ID, changed_router['id']], {FAKE_ID: 'rev'})
+        self.assertFalse(self.plugin_api.get_routers.called)
+        update = agent_queue.add.call_args[0][0]
+        self.assertEqual(1, agent_queue.add.call_count)
+        self.assertEqual(changed_router['id'], update.id)
+        self.assertEqual(changed_router, update.router)
+
+    def test_periodic_sync_routers_task_unchanged_router_removed(self):
+        agent = l3_agent.L3NATAgent(HOSTNAME, self.conf)
+        agent.router_info[FAKE_ID] = mock.Mock(revision='rev',
+                                               router={'id': FAKE_ID})
+        self.plugin_api.get_router_ids.return_value = [FAKE_ID]
+
+        def get_changed_routers(*args):
+            # the router is removed while the server answers
+            del agent.router_info[FAKE_ID]
+            return [], [FAKE_ID]
+
+        self.plugin_api.get_changed_routers.side_effect = get_changed_routers
+        self.plugin_api.get_routers.return_value = [{'id': FAKE_ID}]
+        with mock.patch.object(agent, '_queue') as agent_queue:
+            agent.periodic_sync_routers_task(agent.context)
+        self.plugin_api.get_routers.assert_called_once_with(
+            agent.context, [FAKE_ID])
+        update = agent_queue.add.call_args[0][0]
+        self.assertEqual(FAKE_ID, update.id)
+        self.assertEqual({'id': FAKE_ID}, update.router)
+        self.assertFalse(agent.fullsync)
+
+    def test_periodic_sync_routers_task_changed_routers_unsupported(self):
+        agent = l3_agent.L3NATAgent(HOSTNAME, self.conf)
+        agent.router_info[FAKE_ID] = mock.Mock(revision='rev',
+                                               router={'id': FAKE_ID})
+        self.plugin_api.get_router_ids.return_value = [FAKE_ID]
+        self.plugin_api.get_changed_routers.side_effect = (
+            oslo_messaging.RemoteError('UnsupportedVersion'))
+        self.plugin_api.get_routers.return_value = [{'id': FAKE_ID}]
+        with mock.patch.object(agent, '_queue') as agent_queue:
+            agent.periodic_sync_routers_task(agent.context)
+            agent.fullsync = True
+            agent.periodic_sync_routers_task(agent.context)
+        self.assertEqual(1, self.plugin_api.get_changed_routers.call_count)
+        self.assertEqual(2, self.plugin_api.get_routers.call_count)
+        self.assertEqual(2, agent_queue.add.call_count)
+
     def test_l3_initial_report_state_done(self):
         with mock.patch.object(l3_agent.L3NATAgentWithStateReport,
                                'periodic_sync_routers_task'),\
@@ -246,6 +305,116 @@ class TestBasicRouterOperations(BasicRouterOperationsFramework):
             agent._report_state()
             self.assertFalse(agent.fullsync)
 
+    def test_report_state_router_workers_stats(self):
+        self.conf.set_override('router_workers', 2)
+        with mock.patch.object(agent_rpc.PluginReportStateAPI,
+                               'report_state'), \
+                mock.patch.object(router_workers, 'RouterWorkerPool') as pool:
+            pool.return_value.get_stats.return_value = {'routers': 2,
+                                                        'interfaces': 3}
+            agent = l3_agent.L3NATAgentWithStateReport(host=HOSTNAME,
+                                                       conf=self.conf)
+            agent._report_state()
+        configurations = agent.agent_state['configurations']
+        self.assertEqual(2, configurations['routers'])
+        self.assertEqual(3, configurations['interfaces'])
+        self.assertEqual(0, configurations['floating_ips'])
+
+    def test_router_workers_dvr_agent_mode(self):
+        self.conf.set_override('router_workers', 2)
+        self.conf.set_override('agent_mode',
+                               l3_constants.L3_AGENT_MODE_DVR_SNAT)
+        self.assertRaises(SystemExit, l3_agent.L3NATAgent,
+                          HOSTNAME, self.conf)
+
+    @mock.patch.object(router_workers, 'RouterWorkerPool')
+    def test_router_workers(self, pool):
+        self.conf.set_override('router_workers', 2)
+        with mock.patch.object(eventlet, 'spawn_n') as spawn_n:
+            agent = l3_agent.L3NATAgent(HOSTNAME, self.conf)
+            agent.after_start()
+        pool.assert_called_once_with(2)
+        self.assertTrue(pool.return_value.start.called)
+        self.assertFalse(spawn_n.called)
+
+        agent.routers_updated(None, [FAKE_ID])
+        update = pool.return_value.add.call_args[0][0]
+        self.assertEqual(FAKE_ID, update.id)
+        agent.enqueue_state_change(FAKE_ID, 'master')
+        pool.return_value.enqueue_state_change.assert_called_once_with(
+            FAKE_ID, 'master')
+
+    def test_periodic_sync_routers_task_router_workers(self):
+        with mock.patch.object(router_workers, 'RouterWorkerPool') as pool:
+            self.conf.set_override('router_workers', 2)
+            agent = l3_agent.L3NATAgent(HOSTNAME, self.conf)
+        pool.return_value.router_ids = {FAKE_ID}
+        self.plugin_api.get_router_ids.return_value = []
+        agent.periodic_sync_routers_task(agent.context)
+        update = pool.return_value.add.call_args[0][0]
+        self.assertEqual(FAKE_ID, update.id)
+        self.assertEqual(router_processing_queue.DELETE_ROUTER, update.action)
+
+    def test_periodic_sync_routers_task_router_workers_revisions(self):
+        with mock.patch.object(router_workers, 'RouterWorkerPool') as pool:
+            self.conf.set_override('router_workers', 2)
+            agent = l3_agent.L3NATAgent(HOSTNAME, self.conf)
+        changed_router = {'id': _uuid()}
+        pool.return_value.router_ids = {FAKE_ID, changed_router['id']}
+        pool.return_value.revisions = {FAKE_ID: 'rev'}
+        self.plugin_api.get_router_ids.return_value = [
+            FAKE_ID, changed_router['id']]
+        self.plugin_api.get_changed_routers.return_value = (
+            [changed_router], [FAKE_ID])
+        with mock.patch.object(agent.namespaces_manager,
+                               'keep_router') as keep_router:
+            agent.periodic_sync_routers_task(agent.context)
+        self.plugin_api.get_changed_routers.assert_called_once_with(
+            agent.context, [FAKE_ID, changed_router['id']], {FAKE_ID: 'rev'})
+        keep_router.assert_has_calls([mock.call(FAKE_ID),
+                                      mock.call(changed_router['id'])])
+        update = pool.return_value.add.call_args[0][0]
+        self.assertEqual(1, pool.return_value.add.call_count)
+        self.assertEqual(changed_router, update.router)
+
+    def test_router_worker_sends_revisions(self):
+        channel = mock.Mock()
+        agent = l3_agent.L3NATAgentRouterWorker(HOSTNAME, self.conf, channel)
+        router = {'id': FAKE_ID}
+
+        def process_router(router):
+            agent.router_info[FAKE_ID] = mock.Mock(revision='rev')
+
+        with mock.patch.object(l3_agent.L3NATAgent,
+                               '_process_router_if_compatible',
+                               side_effect=process_router), \
+                mock.patch.object(l3_agent.L3NATAgent, '_router_removed',
+                                  side_effect=agent.router_info.pop):
+            agent._process_router_if_compatible(router)
+            agent._router_removed(FAKE_ID)
+        channel.send.assert_has_calls([
+            mock.call('update_revision', FAKE_ID, 'rev'),
+            mock.call('update_revision', FAKE_ID, None)])
+
+    def test_router_worker_run(self):
+        channel = mock.Mock()
+        agent = l3_agent.L3NATAgentRouterWorker(HOSTNAME, self.conf, channel)
+        update = router_processing_queue.RouterUpdate(
+            FAKE_ID, router_processing_queue.PRIORITY_RPC)
+        channel.recv.side_effect = [
+            ('add', (update,)),
+            ('enqueue_state_change', (FAKE_ID, 'master')),
+            EOFError]
+        with mock.patch.object(eventlet, 'spawn_n') as spawn_n, \
+                mock.patch.object(agent, '_queue') as agent_queue, \
+                mock.patch.object(ha.AgentMixin,
+                                  'enqueue_state_change') as state_change:
+            agent.run()
+        spawn_n.assert_called_once_with(agent._process_routers_loop)
+        agent_queue.add.assert_called_once_with(update)
+        state_change.assert_called_once_with(FAKE_ID, 'master')
+        self.assertIsNone(agent.router_workers)
+
     def test_periodic_sync_routers_task_call_clean_stale_namespaces(self):
         agent = l3_agent.L3NATAgent(HOSTNAME, self.conf)
         self.plugin_api.get_routers.return_value = []
@@ -1870,6 +2039,41 @@ class TestBasicRouterOperations(BasicRouterOperationsFramework):
         ns.delete()
         self.mock_ip.netns.delete.assert_called_once_with("qrouter-bar")
 
+    def _create_ha_router_for_update(self, agent):
+        router = {'id': _uuid(), 'gw_port': None, 'routes': [], 'ha': True,
+                  l3_constants.INTERFACE_KEY: [],
+                  l3_constants.FLOATINGIP_KEY: []}
+        ri = ha_router.HaRouter(mock.Mock(), router['id'], router, self.conf,
+                                agent.driver, agent.use_ipv6)
+        ri.ha_port = {'id': _uuid()}
+        ri._process_internal_ports = mock.Mock()
+        ri.process_external = mock.Mock()
+        ri.process_address_scope = mock.Mock()
+        ri.routes_updated = mock.Mock()
+        ri.enable_keepalived = mock.Mock()
+        agent.router_info[router['id']] = ri
+        return ri, router
+
+    def test_process_updated_ha_router(self):
+        agent = l3_agent.L3NATAgent(HOSTNAME, self.conf)
+        agent.pd = mock.Mock()
+        ri, router = self._create_ha_router_for_update(agent)
+        agent._process_updated_router(router)
+        agent._process_updated_router(dict(router))
+        ri.enable_keepalived.assert_called_once_with()
+
+    def test_process_updated_ha_router_keepalived_failure(self):
+        agent = l3_agent.L3NATAgent(HOSTNAME, self.conf)
+        agent.pd = mock.Mock()
+        ri, router = self._create_ha_router_for_update(agent)
+        ri.enable_keepalived.side_effect = RuntimeError
+        self.assertRaises(RuntimeError, agent._process_updated_router, router)
+        # the router is processed again, keepalived included, on resync
+        ri.enable_keepalived.side_effect = None
+        agent._process_updated_router(dict(router))
+        self.assertEqual(2, ri.enable_keepalived.call_count)
+        self.assertEqual(2, ri._process_internal_ports.call_count)
+
     def _configure_metadata_proxy(self, enableflag=True):
         if not enableflag:
             self.conf.set_override('enable_metadata_proxy', False)
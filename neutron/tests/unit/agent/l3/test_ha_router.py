@@ -16,6 +16,7 @@ import mock
 from oslo_utils import uuidutils
 
 from neutron.agent.l3 import ha_router
+from neutron.agent.l3 import router_info
 from neutron.tests import base
 
 _uuid = uuidutils.generate_uuid
@@ -72,3 +73,16 @@ class TestBasicRouterOperations(base.BaseTestCase):
         subnets[1]['gateway_ip'] = None
         ri._add_default_gw_virtual_route(ex_gw_port, 'qg-abc')
         self.assertEqual(0, len(mock_instance.virtual_routes.gateway_routes))
+
+    @mock.patch.object(router_info.RouterInfo, 'process')
+    def test_process_unchanged_router(self, process):
+        ri = self._create_router()
+        ri.ha_port = {'id': _uuid()}
+        ri.enable_keepalived = mock.Mock()
+        ri._router_changes = set()
+        ri.process(mock.Mock())
+        self.assertFalse(ri.enable_keepalived.called)
+
+        ri._router_changes = {'routes'}
+        ri.process(mock.Mock())
+        ri.enable_keepalived.assert_called_once_with()
@@ -17,6 +17,7 @@ from oslo_utils import uuidutils
 from neutron.agent.common import config as agent_config
 from neutron.agent.l3 import router_info
 from neutron.agent.linux import ip_lib
+from neutron.common import constants as n_const
 from neutron.common import exceptions as n_exc
 from neutron.tests import base
 
@@ -166,6 +167,100 @@ class TestRouterInfo(base.BaseTestCase):
         self.assertEqual(new_mark_ids, new_ri.available_mark_ids)
         self.assertTrue(ri.available_mark_ids != new_ri.available_mark_ids)
 
+    def _process_router(self, ri, router):
+        ri.router = router
+        ri._process_internal_ports = mock.Mock()
+        ri.process_external = mock.Mock()
+        ri.process_address_scope = mock.Mock()
+        ri.routes_updated = mock.Mock()
+        ri.process(mock.Mock())
+        ri.commit_processed()
+        return [step for step, _elapsed in ri.process_timings]
+
+    def _get_router(self):
+        return {'id': _uuid(),
+                'gw_port': None,
+                'routes': [],
+                l3_constants.INTERFACE_KEY: [{'id': _uuid()}],
+                l3_constants.FLOATINGIP_KEY: []}
+
+    def test_process_unchanged_router(self):
+        router = self._get_router()
+        ri = router_info.RouterInfo(router['id'], router, **self.ri_kwargs)
+        self.assertEqual(
+            ['internal_ports', 'external', 'address_scope', 'routes'],
+            self._process_router(ri, router))
+        self.assertEqual([], self._process_router(ri, dict(router)))
+        self.assertFalse(ri.router_changed())
+
+    def test_process_changed_floating_ips(self):
+        router = self._get_router()
+        ri = router_info.RouterInfo(router['id'], router, **self.ri_kwargs)
+        self._process_router(ri, router)
+        router = dict(router)
+        router[l3_constants.FLOATINGIP_KEY] = [
+            {'id': _uuid(), 'floating_ip_address': '15.1.2.3',
+             'fixed_ip_address': '192.168.0.1'}]
+        self.assertEqual(['external', 'address_scope'],
+                         self._process_router(ri, router))
+
+    def test_process_changed_routes(self):
+        router = self._get_router()
+        ri = router_info.RouterInfo(router['id'], router, **self.ri_kwargs)
+        self._process_router(ri, router)
+        router = dict(router)
+        router['routes'] = [{'destination': '135.207.0.0/16',
+                             'nexthop': '1.2.3.4'}]
+        self.assertEqual(['routes'], self._process_router(ri, router))
+
+    def test_process_changed_other_key(self):
+        router = self._get_router()
+        ri = router_info.RouterInfo(router['id'], router, **self.ri_kwargs)
+        self._process_router(ri, router)
+        router = dict(router, ha=True)
+        self.assertEqual(
+            ['internal_ports', 'external', 'address_scope', 'routes'],
+            self._process_router(ri, router))
+
+    def test_process_changed_revision(self):
+        router = self._get_router()
+        ri = router_info.RouterInfo(router['id'], router, **self.ri_kwargs)
+        self.assertIsNone(ri.revision)
+        self._process_router(
+            ri, dict(router, **{n_const.ROUTER_REVISION_KEY: 'rev1'}))
+        self.assertEqual('rev1', ri.revision)
+        router = dict(router, revision=2,
+                      **{n_const.ROUTER_REVISION_KEY: 'rev2'})
+        self.assertEqual([], self._process_router(ri, router))
+        self.assertEqual('rev2', ri.revision)
+
+    def test_process_after_failure(self):
+        router = self._get_router()
+        ri = router_info.RouterInfo(router['id'], router, **self.ri_kwargs)
+        self._process_router(ri, router)
+        ri.router = dict(router, routes=[{'destination': '135.207.0.0/16',
+                                          'nexthop': '1.2.3.4'}])
+        ri.routes_updated.side_effect = Exception
+        self.assertRaises(Exception, ri.process, mock.Mock())
+        self.assertEqual(
+            ['internal_ports', 'external', 'address_scope', 'routes'],
+            self._process_router(ri, router))
+
+    def test_process_after_floating_ip_error(self):
+        router = self._get_router()
+        ri = router_info.RouterInfo(router['id'], router, **self.ri_kwargs)
+        ri.router = router
+        ri._process_internal_ports = mock.Mock()
+        ri.process_external = mock.Mock(
+            side_effect=lambda agent: ri.update_fip_statuses(
+                agent, {'fip_id': l3_constants.FLOATINGIP_STATUS_ERROR}))
+        ri.process_address_scope = mock.Mock()
+        ri.routes_updated = mock.Mock()
+        ri.process(mock.Mock())
+        self.assertEqual(
+            ['internal_ports', 'external', 'address_scope', 'routes'],
+            self._process_router(ri, router))
+
 
 class BasicRouterTestCaseFramework(base.BaseTestCase):
     def _create_router(self, router=None, **kwargs):
@@ -0,0 +1,143 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import signal
+import socket
+
+import mock
+
+from neutron.agent.l3 import router_processing_queue as queue
+from neutron.agent.l3 import router_workers
+from neutron.tests import base
+
+
+class TestRouterWorkerChannel(base.BaseTestCase):
+    def setUp(self):
+        super(TestRouterWorkerChannel, self).setUp()
+        sock1, sock2 = socket.socketpair()
+        self.channel1 = router_workers.RouterWorkerChannel(sock1)
+        self.channel2 = router_workers.RouterWorkerChannel(sock2)
+        self.addCleanup(self.channel1.close)
+
+    def test_send_recv(self):
+        update = queue.RouterUpdate('router_id', queue.PRIORITY_RPC,
+                                    router={'id': 'router_id'})
+        self.channel1.send('add', update)
+        self.channel1.send('enqueue_state_change', 'router_id', 'master')
+        method, (received,) = self.channel2.recv()
+        self.assertEqual('add', method)
+        self.assertEqual(update.id, received.id)
+        self.assertEqual(update.timestamp, received.timestamp)
+        self.assertEqual(update.router, received.router)
+        self.assertEqual(('enqueue_state_change', ('router_id', 'master')),
+                         self.channel2.recv())
+
+    def test_recv_closed(self):
+        self.channel2.close()
+        self.assertRaises(EOFError, self.channel1.recv)
+
+
+class TestRouterWorkerPool(base.BaseTestCase):
+    def setUp(self):
+        super(TestRouterWorkerPool, self).setUp()
+        self.pool = router_workers.RouterWorkerPool(2)
+        self.channels = [mock.Mock(), mock.Mock()]
+        self.pool._channels = self.channels
+
+    def _sent_router_ids(self, channel):
+        return [c[1][1].id for c in channel.send.mock_calls]
+
+    def test_add_shards_routers(self):
+        router_ids = ['router%d' % i for i in range(20)]
+        for router_id in router_ids * 2:
+            self.pool.add(queue.RouterUpdate(router_id, queue.PRIORITY_RPC))
+        sent = [self._sent_router_ids(channel) for channel in self.channels]
+        self.assertTrue(all(sent))
+        self.assertFalse(set(sent[0]) & set(sent[1]))
+        self.assertEqual(40, len(sent[0]) + len(sent[1]))
+        self.assertEqual(set(router_ids), self.pool.router_ids)
+
+    def test_add_delete_router(self):
+        self.pool.add(queue.RouterUpdate('router', queue.PRIORITY_RPC))
+        self.pool.add(queue.RouterUpdate('router', queue.PRIORITY_RPC,
+                                         action=queue.DELETE_ROUTER))
+        self.assertEqual(set(), self.pool.router_ids)
+        self.assertEqual(
+            2, sum(channel.send.call_count for channel in self.channels))
+
+    def test_add_pd_update(self):
+        update = queue.RouterUpdate(None, queue.PRIORITY_PD_UPDATE,
+                                    action=queue.PD_UPDATE)
+        self.pool.add(update)
+        for channel in self.channels:
+            channel.send.assert_called_once_with('add', update)
+
+    def test_enqueue_state_change(self):
+        self.pool.add(queue.RouterUpdate('router', queue.PRIORITY_RPC))
+        self.pool.enqueue_state_change('router', 'master')
+        for channel in self.channels:
+            if channel.send.called:
+                channel.send.assert_called_with('enqueue_state_change',
+                                                'router', 'master')
+
+    def test_read_worker_stats(self):
+        stats = {'routers': 2, 'interfaces': 3}
+        self.channels[0].recv.side_effect = [('update_stats', (stats,)),
+                                             EOFError]
+        self.channels[1].recv.side_effect = [
+            ('update_stats', ({'routers': 1, 'interfaces': 0},)), EOFError]
+        with mock.patch('os.kill') as kill:
+            self.pool._read_worker(0, self.channels[0])
+            self.pool._read_worker(1, self.channels[1])
+        kill.assert_called_with(mock.ANY, signal.SIGTERM)
+        self.assertEqual({'routers': 3, 'interfaces': 3},
+                         self.pool.get_stats())
+
+    def test_read_worker_revisions(self):
+        self.pool.add(queue.RouterUpdate('router1', queue.PRIORITY_RPC))
+        self.pool.add(queue.RouterUpdate('router2', queue.PRIORITY_RPC))
+        self.channels[0].recv.side_effect = [
+            ('update_revision', ('router1', 'rev1')),
+            ('update_revision', ('router2', 'rev2')),
+            ('update_revision', ('router2', None)),
+            ('update_revision', ('router3', 'rev3')),
+            EOFError]
+        with mock.patch('os.kill'):
+            self.pool._read_worker(0, self.channels[0])
+        self.assertEqual({'router1': 'rev1'}, self.pool.revisions)
+        self.pool.add(queue.RouterUpdate('router1', queue.PRIORITY_RPC,
+                                         action=queue.DELETE_ROUTER))
+        self.assertEqual({}, self.pool.revisions)
+
+    @mock.patch('eventlet.spawn_n')
+    @mock.patch('os.fork', return_value=42)
+    def test_start(self, fork, spawn_n):
+        pool = router_workers.RouterWorkerPool(2)
+        worker_main = mock.Mock()
+        pool.start(worker_main)
+        self.addCleanup(lambda: [c.close() for c in pool._channels])
+        self.assertEqual(2, fork.call_count)
+        self.assertEqual(2, len(pool._channels))
+        self.assertEqual(2, spawn_n.call_count)
+        self.assertFalse(worker_main.called)
+
+    @mock.patch('eventlet.hubs.use_hub')
+    @mock.patch('os.fork', return_value=0)
+    def test_start_worker(self, fork, use_hub):
+        pool = router_workers.RouterWorkerPool(1)
+        worker_main = mock.Mock()
+        with mock.patch('os._exit', side_effect=SystemExit) as exit:
+            self.assertRaises(SystemExit, pool.start, worker_main)
+        exit.assert_called_once_with(0)
+        self.assertIsInstance(worker_main.call_args[0][0],
+                              router_workers.RouterWorkerChannel)
+        worker_main.call_args[0][0].close()
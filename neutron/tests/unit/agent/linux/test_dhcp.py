@@ -1631,6 +1631,37 @@ class TestDnsmasq(TestBase):
             mock.call(exp_opt_name, exp_opt_data),
         ])
 
+    def test_reload_allocations_unchanged_conf_files(self):
+        dm = self._get_dnsmasq(FakeDualNetwork())
+        dm._output_config_files = mock.Mock(return_value=False)
+        self.external_process().active = True
+        dm._spawn_or_reload_process(reload_with_HUP=True)
+        self.assertFalse(self.external_process().enable.called)
+
+    def test__replace_conf_file_unchanged(self):
+        self.useFixture(tools.OpenFixture('/dhcp/opts', 'tag:tag0'))
+        dm = self._get_dnsmasq(FakeDualNetwork())
+        dm._replace_conf_file('/dhcp/opts', 'tag:tag0')
+        self.assertFalse(self.safe.called)
+        self.assertFalse(dm._conf_files_changed)
+        dm._replace_conf_file('/dhcp/opts', 'tag:tag1')
+        self.safe.assert_called_once_with('/dhcp/opts', 'tag:tag1')
+        self.assertTrue(dm._conf_files_changed)
+
+    def test__get_port_entries_renders_replaced_ports(self):
+        network = FakeV4NetworkClientId()
+        dm = self._get_dnsmasq(network)
+        with mock.patch.object(dm, '_render_port_entries',
+                               wraps=dm._render_port_entries) as render:
+            entries = dm._get_port_entries()
+            self.assertEqual(3, render.call_count)
+            network.ports[1] = FakePort5()
+            self.assertEqual(entries, dm._get_port_entries())
+            self.assertEqual(4, render.call_count)
+            network.subnets[0].enable_dhcp = False
+            dm._get_port_entries()
+            self.assertEqual(7, render.call_count)
+
     def test_release_unused_leases(self):
         dnsmasq = self._get_dnsmasq(FakeDualNetwork())
 
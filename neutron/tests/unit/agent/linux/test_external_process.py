@@ -262,3 +262,35 @@ class TestProcessManager(base.BaseTestCase):
             self.assertFalse(manager.active)
 
         mock_open.assert_called_once_with('/proc/4/cmdline', 'r')
+
+    def _test_active_twice(self, ctimes):
+        mock_open = self.useFixture(
+            tools.OpenFixture('/proc/4/cmdline', 'python foo --router_id=uuid')
+        ).mock_open
+        with mock.patch.object(ep.ProcessManager, 'pid') as pid, \
+                mock.patch('os.stat') as stat:
+            pid.__get__ = mock.Mock(return_value=4)
+            stat.side_effect = [mock.Mock(st_ctime=ctime) for ctime in ctimes]
+            manager = ep.ProcessManager(self.conf, 'uuid')
+            self.assertTrue(manager.active)
+            self.assertTrue(manager.active)
+        stat.assert_called_with('/proc/4')
+        return pid.__get__, mock_open
+
+    def test_active_cached(self):
+        get_pid, mock_open = self._test_active_twice([1.5, 1.5])
+        self.assertEqual(1, get_pid.call_count)
+        mock_open.assert_called_once_with('/proc/4/cmdline', 'r')
+
+    def test_active_pid_reused(self):
+        get_pid, mock_open = self._test_active_twice([1.5, 2.5, 2.5])
+        self.assertEqual(2, get_pid.call_count)
+        self.assertEqual(2, mock_open.call_count)
+
+    def test_disable_resets_active_process(self):
+        manager = ep.ProcessManager(self.conf, 'uuid')
+        manager._active_process = (4, 1.5)
+        with mock.patch.object(ep.ProcessManager, 'active') as active:
+            active.__get__ = mock.Mock(return_value=False)
+            manager.disable()
+        self.assertIsNone(manager._active_process)
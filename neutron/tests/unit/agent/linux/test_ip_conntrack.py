@@ -25,6 +25,8 @@ class IPConntrackTestCase(base.BaseTestCase):
         self.execute = mock.Mock()
         self.mgr = ip_conntrack.IpConntrackManager(self._zone_lookup,
                                                    self.execute)
+        self.start_worker = mock.patch.object(self.mgr,
+                                              '_start_worker').start()
 
     def _zone_lookup(self, dev):
         return 100
@@ -34,4 +36,56 @@ class IPConntrackTestCase(base.BaseTestCase):
         dev_info = {'device': 'device', 'fixed_ips': ['1.2.3.4']}
         dev_info_list = [dev_info for _ in range(10)]
         self.mgr._delete_conntrack_state(dev_info_list, rule)
+        self.mgr._delete_conntrack_state(dev_info_list, rule)
+        self.start_worker.assert_called_with()
+        self.mgr._process_queue()
         self.assertEqual(1, len(self.execute.mock_calls))
+
+    def test_delete_conntrack_state_by_remote_ips_coalesces(self):
+        dev_info = {'device': 'device', 'fixed_ips': ['1.2.3.4']}
+        self.mgr.delete_conntrack_state_by_remote_ips(
+            [dev_info], 'IPv4', ['10.0.0.1', '10.0.0.2'])
+        self.assertEqual(4, len(self.mgr._pending[100]))
+        # the entries of every remote ip are deleted with the broader ones
+        self.mgr.delete_conntrack_state_by_remote_ips(
+            [dev_info], 'IPv4', set())
+        self.mgr.delete_conntrack_state_by_remote_ips(
+            [dev_info], 'IPv4', ['10.0.0.3'])
+        self.mgr._process_queue()
+        self.execute.assert_has_calls([
+            mock.call(['conntrack', '-D', '-f', 'ipv4', '-d', '1.2.3.4',
+                       '-w', 100], run_as_root=True, check_exit_code=True,
+                      extra_ok_codes=[1]),
+            mock.call(['conntrack', '-D', '-f', 'ipv4', '-s', '1.2.3.4',
+                       '-w', 100], run_as_root=True, check_exit_code=True,
+                      extra_ok_codes=[1])])
+        self.assertEqual(2, len(self.execute.mock_calls))
+
+    def test_process_queue_batches(self):
+        self.mgr.batch_size = 3
+        rule = {'ethertype': 'IPv4', 'direction': 'ingress'}
+        dev_info_list = [{'device': 'device%d' % i,
+                          'fixed_ips': ['10.0.0.%d' % i]} for i in range(7)]
+        self.mgr._delete_conntrack_state(dev_info_list, rule)
+        with mock.patch.object(ip_conntrack.eventlet, 'sleep') as sleep, \
+                mock.patch.object(self.mgr,
+                                  '_delete_conntrack_entries') as delete:
+            self.mgr._process_queue()
+        self.assertEqual([3, 3, 1],
+                         [len(c[0][0]) for c in delete.call_args_list])
+        self.assertEqual(3, sleep.call_count)
+        self.assertEqual({}, self.mgr._pending)
+
+    def test_delete_conntrack_entries_privsep(self):
+        self.mgr.use_privsep = True
+        rule = {'ethertype': 'IPv4', 'direction': 'egress'}
+        dev_info = {'device': 'device', 'fixed_ips': ['1.2.3.4']}
+        self.mgr._delete_conntrack_state([dev_info], rule)
+        with mock.patch.object(ip_conntrack.privileged,
+                               'delete_conntrack_entries',
+                               return_value=[]) as delete:
+            self.mgr._process_queue()
+        delete.assert_called_once_with(
+            [ip_conntrack.privileged.ConntrackEntry(
+                100, 'ipv4', None, 'egress', '1.2.3.4', None)], None)
+        self.assertFalse(self.execute.called)
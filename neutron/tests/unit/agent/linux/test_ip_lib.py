@@ -15,11 +15,13 @@
 
 import mock
 import netaddr
+from oslo_config import cfg
 import testtools
 
 from neutron.agent.common import utils  # noqa
 from neutron.agent.linux import ip_lib
 from neutron.common import exceptions
+from neutron.privileged.agent.linux import ip_lib as privileged
 from neutron.tests import base
 
 NETNS_SAMPLE = [
@@ -581,6 +583,7 @@ class TestIPCmdBase(base.BaseTestCase):
         super(TestIPCmdBase, self).setUp()
         self.parent = mock.Mock()
         self.parent.name = 'eth0'
+        self.parent.use_privsep = False
 
     def _assert_call(self, options, args):
         self.parent._run.assert_has_calls([
@@ -882,6 +885,129 @@ class TestIpAddrCommand(TestIPCmdBase):
         self.assertEqual('eth0', devices[0]['name'])
 
 
+class TestIpLibPrivsep(base.BaseTestCase):
+    def setUp(self):
+        super(TestIpLibPrivsep, self).setUp()
+        cfg.CONF.set_override('use_privsep_ip_lib', True, 'AGENT')
+        self.execute = mock.patch.object(ip_lib.IpCommandBase,
+                                         '_run').start()
+        self.addresses = [
+            dict(name='eth0', cidr='172.16.77.240/24', scope='global',
+                 dynamic=False, tentative=False, dadfailed=False),
+            dict(name='eth0', cidr='172.16.77.10/24', scope='global',
+                 dynamic=True, tentative=False, dadfailed=False),
+            dict(name='eth0', cidr='fe80::dfcc:aaff:feb9:76ce/64',
+                 scope='link', dynamic=False, tentative=False,
+                 dadfailed=False)]
+
+    @mock.patch.object(privileged, 'get_device_names',
+                       return_value=['lo', 'eth0'])
+    def test_get_devices(self, get_device_names):
+        retval = ip_lib.IPWrapper(namespace='foo').get_devices(
+            exclude_loopback=True)
+        get_device_names.assert_called_once_with('foo')
+        self.assertEqual([ip_lib.IPDevice('eth0', namespace='foo')], retval)
+
+    @mock.patch.object(privileged, 'get_link_attributes',
+                       return_value={'mtu': 1500, 'state': 'UP'})
+    def test_link_attributes(self, get_link_attributes):
+        device = ip_lib.IPDevice('eth0', namespace='foo')
+        self.assertEqual(1500, device.link.mtu)
+        get_link_attributes.assert_called_once_with('eth0', 'foo')
+        self.assertFalse(self.execute.called)
+
+    def test_force_root_uses_ip_command(self):
+        cfg.CONF.register_opts(ip_lib.OPTS)
+        cfg.CONF.set_override('ip_lib_force_root', True)
+        self.assertFalse(ip_lib.IPDevice('eth0').use_privsep)
+
+    def _test_list(self, expected, **kwargs):
+        with mock.patch.object(privileged, 'get_ip_addresses',
+                               return_value=self.addresses) as get_addr:
+            device = ip_lib.IPDevice('eth0', namespace='foo')
+            self.assertEqual(expected, device.addr.list(**kwargs))
+            get_addr.assert_called_once_with(
+                'eth0', 'foo', kwargs.get('ip_version'))
+        self.assertFalse(self.execute.called)
+
+    def test_list(self):
+        self._test_list(self.addresses)
+
+    def test_list_scope(self):
+        self._test_list(self.addresses[2:], scope='link', ip_version=6)
+
+    def test_list_permanent(self):
+        self._test_list([self.addresses[0], self.addresses[2]],
+                        filters=['permanent'])
+
+    def test_list_to(self):
+        self._test_list(self.addresses[1:2], to='172.16.77.10')
+
+    def test_list_other_filters_use_ip_command(self):
+        self.execute.return_value = ''
+        with mock.patch.object(privileged, 'get_ip_addresses') as get_addr:
+            ip_lib.IPDevice('eth0').addr.list(filters=['dynamic'])
+        self.assertFalse(get_addr.called)
+        self.assertTrue(self.execute.called)
+
+    def _test_list_routes(self, expected, routes, table=None, **kwargs):
+        with mock.patch.object(privileged, 'list_routes',
+                               return_value=routes) as list_routes:
+            device = ip_lib.IPDevice('eth0', namespace='foo')
+            route_cmd = device.route.table(table) if table else device.route
+            self.assertEqual(expected, route_cmd.list_routes(4, **kwargs))
+            list_routes.assert_called_once_with(4, 'foo', device='eth0',
+                                                table=table)
+        self.assertFalse(self.execute.called)
+
+    def test_list_routes(self):
+        routes = [{'cidr': '10.0.0.0/24', 'dev': 'eth0', 'scope': 'link',
+                   'src': '10.0.0.1'},
+                  {'cidr': '0.0.0.0/0', 'dev': 'eth0', 'via': '10.0.0.254'}]
+        self._test_list_routes(routes, routes)
+
+    def test_list_routes_table(self):
+        routes = [{'cidr': '0.0.0.0/0', 'dev': 'eth0', 'via': '10.0.0.254'}]
+        self._test_list_routes([dict(routes[0], table='16')], routes,
+                               table='16')
+
+    def test_list_onlink_routes(self):
+        routes = [{'cidr': '10.0.0.0/24', 'dev': 'eth0', 'scope': 'link',
+                   'src': '10.0.0.1'},
+                  {'cidr': '10.0.1.0/24', 'dev': 'eth0', 'scope': 'link'},
+                  {'cidr': '0.0.0.0/0', 'dev': 'eth0', 'via': '10.0.0.254'}]
+        with mock.patch.object(privileged, 'list_routes',
+                               return_value=routes):
+            device = ip_lib.IPDevice('eth0', namespace='foo')
+            self.assertEqual([routes[1]],
+                             device.route.list_onlink_routes(4))
+        self.assertFalse(self.execute.called)
+
+    def test_list_routes_via(self):
+        routes = [{'cidr': '10.0.1.0/24', 'dev': 'eth0', 'via': '10.0.0.2'},
+                  {'cidr': '10.0.2.0/24', 'dev': 'eth0', 'via': '10.0.0.3'}]
+        self._test_list_routes(routes[1:], routes, via='10.0.0.3')
+
+    def test_list_routes_named_table_uses_ip_command(self):
+        self.execute.return_value = ''
+        with mock.patch.object(privileged, 'list_routes') as list_routes:
+            ip_lib.IPDevice('eth0').route.table('main').list_routes(4)
+        self.assertFalse(list_routes.called)
+        self.assertTrue(self.execute.called)
+
+    def test_get_gateway(self):
+        routes = [{'cidr': '10.0.0.0/24', 'dev': 'eth0', 'scope': 'link'},
+                  {'cidr': '0.0.0.0/0', 'dev': 'eth0', 'via': '10.0.0.254',
+                   'metric': '100'}]
+        with mock.patch.object(privileged, 'list_routes',
+                               return_value=routes):
+            device = ip_lib.IPDevice('eth0', namespace='foo')
+            self.assertEqual({'gateway': '10.0.0.254', 'metric': 100},
+                             device.route.get_gateway())
+            self.assertIsNone(device.route.get_gateway(scope='link'))
+        self.assertFalse(self.execute.called)
+
+
 class TestIpRouteCommand(TestIPCmdBase):
     def setUp(self):
         super(TestIpRouteCommand, self).setUp()
@@ -163,3 +163,92 @@ class IpsetManagerTestCase(BaseIpsetManagerTest):
         self.expect_destroy()
         self.ipset.destroy(TEST_SET_ID, ETHERTYPE)
         self.verify_mock_calls()
+
+    def expect_restore(self, input, check_exit_code=True):
+        self.expected_calls.append(
+            mock.call(['ipset', 'restore', '-exist'],
+                      process_input='\n'.join(input),
+                      run_as_root=True,
+                      check_exit_code=check_exit_code))
+
+    def test_set_members_deferred_with_new_set(self):
+        self.ipset.defer_apply_on()
+        self.ipset.set_members(TEST_SET_ID, ETHERTYPE, FAKE_IPS[0:2])
+        self.assertTrue(self.ipset.set_name_exists(TEST_SET_NAME))
+        self.assertFalse(self.execute.called)
+        self.expected_calls = []
+        self.expect_restore(
+            ['create %s hash:net family inet' % TEST_SET_NAME,
+             'create %s hash:net family inet' % TEST_SET_NAME_NEW] +
+            ['add %s %s' % (TEST_SET_NAME_NEW, ip)
+             for ip in self.ipset._sanitize_addresses(FAKE_IPS[0:2])] +
+            ['swap %s %s' % (TEST_SET_NAME_NEW, TEST_SET_NAME),
+             'destroy %s' % TEST_SET_NAME_NEW])
+        self.ipset.defer_apply_off()
+        self.verify_mock_calls()
+        self.assertEqual(1, self.execute.call_count)
+
+    def test_set_members_deferred_with_existing_set(self):
+        self.add_all_ips()
+        self.execute.reset_mock()
+        self.ipset.defer_apply_on()
+        self.ipset.set_members(TEST_SET_ID, ETHERTYPE, FAKE_IPS[0:3])
+        self.ipset.set_members(TEST_SET_ID, ETHERTYPE,
+                               FAKE_IPS[0:2] + ['10.0.0.7'])
+        self.expected_calls = []
+        self.expect_restore(
+            ['add %s %s' % (TEST_SET_NAME, ip)
+             for ip in self.ipset._sanitize_addresses(['10.0.0.7'])] +
+            ['del %s %s' % (TEST_SET_NAME, ip)
+             for ip in self.ipset._sanitize_addresses(FAKE_IPS[2:])])
+        self.ipset.defer_apply_off()
+        self.verify_mock_calls()
+        self.assertEqual(1, self.execute.call_count)
+
+    def test_set_members_deferred_without_changes(self):
+        self.add_all_ips()
+        self.execute.reset_mock()
+        self.ipset.defer_apply_on()
+        self.ipset.set_members(TEST_SET_ID, ETHERTYPE, FAKE_IPS[0:3])
+        self.ipset.set_members(TEST_SET_ID, ETHERTYPE, FAKE_IPS)
+        self.ipset.defer_apply_off()
+        self.assertFalse(self.execute.called)
+
+    def test_destroy_deferred(self):
+        self.add_first_ip()
+        self.execute.reset_mock()
+        self.ipset.defer_apply_on()
+        self.ipset.destroy(TEST_SET_ID, ETHERTYPE)
+        self.assertFalse(self.ipset.set_name_exists(TEST_SET_NAME))
+        self.assertFalse(self.execute.called)
+        self.expected_calls = []
+        self.expect_restore(['destroy %s' % TEST_SET_NAME])
+        self.ipset.defer_apply_off()
+        self.verify_mock_calls()
+        self.assertFalse(self.ipset.set_name_exists(TEST_SET_NAME))
+
+    def test_destroy_deferred_failure_destroys_each_set(self):
+        other_set_name = self.ipset.get_name('other', ETHERTYPE)
+        self.ipset.ipset_sets = {TEST_SET_NAME: [], other_set_name: []}
+        self.ipset.defer_apply_on()
+        self.ipset.destroy(TEST_SET_ID, ETHERTYPE)
+        self.ipset.destroy('other', ETHERTYPE)
+        self.execute.side_effect = [RuntimeError('set in use'), None, None]
+        self.ipset.defer_apply_off()
+        self.expected_calls = []
+        self.expect_restore(['destroy %s' % set_name for set_name in
+                             sorted([TEST_SET_NAME, other_set_name])])
+        self.expected_calls.extend(
+            mock.call(['ipset', 'destroy', set_name], process_input=None,
+                      run_as_root=True, check_exit_code=False)
+            for set_name in sorted([TEST_SET_NAME, other_set_name]))
+        self.verify_mock_calls()
+        self.assertEqual({}, self.ipset.ipset_sets)
+
+    def test_set_members_and_destroy_deferred(self):
+        self.ipset.defer_apply_on()
+        self.ipset.set_members(TEST_SET_ID, ETHERTYPE, FAKE_IPS)
+        self.ipset.destroy(TEST_SET_ID, ETHERTYPE)
+        self.ipset.defer_apply_off()
+        self.assertFalse(self.execute.called)
+        self.assertFalse(self.ipset.set_name_exists(TEST_SET_NAME))
@@ -23,6 +23,7 @@ import testtools
 
 from neutron.agent.common import config as a_cfg
 from neutron.agent import firewall
+from neutron.agent.linux import ip_conntrack
 from neutron.agent.linux import ipset_manager
 from neutron.agent.linux import iptables_comments as ic
 from neutron.agent.linux import iptables_firewall
@@ -76,6 +77,10 @@ class BaseIptablesFirewallTestCase(base.BaseTestCase):
         self.utils_exec_p = mock.patch(
             'neutron.agent.linux.utils.execute')
         self.utils_exec = self.utils_exec_p.start()
+        # delete the conntrack entries right away instead of in a greenthread
+        mock.patch.object(ip_conntrack.IpConntrackManager, '_start_worker',
+                          autospec=True,
+                          side_effect=lambda mgr: mgr._process_queue()).start()
         self.iptables_cls_p = mock.patch(
             'neutron.agent.linux.iptables_manager.IptablesManager')
         iptables_cls = self.iptables_cls_p.start()
@@ -1800,6 +1805,19 @@ class IptablesFirewallEnhancedIpsetTestCase(BaseIptablesFirewallTestCase):
 
         self.firewall.ipset.assert_has_calls(calls, any_order=True)
 
+    def test_defer_apply_commits_ipsets_around_iptables(self):
+        manager = mock.Mock()
+        manager.attach_mock(self.firewall.ipset, 'ipset')
+        manager.attach_mock(self.iptables_inst, 'iptables')
+        with self.firewall.defer_apply():
+            pass
+        manager.assert_has_calls([mock.call.iptables.defer_apply_on(),
+                                  mock.call.ipset.defer_apply_on(),
+                                  mock.call.ipset.defer_apply_off(),
+                                  mock.call.iptables.defer_apply_off(),
+                                  mock.call.ipset.defer_apply_on(),
+                                  mock.call.ipset.defer_apply_off()])
+
     def test_filter_defer_apply_off_with_sg_only_ipv6_rule(self):
         self.firewall.sg_rules = self._fake_sg_rules()
         self.firewall.pre_sg_rules = self._fake_sg_rules()
@@ -900,6 +900,121 @@ class IptablesManagerStateFulTestCase(base.BaseTestCase):
             {'wrap': True, 'top': False, 'rule': '-j DROP',
              'chain': 'nonexistent'})
 
+    def test_apply_skips_converged_tables(self):
+        self.execute.return_value = FILTER_DUMP
+        with mock.patch.object(iptables_manager,
+                               '_generate_path_between_rules',
+                               return_value=[]), \
+                mock.patch.object(self.iptables, '_modify_rules',
+                                  return_value=[]) as modify:
+            self.iptables.apply()
+            self.assertEqual(len(self.iptables.ipv4), modify.call_count)
+            for table in self.iptables.ipv4.values():
+                self.assertFalse(table.dirty_chains)
+
+            modify.reset_mock()
+            self.iptables.apply()
+            self.assertFalse(modify.called)
+
+            self.iptables.ipv4['filter'].add_rule('INPUT', '-j DROP')
+            self.iptables.apply()
+            modify.assert_called_once_with(
+                mock.ANY, self.iptables.ipv4['filter'], 'filter')
+
+    def test_apply_skips_converged_tables_with_new_counters(self):
+        self.execute.return_value = FILTER_DUMP.replace(
+            ':INPUT - [0:0]', ':INPUT ACCEPT [12:3456]')
+        with mock.patch.object(iptables_manager,
+                               '_generate_path_between_rules',
+                               return_value=[]), \
+                mock.patch.object(self.iptables, '_modify_rules',
+                                  return_value=[]) as modify:
+            self.iptables.apply()
+            modify.reset_mock()
+            self.execute.return_value = FILTER_DUMP.replace(
+                ':INPUT - [0:0]', ':INPUT ACCEPT [78:91011]')
+            self.iptables.apply()
+            self.assertFalse(modify.called)
+
+    def test_apply_rediffs_table_changed_by_others(self):
+        self.execute.return_value = FILTER_DUMP
+        with mock.patch.object(iptables_manager,
+                               '_generate_path_between_rules',
+                               return_value=[]), \
+                mock.patch.object(self.iptables, '_modify_rules',
+                                  return_value=[]) as modify:
+            self.iptables.apply()
+            modify.reset_mock()
+            self.execute.return_value = FILTER_DUMP.replace(
+                'COMMIT', '-A INPUT -j DROP\nCOMMIT')
+            self.iptables.apply()
+            modify.assert_called_once_with(
+                mock.ANY, self.iptables.ipv4['filter'], 'filter')
+
+    def _get_save_calls(self):
+        return [c for c in self.execute.call_args_list
+                if c == mock.call(['iptables-save'], run_as_root=True)]
+
+    def test_apply_trusts_cached_state(self):
+        cfg.CONF.set_override('iptables_state_verify_interval', 60, 'AGENT')
+        self.execute.return_value = ''
+        self.iptables.apply()
+        self.iptables.ipv4['filter'].add_rule('INPUT', '-j DROP')
+        self.iptables.apply()
+        self.assertEqual(1, len(self._get_save_calls()))
+        self.execute.assert_called_with(
+            ['iptables-restore', '-n'],
+            process_input=('# Generated by iptables_manager\n'
+                           '*filter\n'
+                           '-I %(bn)s-INPUT 1 -j DROP\n'
+                           'COMMIT\n'
+                           '# Completed by iptables_manager\n' %
+                           IPTABLES_ARG),
+            run_as_root=True)
+        self.assertEqual([], self.iptables.apply())
+
+    def test_apply_verifies_cached_state_after_interval(self):
+        cfg.CONF.set_override('iptables_state_verify_interval', 60, 'AGENT')
+        self.execute.return_value = ''
+        with mock.patch.object(iptables_manager.time, 'time',
+                               return_value=1000):
+            self.iptables.apply()
+        with mock.patch.object(iptables_manager.time, 'time',
+                               return_value=1061):
+            self.iptables.apply()
+        self.assertEqual(2, len(self._get_save_calls()))
+
+    def test_apply_verifies_cached_state_after_restore_failure(self):
+        cfg.CONF.set_override('iptables_state_verify_interval', 60, 'AGENT')
+
+        def iptables_restore_failer(*args, **kwargs):
+            if 'iptables-restore' in args[0]:
+                raise RuntimeError()
+            return ''
+        self.execute.side_effect = iptables_restore_failer
+        self.assertRaises(RuntimeError, self.iptables.apply)
+        self.assertRaises(RuntimeError, self.iptables.apply)
+        self.assertEqual(2, len(self._get_save_calls()))
+
+    def test_apply_without_verify_interval_always_saves(self):
+        self.execute.return_value = ''
+        self.iptables.apply()
+        self.iptables.apply()
+        self.assertEqual(2, len(self._get_save_calls()))
+
+    def test_generate_path_between_rules_skips_unchanged_chains(self):
+        old_rules = [':INPUT ACCEPT [0:0]', ':OUTPUT ACCEPT [0:0]',
+                     '-A INPUT -j DROP', '-A OUTPUT -j DROP']
+        new_rules = [':INPUT ACCEPT [0:0]', ':OUTPUT ACCEPT [0:0]',
+                     '-A INPUT -j DROP', '-A OUTPUT -j ACCEPT']
+        with mock.patch.object(iptables_manager,
+                               '_generate_chain_diff_iptables_commands',
+                               return_value=[]) as chain_diff:
+            iptables_manager._generate_path_between_rules(old_rules,
+                                                          new_rules)
+        chain_diff.assert_called_once_with(
+            'OUTPUT', ['-A OUTPUT -j DROP'], ['-A OUTPUT -j ACCEPT'])
+
     def test_iptables_failure_with_no_failing_line_number(self):
         with mock.patch.object(iptables_manager, "LOG") as log:
             # generate Runtime errors on iptables-restore calls
@@ -70,3 +70,91 @@ class TestSimpleInterfaceMonitor(base.BaseTestCase):
             self.monitor.process_events()
             self.assertEqual(self.monitor.new_events['added'][0]['ofport'],
                              ovs_lib.UNASSIGNED_OFPORT)
+
+
+class TestNativeInterfaceMonitor(base.BaseTestCase):
+
+    def setUp(self):
+        super(TestNativeInterfaceMonitor, self).setUp()
+        self.rows = {}
+        conn_cls = mock.patch.object(ovsdb_monitor.connection,
+                                     'Connection').start()
+        self.conn = conn_cls.return_value
+        self.conn.idl.tables = {'Interface': mock.Mock(rows=self.rows)}
+        self.monitor = ovsdb_monitor.NativeInterfaceMonitor()
+
+    @staticmethod
+    def _row(name, ofport=None, external_ids=None):
+        row = mock.Mock(ofport=[ofport] if ofport else [],
+                        external_ids=external_ids or {})
+        row.name = name
+        return row
+
+    @staticmethod
+    def _device(name, ofport=None, external_ids=None):
+        return {'name': name,
+                'ofport': ofport or ovs_lib.UNASSIGNED_OFPORT,
+                'external_ids': external_ids or {}}
+
+    def _notify(self, event, row):
+        self.monitor._notify(event, row)
+
+    def test_start_signals_current_interfaces_as_added(self):
+        self.rows['uuid1'] = self._row('tap1', 1)
+        self.monitor.start()
+        self.conn.start.assert_called_once_with(table_name_list=[])
+        self.assertTrue(self.monitor.is_active())
+        self.assertTrue(self.monitor.has_updates)
+        self.assertEqual({'added': [self._device('tap1', 1)], 'removed': []},
+                         self.monitor.get_events())
+        self.assertFalse(self.monitor.has_updates)
+
+    def test_notify_ignored_when_not_active(self):
+        self._notify(ovsdb_monitor.idl.ROW_CREATE, self._row('tap1', 1))
+        self.assertFalse(self.monitor.has_updates)
+
+    def test_notify_create_and_delete(self):
+        self.monitor.start()
+        self.monitor.get_events()
+        self._notify(ovsdb_monitor.idl.ROW_CREATE, self._row('tap1'))
+        self._notify(ovsdb_monitor.idl.ROW_DELETE, self._row('tap2', 2))
+        self.assertEqual({'added': [self._device('tap1')],
+                          'removed': [self._device('tap2', 2)]},
+                         self.monitor.get_events())
+
+    def test_notify_ofport_assigned_to_pending_interface(self):
+        self.monitor.start()
+        self.monitor.get_events()
+        self._notify(ovsdb_monitor.idl.ROW_CREATE, self._row('tap1'))
+        self._notify(ovsdb_monitor.idl.ROW_UPDATE, self._row('tap1', 3))
+        self.assertEqual({'added': [self._device('tap1', 3)], 'removed': []},
+                         self.monitor.get_events())
+
+    def test_notify_ofport_change_signals_interface_as_added(self):
+        self.rows['uuid1'] = self._row('tap1', 1)
+        self.monitor.start()
+        self.monitor.get_events()
+        self._notify(ovsdb_monitor.idl.ROW_UPDATE, self._row('tap1', 1))
+        self.assertFalse(self.monitor.has_updates)
+        self._notify(ovsdb_monitor.idl.ROW_UPDATE, self._row('tap1', 5))
+        self.assertEqual({'added': [self._device('tap1', 5)], 'removed': []},
+                         self.monitor.get_events())
+
+    def test_wait_returns_when_events_are_available(self):
+        self.monitor.start()
+        with mock.patch.object(self.monitor._events_available,
+                               'wait') as wait:
+            self.monitor.wait(2)
+        wait.assert_called_once_with(2)
+        self.assertTrue(self.monitor._events_available.is_set())
+        self.monitor.get_events()
+        self.assertFalse(self.monitor._events_available.is_set())
+        self._notify(ovsdb_monitor.idl.ROW_CREATE, self._row('tap1'))
+        self.assertTrue(self.monitor._events_available.is_set())
+
+    def test_stop_drops_events(self):
+        self.monitor.start()
+        self.monitor.stop()
+        self.assertFalse(self.monitor.is_active())
+        self.assertEqual({'added': [], 'removed': []},
+                         self.monitor.get_events())
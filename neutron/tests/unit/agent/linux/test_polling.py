@@ -13,8 +13,10 @@
 #    under the License.
 
 import mock
+from oslo_config import cfg
 
 from neutron.agent.common import base_polling
+from neutron.agent.linux import ovsdb_monitor
 from neutron.agent.linux import polling
 from neutron.tests import base
 
@@ -35,6 +37,29 @@ class TestGetPollingManager(base.BaseTestCase):
                 mock_stop.assert_has_calls([mock.call()])
             mock_start.assert_has_calls([mock.call()])
 
+    def _test_polling_minimizer_monitor(self, ovsdb_interface,
+                                        expected_monitor_cls):
+        cfg.CONF.set_override('ovsdb_interface', ovsdb_interface, 'OVS')
+        mock_target = 'neutron.agent.linux.polling.InterfacePollingMinimizer'
+        with mock.patch('%s.start' % mock_target), \
+                mock.patch('%s.stop' % mock_target):
+            with polling.get_polling_manager(minimize_polling=True) as pm:
+                self.assertIsInstance(pm._monitor, expected_monitor_cls)
+
+    def test_polling_minimizer_uses_native_monitor(self):
+        self._test_polling_minimizer_monitor(
+            'native', ovsdb_monitor.NativeInterfaceMonitor)
+
+    def test_polling_minimizer_uses_ovsdb_client_with_vsctl(self):
+        self._test_polling_minimizer_monitor(
+            'vsctl', ovsdb_monitor.SimpleInterfaceMonitor)
+
+    def test_polling_minimizer_native_monitor_not_supported(self):
+        with mock.patch.object(ovsdb_monitor.NativeInterfaceMonitor,
+                               'is_supported', return_value=False):
+            self._test_polling_minimizer_monitor(
+                'native', ovsdb_monitor.SimpleInterfaceMonitor)
+
 
 class TestInterfacePollingMinimizer(base.BaseTestCase):
 
@@ -47,6 +72,11 @@ class TestInterfacePollingMinimizer(base.BaseTestCase):
             self.pm.start()
         mock_start.assert_called_with()
 
+    def test_wait_calls_monitor_wait(self):
+        with mock.patch.object(self.pm._monitor, 'wait') as mock_wait:
+            self.pm.wait(2)
+        mock_wait.assert_called_once_with(2)
+
     def test_stop_calls_monitor_stop(self):
         with mock.patch.object(self.pm._monitor, 'stop') as mock_stop:
             self.pm.stop()
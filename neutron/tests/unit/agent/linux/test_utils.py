@@ -402,3 +402,7 @@ class TestUnixDomainWSGIServer(base.BaseTestCase):
             log=mock.ANY,
             max_size=self.server.num_threads
         )
+
+    def test_num_threads(self):
+        server = utils.UnixDomainWSGIServer('test', num_threads=64)
+        self.assertEqual(64, server.num_threads)
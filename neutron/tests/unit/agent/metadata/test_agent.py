@@ -24,6 +24,7 @@ from neutron.agent.linux import utils as agent_utils
 from neutron.agent.metadata import agent
 from neutron.agent.metadata import config
 from neutron.agent import metadata_agent
+from neutron.agent import rpc as agent_rpc
 from neutron.common import cache_utils as cache
 from neutron.common import utils
 from neutron.tests import base
@@ -40,7 +41,8 @@ class ConfFixture(config_fixture.Config):
                     nova_metadata_protocol='http',
                     nova_metadata_insecure=True,
                     nova_client_cert='nova_cert',
-                    nova_client_priv_key='nova_priv_key')
+                    nova_client_priv_key='nova_priv_key',
+                    enable_port_index=False)
         cache.register_oslo_configs(self.conf)
         self.config(cache_url='')
 
@@ -412,6 +414,30 @@ class _TestMetadataProxyHandlerCacheMixin(object):
         with testtools.ExpectedException(Exception):
             self._proxy_request_test_helper(302)
 
+    def test_proxy_request_reuses_http_client(self):
+        req = mock.Mock(path_info='/the_path', query_string='', headers={},
+                        method='GET', body='body')
+        resp = mock.MagicMock(status=200)
+        resp.__getitem__.return_value = "text/plain"
+        with mock.patch('httplib2.Http') as mock_http:
+            mock_http.return_value.request.return_value = (resp, 'content')
+            self.handler._proxy_request('the_id', 'tenant_id', req)
+            self.handler._proxy_request('the_id', 'tenant_id', req)
+        mock_http.assert_called_once_with(
+            ca_certs=None, disable_ssl_certificate_validation=True)
+        self.assertEqual(2, mock_http.return_value.request.call_count)
+
+    def test_call_logs_elapsed_times(self):
+        req = mock.Mock(path_info='/the_path')
+        with mock.patch.object(self.handler,
+                               '_get_instance_and_tenant_id',
+                               return_value=('the_id', 'tenant_id')), \
+                mock.patch.object(self.handler, '_proxy_request'):
+            self.handler(req)
+        self.log.debug.assert_called_with(
+            mock.ANY, {'path': '/the_path', 'instance_id': 'the_id',
+                       'lookup': mock.ANY, 'proxy': mock.ANY})
+
     def test_sign_instance_id(self):
         self.assertEqual(
             self.handler._sign_instance_id('foo'),
@@ -446,6 +472,61 @@ class TestMetadataProxyHandlerNoCache(TestMetadataProxyHandlerCache):
             2, self.handler.plugin_rpc.get_ports.call_count)
 
 
+class PortIndexConfFixture(ConfFixture):
+    def setUp(self):
+        super(PortIndexConfFixture, self).setUp()
+        self.config(enable_port_index=True)
+
+
+class TestMetadataProxyHandlerPortIndex(TestMetadataProxyHandlerBase):
+    fake_conf = cfg.CONF
+    fake_conf_fixture = PortIndexConfFixture(fake_conf)
+
+    def setUp(self):
+        super(TestMetadataProxyHandlerPortIndex, self).setUp()
+        mock.patch.object(agent_rpc, 'create_consumers').start()
+        self.handler._port_index.plugin_rpc = self.handler.plugin_rpc
+        self.port = {'id': 'port_id', 'network_id': 'net1',
+                     'device_id': 'device_id', 'device_owner': 'compute:nova',
+                     'tenant_id': 'tenant_id',
+                     'fixed_ips': [{'ip_address': '192.168.1.1'}]}
+        self.router_port = {'id': 'router_port_id', 'network_id': 'net1',
+                            'device_id': 'router_id',
+                            'device_owner': n_const.DEVICE_OWNER_ROUTER_INTF,
+                            'tenant_id': 'tenant_id',
+                            'fixed_ips': [{'ip_address': '192.168.1.254'}]}
+
+    def _get_instance_and_tenant_id(self, headers):
+        headers['X-Forwarded-For'] = '192.168.1.1'
+        req = mock.Mock(headers=headers)
+        return self.handler._get_instance_and_tenant_id(req)
+
+    def test_get_instance_id_network_id(self):
+        self.handler.plugin_rpc.get_ports.return_value = [self.port]
+        for _i in range(2):
+            self.assertEqual(
+                ('device_id', 'tenant_id'),
+                self._get_instance_and_tenant_id(
+                    {'X-Neutron-Network-ID': 'net1'}))
+        self.handler.plugin_rpc.get_ports.assert_called_once_with(
+            mock.ANY, {'network_id': ['net1']})
+
+    def test_get_instance_id_router_id(self):
+        self.handler.plugin_rpc.get_ports.side_effect = [
+            [self.router_port], [self.router_port, self.port]]
+        for _i in range(2):
+            self.assertEqual(
+                ('device_id', 'tenant_id'),
+                self._get_instance_and_tenant_id(
+                    {'X-Neutron-Router-ID': 'router_id'}))
+        self.handler.plugin_rpc.get_ports.assert_has_calls([
+            mock.call(mock.ANY,
+                      {'device_id': ['router_id'],
+                       'device_owner': n_const.ROUTER_INTERFACE_OWNERS}),
+            mock.call(mock.ANY, {'network_id': ['net1']})])
+        self.assertEqual(2, self.handler.plugin_rpc.get_ports.call_count)
+
+
 class TestUnixDomainMetadataProxy(base.BaseTestCase):
     def setUp(self):
         super(TestUnixDomainMetadataProxy, self).setUp()
@@ -457,6 +538,7 @@ class TestUnixDomainMetadataProxy(base.BaseTestCase):
         self.cfg.CONF.metadata_proxy_socket = '/the/path'
         self.cfg.CONF.metadata_workers = 0
         self.cfg.CONF.metadata_backlog = 128
+        self.cfg.CONF.metadata_pool_size = 64
         self.cfg.CONF.metadata_proxy_socket_mode = config.USER_MODE
 
     @mock.patch.object(utils, 'ensure_dir')
@@ -503,7 +585,7 @@ class TestUnixDomainMetadataProxy(base.BaseTestCase):
 
         ensure_dir.assert_called_once_with('/the')
         server.assert_has_calls([
-            mock.call('neutron-metadata-agent'),
+            mock.call('neutron-metadata-agent', num_threads=64),
             mock.call().start(handler.return_value,
                               '/the/path', workers=0,
                               backlog=128, mode=0o644),
@@ -0,0 +1,178 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import mock
+from neutron_lib import constants
+
+from neutron.agent.metadata import port_index
+from neutron.agent import rpc as agent_rpc
+from neutron.common import topics
+from neutron.tests import base
+
+
+def _port(port_id, network_id, ip_address, device_id='device_id',
+          device_owner='compute:nova'):
+    return {'id': port_id, 'network_id': network_id, 'device_id': device_id,
+            'device_owner': device_owner, 'tenant_id': 'tenant_id',
+            'fixed_ips': [{'ip_address': ip_address}]}
+
+
+class TestPortIndex(base.BaseTestCase):
+    def setUp(self):
+        super(TestPortIndex, self).setUp()
+        self.create_consumers = mock.patch.object(
+            agent_rpc, 'create_consumers').start()
+        self.looping_call = mock.patch(
+            'oslo_service.loopingcall.FixedIntervalLoopingCall').start()
+        self.plugin_rpc = mock.Mock()
+        self.index = port_index.PortIndex(self.plugin_rpc, mock.Mock(), 60)
+
+    def test_get_ports_loads_network_once(self):
+        port = _port('port1', 'net1', '10.0.0.1')
+        self.plugin_rpc.get_ports.return_value = [
+            port, _port('port2', 'net1', '10.0.0.2')]
+        for _i in range(2):
+            ports = self.index.get_ports('10.0.0.1', ('net1',))
+            self.assertEqual(['port1'], [p['id'] for p in ports])
+        self.plugin_rpc.get_ports.assert_called_once_with(
+            mock.ANY, {'network_id': ['net1']})
+
+    def test_start_once(self):
+        self.plugin_rpc.get_ports.return_value = []
+        self.index.get_ports('10.0.0.1', ('net1',))
+        self.index.get_ports('10.0.0.1', ('net1',))
+        self.create_consumers.assert_called_once_with(
+            [self.index], topics.AGENT,
+            [[topics.PORT, topics.UPDATE],
+             [topics.PORT, topics.DELETE],
+             [topics.NETWORK, topics.DELETE]])
+        self.looping_call.return_value.start.assert_called_once_with(
+            interval=60, initial_delay=60)
+
+    def test_get_ports_miss_asks_server(self):
+        port = _port('port1', 'net1', '10.0.0.1')
+        self.plugin_rpc.get_ports.side_effect = [[], [port]]
+        ports = self.index.get_ports('10.0.0.1', ('net1',))
+        self.assertEqual(['port1'], [p['id'] for p in ports])
+        self.plugin_rpc.get_ports.assert_called_with(
+            mock.ANY, {'network_id': ['net1'],
+                       'fixed_ips': {'ip_address': ['10.0.0.1']}})
+        self.plugin_rpc.get_ports.reset_mock()
+        self.index.get_ports('10.0.0.1', ('net1',))
+        self.assertFalse(self.plugin_rpc.get_ports.called)
+
+    def test_port_update(self):
+        self.plugin_rpc.get_ports.return_value = [
+            _port('port1', 'net1', '10.0.0.1')]
+        self.index.get_ports('10.0.0.1', ('net1',))
+        self.index.port_update(
+            mock.Mock(), port=_port('port1', 'net1', '10.0.0.3'))
+        self.index.port_update(
+            mock.Mock(), port=_port('port2', 'net2', '10.0.0.1'))
+        self.plugin_rpc.get_ports.reset_mock()
+        self.plugin_rpc.get_ports.return_value = []
+        ports = self.index.get_ports('10.0.0.3', ('net1',))
+        self.assertEqual(['port1'], [p['id'] for p in ports])
+        self.assertFalse(self.plugin_rpc.get_ports.called)
+        self.assertNotIn('port2', self.index._ports)
+
+    def test_port_delete(self):
+        self.plugin_rpc.get_ports.return_value = [
+            _port('port1', 'net1', '10.0.0.1')]
+        self.index.get_ports('10.0.0.1', ('net1',))
+        self.index.port_delete(mock.Mock(), port_id='port1')
+        self.assertEqual({}, self.index._ports)
+        self.assertEqual({}, self.index._addresses)
+
+    def test_network_delete(self):
+        self.plugin_rpc.get_ports.return_value = [
+            _port('port1', 'net1', '10.0.0.1')]
+        self.index.get_ports('10.0.0.1', ('net1',))
+        self.index.network_delete(mock.Mock(), network_id='net1')
+        self.assertEqual({}, self.index._ports)
+        self.assertEqual(set(), self.index._networks)
+
+    def test_get_router_networks(self):
+        self.plugin_rpc.get_ports.return_value = [
+            _port('rport1', 'net2', '10.0.1.1', device_id='router1',
+                  device_owner=constants.DEVICE_OWNER_ROUTER_INTF),
+            _port('rport2', 'net1', '10.0.0.1', device_id='router1',
+                  device_owner=constants.DEVICE_OWNER_ROUTER_INTF)]
+        self.assertEqual(('net1', 'net2'),
+                         self.index.get_router_networks('router1'))
+        self.index.port_update(
+            mock.Mock(),
+            port=_port('rport3', 'net3', '10.0.2.1', device_id='router1',
+                       device_owner=constants.DEVICE_OWNER_ROUTER_INTF))
+        self.index.port_delete(mock.Mock(), port_id='rport1')
+        self.assertEqual(('net1', 'net3'),
+                         self.index.get_router_networks('router1'))
+        self.plugin_rpc.get_ports.assert_called_once_with(
+            mock.ANY, {'device_id': ['router1'],
+                       'device_owner': constants.ROUTER_INTERFACE_OWNERS})
+
+    def test_get_router_ports(self):
+        rport = _port('rport1', 'net1', '10.0.0.254', device_id='router1',
+                      device_owner=constants.DEVICE_OWNER_ROUTER_INTF)
+        port = _port('port1', 'net1', '10.0.0.1')
+        self.plugin_rpc.get_ports.side_effect = [[rport], [rport, port]]
+        for _i in range(2):
+            ports = self.index.get_router_ports('10.0.0.1', 'router1')
+            self.assertEqual(['port1'], [p['id'] for p in ports])
+        self.assertEqual(2, self.plugin_rpc.get_ports.call_count)
+
+    def test_get_router_ports_miss_refreshes_router(self):
+        rport1 = _port('rport1', 'net1', '10.0.0.254', device_id='router1',
+                       device_owner=constants.DEVICE_OWNER_ROUTER_INTF)
+        rport2 = _port('rport2', 'net2', '10.0.1.254', device_id='router1',
+                       device_owner=constants.DEVICE_OWNER_ROUTER_INTF)
+        port = _port('port1', 'net2', '10.0.1.1')
+        self.plugin_rpc.get_ports.side_effect = [
+            [rport1], [rport1], [rport1, rport2], [rport2, port]]
+        self.assertEqual(('net1',), self.index.get_router_networks('router1'))
+        # the interface on net2 was added without any port update
+        ports = self.index.get_router_ports('10.0.1.1', 'router1')
+        self.assertEqual(['port1'], [p['id'] for p in ports])
+        self.assertEqual(('net1', 'net2'),
+                         self.index.get_router_networks('router1'))
+        self.plugin_rpc.get_ports.assert_has_calls([
+            mock.call(mock.ANY,
+                      {'device_id': ['router1'],
+                       'device_owner': constants.ROUTER_INTERFACE_OWNERS}),
+            mock.call(mock.ANY, {'network_id': ['net2']})])
+
+    def test_get_router_ports_miss_removed_interface(self):
+        rport1 = _port('rport1', 'net1', '10.0.0.254', device_id='router1',
+                       device_owner=constants.DEVICE_OWNER_ROUTER_INTF)
+        self.plugin_rpc.get_ports.side_effect = [[rport1], [rport1], []]
+        self.assertEqual([], self.index.get_router_ports('10.0.0.1',
+                                                         'router1'))
+        self.assertEqual((), self.index.get_router_networks('router1'))
+        self.assertNotIn('rport1', self.index._ports)
+
+    def test_resync(self):
+        self.plugin_rpc.get_ports.return_value = [
+            _port('port1', 'net1', '10.0.0.1')]
+        self.index.get_ports('10.0.0.1', ('net1',))
+        self.plugin_rpc.get_ports.return_value = [
+            _port('port2', 'net1', '10.0.0.2')]
+        self.index._resync()
+        self.assertEqual(['port2'], list(self.index._ports))
+        self.assertEqual({'net1'}, self.index._networks)
+
+    def test_resync_failure_keeps_index(self):
+        self.plugin_rpc.get_ports.return_value = [
+            _port('port1', 'net1', '10.0.0.1')]
+        self.index.get_ports('10.0.0.1', ('net1',))
+        self.plugin_rpc.get_ports.side_effect = Exception
+        self.index._resync()
+        self.assertEqual(['port1'], list(self.index._ports))
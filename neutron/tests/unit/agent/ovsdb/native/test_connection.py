@@ -53,6 +53,21 @@ class TestOVSNativeConnection(base.BaseTestCase):
     def test_start_with_table_name_list(self):
         self._test_start(table_name_list=['fake-table1', 'fake-table2'])
 
+    @mock.patch.object(connection, 'TransactionQueue')
+    @mock.patch.object(idlutils, 'get_schema_helper')
+    @mock.patch.object(idlutils, 'wait_for_change')
+    def test_start_with_idl_class(self, wfc, gsh, tq):
+        idl_class = mock.Mock()
+        self.connection = connection.Connection(
+            mock.sentinel.connection, mock.Mock(), mock.Mock(),
+            idl_class=idl_class)
+        with mock.patch.object(poller, 'Poller'), \
+                mock.patch('threading.Thread'):
+            self.connection.start(table_name_list=[])
+        idl_class.assert_called_once_with(mock.sentinel.connection,
+                                          gsh.return_value)
+        self.assertEqual(idl_class.return_value, self.connection.idl)
+
     def test_transaction_queue_init(self):
         # a test to cover py34 failure during initialization (LP Bug #1580270)
         # make sure no ValueError: can't have unbuffered text I/O is raised
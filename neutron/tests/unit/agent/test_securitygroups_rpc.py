@@ -15,6 +15,7 @@
 
 import collections
 import contextlib
+import copy
 
 import mock
 from neutron_lib import constants as const
@@ -1393,6 +1394,71 @@ class SecurityGroupAgentEnhancedRpcTestCase(
         self.agent.refresh_firewall([])
         self.assertFalse(self.firewall.called)
 
+    def test_prepare_devices_filter_sends_cached_info(self):
+        self.agent.prepare_devices_filter(['fake_device'])
+        self.agent.refresh_firewall(['fake_device'])
+        sg_info = self.agent.plugin_rpc.security_group_info_for_devices
+        sg_info.assert_called_with(
+            None, ['fake_device'], cached_info={
+                'security_groups': {
+                    'fake_sgid1': securitygroups_rpc.get_rules_digest(
+                        [{'remote_group_id': 'fake_sgid2'}]),
+                    'fake_sgid2': securitygroups_rpc.get_rules_digest([])},
+                'sg_member_ips': {'fake_sgid2': {
+                    'IPv4': [securitygroups_rpc.get_digest([])],
+                    'IPv6': [securitygroups_rpc.get_digest([])]}}})
+
+    def test_remove_devices_filter_prunes_cache(self):
+        self.agent.prepare_devices_filter(['fake_device'])
+        self.firewall.ports = {}
+        self.agent.remove_devices_filter(['fake_device'])
+        self.assertEqual({'security_groups': {}, 'sg_member_ips': {}},
+                         self.agent.sg_info_cache.get_cached_info())
+
+
+class SecurityGroupInfoCacheTestCase(base.BaseTestCase):
+
+    def _get_sg_info(self, rules, member_ips):
+        return {'devices': {'fake_device': {}},
+                'security_groups': {'sg1': rules, 'sg2': []},
+                'sg_member_ips': {'sg1': {'IPv4': member_ips}}}
+
+    def _apply(self, cache, sg_info):
+        delta = securitygroups_rpc.make_security_group_info_delta(
+            copy.deepcopy(sg_info), cache.get_cached_info())
+        return cache.apply(delta)
+
+    def test_apply_delta(self):
+        cache = sg_rpc.SecurityGroupInfoCache()
+        rules = [{'direction': 'ingress', 'remote_group_id': 'sg1'}]
+        member_ips = ['10.0.0.%d' % i for i in range(200)]
+        sg_info = self._get_sg_info(rules, member_ips)
+        self.assertEqual(sg_info, self._apply(cache, sg_info))
+
+        member_ips = member_ips[1:] + ['10.0.1.1']
+        sg_info = self._get_sg_info(rules, member_ips)
+        delta = securitygroups_rpc.make_security_group_info_delta(
+            copy.deepcopy(sg_info), cache.get_cached_info())
+        self.assertEqual(['sg1', 'sg2'],
+                         sorted(delta['unchanged_security_groups']))
+        self.assertGreaterEqual(2, len(
+            delta['sg_member_ips_buckets']['sg1']['IPv4']))
+        result = cache.apply(delta)
+        self.assertEqual(sg_info['security_groups'],
+                         result['security_groups'])
+        self.assertEqual(set(member_ips),
+                         set(result['sg_member_ips']['sg1']['IPv4']))
+
+    def test_apply_delta_respreads_members(self):
+        cache = sg_rpc.SecurityGroupInfoCache()
+        self._apply(cache, self._get_sg_info([], ['10.0.0.1']))
+        member_ips = ['10.0.0.%d' % i for i in range(250)]
+        result = self._apply(cache, self._get_sg_info([], member_ips))
+        self.assertEqual(set(member_ips),
+                         set(result['sg_member_ips']['sg1']['IPv4']))
+        self.assertEqual(7, len(cache.get_cached_info()[
+            'sg_member_ips']['sg1']['IPv4']))
+
 
 class SecurityGroupAgentRpcWithDeferredRefreshTestCase(
     SecurityGroupAgentRpcTestCase):
@@ -71,6 +71,40 @@ class TestDhcpRpcCallback(base.BaseTestCase):
                     {'id': 'b', 'subnets': [subnet], 'ports': []}]
         self.assertEqual(expected, networks)
 
+    def test_get_active_network_ids(self):
+        self.plugin.get_networks.return_value = [{'id': 'a'}, {'id': 'b'}]
+        self.assertEqual(['a', 'b'],
+                         self.callbacks.get_active_network_ids(mock.Mock(),
+                                                               host='host'))
+
+    def test_get_active_networks_info_network_ids(self):
+        self.plugin.get_networks.return_value = [{'id': 'b'}]
+        port = {'network_id': 'b'}
+        self.plugin.get_ports.return_value = [port]
+        self.plugin.get_subnets.return_value = []
+        networks = self.callbacks.get_active_networks_info(
+            mock.Mock(), host='host', network_ids=['b', 'c'])
+        self.assertEqual([{'id': 'b', 'subnets': [], 'ports': [port]}],
+                         networks)
+        self.plugin.get_networks.assert_called_once_with(
+            mock.ANY, filters={'admin_state_up': [True], 'id': ['b', 'c']})
+        self.assertEqual(
+            ['b'],
+            self.plugin.get_ports.call_args[1]['filters']['network_id'])
+
+    def test_get_active_networks_info_network_ids_with_scheduler(self):
+        with mock.patch.object(utils, 'is_extension_supported',
+                               return_value=True):
+            self.plugin.list_active_networks_on_active_dhcp_agent.\
+                return_value = []
+            networks = self.callbacks.get_active_networks_info(
+                mock.Mock(), host='host', network_ids=['b'])
+        self.assertEqual([], networks)
+        self.assertFalse(self.plugin.auto_schedule_networks.called)
+        (self.plugin.list_active_networks_on_active_dhcp_agent.
+         assert_called_once_with(mock.ANY, 'host', network_ids=['b']))
+        self.assertFalse(self.plugin.get_ports.called)
+
     def test_get_active_networks_info_with_routed_networks(self):
         self.get_service_plugins.return_value = {
             'segments': self.segment_plugin
@@ -13,6 +13,7 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import mock
 from oslo_config import cfg
 
 from neutron.api.rpc.handlers import l3_rpc
@@ -65,3 +66,37 @@ class TestL3RpcCallback(testlib_api.SqlTestCase):
         updated_subnet = res[0]
         self.assertEqual(updated_subnet['cidr'], data[subnet['id']])
         self.assertEqual(updated_subnet['allocation_pools'], allocation_pools)
+
+    def _mock_l3plugin(self, routers):
+        self.callbacks._l3plugin = mock.Mock(supported_extension_aliases=[])
+        self.callbacks._l3plugin.get_sync_data.side_effect = (
+            lambda context, router_ids: [dict(r) for r in routers])
+
+    def test_sync_routers_revisions(self):
+        routers = [{'id': 'router1', 'routes': []},
+                   {'id': 'router2', 'routes': []}]
+        self._mock_l3plugin(routers)
+        synced = self.callbacks.sync_routers(self.ctx, host='host')
+        revisions = [r.pop(constants.ROUTER_REVISION_KEY) for r in synced]
+        self.assertEqual(routers, synced)
+        self.assertNotEqual(revisions[0], revisions[1])
+        self.assertEqual(revisions, [
+            r[constants.ROUTER_REVISION_KEY]
+            for r in self.callbacks.sync_routers(self.ctx, host='host')])
+
+    def test_sync_changed_routers(self):
+        routers = [{'id': 'router1', 'routes': []},
+                   {'id': 'router2', 'routes': []},
+                   {'id': 'router3', 'routes': []}]
+        self._mock_l3plugin(routers)
+        revisions = {
+            r['id']: r[constants.ROUTER_REVISION_KEY]
+            for r in self.callbacks.sync_routers(self.ctx, host='host')}
+        routers[0]['routes'] = [{'destination': '10.0.0.0/8',
+                                 'nexthop': '192.168.0.1'}]
+        del revisions['router3']
+        result = self.callbacks.sync_changed_routers(
+            self.ctx, host='host', router_ids=None, revisions=revisions)
+        self.assertEqual(['router1', 'router3'],
+                         [r['id'] for r in result['routers']])
+        self.assertEqual(['router2'], result['unchanged_router_ids'])
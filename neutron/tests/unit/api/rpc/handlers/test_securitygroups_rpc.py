@@ -33,6 +33,82 @@ class SecurityGroupServerRpcApiTestCase(base.BaseTestCase):
                     'security_group_rules_for_devices',
                     devices=['fake_device'])
 
+    def test_security_group_info_for_devices_cached_info(self):
+        rpcapi = securitygroups_rpc.SecurityGroupServerRpcApi('fake_topic')
+
+        with mock.patch.object(rpcapi.client, 'call') as rpc_mock, \
+                mock.patch.object(rpcapi.client, 'prepare') as prepare_mock:
+            prepare_mock.return_value = rpcapi.client
+            rpcapi.security_group_info_for_devices(
+                'context', ['fake_device'], cached_info={})
+
+            prepare_mock.assert_called_once_with(version='1.3')
+            rpc_mock.assert_called_once_with(
+                    'context',
+                    'security_group_info_for_devices',
+                    devices=['fake_device'], cached_info={})
+
+
+class SecurityGroupInfoDeltaTestCase(base.BaseTestCase):
+
+    def _get_sg_info(self, nb_members):
+        return {'devices': {},
+                'security_groups': {
+                    'sg1': [{'direction': 'ingress', 'ethertype': 'IPv4',
+                             'remote_group_id': 'sg2'}],
+                    'sg2': [{'direction': 'egress', 'ethertype': 'IPv4'}]},
+                'sg_member_ips': {
+                    'sg2': {'IPv4': set('10.0.%d.%d' % (i // 256, i % 256)
+                                        for i in range(nb_members))}}}
+
+    def test_split_member_ips(self):
+        ips = self._get_sg_info(100)['sg_member_ips']['sg2']['IPv4']
+        nb_buckets = securitygroups_rpc.get_member_buckets_count(len(ips))
+        buckets = securitygroups_rpc.split_member_ips(ips, nb_buckets)
+        self.assertEqual(3, len(buckets))
+        self.assertEqual(ips, set().union(*buckets))
+        self.assertEqual(buckets,
+                         securitygroups_rpc.split_member_ips(ips, 3))
+
+    def test_make_security_group_info_delta_empty_cache(self):
+        sg_info = self._get_sg_info(10)
+        delta = securitygroups_rpc.make_security_group_info_delta(
+            self._get_sg_info(10), {})
+        self.assertEqual(sg_info['security_groups'],
+                         delta['security_groups'])
+        self.assertEqual(sg_info['sg_member_ips'], delta['sg_member_ips'])
+        self.assertEqual([], delta['unchanged_security_groups'])
+        self.assertEqual({}, delta['sg_member_ips_buckets'])
+
+    def test_make_security_group_info_delta(self):
+        sg_info = self._get_sg_info(100)
+        ips = sg_info['sg_member_ips']['sg2']['IPv4']
+        buckets = securitygroups_rpc.split_member_ips(ips, 3)
+        cached_info = {
+            'security_groups': {
+                'sg1': securitygroups_rpc.get_rules_digest(
+                    sg_info['security_groups']['sg1']),
+                'sg2': 'outdated'},
+            'sg_member_ips': {'sg2': {'IPv4': [
+                securitygroups_rpc.get_digest(bucket)
+                for bucket in buckets]}}}
+        sg_info['sg_member_ips']['sg2']['IPv4'].add('10.1.0.1')
+        changed_index = securitygroups_rpc.split_member_ips(
+            ['10.1.0.1'], 3).index({'10.1.0.1'})
+
+        delta = securitygroups_rpc.make_security_group_info_delta(
+            sg_info, cached_info)
+        self.assertEqual(['sg1'], delta['unchanged_security_groups'])
+        self.assertEqual(['sg2'], list(delta['security_groups']))
+        self.assertEqual({'sg2': {}}, delta['sg_member_ips'])
+        self.assertEqual(
+            {'sg2': {'IPv4': {str(changed_index): mock.ANY}}},
+            delta['sg_member_ips_buckets'])
+        self.assertEqual(
+            buckets[changed_index] | {'10.1.0.1'},
+            set(delta['sg_member_ips_buckets']['sg2']['IPv4'][
+                str(changed_index)]))
+
 
 class SGAgentRpcCallBackMixinTestCase(base.BaseTestCase):
 
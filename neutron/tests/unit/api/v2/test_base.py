@@ -569,6 +569,69 @@ class JSONV2TestCase(APIv2TestBase, testlib_api.WebTestCase):
         tenant_id = _uuid()
         self._test_list(tenant_id + "bad", tenant_id)
 
+    def _test_list_ports_owner_policy(self, rule, check_result=False,
+                                      params=None):
+        tenant_id = _uuid()
+        env = {'neutron.context': context.Context('', tenant_id)}
+        rules = oslo_policy.Rules.from_dict(
+            {'context_is_admin': 'role:admin',
+             'owner': 'tenant_id:%(tenant_id)s',
+             'admin_or_owner': 'rule:context_is_admin or rule:owner',
+             'admin_owner_or_network_owner':
+                 'rule:admin_or_owner or tenant_id:%(network:tenant_id)s',
+             'get_port': rule})
+        policy.set_rules(rules, overwrite=False)
+        own_port = {'id': _uuid(), 'tenant_id': tenant_id}
+        other_port = {'id': _uuid(), 'tenant_id': _uuid()}
+        instance = self.plugin.return_value
+        instance.get_ports.return_value = [own_port, other_port]
+
+        checked_ports = []
+
+        def check(context, action, target, **kwargs):
+            if action != 'get_port':
+                return True
+            checked_ports.append(target['id'])
+            return check_result
+
+        with mock.patch.object(policy, 'check', side_effect=check):
+            res = self.api.get(_get_path('ports', fmt=self.fmt), params,
+                               extra_environ=env)
+        res = self.deserialize(res)
+        filters = instance.get_ports.call_args[1]['filters']
+        return ([p['id'] for p in res['ports']], filters,
+                (own_port['id'], other_port['id']), checked_ports)
+
+    def test_list_owner_policy_pushed_to_plugin(self):
+        ports, filters, (own, other), checked = (
+            self._test_list_ports_owner_policy('rule:admin_or_owner'))
+        self.assertEqual({'tenant_id': [mock.ANY]}, filters)
+        # the plugin did not filter the port of the other tenant out
+        self.assertEqual([own], ports)
+        self.assertEqual([], checked)
+
+    def test_list_owner_policy_with_other_tenant_filter(self):
+        ports, filters, (own, other), checked = (
+            self._test_list_ports_owner_policy('rule:admin_or_owner',
+                                               params={'tenant_id': _uuid()}))
+        self.assertEqual({'tenant_id': []}, filters)
+
+    def test_list_owner_or_parent_owner_policy(self):
+        ports, filters, (own, other), checked = (
+            self._test_list_ports_owner_policy(
+                'rule:admin_owner_or_network_owner', check_result=True))
+        self.assertEqual({}, filters)
+        self.assertEqual([own, other], ports)
+        # only the port of the other tenant needs a policy check
+        self.assertEqual([other], checked)
+
+    def test_list_not_field_policy_checks_every_port(self):
+        ports, filters, (own, other), checked = (
+            self._test_list_ports_owner_policy('not field:ports:name=secret'))
+        self.assertEqual({}, filters)
+        self.assertEqual([], ports)
+        self.assertEqual([own, other], checked)
+
     def test_list_pagination(self):
         id1 = str(_uuid())
         id2 = str(_uuid())
@@ -19,6 +19,7 @@ from neutron.callbacks import events
 from neutron.callbacks import exceptions
 from neutron.callbacks import manager
 from neutron.callbacks import resources
+from neutron import context
 from neutron.tests import base
 
 
@@ -214,3 +215,57 @@ class CallBacksManagerTestCase(base.BaseTestCase):
             resources.ROUTER, events.BEFORE_DELETE, mock.ANY)
         self.assertEqual(2, callback_1.counter)
         self.assertEqual(1, callback_2.counter)
+
+    def test_notify_after_event_async_safe(self):
+        self.manager.subscribe(
+            callback_1, resources.PORT, events.AFTER_CREATE, async_safe=True)
+        self.manager.subscribe(
+            callback_2, resources.PORT, events.AFTER_CREATE)
+        self.manager.notify(resources.PORT, events.AFTER_CREATE, mock.ANY)
+        self.assertEqual(0, callback_1.counter)
+        self.assertEqual(1, callback_2.counter)
+        self.manager._async_pool.waitall()
+        self.assertEqual(1, callback_1.counter)
+
+    def test_notify_before_event_async_safe(self):
+        self.manager.subscribe(
+            callback_1, resources.PORT, events.BEFORE_CREATE, async_safe=True)
+        self.manager.notify(resources.PORT, events.BEFORE_CREATE, mock.ANY)
+        self.assertEqual(1, callback_1.counter)
+
+    def test_notify_async_safe_context_copied(self):
+        callback = mock.Mock()
+        self.manager.subscribe(
+            callback, resources.PORT, events.AFTER_UPDATE, async_safe=True)
+        ctx = context.Context('user_id', 'tenant_id')
+        self.manager.notify(resources.PORT, events.AFTER_UPDATE, mock.ANY,
+                            context=ctx, port={'id': 'port_id'})
+        self.manager._async_pool.waitall()
+        callback_ctx = callback.call_args[1]['context']
+        self.assertIsNot(ctx, callback_ctx)
+        self.assertEqual(ctx.to_dict(), callback_ctx.to_dict())
+        self.assertEqual({'id': 'port_id'}, callback.call_args[1]['port'])
+
+    def test_unsubscribe_async_safe(self):
+        self.manager.subscribe(
+            callback_1, resources.PORT, events.AFTER_CREATE, async_safe=True)
+        self.manager.unsubscribe_all(callback_1)
+        self.assertEqual(set(), self.manager._async_safe)
+
+    def test_get_stats(self):
+        self.manager.subscribe(
+            callback_1, resources.PORT, events.BEFORE_CREATE)
+        self.manager.subscribe(
+            callback_raise, resources.PORT, events.AFTER_CREATE)
+        self.manager.notify(resources.PORT, events.BEFORE_CREATE, mock.ANY)
+        self.manager.notify(resources.PORT, events.BEFORE_CREATE, mock.ANY)
+        self.manager.notify(resources.PORT, events.AFTER_CREATE, mock.ANY)
+        stats = self.manager.get_stats()
+        self.assertEqual(2, stats[callback_id_1]['calls'])
+        self.assertNotIn('errors', stats[callback_id_1])
+        self.assertGreaterEqual(stats[callback_id_1]['time'],
+                                stats[callback_id_1]['max_time'])
+        callback_raise_id = manager._get_id(callback_raise)
+        self.assertEqual({'calls': 1, 'errors': 1},
+                         {key: stats[callback_raise_id][key]
+                          for key in ('calls', 'errors')})
@@ -624,6 +624,22 @@ class OvsAgentSchedulerTestCase(OvsAgentSchedulerTestCaseBase):
             self.adminContext, host=DHCP_HOSTA)
         self.assertEqual([], nets)
 
+    def test_list_active_networks_on_active_dhcp_agent_network_ids(self):
+        plugin = manager.NeutronManager.get_plugin()
+        agent = helpers.register_dhcp_agent(DHCP_HOSTA)
+        with self.network() as net1, self.network() as net2:
+            net1_id = net1['network']['id']
+            net2_id = net2['network']['id']
+            self._add_network_to_dhcp_agent(agent.id, net1_id)
+            self._add_network_to_dhcp_agent(agent.id, net2_id)
+            nets = plugin.list_active_networks_on_active_dhcp_agent(
+                self.adminContext, DHCP_HOSTA,
+                network_ids=[net2_id, 'unknown'])
+            self.assertEqual([net2_id], [net['id'] for net in nets])
+            nets = plugin.list_active_networks_on_active_dhcp_agent(
+                self.adminContext, DHCP_HOSTA, network_ids=[])
+            self.assertEqual([], nets)
+
     def test_reserved_port_after_network_remove_from_dhcp_agent(self):
         helpers.register_dhcp_agent(DHCP_HOSTA)
         hosta_id = self._get_agent_id(constants.AGENT_TYPE_DHCP,
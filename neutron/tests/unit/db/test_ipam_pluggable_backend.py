@@ -507,6 +507,27 @@ class TestDbBasePluginIpam(test_db_base.NeutronDbPluginV2TestCase):
                 self.assertEqual(ips[0]['subnet_id'], subnet['subnet']['id'])
                 self._validate_allocate_calls(expected_calls, mocks)
 
+    @mock.patch('neutron.ipam.driver.Pool')
+    def test_create_ports_bulk_ipam(self, pool_mock):
+        mocks = self._prepare_mocks_with_pool_mock(pool_mock)
+        with self.subnet() as subnet:
+            subnet_id = subnet['subnet']['id']
+            mocks['subnets'].allocate_many.return_value = [
+                ('10.0.0.2', subnet_id), ('10.0.0.3', subnet_id)]
+            res = self._create_port_bulk(self.fmt, 2,
+                                         subnet['subnet']['network_id'],
+                                         'test', True)
+            ports = self.deserialize(self.fmt, res)['ports']
+            self.assertEqual(
+                [[{'subnet_id': subnet_id, 'ip_address': '10.0.0.2'}],
+                 [{'subnet_id': subnet_id, 'ip_address': '10.0.0.3'}]],
+                [port['fixed_ips'] for port in ports])
+            requests = mocks['subnets'].allocate_many.call_args[0][0]
+            self.assertEqual(2, len(requests))
+            for request in requests:
+                self.assertIsInstance(request, ipam_req.AnyAddressRequest)
+            self.assertFalse(mocks['subnets'].allocate.called)
+
     @mock.patch('neutron.ipam.driver.Pool')
     def test_create_port_ipam_with_rollback(self, pool_mock):
         mocks = self._prepare_mocks_with_pool_mock(pool_mock)
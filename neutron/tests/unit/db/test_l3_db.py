@@ -209,6 +209,17 @@ class TestL3_NAT_dbonly_mixin(base.BaseTestCase):
                                        context=mock.ANY,
                                        subnetpool_id='fake_id')
 
+    @mock.patch.object(l3_db, '_notify_routers_callback')
+    def test_subscribe_port_delete_async_safe(self, notify):
+        l3_db.L3RpcNotifierMixin._subscribe_callbacks()
+        registry.notify(resources.PORT, events.AFTER_DELETE, mock.ANY,
+                        context=mock.ANY, router_ids=['fake_id'])
+        self.assertFalse(notify.called)
+        self._callback_manager._async_pool.waitall()
+        notify.assert_called_once_with(resources.PORT, events.AFTER_DELETE,
+                                       mock.ANY, context=mock.ANY,
+                                       router_ids=['fake_id'])
+
 
 class L3_NAT_db_mixin(base.BaseTestCase):
     def setUp(self):
@@ -218,7 +218,11 @@ class FlavorExtensionTestCase(extension.ExtensionTestCase):
         res = self.api.get(_get_path('flavors', fmt=self.fmt))
         instance.get_flavors.assert_called_with(mock.ANY,
                                                 fields=mock.ANY,
-                                                filters=mock.ANY)
+                                                filters=mock.ANY,
+                                                sorts=mock.ANY,
+                                                limit=mock.ANY,
+                                                marker=mock.ANY,
+                                                page_reverse=mock.ANY)
         res = self.deserialize(res)
         self.assertEqual(data, res)
 
@@ -366,7 +370,11 @@ class FlavorExtensionTestCase(extension.ExtensionTestCase):
         res = self.api.get(_get_path('service_profiles', fmt=self.fmt))
         instance.get_service_profiles.assert_called_with(mock.ANY,
                                                          fields=mock.ANY,
-                                                         filters=mock.ANY)
+                                                         filters=mock.ANY,
+                                                         sorts=mock.ANY,
+                                                         limit=mock.ANY,
+                                                         marker=mock.ANY,
+                                                         page_reverse=mock.ANY)
         res = self.deserialize(res)
         self.assertEqual(expected, res)
 
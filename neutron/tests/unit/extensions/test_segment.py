@@ -215,6 +215,16 @@ class TestSegment(SegmentTestCase):
         res = self._list('segments')
         self.assertEqual(2, len(res['segments']))
 
+    def test_list_segments_with_pagination(self):
+        with self.network() as network:
+            network = network['network']
+        segments = [self._test_create_segment(network_id=network['id'],
+                                              physical_network='phys_net',
+                                              segmentation_id=seg_id)
+                    for seg_id in (200, 201, 202)]
+        self._test_list_with_pagination('segment', segments,
+                                        ('segmentation_id', 'asc'), 2, 2)
+
 
 class TestSegmentML2(SegmentTestCase):
     def setUp(self):
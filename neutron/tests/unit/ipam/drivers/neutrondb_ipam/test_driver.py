@@ -382,6 +382,99 @@ class TestNeutronDbIpamSubnet(testlib_api.SqlTestCase,
         # This test instead might be made to pass, but for the wrong reasons!
         pass
 
+    def _get_ranges(self, ipam_subnet):
+        return sorted(
+            ((r.first_ip, r.last_ip) for r in
+             ipam_subnet.subnet_manager.list_ranges_by_subnet_id(
+                 self.ctx.session)),
+            key=lambda r: netaddr.IPAddress(r[0]))
+
+    def test_allocate_any_address_updates_ranges(self):
+        ipam_subnet = self._create_and_allocate_ipam_subnet(
+            '10.0.0.0/24')[0]
+        ip_address = ipam_subnet.allocate(ipam_req.PreferNextAddressRequest())
+        self.assertEqual('10.0.0.2', ip_address)
+        self.assertEqual([('10.0.0.3', '10.0.0.254')],
+                         self._get_ranges(ipam_subnet))
+
+    def test_allocate_specific_address_splits_range(self):
+        ipam_subnet = self._create_and_allocate_ipam_subnet(
+            '10.0.0.0/24')[0]
+        ipam_subnet.allocate(ipam_req.SpecificAddressRequest('10.0.0.33'))
+        self.assertEqual([('10.0.0.2', '10.0.0.32'),
+                          ('10.0.0.34', '10.0.0.254')],
+                         self._get_ranges(ipam_subnet))
+
+    def test_allocate_skips_addresses_left_in_ranges(self):
+        ipam_subnet = self._create_and_allocate_ipam_subnet(
+            '10.0.0.0/24')[0]
+        # EUI-64 addresses are allocated without updating the ranges
+        with self.ctx.session.begin(subtransactions=True):
+            ipam_subnet.subnet_manager.create_allocation(self.ctx.session,
+                                                         '10.0.0.2')
+        ip_address = ipam_subnet.allocate(ipam_req.PreferNextAddressRequest())
+        self.assertEqual('10.0.0.3', ip_address)
+        self.assertEqual([('10.0.0.4', '10.0.0.254')],
+                         self._get_ranges(ipam_subnet))
+
+    def test_deallocate_address_merges_ranges(self):
+        ipam_subnet = self._create_and_allocate_ipam_subnet(
+            '10.0.0.0/24')[0]
+        for ip_address in ('10.0.0.33', '10.0.0.34', '10.0.0.35'):
+            ipam_subnet.allocate(ipam_req.SpecificAddressRequest(ip_address))
+        ipam_subnet.deallocate('10.0.0.33')
+        ipam_subnet.deallocate('10.0.0.35')
+        self.assertEqual([('10.0.0.2', '10.0.0.33'),
+                          ('10.0.0.35', '10.0.0.254')],
+                         self._get_ranges(ipam_subnet))
+        ipam_subnet.deallocate('10.0.0.34')
+        self.assertEqual([('10.0.0.2', '10.0.0.254')],
+                         self._get_ranges(ipam_subnet))
+
+    def test_deallocate_address_out_of_pools(self):
+        ipam_subnet = self._create_and_allocate_ipam_subnet(
+            '10.0.0.0/24',
+            allocation_pools=[{'start': '10.0.0.10',
+                               'end': '10.0.0.20'}])[0]
+        ipam_subnet.allocate(ipam_req.SpecificAddressRequest('10.0.0.30'))
+        ipam_subnet.deallocate('10.0.0.30')
+        self.assertEqual([('10.0.0.10', '10.0.0.20')],
+                         self._get_ranges(ipam_subnet))
+
+    def test_allocate_many(self):
+        ipam_subnet = self._create_and_allocate_ipam_subnet(
+            '10.0.0.0/29')[0]
+        ip_addresses = ipam_subnet.allocate_many(
+            [ipam_req.AnyAddressRequest(),
+             ipam_req.SpecificAddressRequest('10.0.0.4'),
+             ipam_req.AnyAddressRequest()])
+        self.assertEqual(['10.0.0.2', '10.0.0.4', '10.0.0.3'], ip_addresses)
+        self.assertEqual([('10.0.0.5', '10.0.0.6')],
+                         self._get_ranges(ipam_subnet))
+        self.assertEqual(
+            {'10.0.0.2', '10.0.0.3', '10.0.0.4'},
+            {a.ip_address for a in
+             ipam_subnet.subnet_manager.list_allocations(self.ctx.session)})
+
+    def test_allocate_many_exhausted_pools_fails(self):
+        ipam_subnet = self._create_and_allocate_ipam_subnet(
+            '192.168.0.0/30')[0]
+        self.assertRaises(ipam_exc.IpAddressGenerationFailure,
+                          ipam_subnet.allocate_many,
+                          [ipam_req.AnyAddressRequest(),
+                           ipam_req.AnyAddressRequest()])
+
+    def test_update_allocation_pools_excludes_allocations_from_ranges(self):
+        cidr = '10.0.0.0/24'
+        ipam_subnet = self._create_and_allocate_ipam_subnet(cidr)[0]
+        ipam_subnet.allocate(ipam_req.SpecificAddressRequest('10.0.0.33'))
+        ipam_subnet.update_allocation_pools(
+            [netaddr.IPRange('10.0.0.10', '10.0.0.50')],
+            netaddr.IPNetwork(cidr))
+        self.assertEqual([('10.0.0.10', '10.0.0.32'),
+                          ('10.0.0.34', '10.0.0.50')],
+                         self._get_ranges(ipam_subnet))
+
     def test_allocate_subnet_for_non_existent_subnet_pass(self):
         # This test should pass because ipam subnet is no longer
         # have foreign key relationship with neutron subnet.
@@ -22,6 +22,7 @@ from oslo_utils import uuidutils
 
 from neutron.common import exceptions as n_exc
 from neutron import context
+from neutron.db import models_v2
 from neutron.ipam import requests as ipam_req
 from neutron.ipam import subnet_alloc
 from neutron import manager
@@ -197,3 +198,114 @@ class TestSubnetAllocation(testlib_api.SqlTestCase):
                                          'fe80::/63')
         with mock.patch("sqlalchemy.orm.query.Query.update", return_value=0):
             self.assertRaises(db_exc.RetryRequest, sa.allocate_subnet, req)
+
+    def _get_free_prefixes(self, subnetpool_id):
+        query = self.ctx.session.query(models_v2.SubnetPoolFreePrefix)
+        free_prefixes = query.filter_by(subnetpool_id=subnetpool_id)
+        return sorted(x.cidr for x in free_prefixes)
+
+    def _allocate_subnets(self, sp, *cidrs):
+        sa = subnet_alloc.SubnetAllocator(sp, self.ctx)
+        for cidr in cidrs:
+            req = ipam_req.SpecificSubnetRequest(self._tenant_id,
+                                             uuidutils.generate_uuid(),
+                                             cidr)
+            sa.allocate_subnet(req)
+
+    def test_allocate_any_subnet_best_fit(self):
+        sp = self._create_subnet_pool(self.plugin, self.ctx, 'test-sp',
+                                      ['10.1.0.0/16'], 21, 4)
+        sp = self.plugin._get_subnetpool(self.ctx, sp['id'])
+        self._allocate_subnets(sp, '10.1.0.0/24')
+        self.assertEqual(['10.1.1.0/24', '10.1.128.0/17', '10.1.16.0/20',
+                          '10.1.2.0/23', '10.1.32.0/19', '10.1.4.0/22',
+                          '10.1.64.0/18', '10.1.8.0/21'],
+                         self._get_free_prefixes(sp['id']))
+        sa = subnet_alloc.SubnetAllocator(sp, self.ctx)
+        req = ipam_req.AnySubnetRequest(self._tenant_id,
+                                        uuidutils.generate_uuid(),
+                                        constants.IPv4, 22)
+        detail = sa.allocate_subnet(req).get_details()
+        self.assertEqual('10.1.4.0/22', str(detail.subnet_cidr))
+        self.assertNotIn('10.1.4.0/22', self._get_free_prefixes(sp['id']))
+
+    def test_release_subnetpool_prefixes_merges_buddies(self):
+        sp = self._create_subnet_pool(self.plugin, self.ctx, 'test-sp',
+                                      ['10.1.0.0/22'], 21, 4)
+        sp = self.plugin._get_subnetpool(self.ctx, sp['id'])
+        self._allocate_subnets(sp, '10.1.0.0/24', '10.1.1.0/24')
+        self.assertEqual(['10.1.2.0/23'], self._get_free_prefixes(sp['id']))
+        subnet_alloc.release_subnetpool_prefixes(self.ctx, sp['id'],
+                                                 ['10.1.0.0/24'])
+        self.assertEqual(['10.1.0.0/24', '10.1.2.0/23'],
+                         self._get_free_prefixes(sp['id']))
+        subnet_alloc.release_subnetpool_prefixes(self.ctx, sp['id'],
+                                                 ['10.1.1.0/24'])
+        self.assertEqual(['10.1.0.0/22'], self._get_free_prefixes(sp['id']))
+
+    def test_release_subnetpool_prefixes_without_free_prefixes(self):
+        sp = self._create_subnet_pool(self.plugin, self.ctx, 'test-sp',
+                                      ['10.1.0.0/22'], 21, 4)
+        subnet_alloc.release_subnetpool_prefixes(self.ctx, sp['id'],
+                                                 ['10.1.0.0/24'])
+        self.assertEqual([], self._get_free_prefixes(sp['id']))
+
+    def test_allocate_subnet_rebuilds_stale_free_prefixes(self):
+        sp = self._create_subnet_pool(self.plugin, self.ctx, 'test-sp',
+                                      ['10.1.0.0/22'], 21, 4)
+        sp = self.plugin._get_subnetpool(self.ctx, sp['id'])
+        self._allocate_subnets(sp, '10.1.0.0/24')
+        query = self.ctx.session.query(models_v2.SubnetPool)
+        query.filter_by(id=sp['id']).update({'hash': 'outdated'})
+        # NOTE: no subnet was created, the rebuilt free prefixes contain the
+        # previous allocation again
+        self._allocate_subnets(sp, '10.1.0.0/24')
+        self.assertEqual(['10.1.1.0/24', '10.1.2.0/23'],
+                         self._get_free_prefixes(sp['id']))
+
+    def test_allocate_subnet_from_full_pool_does_not_rebuild(self):
+        sp = self._create_subnet_pool(self.plugin, self.ctx, 'test-sp',
+                                      ['10.1.0.0/24'], 21, 4)
+        sp = self.plugin._get_subnetpool(self.ctx, sp['id'])
+        self._allocate_subnets(sp, '10.1.0.0/24')
+        self.assertEqual([], self._get_free_prefixes(sp['id']))
+        sa = subnet_alloc.SubnetAllocator(sp, self.ctx)
+        req = ipam_req.AnySubnetRequest(self._tenant_id,
+                                        uuidutils.generate_uuid(),
+                                        constants.IPv4, 25)
+        with mock.patch.object(sa, '_rebuild_free_prefixes') as rebuild:
+            self.assertRaises(n_exc.SubnetAllocationError,
+                              sa.allocate_subnet, req)
+            self.assertFalse(rebuild.called)
+
+    def test_allocate_subnet_updates_free_prefixes_hash(self):
+        sp = self._create_subnet_pool(self.plugin, self.ctx, 'test-sp',
+                                      ['10.1.0.0/22'], 21, 4)
+        sp = self.plugin._get_subnetpool(self.ctx, sp['id'])
+        self._allocate_subnets(sp, '10.1.0.0/24')
+        query = self.ctx.session.query(models_v2.SubnetPool.hash,
+                                       models_v2.SubnetPool.free_prefixes_hash)
+        pool_hash, free_prefixes_hash = query.filter_by(id=sp['id']).one()
+        self.assertEqual(pool_hash, free_prefixes_hash)
+
+    def test_delete_subnet_releases_prefix(self):
+        sp = self._create_subnet_pool(self.plugin, self.ctx, 'test-sp',
+                                      ['10.1.0.0/22'], 21, 4)
+        network = self.plugin.create_network(self.ctx, {'network': {
+            'name': 'net', 'tenant_id': self._tenant_id,
+            'admin_state_up': True, 'shared': False}})
+        attrs = {'name': 'subnet', 'tenant_id': self._tenant_id,
+                 'network_id': network['id'], 'subnetpool_id': sp['id'],
+                 'ip_version': 4, 'prefixlen': 24, 'enable_dhcp': False,
+                 'description': '', 'cidr': constants.ATTR_NOT_SPECIFIED,
+                 'gateway_ip': constants.ATTR_NOT_SPECIFIED,
+                 'allocation_pools': constants.ATTR_NOT_SPECIFIED,
+                 'dns_nameservers': constants.ATTR_NOT_SPECIFIED,
+                 'host_routes': constants.ATTR_NOT_SPECIFIED,
+                 'ipv6_ra_mode': constants.ATTR_NOT_SPECIFIED,
+                 'ipv6_address_mode': constants.ATTR_NOT_SPECIFIED}
+        subnet = self.plugin.create_subnet(self.ctx, {'subnet': attrs})
+        self.assertEqual('10.1.0.0/24', subnet['cidr'])
+        self.assertNotIn('10.1.0.0/22', self._get_free_prefixes(sp['id']))
+        self.plugin.delete_subnet(self.ctx, subnet['id'])
+        self.assertEqual(['10.1.0.0/22'], self._get_free_prefixes(sp['id']))
@@ -64,37 +64,26 @@ class TunnelTypeTestMixin(object):
         segment[api.SEGMENTATION_ID] = 1
         self.driver.validate_provider_segment(segment)
 
+    def _get_free_ranges(self):
+        return sorted(
+            self.session.query(type_tunnel.TunnelFreeRange.first_id,
+                               type_tunnel.TunnelFreeRange.last_id).
+            filter_by(network_type=self.driver.get_type()))
+
+    def _is_free(self, tunnel_id):
+        return any(first_id <= tunnel_id <= last_id
+                   for first_id, last_id in self._get_free_ranges())
+
     def test_sync_tunnel_allocations(self):
+        self.assertEqual([(TUN_MIN, TUN_MAX)], self._get_free_ranges())
         self.assertIsNone(
-            self.driver.get_allocation(self.session, (TUN_MIN - 1)))
-        self.assertFalse(
-            self.driver.get_allocation(self.session, (TUN_MIN)).allocated)
-        self.assertFalse(
-            self.driver.get_allocation(self.session, (TUN_MIN + 1)).allocated)
-        self.assertFalse(
-            self.driver.get_allocation(self.session, (TUN_MAX - 1)).allocated)
-        self.assertFalse(
-            self.driver.get_allocation(self.session, (TUN_MAX)).allocated)
-        self.assertIsNone(
-            self.driver.get_allocation(self.session, (TUN_MAX + 1)))
+            self.driver.get_allocation(self.session, (TUN_MIN)))
 
         self.driver.tunnel_ranges = UPDATED_TUNNEL_RANGES
         self.driver.sync_allocations()
 
-        self.assertIsNone(
-            self.driver.get_allocation(self.session, (TUN_MIN + 5 - 1)))
-        self.assertFalse(
-            self.driver.get_allocation(self.session, (TUN_MIN + 5)).allocated)
-        self.assertFalse(
-            self.driver.get_allocation(self.session,
-                                       (TUN_MIN + 5 + 1)).allocated)
-        self.assertFalse(
-            self.driver.get_allocation(self.session,
-                                       (TUN_MAX + 5 - 1)).allocated)
-        self.assertFalse(
-            self.driver.get_allocation(self.session, (TUN_MAX + 5)).allocated)
-        self.assertIsNone(
-            self.driver.get_allocation(self.session, (TUN_MAX + 5 + 1)))
+        self.assertEqual([(TUN_MIN + 5, TUN_MAX + 5)],
+                         self._get_free_ranges())
 
     def _test_sync_allocations_and_allocated(self, tunnel_id):
         segment = {api.NETWORK_TYPE: self.TYPE,
@@ -107,23 +96,127 @@ class TunnelTypeTestMixin(object):
 
         self.assertTrue(
             self.driver.get_allocation(self.session, tunnel_id).allocated)
+        self.assertFalse(self._is_free(tunnel_id))
 
     def test_sync_allocations_and_allocated_in_initial_range(self):
         self._test_sync_allocations_and_allocated(TUN_MIN + 2)
 
     def test_sync_allocations_and_allocated_in_final_range(self):
         self._test_sync_allocations_and_allocated(TUN_MAX + 2)
+        self.assertEqual([(TUN_MIN + 5, TUN_MAX + 1),
+                          (TUN_MAX + 3, TUN_MAX + 5)],
+                         self._get_free_ranges())
+
+    def _add_free_rows(self):
+        # Free tunnels had a row in the allocations table until the free
+        # ranges were introduced, and still have with the servers not
+        # upgraded yet.
+        with self.session.begin(subtransactions=True):
+            for tunnel_id in moves.range(TUN_MIN, TUN_MAX + 1):
+                self.session.add(self.driver.model(
+                    allocated=tunnel_id == TUN_MIN + 3,
+                    **{self.driver.segmentation_key: tunnel_id}))
+        self.driver.sync_allocations()
+
+    def test_sync_allocations_keeps_free_rows(self):
+        self._add_free_rows()
+
+        self.assertEqual(
+            TUN_MAX - TUN_MIN + 1,
+            self.session.query(self.driver.model).count())
+        self.assertEqual([(TUN_MIN, TUN_MIN + 2), (TUN_MIN + 4, TUN_MAX)],
+                         self._get_free_ranges())
 
-    def test_sync_allocations_no_op(self):
+    def test_reserve_provider_segment_takes_free_row(self):
+        self._add_free_rows()
+        segment = {api.NETWORK_TYPE: self.TYPE,
+                   api.PHYSICAL_NETWORK: None,
+                   api.SEGMENTATION_ID: TUN_MIN + 4}
+        self.driver.reserve_provider_segment(self.session, segment)
+
+        self.assertTrue(
+            self.driver.get_allocation(self.session, TUN_MIN + 4).allocated)
+        self.assertEqual([(TUN_MIN, TUN_MIN + 2), (TUN_MIN + 5, TUN_MAX)],
+                         self._get_free_ranges())
+        with testtools.ExpectedException(exc.TunnelIdInUse):
+            self.driver.reserve_provider_segment(self.session, segment)
 
-        def verify_no_chunk(iterable, chunk_size):
-            # no segment removed/added
-            self.assertEqual(0, len(list(iterable)))
-            return []
-        with mock.patch.object(
-                type_tunnel, 'chunks', side_effect=verify_no_chunk) as chunks:
-            self.driver.sync_allocations()
-            self.assertEqual(2, len(chunks.mock_calls))
+    def test_allocate_tenant_segment_takes_free_row(self):
+        self._add_free_rows()
+        with mock.patch.object(type_tunnel.random, 'choice',
+                               return_value=(TUN_MIN, TUN_MIN + 2)), \
+                mock.patch.object(type_tunnel.random, 'randint',
+                                  return_value=TUN_MIN + 1):
+            segment = self.driver.allocate_tenant_segment(self.session)
+
+        self.assertEqual(TUN_MIN + 1, segment[api.SEGMENTATION_ID])
+        self.assertTrue(
+            self.driver.get_allocation(self.session, TUN_MIN + 1).allocated)
+
+    def test_allocate_tenant_segment_skips_allocated_row(self):
+        self._add_free_rows()
+        # Allocated by a server not using the free ranges
+        with self.session.begin(subtransactions=True):
+            self.driver.get_allocation(self.session,
+                                       TUN_MIN + 1).allocated = True
+        with mock.patch.object(type_tunnel.random, 'choice',
+                               side_effect=[(TUN_MIN, TUN_MIN + 2),
+                                            (TUN_MIN + 2, TUN_MIN + 2)]), \
+                mock.patch.object(type_tunnel.random, 'randint',
+                                  side_effect=[TUN_MIN + 1, TUN_MIN + 2]):
+            segment = self.driver.allocate_tenant_segment(self.session)
+
+        self.assertEqual(TUN_MIN + 2, segment[api.SEGMENTATION_ID])
+        self.assertEqual([(TUN_MIN, TUN_MIN), (TUN_MIN + 4, TUN_MAX)],
+                         self._get_free_ranges())
+
+    def test_get_free_ranges(self):
+        self.assertEqual(
+            [(1, 4), (6, 9), (11, 12), (20, 20)],
+            type_tunnel._get_free_ranges([(1, 10), (5, 12), (20, 25)],
+                                         [5, 10, 21, 22, 23, 24, 25, 30]))
+
+    def test_release_segment_merges_ranges(self):
+        for x in moves.range(TUN_MIN, TUN_MAX + 1):
+            self.driver.allocate_tenant_segment(self.session)
+        self.assertEqual([], self._get_free_ranges())
+
+        for tunnel_id in (TUN_MIN + 5, TUN_MIN + 3, TUN_MIN + 4, TUN_MAX):
+            self.driver.release_segment(
+                self.session, {api.NETWORK_TYPE: self.TYPE,
+                               api.PHYSICAL_NETWORK: None,
+                               api.SEGMENTATION_ID: tunnel_id})
+        self.assertEqual([(TUN_MIN + 3, TUN_MIN + 5), (TUN_MAX, TUN_MAX)],
+                         self._get_free_ranges())
+
+    def test_reserve_provider_segment_splits_range(self):
+        segment = {api.NETWORK_TYPE: self.TYPE,
+                   api.PHYSICAL_NETWORK: None,
+                   api.SEGMENTATION_ID: TUN_MIN + 4}
+        self.driver.reserve_provider_segment(self.session, segment)
+        self.assertEqual([(TUN_MIN, TUN_MIN + 3), (TUN_MIN + 5, TUN_MAX)],
+                         self._get_free_ranges())
+
+    def test_allocate_tenant_segment_splits_range(self):
+        with mock.patch.object(type_tunnel.random, 'randint',
+                               return_value=TUN_MIN + 4):
+            segment = self.driver.allocate_tenant_segment(self.session)
+        self.assertEqual(TUN_MIN + 4, segment[api.SEGMENTATION_ID])
+        self.assertEqual([(TUN_MIN, TUN_MIN + 3), (TUN_MIN + 5, TUN_MAX)],
+                         self._get_free_ranges())
+
+    def test_allocate_tenant_segment_reads_locked_range(self):
+        segment = {api.NETWORK_TYPE: self.TYPE,
+                   api.PHYSICAL_NETWORK: None,
+                   api.SEGMENTATION_ID: TUN_MAX}
+        self.driver.reserve_provider_segment(self.session, segment)
+        # The range as read before a concurrent allocation updated it
+        with mock.patch.object(type_tunnel.random, 'choice',
+                               return_value=(TUN_MIN, TUN_MAX)):
+            segment = self.driver.allocate_tenant_segment(self.session)
+        self.assertThat(segment[api.SEGMENTATION_ID],
+                        matchers.LessThan(TUN_MAX))
+        self.assertFalse(self._is_free(segment[api.SEGMENTATION_ID]))
 
     def test_partial_segment_is_partial_segment(self):
         segment = {api.NETWORK_TYPE: self.TYPE,
@@ -152,7 +245,8 @@ class TunnelTypeTestMixin(object):
         self.driver.release_segment(self.session, segment)
         alloc = self.driver.get_allocation(self.session,
                                            observed[api.SEGMENTATION_ID])
-        self.assertFalse(alloc.allocated)
+        self.assertIsNone(alloc)
+        self.assertTrue(self._is_free(observed[api.SEGMENTATION_ID]))
 
         segment[api.SEGMENTATION_ID] = 1000
         observed = self.driver.reserve_provider_segment(self.session, segment)
@@ -299,10 +393,11 @@ class TunnelTypeMultiRangeTestMixin(object):
         for i in (0, 2, 1, 3):
             self.driver.release_segment(self.session, segments[i])
 
-        for key in (self.TUN_MIN0, self.TUN_MAX0,
-                    self.TUN_MIN1, self.TUN_MAX1):
-            alloc = self.driver.get_allocation(self.session, key)
-            self.assertFalse(alloc.allocated)
+        self.assertEqual(
+            self.TUNNEL_MULTI_RANGES,
+            sorted(self.session.query(type_tunnel.TunnelFreeRange.first_id,
+                                      type_tunnel.TunnelFreeRange.last_id).
+                   filter_by(network_type=self.driver.get_type())))
 
 
 class TunnelRpcCallbackTestMixin(object):
@@ -0,0 +1,131 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import mock
+from neutron_lib import constants
+
+from neutron.plugins.ml2.drivers.l2pop import rpc as l2pop_rpc
+from neutron.tests import base
+
+PORT1 = l2pop_rpc.PortInfo('fa:16:3e:00:00:01', '10.0.0.1')
+PORT2 = l2pop_rpc.PortInfo('fa:16:3e:00:00:02', '10.0.0.2')
+
+
+def _fdb_entries(ports, network_id='net1'):
+    return {network_id: {'segment_id': 1, 'network_type': 'vxlan',
+                         'ports': ports}}
+
+
+class TestL2populationAgentNotifyAPI(base.BaseTestCase):
+    def setUp(self):
+        super(TestL2populationAgentNotifyAPI, self).setUp()
+        mock.patch('neutron.common.rpc.get_client').start()
+        self.spawn_n = mock.patch('eventlet.spawn_n').start()
+        self.context = mock.Mock()
+
+    def _get_notifier(self, batch_interval):
+        self.config(fdb_batch_interval=batch_interval, group='l2pop')
+        notifier = l2pop_rpc.L2populationAgentNotifyAPI()
+        self.fanout = mock.patch.object(notifier,
+                                        '_notification_fanout').start()
+        self.cast = mock.patch.object(notifier, '_notification_host').start()
+        return notifier
+
+    def _send_batch(self, notifier, events):
+        notifier._send_batch([(self.context,) + event for event in events])
+
+    def test_no_batch(self):
+        notifier = self._get_notifier(0)
+        fdb_entries = _fdb_entries({'20.0.0.1': [PORT1]})
+        notifier.add_fdb_entries(self.context, fdb_entries)
+        notifier.remove_fdb_entries(self.context, fdb_entries, 'host')
+        self.fanout.assert_called_once_with(
+            self.context, 'add_fdb_entries', fdb_entries)
+        self.cast.assert_called_once_with(
+            self.context, 'remove_fdb_entries', fdb_entries, 'host')
+        self.assertFalse(self.spawn_n.called)
+
+    def test_batch_queues_entries(self):
+        notifier = self._get_notifier(0.5)
+        notifier.add_fdb_entries(self.context,
+                                 _fdb_entries({'20.0.0.1': [PORT1]}))
+        notifier.add_fdb_entries(self.context,
+                                 _fdb_entries({'20.0.0.1': [PORT2]}))
+        notifier.add_fdb_entries(self.context, {})
+        self.assertFalse(self.fanout.called)
+        self.assertEqual(1, self.spawn_n.call_count)
+        self.assertEqual(2, len(notifier._batch_notifier.pending_events))
+
+    def test_send_batch_merges_entries(self):
+        notifier = self._get_notifier(0.5)
+        self._send_batch(notifier, [
+            ('add_fdb_entries', _fdb_entries(
+                {'20.0.0.1': [constants.FLOODING_ENTRY, PORT1]}), None),
+            ('add_fdb_entries', _fdb_entries({'20.0.0.1': [PORT1],
+                                              '20.0.0.2': [PORT2]}), None),
+            ('add_fdb_entries', _fdb_entries({'20.0.0.3': [PORT2]}, 'net2'),
+             None)])
+        fdb_entries = _fdb_entries({'20.0.0.1': [constants.FLOODING_ENTRY,
+                                                 PORT1],
+                                    '20.0.0.2': [PORT2]})
+        fdb_entries.update(_fdb_entries({'20.0.0.3': [PORT2]}, 'net2'))
+        self.fanout.assert_called_once_with(
+            self.context, 'add_fdb_entries', fdb_entries)
+        self.assertEqual(1, notifier.get_stats()['entries_merged'])
+
+    def test_send_batch_last_operation_wins(self):
+        notifier = self._get_notifier(0.5)
+        self._send_batch(notifier, [
+            ('add_fdb_entries', _fdb_entries(
+                {'20.0.0.1': [constants.FLOODING_ENTRY, PORT1]}), None),
+            ('remove_fdb_entries', _fdb_entries(
+                {'20.0.0.1': [constants.FLOODING_ENTRY, PORT1]}), None),
+            ('remove_fdb_entries', _fdb_entries({'20.0.0.2': [PORT2]}),
+             None),
+            ('add_fdb_entries', _fdb_entries({'20.0.0.2': [PORT2]}), None)])
+        self.fanout.assert_has_calls([
+            mock.call(self.context, 'remove_fdb_entries', _fdb_entries(
+                {'20.0.0.1': [constants.FLOODING_ENTRY, PORT1]})),
+            mock.call(self.context, 'add_fdb_entries',
+                      _fdb_entries({'20.0.0.2': [PORT2]}))])
+        self.assertEqual(2, self.fanout.call_count)
+        self.assertEqual(3, notifier.get_stats()['entries_cancelled'])
+
+    def test_send_batch_host_entries_first(self):
+        notifier = self._get_notifier(0.5)
+        parent = mock.Mock()
+        parent.attach_mock(self.fanout, 'fanout')
+        parent.attach_mock(self.cast, 'cast')
+        self._send_batch(notifier, [
+            ('add_fdb_entries', _fdb_entries({'20.0.0.1': [PORT1]}), None),
+            ('add_fdb_entries', _fdb_entries({'20.0.0.2': [PORT2]}),
+             'host')])
+        self.assertEqual(['cast', 'fanout'],
+                         [call[0] for call in parent.mock_calls])
+
+    def test_send_batch_update_entries_in_order(self):
+        notifier = self._get_notifier(0.5)
+        parent = mock.Mock()
+        parent.attach_mock(self.fanout, 'fanout')
+        update = {'chg_ip': {'net1': {'20.0.0.1': {'after': [PORT2]}}}}
+        self._send_batch(notifier, [
+            ('add_fdb_entries', _fdb_entries({'20.0.0.1': [PORT1]}), None),
+            ('update_fdb_entries', update, None),
+            ('remove_fdb_entries', _fdb_entries({'20.0.0.1': [PORT2]}),
+             None)])
+        self.assertEqual(
+            [mock.call.fanout(self.context, 'add_fdb_entries',
+                              _fdb_entries({'20.0.0.1': [PORT1]})),
+             mock.call.fanout(self.context, 'update_fdb_entries', update),
+             mock.call.fanout(self.context, 'remove_fdb_entries',
+                              _fdb_entries({'20.0.0.1': [PORT2]}))],
+            parent.mock_calls)
@@ -14,6 +14,7 @@
 #    under the License.
 
 import mock
+from oslo_utils import importutils
 
 from neutron.tests.unit.plugins.ml2.drivers.openvswitch.agent \
     import ovs_test_base
@@ -33,3 +34,66 @@ class OVSAgentBridgeTestCase(ovs_test_base.OVSRyuTestBase):
         # make sure it correctly raises RuntimeError, not UnboundLocalError as
         # in LP https://bugs.launchpad.net/neutron/+bug/1588042
         self.assertRaises(RuntimeError, br._get_dp)
+
+    def _setup_deferred_bridge(self):
+        ofswitch = importutils.import_module(
+            'neutron.plugins.ml2.drivers.openvswitch.agent.openflow.native.'
+            'ofswitch')
+        mock.patch.object(ofswitch.ofctl_event, 'SendMsgRequest',
+                          side_effect=lambda msg: mock.Mock(msg=msg)).start()
+        self.send_msg = mock.patch.object(ofswitch.ofctl_api,
+                                          'send_msg').start()
+        mock.patch('neutron.agent.ovsdb.api.API.get').start()
+        br = self.br_int_cls('br-int')
+        self.dp = mock.Mock()
+        self.ofpp = self.dp.ofproto_parser
+        mock.patch.object(br, '_get_dp', return_value=(
+            self.dp, self.dp.ofproto, self.ofpp)).start()
+        return br
+
+    def _sent_events(self, br):
+        return [c[0][1].msg for c in br._app.send_event.call_args_list]
+
+    def test_deferred(self):
+        br = self._setup_deferred_bridge()
+        with br.deferred() as deferred_br:
+            deferred_br.install_drop(priority=1, in_port=1)
+            deferred_br.install_goto(dest_table_id=2, in_port=2)
+            self.assertFalse(br._app.send_event.called)
+        self.assertFalse(self.send_msg.called)
+        self.assertEqual(2, len(self._sent_events(br)))
+        self.assertEqual([mock.call(in_port=1), mock.call(in_port=2)],
+                         self.ofpp.OFPMatch.call_args_list)
+
+    def test_deferred_with_exception(self):
+        br = self._setup_deferred_bridge()
+        try:
+            with br.deferred() as deferred_br:
+                deferred_br.install_drop(priority=1, in_port=1)
+                deferred_br.install_drop(priority=1, in_port=2)
+                raise Exception()
+        except Exception:
+            pass
+        self.assertFalse(br._app.send_event.called)
+        self.assertFalse(self.send_msg.called)
+
+    def test_deferred_does_not_defer_bridge_calls(self):
+        br = self._setup_deferred_bridge()
+        with br.deferred() as deferred_br:
+            deferred_br.install_drop(priority=1, in_port=1)
+            br.install_drop(priority=1, in_port=2)
+            self.assertEqual(1, self.send_msg.call_count)
+            deferred_br.install_drop(priority=1, in_port=3)
+        self.assertEqual(2, len(self._sent_events(br)))
+
+    def test_deferred_flushes_before_request_with_reply(self):
+        br = self._setup_deferred_bridge()
+        deferred_br = br.deferred()
+        deferred_br.install_drop(priority=1, in_port=1)
+        deferred_br.install_drop(priority=1, in_port=2)
+        self.assertFalse(br._app.send_event.called)
+        deferred_br.dump_flows(table_id=0)
+        self.assertEqual(2, len(self._sent_events(br)))
+        self.assertEqual(1, self.send_msg.call_count)
+        deferred_br.apply_flows()
+        self.assertEqual(2, len(self._sent_events(br)))
@@ -64,3 +64,33 @@ class TestBRCookieOpenflow(base.BaseTestCase):
         self.assertIn(new_cookie, self.br.reserved_cookies)
         self.assertNotIn(def_cookie, self.br.reserved_cookies)
         self.assertEqual(set([new_cookie]), self.br.reserved_cookies)
+
+    def test_request_port_cookie(self):
+        port_cookie = self.br.request_port_cookie('port1')
+        self.assertNotEqual(self.br.default_cookie, port_cookie)
+        self.assertIn(port_cookie, self.br.reserved_cookies)
+        self.assertEqual(port_cookie, self.br.request_port_cookie('port1'))
+        self.assertNotEqual(port_cookie, self.br.request_port_cookie('port2'))
+
+    def test_port_cookie(self):
+        default_cookie = self.br.default_cookie
+        with mock.patch.object(self.br, 'run_ofctl') as run_ofctl:
+            with self.br.port_cookie('port1'):
+                port_cookie = self.br.default_cookie
+                self.br.add_flow(in_port=1, actions='drop')
+            self.br.add_flow(in_port=2, actions='drop')
+        self.assertEqual(self.br.request_port_cookie('port1'), port_cookie)
+        self.assertEqual(default_cookie, self.br.default_cookie)
+        flow_strs = [c[1][2] for c in run_ofctl.mock_calls]
+        self.assertIn('cookie=%s,' % port_cookie, flow_strs[0])
+        self.assertIn('cookie=%s,' % default_cookie, flow_strs[1])
+
+    def test_release_port_cookie(self):
+        port_cookie = self.br.request_port_cookie('port1')
+        with mock.patch.object(self.br, 'run_ofctl') as run_ofctl:
+            self.br.release_port_cookie('port1')
+            self.br.release_port_cookie('port2')
+        run_ofctl.assert_called_once_with('del-flows', ['-'],
+                                          'cookie=%s/-1' % port_cookie)
+        self.assertNotIn(port_cookie, self.br.reserved_cookies)
+        self.assertNotEqual(port_cookie, self.br.request_port_cookie('port1'))
@@ -59,6 +59,7 @@ DEVICE_OWNER_COMPUTE = n_const.DEVICE_OWNER_COMPUTE_PREFIX + 'fake'
 class FakeVif(object):
     ofport = 99
     port_name = 'name'
+    vif_id = 'fake-vif-id'
     vif_mac = 'aa:bb:cc:11:22:33'
 
 
@@ -324,6 +325,7 @@ class TestOvsNeutronAgent(object):
     def _test_port_dead(self, cur_tag=None):
         port = mock.Mock()
         port.ofport = 1
+        port.vif_id = 'fake-vif-id'
         with mock.patch.object(self.agent, 'int_br') as int_br:
             int_br.db_get_val.return_value = cur_tag
             self.agent.port_dead(port)
@@ -335,6 +337,8 @@ class TestOvsNeutronAgent(object):
                 mock.call.set_db_attribute("Port", mock.ANY, "tag",
                                            constants.DEAD_VLAN_TAG,
                                            log_errors=True),
+                mock.call.port_cookie(port.vif_id),
+                mock.call.port_cookie().__enter__(),
                 mock.call.drop_port(in_port=port.ofport),
             ])
 
@@ -926,6 +930,19 @@ class TestOvsNeutronAgent(object):
             failed_devices['removed'] = self.agent.treat_devices_removed([{}])
             self.assertEqual(set([dev_mock]), failed_devices.get('removed'))
 
+    def test_treat_devices_removed_releases_port_cookie(self):
+        port_id = 'fake-id'
+        with mock.patch.object(self.agent.plugin_rpc, 'update_device_list',
+                               return_value={'devices_up': [],
+                                             'devices_down': [],
+                                             'failed_devices_up': [],
+                                             'failed_devices_down': []}), \
+                mock.patch.object(self.agent, 'port_unbound'), \
+                mock.patch.object(self.agent.int_br,
+                                  'release_port_cookie') as release:
+            self.agent.treat_devices_removed([port_id])
+        release.assert_called_once_with(port_id)
+
     def test_treat_devices_removed_ext_delete_port(self):
         port_id = 'fake-id'
 
@@ -1103,7 +1120,7 @@ class TestOvsNeutronAgent(object):
         self.agent._update_port_network(TEST_PORT_ID1, TEST_NETWORK_ID1)
         self.agent.port_delete(context=None, port_id=TEST_PORT_ID1)
         self.agent.sg_agent = mock.Mock()
-        self.agent.int_br = mock.Mock()
+        self.agent.int_br = mock.MagicMock()
         self.agent.process_deleted_ports(port_info={})
         self.assertEqual(set(), self.agent.network_ports[TEST_NETWORK_ID1])
 
@@ -1777,6 +1794,8 @@ class TestOvsNeutronAgent(object):
         self.assertEqual(self.agent.tun_br_ofports, tunnel_handles)
 
     def _test_ovs_status(self, *args):
+        # the interfaces are monitored with a mocked ovsdb-client
+        cfg.CONF.set_override('ovsdb_interface', 'vsctl', 'OVS')
         reply2 = {'current': set(['tap0']),
                   'added': set(['tap2']),
                   'removed': set([])}
@@ -1873,6 +1892,8 @@ class TestOvsNeutronAgent(object):
                               constants.OVS_RESTARTED)
 
     def test_rpc_loop_fail_to_process_network_ports_keep_flows(self):
+        # the interfaces are monitored with a mocked ovsdb-client
+        cfg.CONF.set_override('ovsdb_interface', 'vsctl', 'OVS')
         with mock.patch.object(async_process.AsyncProcess, "_spawn"),\
                 mock.patch.object(async_process.AsyncProcess, "start"),\
                 mock.patch.object(async_process.AsyncProcess, "stop"),\
@@ -2064,6 +2085,45 @@ class TestOvsNeutronAgent(object):
                                       tunnel_type=tunnel_type)
         self.assertIn('bar', self.agent.local_vlan_map)
 
+    def test_loop_count_and_wait_with_polling_manager(self):
+        polling_manager = mock.Mock()
+        self.agent.polling_interval = 2
+        with mock.patch.object(time, 'time', return_value=10.5), \
+                mock.patch.object(time, 'sleep') as sleep:
+            self.agent.loop_count_and_wait(10, {}, polling_manager)
+        polling_manager.wait.assert_called_once_with(1.5)
+        self.assertFalse(sleep.called)
+
+    def test_rpc_loop_sync_does_not_wait_for_events(self):
+        polling_manager = mock.Mock()
+        with mock.patch.object(self.agent, 'check_ovs_status',
+                               return_value=constants.OVS_NORMAL), \
+                mock.patch.object(self.agent, 'process_port_info',
+                                  side_effect=Exception('resync')), \
+                mock.patch.object(self.agent, '_agent_has_updates',
+                                  return_value=True), \
+                mock.patch.object(self.agent, '_check_and_handle_signal',
+                                  side_effect=[True, False]), \
+                mock.patch.object(self.agent,
+                                  'loop_count_and_wait') as loop_wait:
+            self.agent.rpc_loop(polling_manager=polling_manager)
+        # the next iteration is a sync, which does not get the events
+        loop_wait.assert_called_once_with(mock.ANY, mock.ANY, None)
+
+    def test_rpc_loop_waits_for_events(self):
+        polling_manager = mock.Mock()
+        with mock.patch.object(self.agent, 'check_ovs_status',
+                               return_value=constants.OVS_NORMAL), \
+                mock.patch.object(self.agent, '_agent_has_updates',
+                                  return_value=False), \
+                mock.patch.object(self.agent, '_check_and_handle_signal',
+                                  side_effect=[True, False]), \
+                mock.patch.object(self.agent,
+                                  'loop_count_and_wait') as loop_wait:
+            self.agent.rpc_loop(polling_manager=polling_manager)
+        loop_wait.assert_called_once_with(mock.ANY, mock.ANY,
+                                          polling_manager)
+
     def test_setup_entry_for_arp_reply_ignores_ipv6_addresses(self):
         self.agent.arp_responder_enabled = True
         ip = '2001:db8::1'
@@ -2079,7 +2139,9 @@ class TestOvsNeutronAgentOFCtl(TestOvsNeutronAgent,
         with mock.patch.object(self.agent.int_br,
                               'dump_flows_all_tables') as dump_flows,\
                 mock.patch.object(self.agent.int_br,
-                                  'delete_flows') as del_flow:
+                                  'delete_flows') as del_flow, \
+                mock.patch.object(self.agent.int_br,
+                                  'do_action_flows') as do_action_flows:
             self.agent.int_br.set_agent_uuid_stamp(1234)
             dump_flows.return_value = [
                 'cookie=0x4d2, duration=50.156s, table=0,actions=drop',
@@ -2089,11 +2151,10 @@ class TestOvsNeutronAgentOFCtl(TestOvsNeutronAgent,
             ]
             self.agent.iter_num = 3
             self.agent.cleanup_stale_flows()
-            expected = [
-                mock.call(cookie='0x4321/-1', table='2'),
-                mock.call(cookie='0x2345/-1', table='2'),
-            ]
-            self.assertEqual(expected, del_flow.mock_calls)
+            self.assertFalse(del_flow.called)
+            do_action_flows.assert_called_once_with('del', mock.ANY)
+            deleted = [f['cookie'] for f in do_action_flows.call_args[0][1]]
+            self.assertEqual(['0x2345/-1', '0x4321/-1'], sorted(deleted))
 
 
 class TestOvsNeutronAgentRyu(TestOvsNeutronAgent,
@@ -2768,13 +2829,15 @@ class TestOvsDvrNeutronAgent(object):
                     vlan_tag=lvid,
                     vif_mac=self._port.vif_mac),
             ])
+            expected_on_int_br = [
+                mock.call.release_port_cookie(self._port.vif_id)]
             if network_type == 'vlan':
-                self.assertEqual([], int_br.mock_calls)
+                self.assertEqual(expected_on_int_br, int_br.mock_calls)
                 self.assertEqual([], tun_br.mock_calls)
                 self.assertEqual(expected, phys_br.mock_calls)
                 self.assertEqual({}, self.agent.dvr_agent.local_ports)
             else:
-                self.assertEqual([], int_br.mock_calls)
+                self.assertEqual(expected_on_int_br, int_br.mock_calls)
                 self.assertEqual(expected, tun_br.mock_calls)
                 self.assertEqual([], phys_br.mock_calls)
 
@@ -2970,6 +3033,7 @@ class TestOvsDvrNeutronAgent(object):
                     dst_mac=self._port.vif_mac,
                     vlan_tag=lvid,
                 ),
+                mock.call.release_port_cookie(self._port.vif_id),
             ]
             self.assertEqual(expected_on_int_br, int_br.mock_calls)
             expected_on_tun_br = []
@@ -785,6 +785,22 @@ class TestMl2PortsV2(test_plugin.TestPortsV2, Ml2PluginV2TestCase):
                                           network=net)
                 self.assertFalse(get_net.called)
 
+    def test_update_port_statuses(self):
+        ctx = context.get_admin_context()
+        plugin = manager.NeutronManager.get_plugin()
+        with self.port() as p1, self.port() as p2:
+            port_statuses = {p1['port']['id']: constants.PORT_STATUS_ACTIVE,
+                             p2['port']['id']: constants.PORT_STATUS_DOWN}
+            with mock.patch.object(plugin.mechanism_manager,
+                                   'update_port_postcommit') as postcommit:
+                updated = plugin.update_port_statuses(ctx, port_statuses)
+            self.assertEqual(set(port_statuses), set(updated))
+            # p2 is already DOWN
+            self.assertEqual(1, postcommit.call_count)
+            for port_id, status in port_statuses.items():
+                self.assertEqual(status,
+                                 plugin.get_port(ctx, port_id)['status'])
+
     def test_update_port_mac(self):
         self.check_update_port_mac(
             host_arg={portbindings.HOST_ID: HOST},
@@ -841,6 +857,20 @@ class TestMl2PortsV2(test_plugin.TestPortsV2, Ml2PluginV2TestCase):
                 self._validate_behavior_on_bulk_failure(
                     res, 'ports', webob.exc.HTTPServerError.code)
 
+    def test_create_ports_bulk_ip_allocation_failure(self):
+        ctx = context.get_admin_context()
+        with self.network() as net:
+            plugin = manager.NeutronManager.get_plugin()
+            with mock.patch.object(
+                    plugin.ipam, 'allocate_ips_for_ports',
+                    side_effect=exc.IpAddressGenerationFailure(
+                        net_id=net['network']['id'])) as allocate:
+                res = self._create_port_bulk(self.fmt, 2, net['network']['id'],
+                                             'test', True, context=ctx)
+                self.assertTrue(allocate.called)
+                self._validate_behavior_on_bulk_failure(
+                    res, 'ports', webob.exc.HTTPConflict.code)
+
     def test_create_ports_bulk_with_sec_grp(self):
         ctx = context.get_admin_context()
         plugin = manager.NeutronManager.get_plugin()
@@ -108,6 +108,55 @@ class PortBindingTestCase(test_plugin.NeutronDbPluginV2TestCase):
             self.assertIsNone(
                 self.plugin.get_bound_port_context(ctx, port['port']['id']))
 
+    def test_get_bound_ports_contexts(self):
+        ctx = context.get_admin_context()
+        host_arg = {portbindings.HOST_ID: 'host-ovs-no_filter'}
+        with self.port(arg_list=(portbindings.HOST_ID,), **host_arg) as p1, \
+                self.port(arg_list=(portbindings.HOST_ID,),
+                          **host_arg) as p2:
+            p1_id = p1['port']['id']
+            short_p2_id = p2['port']['id'][:11]
+            devices = [p1_id, short_p2_id, 'unknown']
+            result = self.plugin.get_bound_ports_contexts(ctx, devices)
+            self.assertEqual(set(devices), set(result))
+            self.assertIsNone(result['unknown'])
+            self.assertEqual(p1_id, result[p1_id].current['id'])
+            self.assertEqual(p2['port']['id'],
+                             result[short_p2_id].current['id'])
+            self.assertEqual(
+                'local', result[p1_id].bottom_bound_segment['network_type'])
+
+    def test_get_bound_ports_contexts_no_binding(self):
+        ctx = context.get_admin_context()
+        with self.port(name='name') as port:
+            # emulating concurrent binding deletion
+            (ctx.session.query(ml2_models.PortBinding).
+             filter_by(port_id=port['port']['id']).delete())
+            self.assertEqual(
+                {port['port']['id']: None},
+                self.plugin.get_bound_ports_contexts(ctx,
+                                                     [port['port']['id']]))
+
+    def test_get_devices_details_list_matches_get_device_details(self):
+        ctx = context.get_admin_context()
+        host_arg = {portbindings.HOST_ID: 'host-ovs-no_filter'}
+        with self.port(arg_list=(portbindings.HOST_ID,), **host_arg) as p1, \
+                self.port(arg_list=(portbindings.HOST_ID,),
+                          **host_arg) as p2:
+            devices = [p1['port']['id'], p2['port']['id']]
+            bulk = self.plugin.endpoints[0].get_devices_details_list(
+                ctx, agent_id="theAgentId", devices=devices,
+                host='host-ovs-no_filter')
+            single = [self.plugin.endpoints[0].get_device_details(
+                          ctx, agent_id="theAgentId", device=device,
+                          host='host-ovs-no_filter')
+                      for device in devices]
+            self.assertEqual(single, bulk)
+            for device in devices:
+                self.assertEqual(
+                    const.PORT_STATUS_BUILD,
+                    self.plugin.get_port(ctx, device)['status'])
+
     def test_hierarchical_binding(self):
         self._test_port_binding("host-hierarchical",
                                 portbindings.VIF_TYPE_OVS,
@@ -166,13 +166,15 @@ class RpcCallbacksTestCase(base.BaseTestCase):
     def _test_get_devices_list(self, callback, side_effect, expected):
         devices = [1, 2, 3, 4, 5]
         kwargs = {'host': 'fake_host', 'agent_id': 'fake_agent_id'}
-        with mock.patch.object(self.callbacks, 'get_device_details',
+        with mock.patch.object(self.callbacks, '_get_device_details',
                                side_effect=side_effect) as f:
             res = callback('fake_context', devices=devices, **kwargs)
             self.assertEqual(expected, res)
-            self.assertEqual(len(devices), f.call_count)
-            calls = [mock.call('fake_context', device=i,
-                               cached_networks={}, **kwargs)
+            self.plugin.get_bound_ports_contexts.assert_called_once_with(
+                'fake_context', devices, 'fake_host')
+            port_contexts = self.plugin.get_bound_ports_contexts.return_value
+            calls = [mock.call(i, 'fake_agent_id', 'fake_host',
+                               port_contexts.get.return_value)
                      for i in devices]
             f.assert_has_calls(calls)
 
@@ -180,7 +182,8 @@ class RpcCallbacksTestCase(base.BaseTestCase):
         devices = [1, 2, 3, 4, 5]
         expected = devices
         callback = self.callbacks.get_devices_details_list
-        self._test_get_devices_list(callback, devices, expected)
+        self._test_get_devices_list(
+            callback, [(d, None) for d in devices], expected)
 
     def test_get_devices_details_list_with_empty_devices(self):
         with mock.patch.object(self.callbacks, 'get_device_details') as f:
@@ -188,20 +191,53 @@ class RpcCallbacksTestCase(base.BaseTestCase):
             self.assertFalse(f.called)
             self.assertEqual([], res)
 
+    def test_get_devices_details_list_bulk_status_update(self):
+        ports = {}
+        port_contexts = {}
+        for device, status in (('dev1', constants.PORT_STATUS_DOWN),
+                               ('dev2', constants.PORT_STATUS_BUILD)):
+            port = collections.defaultdict(lambda: 'fake')
+            port.update(id='%s_port' % device, network_id='fake_net',
+                        admin_state_up=True, status=status)
+            ports[device] = port
+            port_contexts[device] = mock.MagicMock(current=port,
+                                                   host='fake_host')
+        self.plugin.get_bound_ports_contexts.return_value = port_contexts
+        res = self.callbacks.get_devices_details_list(
+            'fake_context', devices=['dev1', 'dev2'], host='fake_host')
+        self.assertEqual(['dev1_port', 'dev2_port'],
+                         [entry['port_id'] for entry in res])
+        self.plugin.update_port_statuses.assert_called_once_with(
+            'fake_context', {'dev1_port': constants.PORT_STATUS_BUILD},
+            'fake_host', {'fake_net': port_contexts['dev1'].network})
+        self.assertFalse(self.plugin.get_bound_port_context.called)
+        self.assertFalse(self.plugin.update_port_status.called)
+
     def test_get_devices_details_list_and_failed_devices(self):
         devices = [1, 2, 3, 4, 5]
         expected = {'devices': devices, 'failed_devices': []}
         callback = (
             self.callbacks.get_devices_details_list_and_failed_devices)
-        self._test_get_devices_list(callback, devices, expected)
+        self._test_get_devices_list(
+            callback, [(d, None) for d in devices], expected)
 
     def test_get_devices_details_list_and_failed_devices_failures(self):
-        devices = [1, Exception('testdevice'), 3,
+        devices = [1, 2, 3, 4, 5]
+        details = [1, Exception('testdevice'), 3,
                    Exception('testdevice'), 5]
         expected = {'devices': [1, 3, 5], 'failed_devices': [2, 4]}
-        callback = (
-            self.callbacks.get_devices_details_list_and_failed_devices)
-        self._test_get_devices_list(callback, devices, expected)
+        kwargs = {'host': 'fake_host', 'agent_id': 'fake_agent_id'}
+        self.plugin.get_bound_ports_contexts.side_effect = Exception(
+            'bulk failure')
+        with mock.patch.object(self.callbacks, 'get_device_details',
+                               side_effect=details) as f:
+            res = self.callbacks.get_devices_details_list_and_failed_devices(
+                'fake_context', devices=devices, **kwargs)
+            self.assertEqual(expected, res)
+            calls = [mock.call('fake_context', device=i,
+                               cached_networks={}, **kwargs)
+                     for i in devices]
+            f.assert_has_calls(calls)
 
     def test_get_devices_details_list_and_failed_devices_empty_dev(self):
         with mock.patch.object(self.callbacks, 'get_device_details') as f:
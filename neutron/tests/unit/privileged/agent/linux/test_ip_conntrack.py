@@ -0,0 +1,72 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import mock
+from oslo_concurrency import processutils
+
+from neutron import privileged
+from neutron.privileged.agent.linux import ip_conntrack as priv_conntrack
+from neutron.tests import base
+
+
+def _entry(**kwargs):
+    fields = {'zone': 10, 'ethertype': 'ipv4', 'protocol': None,
+              'direction': 'ingress', 'address': '10.0.0.1',
+              'remote_address': None}
+    fields.update(kwargs)
+    return priv_conntrack.ConntrackEntry(**fields)
+
+
+class TestPrivilegedIpConntrack(base.BaseTestCase):
+    def setUp(self):
+        super(TestPrivilegedIpConntrack, self).setUp()
+        privileged.default.set_client_mode(False)
+        self.addCleanup(privileged.default.set_client_mode, True)
+        self.execute = mock.patch.object(processutils, 'execute').start()
+
+    def test_get_delete_cmd(self):
+        self.assertEqual(
+            ['ip', 'netns', 'exec', 'qrouter-1', 'conntrack', '-D',
+             '-p', 'tcp', '-f', 'ipv6', '-s', 'fe80::1', '-w', 10,
+             '-s', 'fe80::2'],
+            priv_conntrack.get_delete_cmd(
+                _entry(ethertype='ipv6', protocol='tcp', direction='egress',
+                       address='fe80::1', remote_address='fe80::2'),
+                'qrouter-1'))
+
+    def test_get_delete_cmd_invalid(self):
+        for entry, namespace in (
+                (_entry(zone='10'), None),
+                (_entry(zone=65536), None),
+                (_entry(ethertype='arp'), None),
+                (_entry(protocol='-j'), None),
+                (_entry(direction='both'), None),
+                (_entry(address='--dump'), None),
+                (_entry(address='fe80::1'), None),
+                (_entry(remote_address='10.0.0.2 -x'), None),
+                (_entry(), '-n')):
+            self.assertRaises(ValueError, priv_conntrack.get_delete_cmd,
+                              entry, namespace)
+
+    def test_delete_conntrack_entries(self):
+        entries = [_entry(), _entry(address='10.0.0.2', zone=11),
+                   ['bash', '-c', 'true']]
+        self.execute.side_effect = [
+            None, processutils.ProcessExecutionError('failed')]
+        failures = priv_conntrack.delete_conntrack_entries(entries)
+        self.execute.assert_has_calls(
+            [mock.call('conntrack', '-D', '-f', 'ipv4', '-d', '10.0.0.1',
+                       '-w', '10', check_exit_code=[0, 1]),
+             mock.call('conntrack', '-D', '-f', 'ipv4', '-d', '10.0.0.2',
+                       '-w', '11', check_exit_code=[0, 1])])
+        self.assertEqual(2, self.execute.call_count)
+        self.assertEqual(entries[1:], [entry for entry, error in failures])
@@ -0,0 +1,141 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import errno
+import socket
+
+import mock
+
+from neutron.privileged.agent.linux import ip_lib as priv_ip_lib
+from neutron.tests import base
+
+
+class FakeNetlinkMessage(dict):
+    def __init__(self, attrs=None, **fields):
+        super(FakeNetlinkMessage, self).__init__(**fields)
+        self.attrs = attrs or {}
+
+    def get_attr(self, name):
+        return self.attrs.get(name)
+
+
+def _link(index, name, **attrs):
+    attrs['IFLA_IFNAME'] = name
+    return FakeNetlinkMessage(attrs, index=index)
+
+
+def _addr(index, family, address, prefixlen, scope=0, flags=0x80):
+    return FakeNetlinkMessage({'IFA_ADDRESS': address}, index=index,
+                              family=family, prefixlen=prefixlen,
+                              scope=scope, flags=flags)
+
+
+def _route(dst_len, scope, table=254, type=1, **attrs):
+    return FakeNetlinkMessage(attrs, dst_len=dst_len, scope=scope,
+                              table=table, type=type)
+
+
+class TestPrivilegedIpLib(base.BaseTestCase):
+    def setUp(self):
+        super(TestPrivilegedIpLib, self).setUp()
+        self.ip = mock.Mock()
+        self.ip.get_links.return_value = [_link(1, 'lo'), _link(2, 'eth0')]
+        self.ip.link_lookup.return_value = [2]
+
+    def test_get_link_attributes(self):
+        self.ip.get_links.return_value = [
+            _link(2, 'eth0', IFLA_MTU=1500, IFLA_QDISC='noqueue',
+                  IFLA_OPERSTATE='UP', IFLA_TXQLEN=1000,
+                  IFLA_ADDRESS='cc:dd:ee:ff:ab:cd')]
+        self.assertEqual({'mtu': 1500, 'qdisc': 'noqueue', 'state': 'UP',
+                          'qlen': 1000, 'link/ether': 'cc:dd:ee:ff:ab:cd'},
+                         priv_ip_lib._get_link_attributes(self.ip, 'eth0'))
+        self.ip.link_lookup.assert_called_once_with(ifname='eth0')
+        self.ip.get_links.assert_called_once_with(2)
+
+    def test_get_link_attributes_missing_device(self):
+        self.ip.link_lookup.return_value = []
+        self.assertRaises(priv_ip_lib.NetworkInterfaceNotFound,
+                          priv_ip_lib._get_link_attributes, self.ip, 'eth0')
+
+    def test_get_device_names(self):
+        self.assertEqual(['lo', 'eth0'],
+                         priv_ip_lib._get_device_names(self.ip))
+
+    def test_get_ip_addresses(self):
+        self.ip.get_addr.return_value = [
+            _addr(2, socket.AF_INET6, 'fe80::1', 64, scope=253,
+                  flags=0x80 | 0x40),
+            _addr(2, socket.AF_INET, '10.0.0.2', 24, flags=0),
+            _addr(1, socket.AF_INET, '127.0.0.1', 8, scope=254)]
+        self.assertEqual(
+            [dict(name='lo', cidr='127.0.0.1/8', scope='host',
+                  dynamic=False, tentative=False, dadfailed=False),
+             dict(name='eth0', cidr='10.0.0.2/24', scope='global',
+                  dynamic=True, tentative=False, dadfailed=False),
+             dict(name='eth0', cidr='fe80::1/64', scope='link',
+                  dynamic=False, tentative=True, dadfailed=False)],
+            priv_ip_lib._get_ip_addresses(self.ip, None, None))
+        self.ip.get_addr.assert_called_once_with()
+
+    def test_get_ip_addresses_filtered(self):
+        self.ip.get_addr.return_value = []
+        priv_ip_lib._get_ip_addresses(self.ip, 'eth0', 6)
+        self.ip.get_addr.assert_called_once_with(index=2,
+                                                 family=socket.AF_INET6)
+
+    def test_list_routes(self):
+        self.ip.get_routes.return_value = [
+            _route(24, 253, RTA_DST='10.0.0.0', RTA_OIF=2,
+                   RTA_PREFSRC='10.0.0.2'),
+            _route(32, 0, RTA_DST='10.0.1.1', RTA_OIF=2,
+                   RTA_GATEWAY='10.0.0.1'),
+            _route(0, 0, RTA_OIF=2, RTA_GATEWAY='10.0.0.254',
+                   RTA_PRIORITY=100),
+            _route(8, 254, table=255, RTA_DST='127.0.0.0', RTA_OIF=1),
+            _route(24, 0, type=6, RTA_DST='10.0.2.0')]
+        self.assertEqual(
+            [{'cidr': '10.0.0.0/24', 'dev': 'eth0', 'scope': 'link',
+              'src': '10.0.0.2'},
+             {'cidr': '10.0.1.1', 'dev': 'eth0', 'via': '10.0.0.1'},
+             {'cidr': '0.0.0.0/0', 'dev': 'eth0', 'via': '10.0.0.254',
+              'metric': '100'}],
+            priv_ip_lib._list_routes(self.ip, 4, None, None))
+        self.ip.get_routes.assert_called_once_with(family=socket.AF_INET)
+
+    def test_list_routes_device_and_table(self):
+        self.ip.get_routes.return_value = [
+            _route(0, 0, table=252, RTA_TABLE=16, RTA_OIF=2,
+                   RTA_GATEWAY='10.0.0.254'),
+            _route(0, 0, RTA_OIF=2, RTA_GATEWAY='10.0.0.1'),
+            _route(0, 0, table=252, RTA_TABLE=16, RTA_OIF=1,
+                   RTA_GATEWAY='127.0.0.2')]
+        self.assertEqual(
+            [{'cidr': '0.0.0.0/0', 'dev': 'eth0', 'via': '10.0.0.254'}],
+            priv_ip_lib._list_routes(self.ip, 4, 'eth0', '16'))
+        self.ip.link_lookup.assert_called_once_with(ifname='eth0')
+
+    @mock.patch.object(priv_ip_lib, '_get_iproute')
+    def test_run_iproute_missing_namespace(self, get_iproute):
+        get_iproute.side_effect = OSError(errno.ENOENT, 'No such file')
+        self.assertRaises(priv_ip_lib.NetworkNamespaceNotFound,
+                          priv_ip_lib._run_iproute, 'foo',
+                          priv_ip_lib._get_device_names)
+
+    @mock.patch.object(priv_ip_lib, '_get_iproute')
+    def test_run_iproute(self, get_iproute):
+        ip = get_iproute.return_value.__enter__.return_value
+        func = mock.Mock()
+        self.assertEqual(func.return_value,
+                         priv_ip_lib._run_iproute('foo', func, 'eth0'))
+        get_iproute.assert_called_once_with('foo')
+        func.assert_called_once_with(ip, 'eth0')
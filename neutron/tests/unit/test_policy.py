@@ -373,6 +373,61 @@ class NeutronPolicyTestCase(base.BaseTestCase):
     def test_nonadmin_read_on_shared_succeeds(self):
         self._test_nonadmin_action_on_attr('get', 'shared', True)
 
+    def _get_query_filters(self, action, ctx=None, resource='ports'):
+        return policy.get_query_filters(
+            ctx or self.context, action,
+            attributes.RESOURCE_ATTRIBUTE_MAP[resource], pluralized=resource)
+
+    def test_get_query_filters_owner_rule(self):
+        self.assertEqual(({'tenant_id': 'fake'}, True),
+                         self._get_query_filters('get_port'))
+
+    def test_get_query_filters_authorized_by_role(self):
+        svc_context = context.Context('', 'svc', roles=['advsvc'])
+        self.assertEqual(({}, True),
+                         self._get_query_filters('get_port', ctx=svc_context))
+
+    def test_get_query_filters_admin_context(self):
+        self.assertEqual(({}, True), self._get_query_filters(
+            'get_port', ctx=context.get_admin_context()))
+
+    def test_get_query_filters_owner_or_field_rule(self):
+        self.assertEqual(({'tenant_id': 'fake'}, False),
+                         self._get_query_filters('get_network',
+                                                 resource='networks'))
+
+    def test_get_query_filters_owner_or_parent_owner_rule(self):
+        self._set_rules(get_port='rule:admin_or_owner or '
+                                 'rule:admin_or_network_owner')
+        self.assertEqual(({'tenant_id': 'fake'}, False),
+                         self._get_query_filters('get_port'))
+
+    def test_get_query_filters_parent_owner_rule(self):
+        self._set_rules(get_port='rule:admin_or_network_owner')
+        self.assertEqual((None, False), self._get_query_filters('get_port'))
+
+    def test_get_query_filters_denied(self):
+        self._set_rules(get_port='rule:admin_only')
+        self.assertEqual((None, False), self._get_query_filters('get_port'))
+
+    def test_get_query_filters_not_owner_rule(self):
+        self._set_rules(get_port='not tenant_id:%(tenant_id)s')
+        self.assertEqual((None, False), self._get_query_filters('get_port'))
+
+    def test_get_query_filters_not_field_rule(self):
+        self._set_rules(get_port='not field:ports:name=secret')
+        self.assertEqual((None, False), self._get_query_filters('get_port'))
+
+    def test_get_query_filters_owner_or_not_field_rule(self):
+        self._set_rules(get_port='rule:admin_or_owner or '
+                                 'not field:ports:name=secret')
+        self.assertEqual(({'tenant_id': 'fake'}, False),
+                         self._get_query_filters('get_port'))
+
+    def test_get_query_filters_default_rule(self):
+        self.assertEqual(({}, True),
+                         self._get_query_filters('get_fake_resource'))
+
     def test_check_is_admin_with_admin_context_succeeds(self):
         admin_context = context.get_admin_context()
         # explicitly set roles as this test verifies user credentials
@@ -464,6 +519,25 @@ class NeutronPolicyTestCase(base.BaseTestCase):
         result = policy._build_match_rule(action, target, None)
         self.assertEqual("rule:" + action, str(result))
 
+    def test_build_match_rule_cached(self):
+        action = "create_" + FAKE_RESOURCE_NAME
+        target = {'attr': {'sub_attr_1': 'x'}}
+        result = policy._build_match_rule(action, target, None)
+        self.assertEqual(
+            "(rule:%(action)s and (rule:%(action)s:attr and "
+            "(rule:%(action)s:attr:sub_attr_1)))" % {'action': action},
+            str(result))
+        self.assertIs(result, policy._build_match_rule(
+            action, {'attr': {'sub_attr_1': 'y'}}, None))
+        other = policy._build_match_rule(
+            action, {'attr': {'sub_attr_2': 'x'}}, None)
+        self.assertEqual(
+            "(rule:%(action)s and (rule:%(action)s:attr and "
+            "(rule:%(action)s:attr:sub_attr_2)))" % {'action': action},
+            str(other))
+        self.assertEqual("rule:" + action,
+                         str(policy._build_match_rule(action, {}, None)))
+
     def test_enforce_subattribute(self):
         action = "create_" + FAKE_RESOURCE_NAME
         target = {'tenant_id': 'fake', 'attr': {'sub_attr_1': 'x'}}
@@ -522,6 +596,23 @@ class NeutronPolicyTestCase(base.BaseTestCase):
             result = policy.enforce(self.context, action, target)
             self.assertTrue(result)
 
+    def test_enforce_tenant_id_check_parent_resource_cached(self):
+        action = "create_port:mac"
+        target = {'network_id': 'whatever'}
+        with mock.patch.object(manager.NeutronManager.get_instance().plugin,
+                               'get_network',
+                               return_value={'tenant_id': 'fake'}) as get:
+            self.assertTrue(policy.enforce(self.context, action,
+                                           dict(target)))
+            self.assertTrue(policy.enforce(self.context, action,
+                                           dict(target)))
+            self.assertEqual(1, get.call_count)
+            # the cache is scoped to the request
+            other_context = context.Context('fake', 'fake', roles=['user'])
+            self.assertTrue(policy.enforce(other_context, action,
+                                           dict(target)))
+            self.assertEqual(2, get.call_count)
+
     def test_enforce_plugin_failure(self):
 
         def fakegetnetwork(*args, **kwargs):
@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Time the Dnsmasq config files generation of a reload_allocations.
+
+No root privileges are needed: only the hosts, addn_hosts and opts files of
+a fake network are written, in a temporary directory.
+"""
+
+import argparse
+import shutil
+import tempfile
+import time
+
+import netaddr
+from oslo_config import cfg
+
+from neutron.agent import dhcp_agent
+from neutron.agent.linux import dhcp
+
+NETWORK_ID = '3f0b6c5e-5a8b-4d57-9c1e-6f0e1c7bd0a4'
+SUBNET_ID = 'a5e8a0a2-9f3e-4a4c-8d6c-2c8e1a9d5b13'
+
+
+def _make_port(index, subnet):
+    ip_address = str(subnet.network + index + 2)
+    return dhcp.DictModel({
+        'id': 'port-%d' % index,
+        'network_id': NETWORK_ID,
+        'device_owner': 'compute:nova',
+        'mac_address': 'fa:16:3e:%02x:%02x:%02x' % (
+            index // 65536 % 256, index // 256 % 256, index % 256),
+        'fixed_ips': [{'subnet_id': SUBNET_ID, 'ip_address': ip_address}],
+        'extra_dhcp_opts': []})
+
+
+def _timed_output(driver):
+    start = time.time()
+    driver._output_config_files()
+    return time.time() - start
+
+
+def run(nb_ports):
+    subnet = netaddr.IPNetwork('10.0.0.0/8')
+    network = dhcp.NetModel({
+        'id': NETWORK_ID,
+        'subnets': [{'id': SUBNET_ID, 'ip_version': 4, 'enable_dhcp': True,
+                     'cidr': str(subnet), 'gateway_ip': '10.0.0.1',
+                     'dns_nameservers': [], 'host_routes': [],
+                     'ipv6_address_mode': None, 'ipv6_ra_mode': None}],
+        'ports': [_make_port(index, subnet) for index in range(nb_ports)]})
+    driver = dhcp.Dnsmasq(cfg.CONF, network, process_monitor=None)
+    # NOTE: the interface name is only needed for isolated metadata
+    driver._make_subnet_interface_ip_map = lambda: {}
+
+    initial = _timed_output(driver)
+    noop = _timed_output(driver)
+    network.ports[nb_ports // 2] = _make_port(nb_ports, subnet)
+    one_port = _timed_output(driver)
+    dhcp.Dnsmasq._port_entries_cache.clear()
+    network.ports[0] = _make_port(nb_ports + 1, subnet)
+    uncached = _timed_output(driver)
+    return initial, noop, one_port, uncached
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('sizes', metavar='N', type=int, nargs='*',
+                        default=[100, 1000, 5000, 20000],
+                        help='number of ports to benchmark with')
+    args = parser.parse_args()
+    dhcp_agent.register_options(cfg.CONF)
+    confs_dir = tempfile.mkdtemp()
+    cfg.CONF.set_override('dhcp_confs', confs_dir)
+    cfg.CONF.set_override('interface_driver',
+                          'neutron.agent.linux.interface.NullDriver')
+    print('%10s %12s %12s %12s %12s' % ('ports', 'initial(s)', 'no-op(s)',
+                                        'one-port(s)', 'uncached(s)'))
+    for nb_ports in args.sizes:
+        print('%10d %12.3f %12.3f %12.3f %12.3f' % (
+            (nb_ports,) + run(nb_ports)))
+    shutil.rmtree(confs_dir)
+
+
+if __name__ == '__main__':
+    main()